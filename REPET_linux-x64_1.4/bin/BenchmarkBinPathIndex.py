@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+
+##@file
+# Compare the bin table ('_idx') and the in-memory interval index of TableBinPathAdaptator on random coordinate queries.
+#
+# usage: BenchmarkBinPathIndex.py [ options ]
+# options:
+#      -h: this help
+#      -t: name of the path table
+#      -n: number of random queries (default=1000)
+#      -l: length of the queried regions, in bp (default=10000)
+#      -s: seed of the random generator (default=0)
+#      -b: rebuild the bin table before the benchmark
+#      -C: configuration file
+#      -v: verbose (default=0/1)
+
+
+import sys
+import time
+import random
+import getopt
+from pyRepetUnit.commons.sql.DbMySql import DbMySql
+from pyRepetUnit.commons.sql.TableBinPathAdaptator import TableBinPathAdaptator
+
+
+class BenchmarkBinPathIndex( object ):
+    
+    def __init__( self ):
+        self._table = ""
+        self._nbQueries = 1000
+        self._queryLength = 10000
+        self._seed = 0
+        self._rebuildBinTable = False
+        self._configFileName = ""
+        self._verbose = 0
+        self._db = None
+        
+        
+    def help( self ):
+        print
+        print "usage: %s [ options ]" % ( sys.argv[0].split("/")[-1] )
+        print "options:"
+        print "     -h: this help"
+        print "     -t: name of the path table"
+        print "     -n: number of random queries (default=1000)"
+        print "     -l: length of the queried regions, in bp (default=10000)"
+        print "     -s: seed of the random generator (default=0)"
+        print "     -b: rebuild the bin table before the benchmark"
+        print "     -C: configuration file (otherwise, use env variables)"
+        print "     -v: verbose (default=0/1)"
+        print
+        
+        
+    def setAttributesFromCmdLine( self ):
+        try:
+            opts, args = getopt.getopt(sys.argv[1:],"ht:n:l:s:bC:v:")
+        except getopt.GetoptError, err:
+            print str(err); self.help(); sys.exit(1)
+        for o,a in opts:
+            if o == "-h":
+                self.help(); sys.exit(0)
+            elif o == "-t":
+                self._table = a
+            elif o == "-n":
+                self._nbQueries = int(a)
+            elif o == "-l":
+                self._queryLength = int(a)
+            elif o == "-s":
+                self._seed = int(a)
+            elif o == "-b":
+                self._rebuildBinTable = True
+            elif o == "-C":
+                self._configFileName = a
+            elif o == "-v":
+                self._verbose = int(a)
+                
+                
+    def checkAttributes( self ):
+        if self._table == "":
+            print "ERROR: missing input table"
+            self.help()
+            sys.exit(1)
+            
+            
+    def getRandomQueries( self, tpA ):
+        """
+        Return a list of (contig, start, end) regions drawn within the extent of the paths on each contig.
+        """
+        lContigs = tpA.getQueryList()
+        dContig2Max = {}
+        for contig in lContigs:
+            sqlCmd = "SELECT MAX(max) FROM %s WHERE contig='%s'" % ( tpA._table_idx, contig )
+            dContig2Max[ contig ] = max( 1, int( self._db.getIntegerWithSQLCmd( sqlCmd ) ) )
+        random.seed( self._seed )
+        lQueries = []
+        for i in xrange( 0, self._nbQueries ):
+            contig = random.choice( lContigs )
+            start = random.randint( 1, dContig2Max[ contig ] )
+            lQueries.append( ( contig, start, start + self._queryLength - 1 ) )
+        return lQueries
+    
+    
+    def runQueries( self, tpA, lQueries ):
+        """
+        Return the elapsed time and the sorted results of the queries.
+        """
+        lResults = []
+        startTime = time.time()
+        for contig, start, end in lQueries:
+            lResults.append( tpA.getPathListOverlappingQueryCoord( contig, start, end ) )
+            lResults.append( tpA.getPathListIncludedInQueryCoord( contig, start, end ) )
+        elapsed = time.time() - startTime
+        lSortedResults = []
+        for lPaths in lResults:
+            lStrings = [ iPath.toString() for iPath in lPaths ]
+            lStrings.sort()
+            lSortedResults.append( lStrings )
+        return elapsed, lSortedResults
+    
+    
+    def start( self ):
+        self.checkAttributes()
+        if self._verbose > 0:
+            print "START %s" % (sys.argv[0].split("/")[-1])
+            sys.stdout.flush()
+        if self._configFileName != "":
+            self._db = DbMySql( cfgFileName = self._configFileName )
+        else:
+            self._db = DbMySql()
+            
+            
+    def end( self ):
+        self._db.close()
+        if self._verbose > 0:
+            print "END %s" % (sys.argv[0].split("/")[-1])
+            sys.stdout.flush()
+            
+            
+    def run( self ):
+        self.start()
+        tpA = TableBinPathAdaptator( self._db, self._table )
+        if self._rebuildBinTable or not self._db.doesTableExist( tpA._table_idx ):
+            startTime = time.time()
+            tpA.createBinPathTable( self._verbose )
+            print "bin table built in %.2f s" % ( time.time() - startTime )
+        lQueries = self.getRandomQueries( tpA )
+        
+        binTime, lBinResults = self.runQueries( tpA, lQueries )
+        print "bin table: %i queries in %.2f s" % ( 2 * len(lQueries), binTime )
+        sys.stdout.flush()
+        
+        startTime = time.time()
+        tpA.loadIndexInMemory( self._verbose )
+        print "in-memory index loaded in %.2f s" % ( time.time() - startTime )
+        memTime, lMemResults = self.runQueries( tpA, lQueries )
+        print "in-memory index: %i queries in %.2f s" % ( 2 * len(lQueries), memTime )
+        if memTime > 0:
+            print "speed-up: %.1fx" % ( binTime / memTime )
+        
+        if lBinResults != lMemResults:
+            print "ERROR: results differ between the bin table and the in-memory index"
+            self.end()
+            sys.exit(1)
+        self.end()
+        
+        
+if __name__ == "__main__":
+    i = BenchmarkBinPathIndex()
+    i.setAttributesFromCmdLine()
+    i.run()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+##@file
+# Time the complement, reverse complement and IUPAC conversion of Bioseq on a random sequence.
+#
+# usage: BenchmarkBioseqComplement.py [ options ]
+# options:
+#      -h: this help
+#      -L: length of the sequence, in bp (default=100000000)
+#      -a: proportion of ambiguous IUPAC symbols (default=0.0)
+#      -s: seed of the random generator (default=0)
+#      -v: verbose (default=0/1)
+
+
+import sys
+import time
+import random
+import getopt
+import pyRepetUnit.commons.seq.Bioseq
+import pyRepet.seq.Bioseq
+
+
+class BenchmarkBioseqComplement( object ):
+
+    def __init__( self ):
+        self._sequenceLength = 100000000
+        self._ambiguousProportion = 0.0
+        self._seed = 0
+        self._verbose = 0
+
+
+    def help( self ):
+        print
+        print "usage: %s [ options ]" % ( sys.argv[0].split("/")[-1] )
+        print "options:"
+        print "     -h: this help"
+        print "     -L: length of the sequence, in bp (default=100000000)"
+        print "     -a: proportion of ambiguous IUPAC symbols (default=0.0)"
+        print "     -s: seed of the random generator (default=0)"
+        print "     -v: verbose (default=0/1)"
+        print
+
+
+    def setAttributesFromCmdLine( self ):
+        try:
+            opts, args = getopt.getopt(sys.argv[1:],"hL:a:s:v:")
+        except getopt.GetoptError, err:
+            print str(err); self.help(); sys.exit(1)
+        for o,a in opts:
+            if o == "-h":
+                self.help(); sys.exit(0)
+            elif o == "-L":
+                self._sequenceLength = int(a)
+            elif o == "-a":
+                self._ambiguousProportion = float(a)
+            elif o == "-s":
+                self._seed = int(a)
+            elif o == "-v":
+                self._verbose = int(a)
+
+
+    def checkAttributes( self ):
+        if self._sequenceLength < 1:
+            print "ERROR: option '-L' must be positive"
+            self.help()
+            sys.exit(1)
+        if self._ambiguousProportion < 0 or self._ambiguousProportion > 1:
+            print "ERROR: option '-a' must be between 0 and 1"
+            self.help()
+            sys.exit(1)
+
+
+    def getRandomSequence( self ):
+        """
+        Return a random sequence, made of a random block of at most 1 Mb repeated up to the required length.
+        """
+        random.seed( self._seed )
+        blockLength = min( self._sequenceLength, 1000000 )
+        lBlock = []
+        for i in xrange( 0, blockLength ):
+            if random.random() < self._ambiguousProportion:
+                lBlock.append( random.choice( "RYMKWSBDHV" ) )
+            else:
+                lBlock.append( random.choice( "ACGTNacgtn" ) )
+        block = "".join( lBlock )
+        return ( block * ( self._sequenceLength / blockLength + 1 ) )[ : self._sequenceLength ]
+
+
+    def timeMethod( self, name, bioseq, methodName ):
+        """
+        Call a method of a Bioseq instance and print its elapsed time.
+        """
+        startTime = time.time()
+        getattr( bioseq, methodName )()
+        print "%s: %.2f s" % ( name, time.time() - startTime )
+        sys.stdout.flush()
+
+
+    def run( self ):
+        self.checkAttributes()
+        if self._verbose > 0:
+            print "START %s" % (sys.argv[0].split("/")[-1])
+            sys.stdout.flush()
+        sequence = self.getRandomSequence()
+        print "random sequence of %i bp, %.3f ambiguous IUPAC symbols" % ( self._sequenceLength, self._ambiguousProportion )
+        sys.stdout.flush()
+
+        self.timeMethod( "Bioseq.complement", pyRepetUnit.commons.seq.Bioseq.Bioseq( "seq", sequence ), "complement" )
+        self.timeMethod( "Bioseq.reverseComplement", pyRepetUnit.commons.seq.Bioseq.Bioseq( "seq", sequence ), "reverseComplement" )
+        self.timeMethod( "Bioseq.getSeqWithOnlyATGCN", pyRepetUnit.commons.seq.Bioseq.Bioseq( "seq", sequence.upper() ), "getSeqWithOnlyATGCN" )
+        self.timeMethod( "pyRepet Bioseq.realComplement", pyRepet.seq.Bioseq.Bioseq( "seq", sequence.upper() ), "realComplement" )
+        self.timeMethod( "pyRepet Bioseq.complement", pyRepet.seq.Bioseq.Bioseq( "seq", sequence ), "complement" )
+
+        if self._verbose > 0:
+            print "END %s" % (sys.argv[0].split("/")[-1])
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    i = BenchmarkBioseqComplement()
+    i.setAttributesFromCmdLine()
+    i.run()
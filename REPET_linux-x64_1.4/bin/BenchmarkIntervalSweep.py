@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+
+##@file
+# Time the sweep-line of IntervalSweep and the Set functions relying on it on random intervals.
+#
+# usage: BenchmarkIntervalSweep.py [ options ]
+# options:
+#      -h: this help
+#      -n: number of random intervals (default=1000000)
+#      -q: number of sequences (default=10)
+#      -L: length of each sequence, in bp (default=10000000)
+#      -l: maximum length of an interval, in bp (default=5000)
+#      -s: seed of the random generator (default=0)
+#      -c: only time IntervalSweep on columns (skip the Set functions)
+#      -v: verbose (default=0/1)
+
+
+import sys
+import time
+import random
+import getopt
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from pyRepetUnit.commons.coord.IntervalSweep import IntervalSweep
+from pyRepetUnit.commons.coord.SetUtils import SetUtils
+import pyRepetUnit.commons.coord.Set
+import pyRepet.coord.Set
+
+
+class BenchmarkIntervalSweep( object ):
+
+    def __init__( self ):
+        self._nbIntervals = 1000000
+        self._nbSequences = 10
+        self._sequenceLength = 10000000
+        self._maxIntervalLength = 5000
+        self._seed = 0
+        self._onlyColumns = False
+        self._verbose = 0
+
+
+    def help( self ):
+        print
+        print "usage: %s [ options ]" % ( sys.argv[0].split("/")[-1] )
+        print "options:"
+        print "     -h: this help"
+        print "     -n: number of random intervals (default=1000000)"
+        print "     -q: number of sequences (default=10)"
+        print "     -L: length of each sequence, in bp (default=10000000)"
+        print "     -l: maximum length of an interval, in bp (default=5000)"
+        print "     -s: seed of the random generator (default=0)"
+        print "     -c: only time IntervalSweep on columns (skip the Set functions)"
+        print "     -v: verbose (default=0/1)"
+        print
+
+
+    def setAttributesFromCmdLine( self ):
+        try:
+            opts, args = getopt.getopt(sys.argv[1:],"hn:q:L:l:s:cv:")
+        except getopt.GetoptError, err:
+            print str(err); self.help(); sys.exit(1)
+        for o,a in opts:
+            if o == "-h":
+                self.help(); sys.exit(0)
+            elif o == "-n":
+                self._nbIntervals = int(a)
+            elif o == "-q":
+                self._nbSequences = int(a)
+            elif o == "-L":
+                self._sequenceLength = int(a)
+            elif o == "-l":
+                self._maxIntervalLength = int(a)
+            elif o == "-s":
+                self._seed = int(a)
+            elif o == "-c":
+                self._onlyColumns = True
+            elif o == "-v":
+                self._verbose = int(a)
+
+
+    def checkAttributes( self ):
+        if self._nbIntervals < 2 or self._nbSequences < 1 or self._sequenceLength < 1 or self._maxIntervalLength < 1:
+            print "ERROR: options '-n', '-q', '-L' and '-l' must be positive ('-n' at least 2)"
+            self.help()
+            sys.exit(1)
+
+
+    def getRandomColumns( self ):
+        """
+        Return the columns (sequence names, starts, ends, identifiers) of random intervals on both strands.
+        """
+        random.seed( self._seed )
+        lSeqnames = []
+        lStarts = []
+        lEnds = []
+        lIds = []
+        for i in xrange( 0, self._nbIntervals ):
+            start = random.randint( 1, self._sequenceLength )
+            end = min( start + random.randint( 0, self._maxIntervalLength - 1 ), self._sequenceLength )
+            if random.random() < 0.5:
+                start, end = end, start
+            lSeqnames.append( "seq%i" % ( random.randint( 1, self._nbSequences ) ) )
+            lStarts.append( start )
+            lEnds.append( end )
+            lIds.append( i + 1 )
+        return lSeqnames, lStarts, lEnds, lIds
+
+
+    def getSetList( self, module, lColumns, first, last ):
+        """
+        Return the intervals [first, last[ of the columns as a list of Set instances of a module.
+        """
+        lSeqnames, lStarts, lEnds, lIds = lColumns
+        lSets = []
+        for i in xrange( first, last ):
+            lSets.append( module.Set( lIds[i], "set%i" % ( lIds[i] ), lSeqnames[i], lStarts[i], lEnds[i] ) )
+        return lSets
+
+
+    def timeFunction( self, name, function, *args ):
+        """
+        Call a function, print its elapsed time and the size of its result, and return the result.
+        """
+        startTime = time.time()
+        result = function( *args )
+        print "%s: %.2f s, %i groups" % ( name, time.time() - startTime, len(result) )
+        sys.stdout.flush()
+        return result
+
+
+    def run( self ):
+        self.checkAttributes()
+        if self._verbose > 0:
+            print "START %s" % (sys.argv[0].split("/")[-1])
+            sys.stdout.flush()
+        lColumns = self.getRandomColumns()
+        half = self._nbIntervals / 2
+        lRefColumns = [ column[ : half ] for column in lColumns ]
+        lSubjectColumns = [ column[ half : ] for column in lColumns ]
+        print "%i random intervals on %i sequence(s) of %i bp, up to %i bp long" % ( self._nbIntervals, self._nbSequences, self._sequenceLength, self._maxIntervalLength )
+        sys.stdout.flush()
+
+        lSelfGroups = self.timeFunction( "IntervalSweep, self overlaps", IntervalSweep.getIdGroupsOfOverlappingIntervals, *lColumns )
+        self.timeFunction( "IntervalSweep, reference/subject overlaps", IntervalSweep.getIdGroupsOfOverlappingIntervalsBetween, lRefColumns, lSubjectColumns )
+        if numpy != None:
+            lNumpyColumns = [ lColumns[0], numpy.array( lColumns[1] ), numpy.array( lColumns[2] ), numpy.array( lColumns[3] ) ]
+            lNumpyGroups = self.timeFunction( "IntervalSweep on numpy columns, self overlaps", IntervalSweep.getIdGroupsOfOverlappingIntervals, *lNumpyColumns )
+            if lNumpyGroups != lSelfGroups:
+                print "ERROR: results differ between list and numpy columns"
+                sys.exit(1)
+
+        if not self._onlyColumns:
+            lSets = self.getSetList( pyRepet.coord.Set, lColumns, 0, self._nbIntervals )
+            self.timeFunction( "set_list_find_self_overlaps", pyRepet.coord.Set.set_list_find_self_overlaps, lSets )
+            lRefSets = self.getSetList( pyRepet.coord.Set, lColumns, 0, half )
+            lSubjectSets = self.getSetList( pyRepet.coord.Set, lColumns, half, self._nbIntervals )
+            self.timeFunction( "set_list_find_overlaps", pyRepet.coord.Set.set_list_find_overlaps, lRefSets, lSubjectSets )
+            lRefSets = self.getSetList( pyRepetUnit.commons.coord.Set, lColumns, 0, half )
+            lSubjectSets = self.getSetList( pyRepetUnit.commons.coord.Set, lColumns, half, self._nbIntervals )
+            self.timeFunction( "SetUtils.getListOfIdListOfOverlappingSets", SetUtils.getListOfIdListOfOverlappingSets, lRefSets, lSubjectSets )
+            lSets = self.getSetList( pyRepetUnit.commons.coord.Set, lColumns, 0, self._nbIntervals )
+            startTime = time.time()
+            lMergedSets = SetUtils.mergeSetsInList( lSets )
+            print "SetUtils.mergeSetsInList: %.2f s, %i merged sets" % ( time.time() - startTime, len(lMergedSets) )
+
+        if self._verbose > 0:
+            print "END %s" % (sys.argv[0].split("/")[-1])
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    i = BenchmarkIntervalSweep()
+    i.setAttributesFromCmdLine()
+    i.run()
@@ -14,6 +14,7 @@ import time
 from pyRepet.launcher.programLauncher import programLauncher
 from pyRepetUnit.commons.seq.FastaUtils import FastaUtils
 from pyRepetUnit.commons.seq.BioseqDB import BioseqDB
+from pyRepetUnit.commons.seq.IndexedFastaDB import IndexedFastaDB
 from pyRepetUnit.commons.coord.PathUtils import PathUtils
 from pyRepetUnit.commons.coord.Match import Match
 from pyRepetUnit.commons.coord.AlignUtils import AlignUtils
@@ -425,7 +426,7 @@ class ClusterConsensus( object ):
             sys.stdout.flush()
         ors = OrientSequences()
         ors.setInputFileName( inFaFileName )
-        ors.setPrgToOrient( "mummer" )
+        ors.setPrgToOrient( "kmers" )
         ors.setClean()
         ors.setVerbosityLevel( self._verbose-1 )
         ors.run()
@@ -536,7 +537,7 @@ class ClusterConsensus( object ):
         
         ors = OrientSequences()
         ors.setInputFileName( "%s%s.fa.fullS" % ( CLUSTER, self._familyID ) )
-        ors.setPrgToOrient( "mummer" )
+        ors.setPrgToOrient( "kmers" )
         ors.setClean()
         ors.setVerbosityLevel( self._verbose-1 )
         lConsensusToReverse = ors.getSequencesToReverse()
@@ -581,7 +582,7 @@ class ClusterConsensus( object ):
             
         ors = OrientSequences()
         ors.setInputFileName( "%s%s.fa.fullS" % ( CLUSTER, self._familyID ) )
-        ors.setPrgToOrient( "mummer" )
+        ors.setPrgToOrient( "kmers" )
         ors.setClean()
         ors.setVerbosityLevel( self._verbose-1 )
         lConsensusToReverse = ors.getSequencesToReverse()
@@ -1142,7 +1143,7 @@ class HandleAllGroupsOfConsensus:
             print "add data to headers and filter..."; sys.stdout.flush()
             
         self.loadDataAboutClustering()
-        qryDB = BioseqDB( self._pathToFaInFileName )
+        qryDB = IndexedFastaDB( self._pathToFaInFileName )
         if self._annotTable != "":
             self.getNbCopiesPerConsensus()
             self.getNbFlCopiesPerConsensus()
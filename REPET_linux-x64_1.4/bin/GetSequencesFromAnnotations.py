@@ -14,6 +14,7 @@ from pyRepetUnit.commons.sql.TableSeqAdaptator import TableSeqAdaptator
 from pyRepetUnit.commons.coord.PathUtils import PathUtils
 from pyRepetUnit.commons.coord.SetUtils import SetUtils
 from pyRepetUnit.commons.seq.FastaUtils import FastaUtils
+from pyRepetUnit.commons.seq.IndexedFastaDB import IndexedFastaDB
 
 
 ## Get the sequences corresponding to input coordinates
@@ -36,7 +37,7 @@ class GetSequencesFromAnnotations( object ):
         self._typeInRefseqs = "table"
         self._iDb = None
         self._coordAdaptator = None   # TablePathAdaptator() if format='path', a dictionary if format='set
-        self._genomeAdaptator = None
+        self._genomeAdaptator = None   # TableSeqAdaptator() if genome in a table, IndexedFastaDB() if in a file
         self._refseqsAdaptator = None
         self._outCoordFile = ""   # if getAnnot=True, file in which the coordinates of the saved annotations will be recorded
         self._outCoordFileHandler = None
@@ -311,10 +312,7 @@ class GetSequencesFromAnnotations( object ):
             sys.stdout.flush()
             
         if self._typeInGenome == "file":
-            tmpSeqTable = self._inGenome.replace(".","_").replace("-","_")
-            if not self._iDb.doesTableExist( tmpSeqTable ):
-                self._iDb.createTable( tmpSeqTable, "fasta", self._inGenome, True, self._verbose-2 )
-            self._genomeAdaptator = TableSeqAdaptator( self._iDb, tmpSeqTable )
+            self._genomeAdaptator = IndexedFastaDB( self._inGenome, self._verbose-1 )
         else:
             self._genomeAdaptator = TableSeqAdaptator( self._iDb, self._inGenome )
         if self._refseqName == "file":
@@ -346,7 +344,7 @@ class GetSequencesFromAnnotations( object ):
             if self._typeInCoord == "file":
                 self._iDb.dropTable( self._coordAdaptator._table, self._verbose-1 )
             if self._typeInGenome == "file":
-                self._iDb.dropTable( self._genomeAdaptator._table, self._verbose-1 )
+                self._genomeAdaptator.close()
             self._iDb.close()
             if self._getAnnot:
                 self._outCoordFileHandler.close()
@@ -3,6 +3,7 @@
 import user, os, sys, getopt, exceptions
 from pyRepetUnit.align.hmmOutputParsing.HmmpfamOutput2align import HmmpfamOutput2align
 from pyRepetUnit.align.hmmOutputParsing.HmmscanOutput2align import HmmscanOutput2align
+from pyRepetUnit.hmmer.hmmOutput.HmmscanOutputProcessing import HmmscanOutputProcessing
 from pyRepetUnit.align.transformAACoordIntoNtCoord.TransformAACoordIntoNtCoordInAlignFormat import TransformAACoordIntoNtCoordInAlignFormat
 from pyRepetUnit.commons.utils.FileUtils import FileUtils
 
@@ -80,6 +81,16 @@ def main():
         else:
             hmmpfamOutput2align.setOutputFile( outFileName + ".tmp" )
         hmmpfamOutput2align.run( )
+    elif program == "hmmscan" and consensusFileName != "":
+        # parse, transform and filter the hits in one pass, without intermediate file
+        inFile = open( inFileName, "r" )
+        alignTransformation = TransformAACoordIntoNtCoordInAlignFormat()
+        alignTransformation.setOutFileName( outFileName )
+        alignTransformation.setConsensusFileName( consensusFileName )
+        alignTransformation.setIsFiltered(True)
+        hmmscanOutputProcess = HmmscanOutputProcessing()
+        alignTransformation.writeAlignFileFromRecords( hit + [ "0" ] for hit in hmmscanOutputProcess.iterHmmOutput( inFile ) )
+        inFile.close()
     else:
         if program == "hmmscan":
             hmmscanOutput2align = HmmscanOutput2align( )
@@ -92,7 +103,7 @@ def main():
         else:
             print "\nWarning: You must specify a valid program (-p option). Only hmmpfam or hmmscan are supported !\n"
     
-    if consensusFileName != "":
+    if consensusFileName != "" and program == "hmmpfam":
         alignTransformation = TransformAACoordIntoNtCoordInAlignFormat()
         alignTransformation.setInFileName( outFileName + ".tmp" )
         alignTransformation.setOutFileName( outFileName )
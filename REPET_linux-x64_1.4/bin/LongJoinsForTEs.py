@@ -10,6 +10,7 @@ import getopt
 
 from pyRepetUnit.commons.sql.DbMySql import DbMySql
 from pyRepetUnit.commons.sql.TablePathAdaptator import TablePathAdaptator
+from pyRepetUnit.commons.sql.TableBinPathAdaptator import TableBinPathAdaptator
 from pyRepetUnit.commons.coord.PathUtils import PathUtils
 from pyRepetUnit.commons.coord.SetUtils import SetUtils
 from pyRepetUnit.commons.LoggerFactory import LoggerFactory
@@ -37,6 +38,7 @@ class LongJoinsForTEs:
         self._verbose = 0
         self._db = None
         self._tpA = None
+        self._tbpA = None
         self._tmpTable = ""
         self._logger = None
         self._name = "LongJoinsForTEs"
@@ -296,11 +298,11 @@ class LongJoinsForTEs:
                     string = "allow long join: identity %.2f and %.2f" % ( lPaths[i].identity, lPaths[i-1].identity )
                     self._logger.info( string )
                     if self._verbose > 1: print string
-                    newPathId = self._tpA.joinTwoPaths( lPaths[i-1].id, lPaths[i].id )
+                    newPathId = self._tbpA.joinTwoPaths( lPaths[i-1].id, lPaths[i].id )
                     lJoinedPaths.append( ( qry, lPaths[i-1], lPaths[i], distBetweenQueries, distBetweenSubjects ) )
                     continue
                 
-                lNestedPaths = self._tpA.getPathListIncludedInQueryCoord( qry, lPaths[i-1].range_query.end+1, lPaths[i].range_query.start-1 )
+                lNestedPaths = self.getPathListIncludedInQueryCoord( qry, lPaths[i-1].range_query.end+1, lPaths[i].range_query.start-1 )
                 if lNestedPaths == []:
                     string = "deny long join: no nested TEs"
                     self._logger.info( string )
@@ -328,10 +330,25 @@ class LongJoinsForTEs:
                              ( nestedTEcoverage, self._minNestedTEcoverage )
                     self._logger.info( string )
                     if self._verbose > 1: print string
-                    newPathId = self._tpA.joinTwoPaths( lPaths[i-1].id, lPaths[i].id )
+                    newPathId = self._tbpA.joinTwoPaths( lPaths[i-1].id, lPaths[i].id )
                     lJoinedPaths.append( ( qry, lPaths[i-1], lPaths[i], distBetweenQueries, distBetweenSubjects ) )
                     
                     
+    def getPathListIncludedInQueryCoord( self, qry, start, end ):
+        """
+        Return the paths of the input table included in a region of a query.
+        The candidate chains come from the in-memory interval index instead of a scan of the table.
+        """
+        if start > end:
+            start, end = end, start
+        lPaths = []
+        for iPath in self._tbpA.getChainListOverlappingQueryCoord( qry, start, end ):
+            if iPath.range_query.getSeqname() == qry \
+            and iPath.range_query.getMin() >= start and iPath.range_query.getMax() <= end:
+                lPaths.append( iPath )
+        return lPaths
+    
+    
     def join( self ):
         """
         Try to join path ranges from a TE annotation table (output from Matcher).
@@ -377,6 +394,7 @@ class LongJoinsForTEs:
                 self._tpA._table = self._inTable
                 self.joinTEpathsPerQuerySubject( qry, sbj, lPaths, lJoinedPaths )
                 
+        self._tbpA.unloadIndexFromMemory()
         string = "nb of long joins: %i" % ( len(lJoinedPaths) )
         self._logger.info( string )
         if self._verbose > 0:
@@ -483,7 +501,7 @@ class LongJoinsForTEs:
                                 lPathsToInsert += lPaths
 
                 lFilteredPathsToInsert = PathUtils.filterPathListOnChainLength( lPathsToInsert, self._minLengthToKeepChain )
-                tpAout.insertList( lFilteredPathsToInsert )
+                tpAout.insertList( lFilteredPathsToInsert, batchSize=1000 )
                 self._tpA.deleteFromId( initId )
                 
         string = "nb of splits: %i" % ( nbSplits )
@@ -510,6 +528,8 @@ class LongJoinsForTEs:
         self._db.copy_table( self._inTable, self._inTable + "_copy" )
         self._db.changePathQueryCoordinatesToDirectStrand( self._inTable )
         self._tpA = TablePathAdaptator( self._db, self._inTable )
+        self._tbpA = TableBinPathAdaptator( self._db, self._inTable, useBinTable=False )
+        self._tbpA.loadIndexInMemory( self._verbose - 1 )
         string = "nb of distinct queries: %i" % ( len(self._tpA.getQueryList()) )
         self._logger.info( string )
         if self._verbose > 0: print string
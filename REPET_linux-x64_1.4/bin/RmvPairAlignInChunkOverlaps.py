@@ -9,6 +9,9 @@ import sys
 import getopt
 import exceptions
 import copy
+import time
+import shutil
+import multiprocessing
 from pyRepetUnit.commons.coord.Align import *
 
 
@@ -18,7 +21,11 @@ class RmvPairAlignInChunkOverlaps( object ):
     """
     
     
-    def __init__( self, inFileName="", chunkLength=200000, chunkOverlap=10000, margin=10, outFileName="", verbose=0 ):
+    # size of the blocks of the input file read at once (in bytes)
+    _blockSize = 2 ** 24
+    
+    
+    def __init__( self, inFileName="", chunkLength=200000, chunkOverlap=10000, margin=10, outFileName="", verbose=0, nbProcesses=1 ):
         """
         Constructor.
         """
@@ -28,6 +35,8 @@ class RmvPairAlignInChunkOverlaps( object ):
         self._margin = margin
         self._outFileName = outFileName
         self._verbose = verbose
+        self._nbProcesses = nbProcesses
+        self._dChunkName2Number = {}
 
     def help( self ):
         """
@@ -42,6 +51,7 @@ class RmvPairAlignInChunkOverlaps( object ):
         print "     -o: chunk overlap (in bp)"
         print "     -m: margin to remove match included into a chunk overlap (default=10)"
         print "     -O: name of the output file (default=inFileName+'.not_over')"
+        print "     -p: number of processes, each one filtering a part of the input file (default=1)"
         print "     -v: verbose (default=0/1)"
         print
 
@@ -50,7 +60,7 @@ class RmvPairAlignInChunkOverlaps( object ):
         Set attributes from the command-line arguments.
         """
         try:
-            opts, args = getopt.getopt(sys.argv[1:],"h:i:l:o:m:O:v:")
+            opts, args = getopt.getopt(sys.argv[1:],"h:i:l:o:m:O:p:v:")
         except getopt.GetoptError, err:
             print str(err); self.help(); sys.exit(1)
         for o,a in opts:
@@ -66,6 +76,8 @@ class RmvPairAlignInChunkOverlaps( object ):
                 self.setMargin( a )
             elif o == "-O":
                 self.setOutputFileName( a )
+            elif o == "-p":
+                self.setNbProcesses( a )
             elif o == "-v":
                 self.setVerbosityLevel( a )
                 
@@ -84,6 +96,9 @@ class RmvPairAlignInChunkOverlaps( object ):
     def setOutputFileName( self, outFileName ):
         self._outFileName = outFileName
         
+    def setNbProcesses( self, nbProcesses ):
+        self._nbProcesses = int(nbProcesses)
+        
     def setVerbosityLevel( self, verbose ):
         self._verbose = int(verbose)
         
@@ -104,28 +119,38 @@ class RmvPairAlignInChunkOverlaps( object ):
         Return True if the pairwise alignment exactly corresponds to a 2-chunk overlap, False otherwise.
         Take into account cases specific to BLASTER or PALS.
         """
+        return self._isChunkOverlap( a.range_query.start, a.range_query.end, a.range_subject.start, a.range_subject.end, chunkQuery, chunkSubject )
+    
+    
+    def _isChunkOverlap( self, queryStart, queryEnd, subjectStart, subjectEnd, chunkQuery, chunkSubject ):
+        """
+        Same as 'isPairAlignAChunkOverlap()' with the coordinates of the pairwise alignment.
+        """
         
-        if a.range_query.isOnDirectStrand() != a.range_subject.isOnDirectStrand():
+        if ( queryStart <= queryEnd ) != ( subjectStart <= subjectEnd ):
             if self._verbose > 1: print "on different strand"
             return False
         
+        queryLength = abs( queryStart - queryEnd ) + 1
+        subjectLength = abs( subjectStart - subjectEnd ) + 1
+        
         if chunkQuery == chunkSubject + 1:
             if self._verbose > 1: print "query > subject"
-            if a.range_query.start == 1 and a.range_subject.end == self._chunkLength \
-                   and ( a.range_query.getLength() == self._chunkOverlap \
-                         or a.range_query.getLength() == self._chunkOverlap + 1 ) \
-                         and ( a.range_subject.getLength() == self._chunkOverlap \
-                               or a.range_subject.getLength() == self._chunkOverlap + 1 ):
+            if queryStart == 1 and subjectEnd == self._chunkLength \
+                   and ( queryLength == self._chunkOverlap \
+                         or queryLength == self._chunkOverlap + 1 ) \
+                         and ( subjectLength == self._chunkOverlap \
+                               or subjectLength == self._chunkOverlap + 1 ):
                 if self._verbose > 1: print "chunk overlap"
                 return True
             
         elif chunkQuery == chunkSubject - 1:
             if self._verbose > 1: print "query < subject"
-            if a.range_query.end == self._chunkLength and a.range_subject.start == 1 \
-                   and ( a.range_query.getLength() == self._chunkOverlap \
-                         or a.range_query.getLength() == self._chunkOverlap + 1 ) \
-                         and ( a.range_subject.getLength() == self._chunkOverlap \
-                               or a.range_subject.getLength() == self._chunkOverlap + 1 ):
+            if queryEnd == self._chunkLength and subjectStart == 1 \
+                   and ( queryLength == self._chunkOverlap \
+                         or queryLength == self._chunkOverlap + 1 ) \
+                         and ( subjectLength == self._chunkOverlap \
+                               or subjectLength == self._chunkOverlap + 1 ):
                 if self._verbose > 1: print "chunk overlap"
                 return True
             
@@ -146,20 +171,32 @@ class RmvPairAlignInChunkOverlaps( object ):
         """
         Return True if the pairwise alignment lies within an overlap between two contiguous chunks and is due to it, False otherwise.
         """
+        return self._isWithinAndDueToAChunkOverlap( a.range_query.start, a.range_query.end, a.range_subject.start, a.range_subject.end, chunkQuery, chunkSubject )
+    
+    
+    def _isWithinAndDueToAChunkOverlap( self, queryStart, queryEnd, subjectStart, subjectEnd, chunkQuery, chunkSubject ):
+        """
+        Same as 'isPairAlignWithinAndDueToAChunkOverlap()' with the coordinates of the pairwise alignment.
+        """
         uniqLength = self._chunkLength - self._chunkOverlap
         
-        if a.range_query.isOnDirectStrand() != a.range_subject.isOnDirectStrand():
+        if ( queryStart <= queryEnd ) != ( subjectStart <= subjectEnd ):
             if self._verbose > 1: print "on different strand"
             return False
         
+        queryMin = min( queryStart, queryEnd )
+        queryMax = max( queryStart, queryEnd )
+        subjectMin = min( subjectStart, subjectEnd )
+        subjectMax = max( subjectStart, subjectEnd )
+        
         if chunkQuery == chunkSubject + 1:
             if self._verbose > 1: print "query > subject"
-            if a.range_query.getMin() >= 1 and a.range_query.getMax() <= self._chunkOverlap \
-                   and a.range_subject.getMin() >= self._chunkLength - self._chunkOverlap + 1 \
-                   and a.range_subject.getMax() <= self._chunkLength:
+            if queryMin >= 1 and queryMax <= self._chunkOverlap \
+                   and subjectMin >= self._chunkLength - self._chunkOverlap + 1 \
+                   and subjectMax <= self._chunkLength:
                 if self._verbose > 1: print "included"
-                if self.isInInterval( a.range_query.getMin(), a.range_subject.getMin() - uniqLength ) \
-                       and self.isInInterval( self._chunkOverlap - a.range_query.getMax(), self._chunkLength - a.range_subject.getMax() ):
+                if self.isInInterval( queryMin, subjectMin - uniqLength ) \
+                       and self.isInInterval( self._chunkOverlap - queryMax, self._chunkLength - subjectMax ):
                     if self._verbose > 1: print "due to overlap"
                     return True
                 else:
@@ -168,13 +205,13 @@ class RmvPairAlignInChunkOverlaps( object ):
                 
         elif chunkQuery == chunkSubject - 1:
             if self._verbose > 1: print "query < subject"
-            if a.range_query.getMin() >= self._chunkLength - self._chunkOverlap + 1 \
-                   and a.range_query.getMax() <= self._chunkLength \
-                   and a.range_subject.getMin() >= 1 \
-                   and a.range_subject.getMax() <= self._chunkOverlap:
+            if queryMin >= self._chunkLength - self._chunkOverlap + 1 \
+                   and queryMax <= self._chunkLength \
+                   and subjectMin >= 1 \
+                   and subjectMax <= self._chunkOverlap:
                 if self._verbose > 1: print "included"
-                if self.isInInterval( a.range_subject.getMin(), a.range_query.getMin() - uniqLength ) \
-                       and self.isInInterval( self._chunkOverlap - a.range_subject.getMax(), self._chunkLength - a.range_query.getMax() ):
+                if self.isInInterval( subjectMin, queryMin - uniqLength ) \
+                       and self.isInInterval( self._chunkOverlap - subjectMax, self._chunkLength - queryMax ):
                     if self._verbose > 1: print "due to overlap"
                     return True
                 else:
@@ -189,70 +226,173 @@ class RmvPairAlignInChunkOverlaps( object ):
         return False
     
     
-    def removeChunkOverlaps( self ):
+    def getChunkNumber( self, chunkName ):
         """
-        Remove pairwise alignments exactly corresponding to chunk overlaps or those included within such overlaps.
+        Return the number of a chunk from its name (e.g. 'chunk0012' -> 12), or None if the name has no 'chunk'.
         """
-        totalNbPairAlign = 0
-        nbChunkOverlaps = 0
-        d = {}
-        nbPairAlignWithinChunkOverlaps = 0
-        
-        inF = open( self._inFileName, "r" )
-        outF = open( self._outFileName, "w" )
-        alignInstance = Align()
+        if not self._dChunkName2Number.has_key( chunkName ):
+            if "chunk" not in chunkName:
+                return None
+            self._dChunkName2Number[ chunkName ] = int( chunkName.replace("chunk","") )
+        return self._dChunkName2Number[ chunkName ]
+    
+    
+    def filterLines( self, lLines, outF, lCounts ):
+        """
+        Write in the output file the pairwise alignments of a list of lines ('align' format) which are not due to chunk overlaps.
+        The columns of the lines are parsed all at once and the kept alignments are written as with 'Align.write()'.
+        'lCounts' is incremented with the nb of pairwise alignments, of chunk overlaps and of pairwise alignments within chunk overlaps.
+        Return 'stop' at the first line without alignment (as 'Align.read()'), 'warning' at the first alignment without 'chunk' in its names, 'ok' otherwise.
+        """
+        status = "ok"
+        lRows = [ line.split("\t") for line in lLines ]
+        for i in xrange( 0, len(lRows) ):
+            if len(lRows[i]) < 5:
+                lRows = lRows[:i]
+                status = "stop"
+                break
+        if lRows == []:
+            return status
+        lColumns = zip( *lRows )
+        lQueryNames, lSubjectNames = lColumns[0], lColumns[3]
+        lQueryStarts, lQueryEnds = map( int, lColumns[1] ), map( int, lColumns[2] )
+        lSubjectStarts, lSubjectEnds = map( int, lColumns[4] ), map( int, lColumns[5] )
+        lEvalues, lScores, lIdentities = lColumns[6], lColumns[7], lColumns[8]
+        lKeptLines = []
         
-        while True:
-            if not alignInstance.read( inF ): break
-            totalNbPairAlign += 1
-            if self._verbose > 1: alignInstance.show()
+        for i in xrange( 0, len(lRows) ):
+            # the query is put on the direct strand, as in 'Align.setFromTuple()'
+            if lQueryStarts[i] < lQueryEnds[i]:
+                queryStart, queryEnd, subjectStart, subjectEnd = lQueryStarts[i], lQueryEnds[i], lSubjectStarts[i], lSubjectEnds[i]
+            else:
+                queryStart, queryEnd, subjectStart, subjectEnd = lQueryEnds[i], lQueryStarts[i], lSubjectEnds[i], lSubjectStarts[i]
+            lCounts[0] += 1
+            if self._verbose > 1: print "%s\t%d\t%d\t%s\t%d\t%d" % ( lQueryNames[i], queryStart, queryEnd, lSubjectNames[i], subjectStart, subjectEnd )
             
-            if "chunk" not in alignInstance.range_query.seqname or "chunk" not in alignInstance.range_subject.seqname:
-                print "WARNING: no 'chunk' in query or subject name"; return False
-                
-            chunkQuery = int(alignInstance.range_query.seqname.replace("chunk",""))
-            chunkSubject = int(alignInstance.range_subject.seqname.replace("chunk",""))
+            chunkQuery = self.getChunkNumber( lQueryNames[i] )
+            chunkSubject = self.getChunkNumber( lSubjectNames[i] )
+            if chunkQuery == None or chunkSubject == None:
+                status = "warning"
+                break
             
+            isKept = False
             if abs( chunkSubject - chunkQuery ) > 1:
                 if self._verbose > 1: print "non contiguous chunks -> keep"
-                alignInstance.write( outF )
-                continue
-            
-            if alignInstance.range_query.isOnDirectStrand() != alignInstance.range_subject.isOnDirectStrand():
+                isKept = True
+            elif ( queryStart <= queryEnd ) != ( subjectStart <= subjectEnd ):
                 if self._verbose > 1: print "on different strand"
-                alignInstance.write( outF )
-                continue
-            
-            if abs( chunkSubject - chunkQuery ) == 0:
-                if alignInstance.range_query.start == 1 \
-                       and alignInstance.range_query.end == self._chunkLength \
-                       and alignInstance.range_subject.start == 1 \
-                       and alignInstance.range_subject.end == self._chunkLength:
-                    if self._verbose > 1: print "self-alignment on whole chunk -> remove"
-                    continue
-                
-            if self.isPairAlignAChunkOverlap( alignInstance, chunkQuery, chunkSubject ):
+                isKept = True
+            elif chunkSubject == chunkQuery and queryStart == 1 and queryEnd == self._chunkLength \
+                     and subjectStart == 1 and subjectEnd == self._chunkLength:
+                if self._verbose > 1: print "self-alignment on whole chunk -> remove"
+            elif self._isChunkOverlap( queryStart, queryEnd, subjectStart, subjectEnd, chunkQuery, chunkSubject ):
                 if self._verbose > 1: print "chunk overlap -> remove"
-                nbChunkOverlaps += 1
-                
-            elif self.isPairAlignWithinAndDueToAChunkOverlap( alignInstance, chunkQuery, chunkSubject ):
+                lCounts[1] += 1
+            elif self._isWithinAndDueToAChunkOverlap( queryStart, queryEnd, subjectStart, subjectEnd, chunkQuery, chunkSubject ):
                 if self._verbose > 1: print "within chunk overlap -> remove"
-                nbPairAlignWithinChunkOverlaps += 1
-                
+                lCounts[2] += 1
             else:
                 if self._verbose > 1: print "keep"
-                alignInstance.write( outF )
+                isKept = True
                 
+            if isKept:
+                lKeptLines.append( "%s\t%d\t%d\t%s\t%d\t%d\t%g\t%i\t%f\n" % ( lQueryNames[i], queryStart, queryEnd,
+                                                                               lSubjectNames[i], subjectStart, subjectEnd,
+                                                                               float(lEvalues[i]), float(lScores[i]), float(lIdentities[i]) ) )
+        outF.writelines( lKeptLines )
+        return status
+    
+    
+    def removeChunkOverlapsInFileRange( self, startOffset, endOffset, outFileName ):
+        """
+        Filter the pairwise alignments of the input file starting between two offsets (the range starts at the beginning of a line and ends at the beginning of a line or at the end of the file).
+        Return the status of 'filterLines()' and the counts (nb of pairwise alignments, nb of chunk overlaps, nb of pairwise alignments within chunk overlaps).
+        """
+        lCounts = [ 0, 0, 0 ]
+        status = "ok"
+        inF = open( self._inFileName, "r" )
+        inF.seek( startOffset )
+        outF = open( outFileName, "w" )
+        offset = startOffset
+        remainder = ""
+        while status == "ok" and offset < endOffset:
+            data = inF.read( min( self._blockSize, endOffset - offset ) )
+            if data == "":
+                break
+            offset += len(data)
+            lLines = ( remainder + data ).split("\n")
+            remainder = lLines.pop()
+            status = self.filterLines( lLines, outF, lCounts )
+        if status == "ok" and remainder != "":
+            status = self.filterLines( [ remainder ], outF, lCounts )
+        inF.close()
+        outF.close()
+        return status, lCounts
+    
+    
+    def getFileRanges( self, nbRanges ):
+        """
+        Return a list of (start,end) offsets splitting the input file into ranges of similar sizes, starting at the beginning of a line.
+        """
+        fileSize = os.path.getsize( self._inFileName )
+        lStartOffsets = [ 0 ]
+        inF = open( self._inFileName, "r" )
+        for i in xrange( 1, nbRanges ):
+            inF.seek( max( fileSize * i / nbRanges - 1, lStartOffsets[-1] ) )
+            inF.readline()
+            lStartOffsets.append( min( inF.tell(), fileSize ) )
         inF.close()
+        lStartOffsets.append( fileSize )
+        lRanges = []
+        for i in xrange( 0, nbRanges ):
+            if lStartOffsets[i] < lStartOffsets[i+1]:
+                lRanges.append( ( lStartOffsets[i], lStartOffsets[i+1] ) )
+        return lRanges
+    
+    
+    def removeChunkOverlaps( self ):
+        """
+        Remove pairwise alignments exactly corresponding to chunk overlaps or those included within such overlaps.
+        With several processes, the input file is split into ranges of lines filtered in parallel, the outputs being concatenated in order.
+        """
+        lRanges = self.getFileRanges( max( 1, self._nbProcesses ) )
+        lArgs = []
+        for i in xrange( 0, len(lRanges) ):
+            lArgs.append( ( self, lRanges[i][0], lRanges[i][1], "%s.shard%i" % ( self._outFileName, i+1 ) ) )
+        if self._nbProcesses > 1 and len(lArgs) > 1:
+            pool = multiprocessing.Pool( min( self._nbProcesses, len(lArgs) ) )
+            lResults = pool.map( _removeChunkOverlapsInFileRange, lArgs )
+            pool.close()
+            pool.join()
+        else:
+            lResults = map( _removeChunkOverlapsInFileRange, lArgs )
+            
+        totalNbPairAlign = 0
+        nbChunkOverlaps = 0
+        nbPairAlignWithinChunkOverlaps = 0
+        status = "ok"
+        outF = open( self._outFileName, "w" )
+        for i in xrange( 0, len(lArgs) ):
+            shardFileName = lArgs[i][3]
+            if status == "ok":
+                status, lCounts, duration = lResults[i]
+                shardF = open( shardFileName, "r" )
+                shutil.copyfileobj( shardF, outF )
+                shardF.close()
+                totalNbPairAlign += lCounts[0]
+                nbChunkOverlaps += lCounts[1]
+                nbPairAlignWithinChunkOverlaps += lCounts[2]
+                if self._verbose > 0 and len(lArgs) > 1:
+                    print "shard %i: %i pairwise alignments (%i bytes) in %.2fs (%.0f alignments/s)" % ( i+1, lCounts[0], lArgs[i][2] - lArgs[i][1], duration, lCounts[0] / max( duration, 1e-6 ) )
+            os.remove( shardFileName )
+        outF.close()
+        if status == "warning":
+            print "WARNING: no 'chunk' in query or subject name"; return False
+            
         if self._verbose > 0: print "nb of pairwise alignments in input file: %i" % ( totalNbPairAlign )
         if self._verbose > 0: print "nb of chunk overlaps: %i" % ( nbChunkOverlaps )
         if self._verbose > 0: print "nb of pairwise alignments within chunk overlaps: %i" % ( nbPairAlignWithinChunkOverlaps )
         
-        for names,lAligns in d.items():
-            for alignInstance in lAligns:
-                alignInstance.write( outF )
-        outF.close()
-        
         
     def start( self ):
         """
@@ -280,6 +420,18 @@ class RmvPairAlignInChunkOverlaps( object ):
         self.end()
         
         
+# Functions (module level, to be usable by a multiprocessing pool)
+
+def _removeChunkOverlapsInFileRange( args ):
+    """
+    Filter a range of the input file and return the status, the counts and the duration.
+    """
+    iRmv, startOffset, endOffset, outFileName = args
+    startTime = time.time()
+    status, lCounts = iRmv.removeChunkOverlapsInFileRange( startOffset, endOffset, outFileName )
+    return status, lCounts, time.time() - startTime
+
+
 if __name__ == '__main__':
     i = RmvPairAlignInChunkOverlaps()
     i.setAttributesFromCmdLine()
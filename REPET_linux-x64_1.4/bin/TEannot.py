@@ -1592,7 +1592,7 @@ def pathsProcessing( config ):
         cmd += "iDb.close()\n"
         lCmds.append(cmd)
     
-    # avoid time out on iDb, close db handler
+    # give the db handler back to the connection pool (it is reopened transparently if it timed out)
     iDb.close()
 
     # convert the coordinates from chunks to chromosomes
@@ -1792,53 +1792,28 @@ def exportAnnotations( outFormat ):
             print "ERROR: the option gff3_chado must be define in '%s' in your config file : %s" % (sectionName, configFileName)
             sys.exit(1)
 
-        # create the source GFF3 file(s), one per genomic sequence
+        # create the GFF3 file(s), one per genomic sequence, with their annotations
         if verbose > 0:
-            print "create source files..."
+            print "create GFF3 files with their annotations..."
             sys.stdout.flush()
+        if os.path.exists( "annotations" ):
+            os.system( "rm -rf annotations" )
+        os.mkdir( "annotations" )
+        os.chdir( "annotations" )
+
         prg = "%s/bin/srptGFF3Maker.py" % os.environ["REPET_PATH"]
         cmd = prg
         if refSeq == "chr":
             cmd += " -f %s_chr_seq" % projectName
         elif refSeq == "chk":
             cmd += " -f %s_chk_seq" % projectName
+        cmd += " -t %s" % os.path.abspath("../%s" % tableFileName)
+        if config.get(sectionName, "gff3_chado") == "yes":
+            cmd += " -c"
+        if CheckerUtils.isOptionInSectionInConfig( config, sectionName, "gff3_nb_processes" ):
+            cmd += " -p %s" % config.get(sectionName, "gff3_nb_processes")
         cmd += " -v %i" % ( verbose - 1 )
-    
-        cDir = os.getcwd()
-        if config.get(jobsSectionName, "tmpDir") != "":
-            tmpDir = config.get(jobsSectionName, "tmpDir")
-        else:
-            tmpDir = cDir
 
-        groupid = "%s_TEannot_step8_srptGFF3Maker_createGFF3Files" % projectName
-        acronym = "srptGFF3Maker_createGff3Files"
-        jobdb = RepetJob( cfgFileName = "%s/%s" % (projectDir, configFileName) )
-        cL = Launcher(jobdb, os.getcwd(), "", "", cDir, tmpDir, "jobs", queue, groupid, acronym)
-        cL.beginRun()
-        cL.job.jobname = acronym
-        cmd_start = "os.mkdir( \"src_GFF3\" )\n"
-        cmd_start += "os.chdir( \"src_GFF3\" )\n"
-        cmd_start += "log = os.system( \""
-        cmd_start += cmd
-        cmd_start += "\" )\n"
-        cmd_finish = "if not os.path.exists( \"%s/src_GFF3\" ):\n" % cDir
-        cmd_finish += "\tos.mkdir(\"%s/src_GFF3\")\n" % cDir
-        cmd_finish += "os.system( \"find . -type f -name '*.gff3' -exec mv {} %s/src_GFF3/. \\;\" )\n" % cDir
-        cL.runSingleJob( cmd_start, cmd_finish )
-        cL.endRun()
-        if clean:
-            cL.clean( acronym )
-        jobdb.close()
-        
-        # add the annotations to the GFF3 files
-        if verbose > 0:
-            print "add annotations to source files..."
-            sys.stdout.flush()
-        if os.path.exists( "annotations" ):
-            os.system( "rm -rf annotations" )
-        os.mkdir( "annotations" )
-        os.chdir( "annotations" )
-    
         cDir = os.getcwd()
         if config.get(jobsSectionName, "tmpDir" ) != "":
             tmpDir = config.get(jobsSectionName, "tmpDir")
@@ -1851,32 +1826,17 @@ def exportAnnotations( outFormat ):
         cL = Launcher( jobdb, os.getcwd(), "", "", cDir, tmpDir, "jobs", queue, groupid, acronym )
         cL.beginRun()
         cL.job.jobname = acronym
-        cmd_start = ""
-        lGff3FilePaths = glob.glob("../src_GFF3/*.gff3")
-        for gff3FilePath in lGff3FilePaths:
-            gff3FileName = os.path.basename(gff3FilePath)
-            prg = "%s/bin/srptGFF3Maker.py" % os.environ["REPET_PATH"]
-            cmd = prg
-            cmd += " -t %s" % os.path.abspath("../%s" % tableFileName)
-            cmd += " -g %s" % gff3FileName
-            if config.get(sectionName, "gff3_chado") == "yes":
-                cmd += " -c"
-            cmd += " -v %i" % ( verbose - 1 )
-            
-            cmd_start += "os.system(\"cp %s .\")\n" % os.path.abspath(gff3FilePath)
-            cmd_start += "log = os.system( \""
-            cmd_start += cmd
-            cmd_start += "\" )\n"
-            
+        cmd_start = "log = os.system( \""
+        cmd_start += cmd
+        cmd_start += "\" )\n"
         cmd_finish = "os.system( \"find . -type f -name '*.gff3' -exec mv {} %s/. \\;\" )\n" % cDir
         cL.runSingleJob( cmd_start, cmd_finish )
         cL.endRun()
         if clean:
             cL.clean( acronym )
         jobdb.close()
-            
+
         os.chdir( ".." )
-        os.system( "rm -rf src_GFF3/" )
         os.chdir( ".." )
 
     #--------------------------------------------------------------------------
@@ -53,6 +53,7 @@ import glob
 import logging
 import re
 import shutil
+import multiprocessing
 
 if not os.environ.has_key( "REPET_PATH" ):
     print "ERROR: no environment variable REPET_PATH"
@@ -1837,7 +1838,8 @@ def detectFeatures( inFileName, count, cDir, tmpDir ):
     cmd_start += "\tif log != 0:\n"
     cmd_start += "\t\tprint \"ERROR: can't copy '%s' in temporary directory\"\n" % ( inFileName )
     cmd_start += "\t\tsys.stdout.flush()\n"
-    cmd_start += "\t%s" % ( cL.cmd_test( cL.job, "error", loop=1 ) )
+    for line in cL.cmd_test( cL.job, "error", loop=1 ).splitlines():
+        cmd_start += "\t%s\n" % ( line )
     cmd_start += "\t\tsys.exit(1)\n"
     cmd_finish = ""
     cmd_finish += "if os.path.exists( \"" + tmpDir + "/" + prefix + "\" ):\n"
@@ -2373,12 +2375,105 @@ def collectORFOrTEclass(analysis):
 
 #------------------------------------------------------------------------------
 
+# header of a 'match' file
+MATCH_HEADER = "query.name\tquery.start\tquery.end\tquery.length\tquery.length.%\tmatch.length.%\tsubject.name\tsubject.start\tsubject.end\tsubject.length\tsubject.length.%\tE.value\tScore\tIdentity\tpath\n"
+
+# results of a bank smaller than this (in bytes) are collected without launching a job
+# (can be changed with the 'collect_in_process_max_size' option of the config file)
+COLLECT_IN_PROCESS_MAX_SIZE = 500 * 1024 * 1024
+
+#------------------------------------------------------------------------------
+
+def catAndRenumberBlasterFiles( lInFiles, outFileName, dataType ):
+    """
+    Concatenate the 'path' or 'match' files of several batches in one pass.
+    Each (identifier, query, subject) receives a new identifier, in order of appearance (as 'pathnum2id' and 'Matchnum2id.py').
+    The header lines of 'match' files are replaced by a single one.
+    """
+    if dataType == "match":
+        idIndex, queryIndex, subjectIndex = 14, 0, 6
+    else:
+        idIndex, queryIndex, subjectIndex = 0, 1, 4
+    dKey2NewId = {}
+    outFile = open( outFileName, "w" )
+    if dataType == "match":
+        outFile.write( MATCH_HEADER )
+    for inFileName in lInFiles:
+        inFile = open( inFileName, "r" )
+        for line in inFile:
+            if line.strip() == "" or line.startswith( "query.name" ):
+                continue
+            lColumns = line.rstrip("\n").split("\t")
+            key = ( int(lColumns[ idIndex ]), lColumns[ queryIndex ], lColumns[ subjectIndex ] )
+            if not dKey2NewId.has_key( key ):
+                dKey2NewId[ key ] = len(dKey2NewId) + 1
+            lColumns[ idIndex ] = str( dKey2NewId[ key ] )
+            outFile.write( "%s\n" % ( "\t".join( lColumns ) ) )
+        inFile.close()
+    outFile.close()
+
+#------------------------------------------------------------------------------
+
+def collectBlasterTable( args ):
+    """
+    Renumber the 'path' or 'match' files of several batches and load them in a table (module level, to be usable by a multiprocessing pool).
+    The worker opens its own connection, outside the pool of connections inherited from the parent process.
+    """
+    lInFiles, outFileName, tableName, dataType, cfgFileName = args
+    catAndRenumberBlasterFiles( lInFiles, outFileName, dataType )
+    db = DbMySql( cfgFileName = cfgFileName, usePool = False )
+    db.createTable( tableName, dataType, outFileName, True )
+    db.close()
+
+#------------------------------------------------------------------------------
+
 def collectBlaster( analysis, bank ):
-    FileUtils.catFilesByPattern( "../batch_*.fa_%s_%s.align.clean_match.path" % ( analysis, bank ),
-                                 "%s_%s_%s.align.clean_match.path.tmp" % ( project, analysis, bank ) )
+    lPathFiles = glob.glob( "../batch_*.fa_%s_%s.align.clean_match.path" % ( analysis, bank ) )
+    lMatchFiles = glob.glob( "../batch_*.fa_%s_%s.align.clean_match.tab" % ( analysis, bank ) )
+    lPathFiles.sort()
+    lMatchFiles.sort()
+    maxSizeInProcess = COLLECT_IN_PROCESS_MAX_SIZE
+    if CheckerUtils.isOptionInSectionInConfig( config, sectionName, "collect_in_process_max_size" ):
+        maxSizeInProcess = int( config.get( sectionName, "collect_in_process_max_size" ) )
+    totalSize = sum( [ os.path.getsize( f ) for f in lPathFiles + lMatchFiles ] )
+    if totalSize <= maxSizeInProcess:
+        collectBlasterInProcess( analysis, bank, lPathFiles, lMatchFiles )
+    else:
+        collectBlasterWithJob( analysis, bank, lPathFiles, lMatchFiles )
+    os.chdir( ".." )
+    FileUtils.removeFilesByPattern( "batch_*.fa_%s_%s.*" % ( analysis, bank ) )
+    lCutFiles = glob.glob( "%s_cut*" % ( bank ) )
+    if len( lCutFiles ) != 0:
+        for f in lCutFiles:
+            os.remove( f ) 
+    if os.path.exists( "%s.Nstretch.map" % ( bank ) ):
+        os.remove( "%s.Nstretch.map" % ( bank ) )
+
+#------------------------------------------------------------------------------
+
+def collectBlasterInProcess( analysis, bank, lPathFiles, lMatchFiles ):
+    """
+    Renumber the outputs of the batches and load the 'path' and 'match' tables in parallel, without launching a job.
+    """
+    if verbose > 0:
+        print "collect in process"; sys.stdout.flush()
+    cfgFileName = "%s/%s" % ( os.path.abspath("../"), configFileName )
+    lArgs = []
+    lArgs.append( ( lPathFiles, "%s_%s_%s.align.clean_match.path" % ( project, analysis, bank ), "%s_%s_path" % ( project, analysis ), "path", cfgFileName ) )
+    lArgs.append( ( lMatchFiles, "%s_%s_%s.align.clean_match.tab" % ( project, analysis, bank ), "%s_%s_match" % ( project, analysis ), "match", cfgFileName ) )
+    pool = multiprocessing.Pool( len(lArgs) )
+    pool.map( collectBlasterTable, lArgs )
+    pool.close()
+    pool.join()
+
+#------------------------------------------------------------------------------
 
-    FileUtils.catFilesByPattern( "../batch_*.fa_%s_%s.align.clean_match.tab" % ( analysis, bank ),
-                                 "%s_%s_%s.align.clean_match.tab.tmp" % ( project, analysis, bank ) )
+def collectBlasterWithJob( analysis, bank, lPathFiles, lMatchFiles ):
+    """
+    Concatenate the outputs of the batches, then renumber them and load the 'path' and 'match' tables in a job.
+    """
+    FileUtils.catFilesFromList( lPathFiles, "%s_%s_%s.align.clean_match.path.tmp" % ( project, analysis, bank ) )
+    FileUtils.catFilesFromList( lMatchFiles, "%s_%s_%s.align.clean_match.tab.tmp" % ( project, analysis, bank ) )
     
     lCmds = []
     prg = os.environ["REPET_PATH"] + "/bin/pathnum2id"
@@ -2443,15 +2538,6 @@ def collectBlaster( analysis, bank ):
         
     os.remove("%s_%s_%s.align.clean_match.path.tmp" % ( project, analysis, bank ))
     os.remove("%s_%s_%s.align.clean_match.tab.tmp" % ( project, analysis, bank )) 
-    os.chdir( ".." )
-    cmd = "find -name \"batch_*.fa_%s_%s.*\" -exec rm {} \;" % ( analysis, bank )
-    os.system(cmd)
-    lCutFiles = glob.glob( "%s_cut*" % ( bank ) )
-    if len( lCutFiles ) != 0:
-        for f in lCutFiles:
-            os.remove( f ) 
-    if os.path.exists( "%s.Nstretch.map" % ( bank ) ):
-        os.remove( "%s.Nstretch.map" % ( bank ) )
 
 #------------------------------------------------------------------------------
     
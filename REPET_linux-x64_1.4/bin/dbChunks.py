@@ -9,7 +9,7 @@ if not os.environ.has_key( "REPET_PATH" ):
     print "*** Error: no environment variable REPET_PATH"
     sys.exit(1)
 sys.path.append( os.environ.get( "REPET_PATH" ) )
-import pyRepet.seq.fastaDB
+from pyRepetUnit.commons.seq.FastaUtils import FastaUtils
 
 #------------------------------------------------------------------------------
 
@@ -28,7 +28,8 @@ def help():
     print "     -o: chunk overlap (in bp, default=10000)"
     print "     -w: N stretch word length (default=11, 0 for no detection)"
     print "     -O: prefix of the output files (default=inFileName+'_chunks' followed by '.fa' or '.map')"
-    print "     -c: clean (remove 'cut' and 'Nstretch' files)"
+    print "     -c: clean (remove 'Nstretch' file)"
+    print "     -p: number of processes used to cut the sequences (default=1)"
     print "     -v: verbose (default=0/1)"
     print ""
 
@@ -48,9 +49,10 @@ def main():
     outFilePrefix = ""
     clean = False
     verbose = 0
+    nbProcesses = 1
 
     try:
-        opts, args = getopt.getopt( sys.argv[1:], "hi:l:o:w:O:cv:" )
+        opts, args = getopt.getopt( sys.argv[1:], "hi:l:o:w:O:cp:v:" )
     except getopt.GetoptError:
         help()
         sys.exit(1)
@@ -70,6 +72,8 @@ def main():
             outFilePrefix = a
         elif o == "-c":
             clean = True
+        elif o == "-p":
+            nbProcesses = int(a)
         elif o == "-v":
             verbose = int(a)
 
@@ -82,7 +86,7 @@ def main():
         print "START %s" % (sys.argv[0].split("/")[-1])
         sys.stdout.flush()
 
-    pyRepet.seq.fastaDB.dbChunks( inFileName, chkLgth, chkOver, wordN, outFilePrefix, clean, verbose )
+    FastaUtils.dbChunks( inFileName, chkLgth, chkOver, wordN, outFilePrefix, clean, verbose, nbProcesses )
 
     if verbose > 0:
         print "END %s" % (sys.argv[0].split("/")[-1])
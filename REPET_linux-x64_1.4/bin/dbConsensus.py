@@ -20,7 +20,7 @@ if not os.environ.has_key( "REPET_PATH" ):
     sys.exit(1)
 sys.path.append( os.environ["REPET_PATH"] )
 
-import pyRepet.seq.AlignedBioseqDB
+from pyRepetUnit.commons.seq.AlignedBioseqDB import AlignedBioseqDB
 
 
 def help():
@@ -75,7 +75,7 @@ def main():
         print "START %s" % (sys.argv[0].split("/")[-1])
         sys.stdout.flush()
 
-    alnDB = pyRepet.seq.AlignedBioseqDB.AlignedBioseqDB( inFileName )
+    alnDB = AlignedBioseqDB( inFileName )
 
     if alnDB.getSize() <= minNbNt:
         print "WARNING: not enough sequences (<=%i)" % ( minNbNt )
@@ -16,6 +16,7 @@
 import os
 import sys
 import getopt
+import array
 import logging
 
 if not os.environ.has_key( "REPET_PATH" ):
@@ -24,7 +25,6 @@ if not os.environ.has_key( "REPET_PATH" ):
 sys.path.append( os.environ["REPET_PATH"] )
 
 from pyRepet.util.Stat import Stat
-from pyRepetUnit.commons.coord.Map import Map
 
 
 def help():
@@ -46,14 +46,61 @@ def help():
     print
 
 
-def getStatsGroupSize( dGr2Mb ):
+def getMemberId( memberName ):
+    """
+    Return the member identifier from the name of a member (e.g. 'MbQ12Gr3Cl1' gives '12').
+    """
+    if "Q" in memberName.split("Gr")[0]:
+        return memberName.split("Gr")[0].split("MbQ")[1]
+    elif "S" in memberName:
+        return memberName.split("Gr")[0].split("MbS")[1]
+
+
+class GrouperMembers( object ):
+    """
+    Members of the groups made by Grouper, recorded in columns (one row per member, in the order of the input file).
+    """
+
+    def __init__( self ):
+        self.lMemberIds = []
+        self.lGroupIds = []
+        self.lChunkNames = []
+        self.aLengths = array.array( "l" )
+        self.aMinHspEnds = array.array( "l" )   # smallest end (max coordinate) of the HSPs of each member
+        self._dStrings = {}
+
+    def add( self, memberID, groupID, chunkName, length, minHspEnd ):
+        self.lMemberIds.append( memberID )
+        self.lGroupIds.append( self._dStrings.setdefault( groupID, groupID ) )
+        self.lChunkNames.append( self._dStrings.setdefault( chunkName, chunkName ) )
+        self.aLengths.append( length )
+        self.aMinHspEnds.append( minHspEnd )
+
+    def getNbMembers( self ):
+        return len(self.lMemberIds)
+
+    def getRowsPerGroup( self ):
+        """
+        Return a dictionary whose keys are the group identifiers and values the lists of their rows.
+        """
+        dGr2Rows = {}
+        for row in xrange( 0, len(self.lGroupIds) ):
+            groupID = self.lGroupIds[ row ]
+            if dGr2Rows.has_key( groupID ):
+                dGr2Rows[ groupID ].append( row )
+            else:
+                dGr2Rows[ groupID ] = [ row ]
+        return dGr2Rows
+
+
+def getStatsGroupSize( dGr2Rows ):
     """
     Get some descriptive statistics on the groups.
     """
     string = ""
     iStat.reset()
 
-    lGroups = dGr2Mb.keys()
+    lGroups = dGr2Rows.keys()
     lGroups.sort()
     nbGroups = len(lGroups)
     string += "%i groups" % ( nbGroups )
@@ -61,10 +108,10 @@ def getStatsGroupSize( dGr2Mb ):
     countGroup = 0
     for groupID in lGroups:
         countGroup += 1
-        iStat.add( len(dGr2Mb[groupID]) )
+        iStat.add( len(dGr2Rows[groupID]) )
         if verbose > 1:
-            msg = "group %s (%s/%i): %i member" % ( groupID, str(countGroup).zfill(len(str(nbGroups))), nbGroups, len(dGr2Mb[groupID]) )
-            if len(dGr2Mb[groupID]) > 1:
+            msg = "group %s (%s/%i): %i member" % ( groupID, str(countGroup).zfill(len(str(nbGroups))), nbGroups, len(dGr2Rows[groupID]) )
+            if len(dGr2Rows[groupID]) > 1:
                 msg += "s"
             print msg
             sys.stdout.flush()
@@ -77,7 +124,7 @@ def getStatsGroupSize( dGr2Mb ):
         print string; sys.stdout.flush()
 
 
-def getStatsMemberLength( dGr2Mb, dMb2Length ):
+def getStatsMemberLength( dGr2Rows, aLengths ):
     """
     Get some descriptive statistics on the members.
     """
@@ -85,11 +132,11 @@ def getStatsMemberLength( dGr2Mb, dMb2Length ):
     iStat.reset()
     iStatForCoefVar = Stat()
 
-    for groupID in dGr2Mb.keys():
+    for groupID in dGr2Rows.keys():
         tmpStat = Stat()
-        for memberID in dGr2Mb[groupID]:
-            iStat.add( dMb2Length[memberID] )
-            tmpStat.add( dMb2Length[memberID] )
+        for row in dGr2Rows[groupID]:
+            iStat.add( aLengths[row] )
+            tmpStat.add( aLengths[row] )
         iStatForCoefVar.add( tmpStat.cv() )
 
     string += "%i members" % ( iStat.n )
@@ -120,84 +167,53 @@ def getStatsJoinLengths( lJoinLengths ):
         print string; sys.stdout.flush()
 
 
-def removeRedundantMembersDueToChunkOverlaps( dGroupId2MemberHeaders, dGr2Mb, chunkOverlap ):
-    # for each group
-    for groupID in dGroupId2MemberHeaders.keys():
-        if verbose > 1:
-            print "group %s:" % ( groupID )
-        if groupID not in [ "3446" ]:
-            #continue
-            pass
-
-        # get members into Map object, per chunk name
-        dChunkName2Map = {}
-        for memberH in dGroupId2MemberHeaders[ groupID ]:
-            if verbose > 1: print memberH
-            tokens = memberH.split(" ")
-            if "," not in tokens[3]:
-                m = Map()
-                m.name = tokens[0]
-                m.seqname = tokens[1]
-                m.start = int( tokens[3].split("..")[0] )
-                m.end = int( tokens[3].split("..")[1] )
-                dChunkName2Map[ m.seqname ] = [ m ]
-            else:
-                dChunkName2Map[ tokens[1] ] = []
-                for i in tokens[3].split(","):
-                    m = Map()
-                    m.name = tokens[0]
-                    m.seqname = tokens[1]
-                    m.start = int( i.split("..")[0] )
-                    m.end = int( i.split("..")[1] )
-                    dChunkName2Map[ m.seqname ].append( m )
+def removeRedundantMembersDueToChunkOverlaps( iMembers, dGr2Rows, chunkOverlap ):
+    """
+    Remove from each group the members which are redundant because they lie in the overlap between two chunks.
+    In a group, only the last member of each chunk is considered. The chunks without previous or next chunk
+    are skipped, then one chunk out of two (sorted by name). The considered member of each remaining chunk
+    is removed if one of its HSPs ends in the chunk overlap (~< 10000 bp).
+    The members are read from the columns parsed once, without Map object nor list lookup.
+    """
+    maxEnd = 1.1 * chunkOverlap
+    lMemberIds = iMembers.lMemberIds
+    lChunkNames = iMembers.lChunkNames
+    aMinHspEnds = iMembers.aMinHspEnds
+
+    for groupID in dGr2Rows.keys():
+
+        # last member of each chunk
+        dChunkName2Row = {}
+        for row in dGr2Rows[ groupID ]:
+            dChunkName2Row[ lChunkNames[row] ] = row
 
         # remove chunks without previous or next chunks
-        for chunkName in dChunkName2Map.keys():
+        for chunkName in dChunkName2Row.keys():
             chunkId = int( chunkName.split("chunk")[1] )
-            if not ( dChunkName2Map.has_key( "chunk%i" % ( chunkId + 1 ) ) \
-                     or dChunkName2Map.has_key( "chunk%i" % ( chunkId - 1 ) ) ):
-                del dChunkName2Map[ chunkName ]
-                continue
-
-        # for each pair of chunk overlap, remove one chunk
-        lChunkNames = dChunkName2Map.keys()
-        lChunkNames.sort()
-        out = []
-        for i in range(0,len(lChunkNames), 2):
-            del dChunkName2Map[ lChunkNames[i] ]
-
-        # remove members outside chunk overlap (~< 10000 bp)
-        for chunkName in dChunkName2Map.keys():
-            out = []
-            for index, m in enumerate( dChunkName2Map[ chunkName ][:] ):
-                if m.getMax() <= 1.1 * chunkOverlap:
-                    out.append( dChunkName2Map[ chunkName ][ index ] )
-            dChunkName2Map[ chunkName ] = out
-            if len(dChunkName2Map[ chunkName ]) == 0:
-                del dChunkName2Map[ chunkName ]
+            if not ( dChunkName2Row.has_key( "chunk%i" % ( chunkId + 1 ) ) \
+                     or dChunkName2Row.has_key( "chunk%i" % ( chunkId - 1 ) ) ):
+                del dChunkName2Row[ chunkName ]
+
+        # for each pair of chunk overlap, remove one chunk, then keep the members inside chunk overlap (~< 10000 bp)
+        lChunksInOverlaps = dChunkName2Row.keys()
+        lChunksInOverlaps.sort()
+        setMembersToRemove = set()
+        for chunkName in lChunksInOverlaps[1::2]:
+            if aMinHspEnds[ dChunkName2Row[ chunkName ] ] <= maxEnd:
+                setMembersToRemove.add( lMemberIds[ dChunkName2Row[ chunkName ] ] )
+        if len(setMembersToRemove) == 0:
+            continue
 
         if verbose > 1:
-            print "all members:", dGr2Mb[ groupID ]
-            print "chunks to clean:", dChunkName2Map.keys()
-        lMembersToRemove = []
-        for i in dChunkName2Map.keys():
-            for j in dChunkName2Map[ i ]:
-                mbId = j.name.split("Gr")[0]
-                if "Q" in mbId:
-                    mbId = mbId.split("Q")[1]
-                elif "S" in mbId:
-                    mbId = mbId.split("S")[1]
-                lMembersToRemove.append( mbId )
-        out = []
-        for index, k in enumerate( dGr2Mb[ groupID ][:] ):
-            if k not in lMembersToRemove:
-                out.append( dGr2Mb[ groupID ][index] )
-        dGr2Mb[ groupID ] = out
+            print "group %s:" % ( groupID )
+            print "all members:", [ lMemberIds[row] for row in dGr2Rows[ groupID ] ]
+            print "members to remove:", sorted( setMembersToRemove )
+        dGr2Rows[ groupID ] = [ row for row in dGr2Rows[ groupID ] if lMemberIds[row] not in setMembersToRemove ]
         if verbose > 1:
-            print "members to keep:", dGr2Mb[ groupID ]
+            print "members to keep:", [ lMemberIds[row] for row in dGr2Rows[ groupID ] ]
             sys.stdout.flush()
 
-    return dGr2Mb
+    return dGr2Rows
 
 
 def main():
@@ -289,10 +305,9 @@ def main():
     keep = True
     nbHspTooLong = 0
     nbJoinTooLong = 0
-    dGr2Mb = {}
-    dMb2Length = {}
+    iMembers = GrouperMembers()
+    setMemberIds = set()
     lJoinLengths = []
-    dGroupId2MemberHeaders = {}
 
     inFaFile = open( inFaFileName, "r" )
     line = inFaFile.readline()
@@ -308,22 +323,22 @@ def main():
                 print data
 
             memberName = data[0]
-            clusterID = memberName.split("Cl")[1]
             groupID = memberName.split("Cl")[0].split("Gr")[1]
-            if "Q" in memberName.split("Gr")[0]:
-                memberID = memberName.split("Gr")[0].split("MbQ")[1]
-            elif "S" in memberName:
-                memberID = memberName.split("Gr")[0].split("MbS")[1]
+            memberID = getMemberId( memberName )
 
             coord = data[-1]
 
             # if the member was joined (concatenation of several HSPs)
             if "," in coord:
                 length = 0
+                minHspEnd = None
                 for i in coord.split(","):
-                    start = int( i.split("..")[0] )
-                    end = int( i.split("..")[1] )
+                    start, end = i.split("..")
+                    start = int( start )
+                    end = int( end )
                     length += abs( end - start ) + 1
+                    if minHspEnd == None or max( start, end ) < minHspEnd:
+                        minHspEnd = max( start, end )
                 if maxHspLength > 0 and length > maxHspLength:
                     keep = False
                     nbHspTooLong += 1
@@ -338,31 +353,28 @@ def main():
 
             # if not (the member is one HSP)
             else:
-                start = int( coord.split("..")[0] )
-                end = int( coord.split("..")[1] )
+                start, end = coord.split("..")
+                start = int( start )
+                end = int( end )
                 length = abs( end - start ) + 1
+                minHspEnd = max( start, end )
                 if maxHspLength > 0 and length > maxHspLength:
                     keep = False
                     nbHspTooLong += 1
 
             if keep == True:
-                if dGr2Mb.has_key( groupID ):
-                    dGr2Mb[ groupID ].append( memberID )
-                    dGroupId2MemberHeaders[ groupID ].append( line[0:-1] )
-                else:
-                    dGr2Mb[ groupID ] = [ memberID ]
-                    dGroupId2MemberHeaders[ groupID ] = [ line[0:-1] ]
-                if dMb2Length.has_key( memberID ):
+                if memberID in setMemberIds:
                     print "ERROR: memberID '%s' is duplicated" % ( memberID )
                 else:
-                    dMb2Length[ memberID ] = length
+                    setMemberIds.add( memberID )
+                    iMembers.add( memberID, groupID, data[1], length, minHspEnd )
 
         line = inFaFile.readline()
         keep = True
 
     inFaFile.close()
 
-    if len(dMb2Length.keys()) == 0:
+    if iMembers.getNbMembers() == 0:
         string = "WARNING: input fasta file '%s' is empty" % ( inFaFileName )
         logging.info( string )
         if verbose > 0:
@@ -384,12 +396,13 @@ def main():
         logging.info( string )
         if verbose > 0:
             print string; sys.stdout.flush()
-    getStatsGroupSize( dGr2Mb )
-    getStatsMemberLength( dGr2Mb, dMb2Length )
+    dGr2Rows = iMembers.getRowsPerGroup()
+    getStatsGroupSize( dGr2Rows )
+    getStatsMemberLength( dGr2Rows, iMembers.aLengths )
     getStatsJoinLengths( lJoinLengths )
 
     if chunkOverlap > 0:
-        removeRedundantMembersDueToChunkOverlaps( dGroupId2MemberHeaders, dGr2Mb, chunkOverlap )
+        removeRedundantMembersDueToChunkOverlaps( iMembers, dGr2Rows, chunkOverlap )
 
 
     # delete dictionary entries corresponding to groups having less than 'minSeq' members
@@ -403,9 +416,9 @@ def main():
         if verbose > 0:
             print "\n* %s" % ( string ); sys.stdout.flush()
 
-        for groupID in dGr2Mb.keys():
-            if len( dGr2Mb[groupID] ) < minSeq:
-                del dGr2Mb[groupID]
+        for groupID in dGr2Rows.keys():
+            if len( dGr2Rows[groupID] ) < minSeq:
+                del dGr2Rows[groupID]
                 nbTooSmallGroup += 1
 
         string = "nb of groups with less than %i members: %i" % ( minSeq, nbTooSmallGroup )
@@ -423,35 +436,28 @@ def main():
         if verbose > 0:
             print "\n* %s" % ( string ); sys.stdout.flush()
 
-        lMbToKeep = []
+        setMbToKeep = set()
         groupsWithManyMb = 0
 
-        for groupID in dGr2Mb.keys():
-            lMbFromThisGroup = []
-
-            if len( dGr2Mb[groupID] ) > maxSeq:
+        for groupID in dGr2Rows.keys():
+            if len( dGr2Rows[groupID] ) > maxSeq:
                 groupsWithManyMb += 1
-                for mb in dGr2Mb[groupID]:
-                    lMbFromThisGroup.append( "%i_|_%s" % ( dMb2Length[mb], mb ) )
-                    lMbFromThisGroup.sort()
-                    lMbFromThisGroup.reverse()
-                tmp_lFilteredMb = []
-                for i in xrange( 0, min(len(lMbFromThisGroup),maxSeq) ):
-                    lMbToKeep.append( lMbFromThisGroup[i].split("_|_")[1] )
-                    tmp_lFilteredMb.append( lMbFromThisGroup[i].split("_|_")[1] )
-                dGr2Mb[groupID] = tmp_lFilteredMb
-
-            else:
-                for mb in dGr2Mb[groupID]:
-                    lMbToKeep.append( mb )
+                lMbFromThisGroup = []
+                for row in dGr2Rows[groupID]:
+                    lMbFromThisGroup.append( ( "%i_|_%s" % ( iMembers.aLengths[row], iMembers.lMemberIds[row] ), row ) )
+                lMbFromThisGroup.sort()
+                lMbFromThisGroup.reverse()
+                dGr2Rows[groupID] = [ row for key, row in lMbFromThisGroup[:maxSeq] ]
+            for row in dGr2Rows[groupID]:
+                setMbToKeep.add( iMembers.lMemberIds[row] )
 
         string = "nb of groups with more than %i members: %i" % ( maxSeq, groupsWithManyMb )
         logging.info( string )
         if verbose > 0:
             print string; sys.stdout.flush()
 
-    getStatsGroupSize( dGr2Mb )
-    getStatsMemberLength( dGr2Mb, dMb2Length )
+    getStatsGroupSize( dGr2Rows )
+    getStatsMemberLength( dGr2Rows, iMembers.aLengths )
 
 
     # write the remaining sequences into the output fasta file
@@ -473,17 +479,8 @@ def main():
             break
 
         if line[0] == ">":
-            data = line[:-1].split(" ")
-
-            memberName = data[0]
-            clusterID = memberName.split("Cl")[1]
-            groupID = memberName.split("Cl")[0].split("Gr")[1]
-            if "Q" in memberName.split("Gr")[0]:
-                memberID = memberName.split("Gr")[0].split("MbQ")[1]
-            elif "S" in memberName:
-                memberID = memberName.split("Gr")[0].split("MbS")[1]
-
-            if memberID in lMbToKeep:
+            memberID = getMemberId( line[:-1].split(" ")[0] )
+            if memberID in setMbToKeep:
                 keepMember = True
                 outFaFile.write( line )
             else:
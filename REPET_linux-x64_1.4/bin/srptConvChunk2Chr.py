@@ -13,10 +13,8 @@ sys.path.append( os.environ["REPET_PATH"] )
 
 import pyRepet.sql.RepetDB
 import pyRepet.sql.TableAdaptator
-import pyRepet.coord.Map
-import pyRepet.coord.Path
-import pyRepet.coord.Match
-import pyRepet.coord.Set
+from pyRepetUnit.commons.coord.Map import Map
+from repet_base.ConvCoord import ConvCoord
 
 #-----------------------------------------------------------------------------
 
@@ -32,10 +30,12 @@ def help():
     print "     -h: this help"
     print "     -m: name of the table recording the coordinates of the chunks on the chromosomes ('map' format)"
     print "     -q: name of the table recording the coordinates you want to convert ('path'/'set'/'map'/'align' format)"
-    print "     -f: name of the file recording the coordinates you want to convert ('path'/'tab'/'map' format)"
-    print "     -c: connect chunk overlaps (only for table input, not available for 'align' format)"
+    print "     -f: name of the file recording the coordinates you want to convert ('path'/'tab'/'map'/'set'/'align' format)"
+    print "     -c: connect chunk overlaps (only for table input, for 'path' and 'set' formats)"
     print "     -t: format of data (match/path/map/set/align) for the target (-q or -f)"
+    print "     -s: conversion of a table, 'sql' (one INSERT ... SELECT ... JOIN on the map table, default) or 'file' (export, conversion in Python, load)"
     print "     -o: name of the output table (default=inTable+'_onchr')"
+    print "     -p: number of processes connecting the chunk overlaps of a 'path' table, one chromosome at a time (default=1)"
     print "     -C: configuration file from TEdenovo or TEannot pipeline"
     print "     -H: MySQL host (if no configuration file)"
     print "     -U: MySQL user (if no configuration file)"
@@ -54,6 +54,8 @@ def main():
     dataFormat = ""
     connect = False
     outTable = ""
+    nbProcesses = 1
+    tableConversion = "sql"
     configFileName = ""
     host = ""
     user = ""
@@ -63,7 +65,7 @@ def main():
     verbose = 0
 
     try:
-        opts, args = getopt.getopt(sys.argv[1:],"hcm:q:t:f:o:C:H:U:P:D:v:")
+        opts, args = getopt.getopt(sys.argv[1:],"hcm:q:t:f:o:p:s:C:H:U:P:D:v:")
     except getopt.GetoptError:
         help()
         sys.exit(1)
@@ -83,6 +85,10 @@ def main():
             connect = True
         elif o == "-o":
             outTable = a
+        elif o == "-p":
+            nbProcesses = int(a)
+        elif o == "-s":
+            tableConversion = a
         elif o == "-C":
             configFileName = a
         elif o == "-H":
@@ -142,12 +148,10 @@ def main():
         if verbose > 0:
             print "convert file '%s'..." % ( coordFileName )
             sys.stdout.flush()
-        if dataFormat == "path":
-            conv_path_file( dChunk2Link, coordFileName )
-        elif dataFormat == "tab":
-            conv_match_file( dChunk2Link, coordFileName )
-        elif dataFormat == "map":
-            conv_map_file( dChunk2Link, coordFileName )
+        if dataFormat in [ "tab", "match" ]:
+            conv_file( dChunk2Link, coordFileName, coordFileName+".on_chr", "match", escapeFirstLine=True, convertSubjects=False )
+        elif dFormat2Fields.has_key( dataFormat ):
+            conv_file( dChunk2Link, coordFileName, coordFileName+".on_chr", dataFormat, convertSubjects=False )
         else:
             print "*** Error: unknown file format: %s" % ( dataFormat )
             sys.exit(1)
@@ -156,27 +160,27 @@ def main():
         if verbose > 0:
             print "convert table '%s'..." % ( coordTable )
             sys.stdout.flush()
-        if dataFormat == "path":
-            conv_path_table( dChunk2Link, coordTable, outTable )
-            if connect:
-                connect_path_chunks( dChunk2Link, outTable, db, verbose )
-        elif dataFormat == "set":
-            conv_set_table( dChunk2Link, coordTable, outTable )
-            if connect:
-                connect_set_chunks( dChunk2Link, outTable )
-        elif dataFormat == "map":
-            conv_map_table( dChunk2Link, coordTable, outTable )
-            if connect:
-                print "*** Error: cannot still connect 'map' table"
-                sys.exit(1)
-        elif dataFormat == "align":
-            conv_align_table( dChunk2Link, coordTable, outTable )
-            if connect:
-                print "*** Error: not yet available"
-                sys.exit(1)
-        else:
+        if not dFormat2Fields.has_key( dataFormat ):
             print "*** Error: unknown table format: %s" % ( dataFormat )
             sys.exit(1)
+        if connect and dataFormat not in [ "path", "set" ]:
+            print "*** Error: cannot still connect '%s' table" % ( dataFormat )
+            sys.exit(1)
+        if tableConversion == "sql":
+            conv_table( map_tablename, coordTable, outTable, dataFormat )
+        elif tableConversion == "file":
+            conv_table_via_file( dChunk2Link, coordTable, outTable, dataFormat )
+        else:
+            print "*** Error: unknown table conversion: %s" % ( tableConversion )
+            sys.exit(1)
+        if connect and dataFormat == "path":
+            tmpFileName = "%i.on_chr" % ( os.getpid() )
+            db.export( outTable, tmpFileName )
+            connect_path_chunks( dChunk2Link, tmpFileName, nbProcesses )
+            db.create_path( outTable, tmpFileName )
+            os.remove( tmpFileName )
+        elif connect and dataFormat == "set":
+            connect_set_chunks( dChunk2Link, outTable )
 
     elif coordFileName == "" and coordTable == "":
         print "*** Error: both table and file names are given"
@@ -190,454 +194,184 @@ def main():
 
 #----------------------------------------------------------------------------
 
-def conv_path_file( chunk, filename ):
-
-    """
-    Convert a 'path' file format.
-    """
-
-    fout = open( filename+".on_chr", "w" )
-    fin = open( filename, "r" )
-    p = pyRepet.coord.Path.Path()
-    while True:
-        if not p.read(fin):
-            break
-        p.range_query.show()
-        i = chunk.get(p.range_query.seqname.split()[0],None)
-        if i == None:
-            print "*** Error: chunk: '%s' not found" % ( p.range_query.seqname )
-            sys.exit(1)
-        else:
-            p.range_query.seqname = i[0]
-            if i[1] < i[2]:
-                p.range_query.start = p.range_query.start + i[1] - 1
-                p.range_query.end = p.range_query.end + i[1] - 1
-            else:
-                p.range_query.start = i[1] - p.range_query.start + 1
-                p.range_query.end = i[1] - p.range_query.end + 1
-            p.write(fout)
-    fout.close()
-    fin.close()
-
-#----------------------------------------------------------------------------
-
-def conv_match_file( chunk, filename ):
-
-    """
-    Convert a 'match' file format.
-    """
-
-    fout = open( filename+".on_chr", "w")
-    fin = open( filename, "r" )
-    fin.readline()
-    m = pyRepet.coord.Match.Match()
-    while True:
-        if not m.read(fin):
-            break
-        m.range_query.show()
-        i = chunk.get(m.range_query.seqname.split()[0],None)
-        if i == None:
-            print "*** Error: chunk '%s' not found" % ( m.range_query.seqname )
-            sys.exit(1)
-        else:
-            m.range_query.seqname = i[0]
-            if i[1] < i[2]:
-                m.range_query.start = m.range_query.start + i[1] - 1
-                m.range_query.end = m.range_query.end + i[1] - 1
-            else:
-                m.range_query.start = i[1] - m.range_query.start + 1
-                m.range_query.end = i[1] - m.range_query.end + 1
-            m.write(fout)
-    fout.close()
-    fin.close()
+# fields of each format (same order in tables and files), index of the sequence (query) name and index of the subject name (None if no subject)
+dFormat2Fields = {
+    "path": ( [ "path", "query_name", "query_start", "query_end", "subject_name", "subject_start", "subject_end", "E_value", "score", "identity" ], 1, 4 ),
+    "align": ( [ "query_name", "query_start", "query_end", "subject_name", "subject_start", "subject_end", "E_value", "score", "identity" ], 0, 3 ),
+    "match": ( [ "query_name", "query_start", "query_end", "query_length", "query_length_perc", "match_length_perc", "subject_name", "subject_start", "subject_end", "subject_length", "subject_length_perc", "E_value", "score", "identity", "path" ], 0, None ),
+    "set": ( [ "path", "name", "chr", "start", "end" ], 2, None ),
+    "map": ( [ "name", "chr", "start", "end" ], 1, None ),
+    }
 
 #----------------------------------------------------------------------------
 
-def conv_map_file( chunk, filename ):
+def create_table( tableName, dataFormat, fileName="" ):
 
     """
-    Convert a 'map' file format.
+    Create a table of the given format and load the data of a file into it.
     """
 
-    fout = open( filename+".on_chr", "w" )
-    fin = open( filename, "r" )
-    m = pyRepet.coord.Map.Map()
-    while True:
-        if not m.read(fin):
-            break
-        m.show()
-        i = chunk.get(m.seqname.split()[0],None)
-        if i == None:
-            print "*** Error: chunk '%s' not found" % ( m.seqname )
-            sys.exit(1)
-        else:
-            m.seqname = i[0]
-            if i[1] < i[2]:
-                m.start = m.start + i[1] - 1
-                m.end = m.end + i[1] - 1
-            else:
-                m.start = i[1] - m.start + 1
-                m.end = i[1] - m.end + 1
-            m.write(fout)
-    fout.close()
-    fin.close()
+    if dataFormat == "path":
+        db.create_path( tableName, fileName )
+    elif dataFormat == "align":
+        db.create_align( tableName, fileName )
+    elif dataFormat == "match":
+        db.create_match( tableName, fileName )
+    elif dataFormat == "set":
+        db.create_set( tableName, fileName )
+    elif dataFormat == "map":
+        db.create_map( tableName, fileName )
 
 #----------------------------------------------------------------------------
 
-def conv_path_table( dChunk2Link, coordTable, outTable ):
+def conv_table( map_tablename, coordTable, outTable, dataFormat ):
 
     """
-    Convert the coordinates recorded in a 'path' table.
+    Convert the coordinates recorded in a table with a single 'INSERT ... SELECT' joining it with the map table.
+    The sequence names are matched on their first word, the subject names (if any) on the whole name.
+    Rows whose sequence is not a chunk are not kept.
 
-    @param dChunk2Link: dictionary whose keys are the chunk names and values a list with chromosome name, start and end
-    @type dChunk2Link: dictionary
+    @param map_tablename: name of the table recording the coordinates of the chunks on the chromosomes
+    @type map_tablename: string
 
     @param coordTable: name of the table recording the coordinates you want to convert
     @type coordTable: string
 
     @param outTable: name of the output table
     @type outTable: string
-    """
 
-    tmpFileName = "%i.on_chr" % ( os.getpid() )
-    tmpFile = open( tmpFileName, "w" )
-    p = pyRepet.coord.Path.Path()
-
-    # for each chunk
-    lChunks = dChunk2Link.keys()
-    lChunks.sort()
-    for chunkName in lChunks:
-        if verbose > 1:
-            print "processing %s..." % ( chunkName ); sys.stdout.flush()
-
-        # retrieve its matches
-        sql_cmd = "SELECT * FROM %s WHERE query_name LIKE \"%s %%\" or query_name=\"%s\";" \
-                  % ( coordTable, chunkName, chunkName )
-        db.execute( sql_cmd )
-        lPaths = db.fetchall()
-
-        # for each match
-        for path in lPaths:
-            p.set_from_tuple( path )
-
-            # convert the coordinates on the query
-            link = dChunk2Link[chunkName]
-            p.range_query.seqname = link[0]
-            if ( link[1] < link[2] ):
-                p.range_query.start = p.range_query.start + link[1] - 1
-                p.range_query.end = p.range_query.end + link[1] - 1
-            else:
-                p.range_query.start = link[1] - p.range_query.start + 1
-                p.range_query.end = link[1] - p.range_query.end + 1
-
-            # convert the coordinates on the subject (if necessary)
-            link = dChunk2Link.get( p.range_subject.seqname )
-            if link != None:
-                if verbose > 1:
-                    print "convert subject: %s" % ( p.range_subject.seqname )
-                p.range_subject.seqname = link[0]
-                p.range_subject.start = p.range_subject.start + link[1] - 1
-                p.range_subject.end = p.range_subject.end + link[1] - 1
-            p.write( tmpFile )
-    tmpFile.close()
-
-    db.create_path( outTable, tmpFileName )
-
-    os.system( "rm -f " + tmpFileName )
-
-#----------------------------------------------------------------------------
-
-# convert a match table format        
-
-def conv_match_table( chunk, table, outTable ):
-
-    temp_file=str(os.getpid())+".on_chr"
-    fout=open(temp_file,'w')
-    fout.write("dummy line \n")
-    m=pyRepet.coord.Match.Match()
-    for chunkName in chunk.keys():
-        sql_cmd='select * from %s where query_name like "%s %%" or query_name="%s" ;'\
-                 %(table,chunkName,chunkName)
-        db.execute(sql_cmd)
-        res=db.fetchall()
-        for t in res:
-            m.set_from_tuple(t)
-            i=chunk[chunkName]
-            m.range_query.seqname=i[0]
-            if(i[1]<i[2]):
-                m.range_query.start=m.range_query.start+i[1]-1
-                m.range_query.end=m.range_query.end+i[1]-1
-            else:
-                m.range_query.start=i[1]-m.range_query.start+1
-                m.range_query.end=i[1]-m.range_query.end+1
-            m.write(fout)
-    fout.close()
-
-    db.create_path( outTable, temp_file )
+    @param dataFormat: format of the table (path/align/match/set/map)
+    @type dataFormat: string
+    """
 
-    os.system("rm -f "+temp_file)
+    lFields, queryIndex, subjectIndex = dFormat2Fields[ dataFormat ]
+    lExpressions = []
+    for i in xrange( 0, len(lFields) ):
+        if i == queryIndex:
+            lExpressions.append( "m.chr" )
+        elif i in [ queryIndex + 1, queryIndex + 2 ]:
+            lExpressions.append( "IF( m.start < m.end, t.%s + m.start - 1, m.start - t.%s + 1 )" % ( lFields[i], lFields[i] ) )
+        elif subjectIndex != None and i == subjectIndex:
+            lExpressions.append( "IFNULL( s.chr, t.%s )" % ( lFields[i] ) )
+        elif subjectIndex != None and i in [ subjectIndex + 1, subjectIndex + 2 ]:
+            lExpressions.append( "IF( s.name IS NULL, t.%s, t.%s + s.start - 1 )" % ( lFields[i], lFields[i] ) )
+        else:
+            lExpressions.append( "t.%s" % ( lFields[i] ) )
+
+    create_table( outTable, dataFormat )
+    sql_cmd = "INSERT INTO %s SELECT %s" % ( outTable, ", ".join( lExpressions ) )
+    sql_cmd += " FROM %s AS t JOIN %s AS m ON m.name = SUBSTRING_INDEX( t.%s, ' ', 1 )" % ( coordTable, map_tablename, lFields[queryIndex] )
+    if subjectIndex != None:
+        sql_cmd += " LEFT JOIN %s AS s ON s.name = t.%s" % ( map_tablename, lFields[subjectIndex] )
+    if verbose > 1:
+        print sql_cmd; sys.stdout.flush()
+    db.execute( sql_cmd )
 
 #----------------------------------------------------------------------------
 
-# convert a map table format        
-
-def conv_map_table( chunk, table, outTable ):
-
-    temp_file=str(os.getpid())+".on_chr"
-    fout=open(temp_file,'w')
-    m=pyRepet.coord.Map.Map()
-    for chunkName in chunk.keys():
-        sql_cmd='select * from %s where chr like "%s %%" or chr="%s";'\
-                 %(table,chunkName,chunkName)
-        db.execute(sql_cmd)
-        res=db.fetchall()
-        for t in res:
-            m.set_from_tuple(t)
-            i=chunk[chunkName]
-            m.seqname=i[0]
-            if(i[1]<i[2]):
-                m.start=m.start+i[1]-1
-                m.end=m.end+i[1]-1
-            else:
-                m.start=i[1]-m.start+1
-                m.end=i[1]-m.end+1
-            m.write(fout)
-    fout.close()
+def conv_table_via_file( dChunk2Link, coordTable, outTable, dataFormat ):
 
-    db.create_path( outTable, temp_file )
+    """
+    Convert the coordinates recorded in a table by exporting it into a file, converting the file and loading it.
+    The result is the same as with 'conv_table()'.
+    """
 
-    os.system("rm -f "+temp_file)                
+    tmpFileName = "%i.on_chk" % ( os.getpid() )
+    db.export( coordTable, tmpFileName, keepFirstLine=( dataFormat == "match" ) )
+    conv_file( dChunk2Link, tmpFileName, "%i.on_chr" % ( os.getpid() ), dataFormat, escapeFirstLine=( dataFormat == "match" ), skipUnknownChunks=True )
+    os.remove( tmpFileName )
+    tmpFileName = "%i.on_chr" % ( os.getpid() )
+    create_table( outTable, dataFormat, tmpFileName )
+    os.remove( tmpFileName )
 
 #----------------------------------------------------------------------------
 
-def conv_set_table( dChunk2Link, table, outTable ):
+def conv_file( dChunk2Link, inFileName, outFileName, dataFormat, escapeFirstLine=False, convertSubjects=True, skipUnknownChunks=False ):
 
     """
-    Convert the coordinates recorded in a 'set' table.
+    Convert the coordinates recorded in a file, working on the columns of each line.
 
     @param dChunk2Link: dictionary whose keys are the chunk names and values a list with chromosome name, start and end
     @type dChunk2Link: dictionary
 
-    @param coordTable: name of the table recording the coordinates you want to convert
-    @type coordTable: string
+    @param dataFormat: format of the file (path/align/match/set/map)
+    @type dataFormat: string
 
-    @param outTable: name of the output table
-    @type outTable: string
-    """
+    @param escapeFirstLine: copy the first line (header) without converting it
+    @type escapeFirstLine: boolean
 
-    tmpFileName = "%i.on_chr" % ( os.getpid() )
-    tmpFile = open( tmpFileName, "w" )
-    s = pyRepet.coord.Set.Set()
+    @param convertSubjects: also convert the subject coordinates when the subject is a chunk
+    @type convertSubjects: boolean
 
-    for chunkName in dChunk2Link.keys():
-        if verbose > 1:
-            print "processing %s..." % ( chunkName ); sys.stdout.flush()
-        sql_cmd='select * from %s where chr like "%s %%" or chr="%s";'\
-                 %(table,chunkName,chunkName)
-        db.execute(sql_cmd)
-        res=db.fetchall()
-        for t in res:
-            s.set_from_tuple(t)
-            i=dChunk2Link[chunkName]
-            s.seqname=i[0]
-            if(i[1]<i[2]):
-                s.start=s.start+i[1]-1
-                s.end=s.end+i[1]-1
-            else:
-                s.start=i[1]-s.start+1
-                s.end=i[1]-s.end+1
-            s.write(tmpFile)
-    tmpFile.close()
-
-    db.create_set( outTable, tmpFileName )
+    @param skipUnknownChunks: skip the lines whose sequence is not a chunk (error otherwise)
+    @type skipUnknownChunks: boolean
+    """
 
-    os.remove( tmpFileName )
+    lFields, queryIndex, subjectIndex = dFormat2Fields[ dataFormat ]
+    if not convertSubjects:
+        subjectIndex = None
+    inFile = open( inFileName, "r" )
+    outFile = open( outFileName, "w" )
+    if escapeFirstLine:
+        outFile.write( inFile.readline() )
+    for line in inFile:
+        lColumns = line.rstrip("\n").split("\t")
+        if len(lColumns) < len(lFields):
+            continue
+        chunkName = lColumns[ queryIndex ].split(" ")[0]
+        if not dChunk2Link.has_key( chunkName ):
+            if skipUnknownChunks:
+                continue
+            print "*** Error: chunk '%s' not found" % ( lColumns[ queryIndex ] )
+            sys.exit(1)
+        link = dChunk2Link[ chunkName ]
+        lColumns[ queryIndex ] = link[0]
+        for i in [ queryIndex + 1, queryIndex + 2 ]:
+            if link[1] < link[2]:
+                lColumns[i] = str( int(lColumns[i]) + link[1] - 1 )
+            else:
+                lColumns[i] = str( link[1] - int(lColumns[i]) + 1 )
+        if subjectIndex != None and dChunk2Link.has_key( lColumns[ subjectIndex ] ):
+            link = dChunk2Link[ lColumns[ subjectIndex ] ]
+            lColumns[ subjectIndex ] = link[0]
+            for i in [ subjectIndex + 1, subjectIndex + 2 ]:
+                lColumns[i] = str( int(lColumns[i]) + link[1] - 1 )
+        outFile.write( "%s\n" % ( "\t".join( lColumns ) ) )
+    inFile.close()
+    outFile.close()
 
 #----------------------------------------------------------------------------
 
-def conv_align_table( dChunk2Link, coordTable, outTable ):
+def connect_path_chunks( dChunk2Link, pathFileName, nbProcesses=1 ):
 
     """
-    Convert the coordinates recorded in an 'align' table.
+    Merge the paths of a 'path' file split by the chunk overlaps.
+    The file is read once and the merges are done in memory, one chromosome at a time.
 
     @param dChunk2Link: dictionary whose keys are the chunk names and values a list with chromosome name, start and end
     @type dChunk2Link: dictionary
 
-    @param coordTable: name of the table recording the coordinates you want to convert
-    @type coordTable: string
+    @param pathFileName: name of the 'path' file with coordinates on chromosomes, replaced by the merged one
+    @type pathFileName: string
 
-    @param outTable: name of the output table
-    @type outTable: string
+    @param nbProcesses: number of processes, each one merging a chromosome
+    @type nbProcesses: integer
     """
 
-    tmpFileName = "%i.on_chr" % ( os.getpid() )
-    tmpFile = open( tmpFileName, "w" )
-    p = pyRepet.coord.Align.Align()
-
-    # for each chunk
-    lChunks = dChunk2Link.keys()
-    lChunks.sort()
-    for chunkName in lChunks:
-        if verbose > 1:
-            print "processing %s..." % ( chunkName ); sys.stdout.flush()
-
-        # retrieve its matches
-        sql_cmd = "SELECT * FROM %s WHERE query_name LIKE \"%s %%\" or query_name=\"%s\";" \
-                  % ( coordTable, chunkName, chunkName )
-        db.execute( sql_cmd )
-        lHSPs = db.fetchall()
-
-        # for each HSP
-        for align in lHSPs:
-            p.set_from_tuple( align )
-
-            # convert the coordinates on the query
-            link = dChunk2Link[chunkName]
-            p.range_query.seqname = link[0]
-            if ( link[1] < link[2] ):
-                p.range_query.start = p.range_query.start + link[1] - 1
-                p.range_query.end = p.range_query.end + link[1] - 1
-            else:
-                p.range_query.start = link[1] - p.range_query.start + 1
-                p.range_query.end = link[1] - p.range_query.end + 1
-
-            # convert the coordinates on the subject (if necessary)
-            link = dChunk2Link.get( p.range_subject.seqname )
-            if link != None:
-                if verbose > 1:
-                    print "convert subject: %s" % ( p.range_subject.seqname )
-                p.range_subject.seqname = link[0]
-                p.range_subject.start = p.range_subject.start + link[1] - 1
-                p.range_subject.end = p.range_subject.end + link[1] - 1
-            p.write( tmpFile )
-    tmpFile.close()
-
-    db.create_align( outTable, tmpFileName )
-
-    os.system( "rm -f " + tmpFileName )
-
-#----------------------------------------------------------------------------
-
-def connect_path_chunks( chunk, table, db, verbose ):
-
     if verbose > 0:
         print "connect chunks..."
         sys.stdout.flush()
 
-    tablePathAdaptator = pyRepet.sql.TableAdaptator.TablePathAdaptator( db, table )
-
-    nbChunks = len(chunk.keys())
+    dChunks2CoordMaps = {}
+    for chunkName, link in dChunk2Link.items():
+        dChunks2CoordMaps[ chunkName ] = Map( chunkName, link[0], link[1], link[2] )
 
-    for num_chunk in xrange(1,nbChunks):
-        #chunkName = "chunk"+str(num_chunk)
-        chunkName = "chunk%s" % ( str(num_chunk).zfill( len(str(nbChunks)) ) )
-        
-        #next_chunkName="chunk"+str(num_chunk+1)
-        next_chunkName = "chunk%s" % ( str(num_chunk+1).zfill( len(str(nbChunks)) ) )
-
-        if next_chunkName not in chunk.keys():
-            break
-        if verbose > 1:
-            print "try with %s and %s" % ( chunkName, next_chunkName )
-            sys.stdout.flush()
-            
-        start=chunk[chunkName][2]
-        end=chunk[next_chunkName][1]
-        if chunk[chunkName][0] == chunk[next_chunkName][0]:
-            lpath=tablePathAdaptator.getPathList_from_qcoord( chunk[chunkName][0], start, end )
-            if verbose > 1:
-                print "%i matches on %s (%i->%i)" % ( len(lpath), chunk[chunkName][0], start, end )
-                sys.stdout.flush()
-            lpath.sort()
-            chg_path_id={}
-            pathnum_to_ins=[]
-            pathnum_to_del=[]
-            dpath=[]
-            rpath=[]
-            for i in lpath:
-                if i.range_query.isPlusStrand() and i.range_subject.isPlusStrand():
-                    dpath.append(i)
-                else:
-                    rpath.append(i)
-            x=0
-            while x < len(dpath)-1:
-                x=x+1
-                if verbose > 1:
-                    dpath[x-1].show()
-                    dpath[x].show()
-
-                if dpath[x-1].id != dpath[x].id \
-                   and dpath[x-1].range_query.seqname\
-                   ==dpath[x].range_query.seqname\
-                   and dpath[x-1].range_subject.seqname\
-                   ==dpath[x].range_subject.seqname\
-                   and dpath[x-1].range_query.isPlusStrand()\
-                   ==dpath[x].range_query.isPlusStrand()\
-                   and dpath[x-1].range_subject.isPlusStrand()\
-                   ==dpath[x].range_subject.isPlusStrand()\
-                   and dpath[x-1].range_query.overlap(dpath[x].range_query)\
-                   and dpath[x-1].range_subject.overlap(dpath[x].range_subject):
-                    chg_path_id[dpath[x].id]=dpath[x-1].id
-                    if dpath[x-1].id not in pathnum_to_ins:
-                        pathnum_to_ins.append(dpath[x-1].id)
-                    if dpath[x].id not in pathnum_to_del:
-                        pathnum_to_del.append(dpath[x].id)
-                    dpath[x-1].merge(dpath[x])
-                    del dpath[x]
-                    x=x-1
-                    if verbose > 1:
-                        print "--> merged"
-            x=0
-            while x < len(rpath)-1:
-                x=x+1
-                if verbose > 1:
-                    rpath[x-1].show()
-                    rpath[x].show()
-
-                if rpath[x-1].id != rpath[x].id \
-                   and rpath[x-1].range_query.seqname\
-                   ==rpath[x].range_query.seqname\
-                   and rpath[x-1].range_subject.seqname\
-                   ==rpath[x].range_subject.seqname\
-                   and rpath[x-1].range_query.isPlusStrand()\
-                   ==rpath[x].range_query.isPlusStrand()\
-                   and rpath[x-1].range_subject.isPlusStrand()\
-                   ==rpath[x].range_subject.isPlusStrand()\
-                   and rpath[x-1].range_query.overlap(rpath[x].range_query)\
-                   and rpath[x-1].range_subject.overlap(rpath[x].range_subject):
-                    chg_path_id[rpath[x].id]=rpath[x-1].id
-                    if rpath[x-1].id not in pathnum_to_ins:
-                        pathnum_to_ins.append(rpath[x-1].id)
-                    if rpath[x].id not in pathnum_to_del:
-                        pathnum_to_del.append(rpath[x].id)
-                    rpath[x-1].merge(rpath[x])
-                    del rpath[x]
-                    x=x-1
-                    if verbose > 1:
-                        print "--> merged"
-            if verbose > 1:
-                print "pathnum to delete", pathnum_to_del
-            tablePathAdaptator.delPath_from_listnum(pathnum_to_del)
-            tablePathAdaptator.delPath_from_listnum(pathnum_to_ins)
-            for i in dpath:
-                if chg_path_id.has_key(i.id):
-                    i.id=chg_path_id[i.id]
-                if verbose > 1:
-                    i.show()
-                if i.id in pathnum_to_ins:
-                    tablePathAdaptator.insAPath(i)
-                    if verbose > 1:
-                        print "--> inserted!"
-            for i in rpath:
-                if chg_path_id.has_key(i.id):
-                    i.id=chg_path_id[i.id]
-                if verbose > 1:
-                    i.show()
-                if i.id in pathnum_to_ins:
-                    tablePathAdaptator.insAPath(i)
-                    if verbose > 1:
-                        print "--> inserted!"
-            sys.stdout.flush()
+    iConvCoord = ConvCoord()
+    iConvCoord.setNbProcesses( nbProcesses )
+    iConvCoord.setVerbosityLevel( verbose )
+    tmpFileName = "%s.connected" % ( pathFileName )
+    iConvCoord.mergeCoordsOnChunkOverlapsInFile( dChunks2CoordMaps, pathFileName, tmpFileName )
+    os.rename( tmpFileName, pathFileName )
 
 #----------------------------------------------------------------------------
 
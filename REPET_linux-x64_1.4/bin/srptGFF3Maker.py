@@ -9,6 +9,10 @@ import sys
 import getopt
 import ConfigParser
 import glob
+import multiprocessing
+import itertools
+import operator
+import heapq
 
 if not os.environ.has_key( "REPET_PATH" ):
     print "ERROR: no environment variable REPET_PATH"
@@ -16,6 +20,7 @@ if not os.environ.has_key( "REPET_PATH" ):
 sys.path.append( os.environ["REPET_PATH"] )
 
 from pyRepet.sql.RepetDB import *
+import pyRepet.seq.Bioseq
 
 
 def help():
@@ -29,12 +34,14 @@ def help():
     print "     -f: 'fasta' file or 'seq' table recording the input sequences (required to generate new '.gff3' files)"
     print "     -g: gff3 file or pattern (e.g. '*.gff3')"
     print "     -t: file of table name to use to create the gff3 files (tier name 'tab' format 'tab' table name)"
+    print "         (with -f and without -g, each gff3 file is written once with all its annotations)"
     print "     -c: Chado compliance"
     print "     -C: configuration file from TEdenovo or TEannot pipeline"
     print "     -H: MySQL host (if no configuration file)"
     print "     -U: MySQL user (if no configuration file)"
     print "     -P: MySQL password (if no configuration file)"
     print "     -D: MySQL database (if no configuration file)"
+    print "     -p: number of processes used to write the gff3 files (with -f and -t, default=1)"
     print "     -v: verbose (default=0/1/2/3)"
     print
 
@@ -160,21 +167,34 @@ def getPathFeatures( pathTable, seqName, source, feature, frame, chado ):
     @type chado: boolean
     """
 
-    string = ""
-
     # retrieve all the data about the matches
     qry = "SELECT DISTINCT path, query_start, query_end, subject_name, subject_start, subject_end, E_value FROM %s WHERE query_name=\"%s\"" % ( pathTable, seqName )
     db.execute( qry )
     data = db.fetchall()
 
+    return getPathFeaturesFromRows( data, seqName, source, frame, chado )
+
+
+def getPathFeaturesFromRows( data, seqName, source, frame, chado ):
+    """
+    Build the features to write in the GFF3 file from the 'path' rows of a sequence.
+
+    @param data: rows (path, query_start, query_end, subject_name, subject_start, subject_end, E_value)
+    @type data: list of lists
+
+    @return: lines to write in the GFF3 file
+    @rtype: string
+    """
+
     # organise them into 'match' and 'match_part'
     dPathID2Data = gatherSamePathFeatures( data )
 
     # build the output string
+    lFeatures = []
     for pathID in dPathID2Data:
-        string += organizeEachPathFeature( pathID, dPathID2Data[ pathID ], seqName, source, frame, chado )
+        lFeatures.append( organizeEachPathFeature( pathID, dPathID2Data[ pathID ], seqName, source, frame, chado ) )
 
-    return string
+    return "".join( lFeatures )
 
 
 def gatherSamePathFeatures( data ):
@@ -247,7 +267,7 @@ def organizeEachPathFeature( pathID, lMatches, seqName, source, frame, chado ):
     @rtype: string
     """
 
-    string = ""
+    lLines = []
 
     minStart = lMatches[0][0]
     maxEnd = lMatches[0][1]
@@ -277,7 +297,7 @@ def organizeEachPathFeature( pathID, lMatches, seqName, source, frame, chado ):
         attributes += ";Target=%s+%s+%s" % ( target, minStartSubject, maxEndSubject )
     else:
         attributes += ";Target=%s %s %s" % ( target, minStartSubject, maxEndSubject )
-    string += "%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\n" % ( seqName, source, "match", minStart, maxEnd, "0.0", strand, frame, attributes )
+    lLines.append( "%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\n" % ( seqName, source, "match", minStart, maxEnd, "0.0", strand, frame, attributes ) )
 
     if len(lMatches) > 1:
         count = 1
@@ -288,10 +308,10 @@ def organizeEachPathFeature( pathID, lMatches, seqName, source, frame, chado ):
                 attributes += ";Target=%s+%s+%s" % ( target, i[4], i[5] )
             else:
                 attributes += ";Target=%s %s %s" % ( target, i[4], i[5] )
-            string += "%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\n" % ( seqName, source, "match_part", i[0], i[1], i[6], i[2], frame, attributes )
+            lLines.append( "%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\n" % ( seqName, source, "match_part", i[0], i[1], i[6], i[2], frame, attributes ) )
             count += 1
 
-    return string
+    return "".join( lLines )
 
 
 def saveAnnotSet( key, table, tierName, chado ):
@@ -363,21 +383,34 @@ def getSetFeatures( table, key, source, feature, frame, chado ):
     @type chado: boolean
     """
 
-    string = ""
-
     # retrieve all the data about the matches
     qry = "SELECT DISTINCT path,name,start,end FROM %s WHERE chr=\"%s\"" % ( table, key )
     db.execute( qry )
     data = db.fetchall()
 
+    return getSetFeaturesFromRows( data, key, source, frame, chado )
+
+
+def getSetFeaturesFromRows( data, key, source, frame, chado ):
+    """
+    Build the features to write in the GFF3 file from the 'set' rows of a sequence.
+
+    @param data: rows (path, name, start, end)
+    @type data: list of lists
+
+    @return: lines to write in the GFF3 file
+    @rtype: string
+    """
+
     # organise them into 'match' and 'match_part'
     dPathID2Data = gatherSameSetFeatures( data )
 
     # build the output string
+    lFeatures = []
     for pathID in dPathID2Data:
-        string += organizeEachSetFeature( pathID, dPathID2Data[ pathID ], key, source, frame, chado )
+        lFeatures.append( organizeEachSetFeature( pathID, dPathID2Data[ pathID ], key, source, frame, chado ) )
 
-    return string
+    return "".join( lFeatures )
 
 
 def gatherSameSetFeatures( data ):
@@ -438,7 +471,7 @@ def organizeEachSetFeature( pathID, lMatches, seqName, source, frame, chado ):
     @rtype: string
     """
 
-    string = ""
+    lLines = []
 
     minStart = lMatches[0][1]
     maxEnd = lMatches[0][2]
@@ -460,7 +493,7 @@ def organizeEachSetFeature( pathID, lMatches, seqName, source, frame, chado ):
         attributes += ";Target=%s+%s+%s" % ( target, "1", abs(minStart-maxEnd)+1 )
     else:
         attributes += ";Target=%s %s %s" % ( target, "1", abs(minStart-maxEnd)+1 )
-    string += "%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\n" % ( seqName, source, "match", minStart, maxEnd, "0.0", strand, frame, attributes )
+    lLines.append( "%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\n" % ( seqName, source, "match", minStart, maxEnd, "0.0", strand, frame, attributes ) )
 
     if len(lMatches) > 1:
         count = 1
@@ -471,10 +504,235 @@ def organizeEachSetFeature( pathID, lMatches, seqName, source, frame, chado ):
                 attributes += ";Target=%s+%s+%s" % ( target, "1", abs(i[1]-i[2])+1 )
             else:
                 attributes += ";Target=%s %s %s" % ( target, "1", abs(i[1]-i[2])+1 )
-            string += "%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\n" % ( seqName, source, "match_part", i[1], i[2], "0.0", i[3], frame, attributes )
+            lLines.append( "%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\n" % ( seqName, source, "match_part", i[1], i[2], "0.0", i[3], frame, attributes ) )
             count += 1
 
-    return string
+    return "".join( lLines )
+
+
+def readTablesFile( tablesFileName ):
+    """
+    Read the file of the tables to use to create the gff3 files.
+
+    @param tablesFileName: name of the file (tier name 'tab' format 'tab' table name)
+    @type tablesFileName: string
+
+    @return: list of tiers ( [ tierName, format, table ] )
+    @rtype: list of lists of strings
+    """
+
+    lTiers = []
+    tablesFile = open( tablesFileName, "r" )
+    for l in tablesFile:
+        if l[0] == "#":
+            continue
+        tok = l.split()
+        if len(tok) == 0:
+            break
+        lTiers.append( tok[0:3] )
+    tablesFile.close()
+    return lTiers
+
+
+def iterTierRowsPerSequence( lTiers ):
+    """
+    Give the annotations of all the tables, one sequence at a time (sorted by name).
+    Each table is read once, sorted by sequence, through its own streaming
+    connection, and the tables are merged so that only the rows of the current
+    sequence are held in memory.
+
+    @param lTiers: list of tiers ( [ tierName, format, table ] )
+    @type lTiers: list of lists of strings
+
+    @return: generator of ( sequence name, list of the rows of each tier )
+    """
+
+    lConnections = []
+    heap = []
+    for tierIndex in xrange( 0, len(lTiers) ):
+        tierName, format, table = lTiers[ tierIndex ]
+        if format == "path":
+            qry = "SELECT DISTINCT query_name, path, query_start, query_end, subject_name, subject_start, subject_end, E_value FROM %s ORDER BY BINARY query_name, path" % ( table )
+        elif format == "set":
+            qry = "SELECT DISTINCT chr, path, name, start, end FROM %s ORDER BY BINARY chr, path" % ( table )
+        else:
+            continue
+        if verbose > 0:
+            print "retrieve annotations from table '%s' (format %s)" % ( table, format )
+            sys.stdout.flush()
+        # the rows are streamed, hence one connection per table
+        tierDb = RepetDB( db.user, db.host, db.passwd, db.dbname, db.port )
+        lConnections.append( tierDb )
+        iGroups = itertools.groupby( tierDb.iterate( qry ), operator.itemgetter(0) )
+        pushNextSequence( heap, tierIndex, iGroups )
+
+    try:
+        while len(heap) > 0:
+            seqName = heap[0][0]
+            lTierRows = [ [] for i in lTiers ]
+            while len(heap) > 0 and heap[0][0] == seqName:
+                name, tierIndex, lRows, iGroups = heapq.heappop( heap )
+                lTierRows[ tierIndex ] = lRows
+                pushNextSequence( heap, tierIndex, iGroups )
+            yield seqName, lTierRows
+    finally:
+        del heap[:]
+        for tierDb in lConnections:
+            tierDb.close()
+
+
+def pushNextSequence( heap, tierIndex, iGroups ):
+    """
+    Push on the heap the rows of the next sequence of a table, if any.
+    """
+
+    for seqName, iRows in iGroups:
+        heapq.heappush( heap, ( seqName, tierIndex, [ row[1:] for row in iRows ], iGroups ) )
+        break
+
+
+def iterSequences( seqData ):
+    """
+    Give the input sequences one at a time, sorted by name.
+
+    @param seqData: 'fasta' file or 'seq' table recording the input sequences
+    @type seqData: string
+
+    @return: generator of ( name, length, sequence )
+    """
+
+    if os.path.exists( seqData ):
+        lHeaders = []
+        inFile = open( seqData, "r" )
+        while True:
+            offset = inFile.tell()
+            line = inFile.readline()
+            if line == "":
+                break
+            if line[0] == ">":
+                lHeaders.append( ( line[1:].rstrip(), offset ) )
+        lHeaders.sort()
+        bs = pyRepet.seq.Bioseq.Bioseq()
+        for header, offset in lHeaders:
+            inFile.seek( offset )
+            bs.read( inFile )
+            yield bs.header, bs.getLength(), bs.sequence
+        inFile.close()
+
+    elif db.exist( seqData ):
+        qry = "SELECT DISTINCT accession,length,sequence FROM %s ORDER BY BINARY accession" % ( seqData )
+        for seq in db.iterate( qry ):
+            yield seq[0], int(seq[1]), seq[2]
+
+    else:
+        print "ERROR: no file or table '%s' exists" % ( seqData )
+        sys.exit(1)
+
+
+# number of sequences handed to each process at once by saveAnnotations()
+SEQUENCE_BATCH_SIZE = 10
+
+
+# Functions (module level, to be usable by a multiprocessing pool)
+
+def writeGff3File( args ):
+    """
+    Write the GFF3 file of a sequence at once: header, features of each tier, then sequence.
+
+    @param args: ( seqName, seqLength, sequence, lTierRows, lTiers, chado )
+    @type args: tuple
+
+    @return: name of the sequence
+    @rtype: string
+    """
+
+    seqName, seqLength, sequence, lTierRows, lTiers, chado = args
+
+    lLines = [ "##gff-version 3\n", "##sequence-region %s 1 %s\n" % ( seqName, seqLength ) ]
+    for tierIndex in xrange( 0, len(lTiers) ):
+        tierName, format, table = lTiers[ tierIndex ]
+        if format == "path":
+            lLines.append( getPathFeaturesFromRows( lTierRows[ tierIndex ], seqName, tierName, ".", chado ) )
+        elif format == "set":
+            lLines.append( getSetFeaturesFromRows( lTierRows[ tierIndex ], seqName, tierName, ".", chado ) )
+    lLines.append( "##FASTA\n" )
+    lLines.append( ">%s\n" % ( seqName ) )
+    for i in xrange( 0, seqLength, 60 ):
+        lLines.append( sequence[i:i+60] + "\n" )
+
+    outFile = open( "%s.gff3" % ( seqName ), "w" )
+    outFile.write( "".join( lLines ) )
+    outFile.close()
+
+    return seqName
+
+
+def saveAnnotations( seqData, lTiers, chado, nbProcesses=1 ):
+    """
+    Create the GFF3 files with all their annotations, each file being written only once.
+
+    @param seqData: 'fasta' file or 'seq' table recording the input sequences
+    @type seqData: string
+
+    @param lTiers: list of tiers ( [ tierName, format, table ] )
+    @type lTiers: list of lists of strings
+
+    @param chado: Chado compliance
+    @type chado: boolean
+
+    @param nbProcesses: number of processes used to write the files
+    @type nbProcesses: integer
+    """
+
+    lNoRows = [ [] for i in lTiers ]
+
+    if verbose > 0:
+        print "write the GFF3 file(s)..."
+        sys.stdout.flush()
+    if nbProcesses > 1:
+        pool = multiprocessing.Pool( nbProcesses )
+        mapFunction = pool.map
+    else:
+        mapFunction = map
+
+    # the sequences and their annotations, both sorted by sequence name, are merged in the main process
+    # and handed to the workers by batches, to bound the memory
+    iTierRows = iterTierRowsPerSequence( lTiers )
+    annotSeqName, lTierRows = next( iTierRows, ( None, None ) )
+    lArgs = []
+    for seqName, seqLength, sequence in iterSequences( seqData ):
+        while annotSeqName != None and annotSeqName < seqName:
+            annotSeqName, lTierRows = next( iTierRows, ( None, None ) )
+        if annotSeqName == seqName:
+            lArgs.append( ( seqName, seqLength, sequence, lTierRows, lTiers, chado ) )
+        else:
+            lArgs.append( ( seqName, seqLength, sequence, lNoRows, lTiers, chado ) )
+        if len(lArgs) == SEQUENCE_BATCH_SIZE * nbProcesses:
+            writeGff3Files( mapFunction, lArgs )
+            lArgs = []
+    writeGff3Files( mapFunction, lArgs )
+    iTierRows.close()
+
+    if nbProcesses > 1:
+        pool.close()
+        pool.join()
+
+
+def writeGff3Files( mapFunction, lArgs ):
+    """
+    Write the GFF3 files of a batch of sequences.
+
+    @param mapFunction: 'map' or the 'map' method of a multiprocessing pool
+    @type mapFunction: function
+
+    @param lArgs: arguments of writeGff3File() for each sequence
+    @type lArgs: list of tuples
+    """
+
+    for seqName in mapFunction( writeGff3File, lArgs ):
+        if verbose > 1:
+            print "file '%s.gff3' written" % ( seqName )
+            sys.stdout.flush()
 
 
 def getStrand( start, end ):
@@ -508,11 +766,12 @@ def main():
     user = ""
     passwd = ""
     dbname = ""
+    nbProcesses = 1
     global verbose
     verbose = 0
 
     try:
-        options,arguments=getopt.getopt(sys.argv[1:],"hf:g:t:cC:H:U:P:D:v:")
+        options,arguments=getopt.getopt(sys.argv[1:],"hf:g:t:cC:H:U:P:D:p:v:")
     except getopt.GetoptError, err:
         print str(err)
         help()
@@ -542,6 +801,8 @@ def main():
             passwd = a
         elif o == "-D":
             dbname = a
+        elif o == "-p":
+            nbProcesses = int(a)
         elif o == "-v":
             verbose = int(a)
 
@@ -583,43 +844,48 @@ def main():
         print "ERROR: no environment variable REPET_PATH"
         sys.exit(1)
 
-    # create all the ".gff3" files (option '-f')
-    if seqData != "":
-        createGff3Files( seqData )
+    # create all the ".gff3" files with their annotations at once (options '-f' and '-t')
+    if seqData != "" and tablesFileName != "" and gff3FileName == "":
+        saveAnnotations( seqData, readTablesFile( tablesFileName ), chado, nbProcesses )
 
-    # save the annotations in the gff3 file
-    if tablesFileName != "":
-        if os.path.exists( gff3FileName ):
-            lGff3Files = [ gff3FileName ]
-        else:
-            lGff3Files = glob.glob( gff3FileName )
-            if len(lGff3Files) == 0:
-                print "ERROR: '%s' is neither a file nor a pattern" % ( gff3FileName )
-                sys.exit(1)
-        for gff3File in lGff3Files:
-            if verbose > 0:
-                print "handle file '%s'" % ( gff3File )
-                sys.stdout.flush()
-            key = gff3File.split(".gff3")[0]
-            tablesFile = open( tablesFileName, "r" )
-            lines = tablesFile.readlines()
-            for l in lines:
-                if l[0] == "#":
-                    continue
-                tok = l.split()
-                if len(tok) == 0:
-                    break
-                tierName = tok[0]
-                format = tok[1]
-                table = tok[2]
+    else:
+        # create all the ".gff3" files (option '-f')
+        if seqData != "":
+            createGff3Files( seqData )
+
+        # save the annotations in the gff3 file
+        if tablesFileName != "":
+            if os.path.exists( gff3FileName ):
+                lGff3Files = [ gff3FileName ]
+            else:
+                lGff3Files = glob.glob( gff3FileName )
+                if len(lGff3Files) == 0:
+                    print "ERROR: '%s' is neither a file nor a pattern" % ( gff3FileName )
+                    sys.exit(1)
+            for gff3File in lGff3Files:
                 if verbose > 0:
-                    print "save annotations from table '%s' (format %s)" % ( table, format)
+                    print "handle file '%s'" % ( gff3File )
                     sys.stdout.flush()
-                if format == "path":
-                    saveAnnotPath( key, table, tierName, chado )
-                elif format == "set":
-                    saveAnnotSet( key, table, tierName, chado )
-            tablesFile.close()
+                key = gff3File.split(".gff3")[0]
+                tablesFile = open( tablesFileName, "r" )
+                lines = tablesFile.readlines()
+                for l in lines:
+                    if l[0] == "#":
+                        continue
+                    tok = l.split()
+                    if len(tok) == 0:
+                        break
+                    tierName = tok[0]
+                    format = tok[1]
+                    table = tok[2]
+                    if verbose > 0:
+                        print "save annotations from table '%s' (format %s)" % ( table, format)
+                        sys.stdout.flush()
+                    if format == "path":
+                        saveAnnotPath( key, table, tierName, chado )
+                    elif format == "set":
+                        saveAnnotSet( key, table, tierName, chado )
+                tablesFile.close()
 
     if verbose > 0:
         print "END %s" % (sys.argv[0].split("/")[-1])
@@ -11,8 +11,8 @@ import ConfigParser
 import logging
 
 from pyRepetUnit.commons.sql.DbMySql import DbMySql
-from pyRepetUnit.commons.sql.TablePathAdaptator import TablePathAdaptator
-from pyRepetUnit.commons.coord.PathUtils import PathUtils
+from pyRepetUnit.commons.coord.Path import Path
+from pyRepetUnit.commons.coord.DoublonUtils import DoublonUtils
 
 
 def help():
@@ -118,32 +118,20 @@ def main():
         logging.error( "table '%s' doesn't exist" % ( inTable ) )
         sys.exit(1)
         
-    # create a temporary file
-    tmpFileName = inTable + ".tmp" + str(os.getpid()) + "-nr"
-    
-    # retrieve the name of the queries
-    tpA = TablePathAdaptator( db, inTable )
-    lContigs = tpA.getQueryList()
+    # export the paths into a temporary file
+    tmpInFileName = inTable + ".tmp" + str(os.getpid())
+    db.exportDataToFile( inTable, tmpInFileName )
     
-    # for each query
-    for c in lContigs:
-        
-        string = "processing query '%s'..." % ( c )
-        
-        # retrieve its paths
-        clist = tpA.getPathListFromQuery( c )
-        string += "\ninitial nb of paths: %i" % ( len(clist) )
-        
-        # remove doublons
-        clist = PathUtils.getPathListWithoutDuplicates( clist, True )
-        string += "\nnb of paths without duplicates: %i" % ( len(clist) )
-        
-        logging.info( string )
-        if verbose > 1:
-            print string; sys.stdout.flush()
-            
-        # write the non-redundant paths into the temporary file
-        PathUtils.writeListInFile( clist, tmpFileName, "a" )
+    # remove doublons (same coordinates and sequence names), keeping the path with the lowest identifier
+    # the paths are sorted by blocks in memory then merged, so that the table doesn't need to fit in memory
+    tmpFileName = inTable + ".tmp" + str(os.getpid()) + "-nr"
+    nbPaths, nbUniqPaths = DoublonUtils.writeFileWithoutDoublons( tmpInFileName, tmpFileName, Path, DoublonUtils.getCoordKey, Path.getIdentifier )
+    os.remove( tmpInFileName )
+    string = "initial nb of paths: %i" % ( nbPaths )
+    string += "\nnb of paths without duplicates: %i" % ( nbUniqPaths )
+    logging.info( string )
+    if verbose > 1:
+        print string; sys.stdout.flush()
         
     if outTable == "":
         outTable = "%s_nr" % ( inTable )
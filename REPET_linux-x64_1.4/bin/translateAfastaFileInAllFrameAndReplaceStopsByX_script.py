@@ -19,6 +19,7 @@ def help():
     print "     -h: this help"
     print "     -i: name of the nucleotidic input file (format='fasta')"
     print "     -o: name of the output file (default=inFileName+'_aa')"
+    print "     -p: number of processes used to translate the sequences (default=1)"
     print "     -v: verbose (default=0/1/2)"
     print "     -c: clean"
     print ""
@@ -31,9 +32,10 @@ def main():
     outFileName = ""
     verbose = 0
     clean = False
+    nbProcesses = 1
 
     try:
-        opts,args=getopt.getopt(sys.argv[1:],"hi:o:v:c")
+        opts,args=getopt.getopt(sys.argv[1:],"hi:o:p:v:c")
     except getopt.GetoptError, err:
         print str(err)
         help()
@@ -46,6 +48,8 @@ def main():
             inFileName = a
         elif o == "-o":
             outFileName = a
+        elif o == "-p":
+            nbProcesses = int(a)
         elif o == "-v":
             verbose = int(a)
         elif o == "-c":
@@ -66,6 +70,7 @@ def main():
     TranslateInAllFramesAndReplaceStopByX = pyRepetUnit.fastaTranslation.allFrames.TranslateInAllFramesAndReplaceStopByX.TranslateInAllFramesAndReplaceStopByX( )
     TranslateInAllFramesAndReplaceStopByX.setInputFile( inFileName )
     TranslateInAllFramesAndReplaceStopByX.setOutputFile( outFileName )
+    TranslateInAllFramesAndReplaceStopByX.setNbProcesses( nbProcesses )
     TranslateInAllFramesAndReplaceStopByX.run( )
     
     if clean == True:
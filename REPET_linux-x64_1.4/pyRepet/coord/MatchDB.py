@@ -1,6 +1,7 @@
 import sys, math, copy
 
 import pyRepet.coord.Match
+from pyRepetUnit.commons.coord.DoublonUtils import DoublonUtils
 
 #------------------------------------------------------------------------------
 
@@ -228,25 +229,7 @@ class MatchDB:
             print "nb of matches (with doublons): %i" % ( self.getNbMatches() )
 
         # fill a list of non-redundant matches
-        lMatchesUniq = []
-        for match in self.db:
-            if len(lMatchesUniq) == 0:
-                lMatchesUniq.append( match )
-            else:
-                nbDoublons = 0
-                for m in lMatchesUniq:
-                    if match.isDoublonWith( m ):
-                        nbDoublons += 1
-                if nbDoublons == 0:
-                    lMatchesUniq.append( match )
-
-        # check it is really non-redundant
-        for match1 in lMatchesUniq:
-            for match2 in lMatchesUniq:
-                if match1.id != match2.id:
-                    if match1.isDoublonWith( match2 ):
-                        print "*** Error: doublon not removed"
-                        sys.exit(1)
+        lMatchesUniq = DoublonUtils.getListWithoutDoublons( self.db, lambda match: DoublonUtils.getMatchDoublonKey( match, True ) )
 
         # update the attributes
         self.db = []
@@ -1,5 +1,6 @@
 import sys
 from pyRepet.coord.Map import *
+from pyRepetUnit.commons.coord.IntervalSweep import IntervalSweep
  
 class Set(Map):
     """
@@ -405,111 +406,45 @@ def set_list_remove_doublons(lset):
         del lset_out[idx]
     return lset_out
 
+def set_list_columns(lset):
+    """
+    return the columns (seqnames, starts, ends, ids) of a list of
+    L{Set<Set>} instances
+
+    @return: a tuple of four lists
+    """
+    lseqname=[]
+    lstart=[]
+    lend=[]
+    lid=[]
+    for s in lset:
+        lseqname.append(s.seqname)
+        lstart.append(s.start)
+        lend.append(s.end)
+        lid.append(s.id)
+    return lseqname,lstart,lend,lid
+
 def set_list_find_self_overlaps(lset):
     """
     find overlapping L{Set<Set>} instances in the list
+    (only on the same strand)
 
     @return: a list of overlapping path numbers
     """
 
-    lset.sort()
-
-    merge_list=[]
-    merge_list_count=0
-
-    id2merge_list_pos={}
-    
-    i=0
-    j=0
-    while i!= len(lset):
-        while j!= len(lset) and (lset[i]>lset[j] or i==j)\
-            and not(lset[i].overlap(lset[j])\
-                    and lset[i].isPlusStrand()==lset[j].isPlusStrand()):
-            j+=1
-
-        while j!= len(lset) and lset[i].overlap(lset[j]) and i!=j \
-                  and lset[i].isPlusStrand()==lset[j].isPlusStrand():
-            id1=lset[i].id
-            id2=lset[j].id
-            if id2merge_list_pos.has_key(id1) \
-                   and not id2merge_list_pos.has_key(id2):
-                merge_list[id2merge_list_pos[id1]].append(id2)
-                id2merge_list_pos[id2]=id2merge_list_pos[id1]
-            if id2merge_list_pos.has_key(id2) \
-                   and not id2merge_list_pos.has_key(id1):
-                merge_list[id2merge_list_pos[id2]].append(id1)
-                id2merge_list_pos[id1]=id2merge_list_pos[id2]
-            if id2merge_list_pos.has_key(id2) \
-                   and id2merge_list_pos.has_key(id1)\
-                   and id2merge_list_pos[id1]!=id2merge_list_pos[id2]:
-                for id in merge_list[id2merge_list_pos[id2]]:
-                    if id not in merge_list[id2merge_list_pos[id1]]:
-                        merge_list[id2merge_list_pos[id1]].append(id)
-                merge_list[id2merge_list_pos[id2]]=[]      
-                id2merge_list_pos[id2]=id2merge_list_pos[id1]
-            if not id2merge_list_pos.has_key(id2) \
-                   and not id2merge_list_pos.has_key(id1) and id1!=id2:
-                merge_list.append([id1,id2])
-                id2merge_list_pos[id1]=merge_list_count
-                id2merge_list_pos[id2]=merge_list_count
-                merge_list_count+=1
-            j+=1
-        i+=1
-    return merge_list
+    return IntervalSweep.getIdGroupsOfOverlappingIntervals(\
+        *set_list_columns(lset))
 
 def set_list_find_overlaps(lset1,lset2):
     """
     find overlapping L{Set<Set>} instances in the second list
-    given in argument according to the first
+    given in argument according to the first (only on the same strand)
 
     @return: a list of overlapping path numbers
     """
 
-    lset1.sort()
-    lset2.sort()
-
-    merge_list=[]
-    merge_list_count=0
-
-    id2merge_list_pos={}
-    
-    i=0
-    j=0
-    while i!= len(lset1):
-        while j!= len(lset2) and lset1[i]>lset2[j]\
-             and not(lset1[i].overlap(lset2[j])\
-                      and lset1[i].isPlusStrand()==lset2[j].isPlusStrand()):
-            j+=1
-        jj=j
-        while jj!= len(lset2) and lset1[i].overlap(lset2[jj])\
-                  and lset1[i].isPlusStrand()==lset2[jj].isPlusStrand():
-            id1=lset1[i].id
-            id2=lset2[jj].id*-1
-            if id2merge_list_pos.has_key(id1) \
-                   and not id2merge_list_pos.has_key(id2):
-                merge_list[id2merge_list_pos[id1]].append(id2)
-                id2merge_list_pos[id2]=id2merge_list_pos[id1]
-            if id2merge_list_pos.has_key(id2) \
-                   and not id2merge_list_pos.has_key(id1):
-                merge_list[id2merge_list_pos[id2]].append(id1)
-                id2merge_list_pos[id1]=id2merge_list_pos[id2]
-            if id2merge_list_pos.has_key(id2) \
-                   and id2merge_list_pos.has_key(id1)\
-                   and id2merge_list_pos[id1]!=id2merge_list_pos[id2]:
-                for id in merge_list[id2merge_list_pos[id2]]:
-                    if id not in merge_list[id2merge_list_pos[id1]]:
-                        merge_list[id2merge_list_pos[id1]].append(id)
-                merge_list[id2merge_list_pos[id2]]=[]      
-                id2merge_list_pos[id2]=id2merge_list_pos[id1]                
-            if not id2merge_list_pos.has_key(id2) \
-                   and not id2merge_list_pos.has_key(id1):
-                merge_list.append([id1,id2])
-                id2merge_list_pos[id1]=merge_list_count
-                id2merge_list_pos[id2]=merge_list_count
-                merge_list_count+=1
-            jj+=1
-        i+=1
-    return merge_list
+    return IntervalSweep.getIdGroupsOfOverlappingIntervalsBetween(\
+        set_list_columns(lset1),set_list_columns(lset2))
 
 def set_list_find_overlaps_no_strand(lset1,lset2):
     """
@@ -520,49 +455,8 @@ def set_list_find_overlaps_no_strand(lset1,lset2):
     @return: a list of overlapping path numbers
     """
 
-    lset1.sort()
-    lset2.sort()
-
-    merge_list=[]
-    merge_list_count=0
-
-    id2merge_list_pos={}
-    
-    i=0
-    j=0
-    while i!= len(lset1):
-        while j!= len(lset2) and lset1[i]>lset2[j]\
-             and not lset1[i].overlap(lset2[j]):
-            j+=1
-        jj=j
-        while jj!= len(lset2) and lset1[i].overlap(lset2[jj]):
-            id1=lset1[i].id
-            id2=lset2[jj].id*-1
-            if id2merge_list_pos.has_key(id1) \
-                   and not id2merge_list_pos.has_key(id2):
-                merge_list[id2merge_list_pos[id1]].append(id2)
-                id2merge_list_pos[id2]=id2merge_list_pos[id1]
-            if id2merge_list_pos.has_key(id2) \
-                   and not id2merge_list_pos.has_key(id1):
-                merge_list[id2merge_list_pos[id2]].append(id1)
-                id2merge_list_pos[id1]=id2merge_list_pos[id2]
-            if id2merge_list_pos.has_key(id2) \
-                   and id2merge_list_pos.has_key(id1)\
-                   and id2merge_list_pos[id1]!=id2merge_list_pos[id2]:
-                for id in merge_list[id2merge_list_pos[id2]]:
-                    if id not in merge_list[id2merge_list_pos[id1]]:
-                        merge_list[id2merge_list_pos[id1]].append(id)
-                merge_list[id2merge_list_pos[id2]]=[]      
-                id2merge_list_pos[id2]=id2merge_list_pos[id1]                
-            if not id2merge_list_pos.has_key(id2) \
-                   and not id2merge_list_pos.has_key(id1):
-                merge_list.append([id1,id2])
-                id2merge_list_pos[id1]=merge_list_count
-                id2merge_list_pos[id2]=merge_list_count
-                merge_list_count+=1
-            jj+=1
-        i+=1
-    return merge_list
+    return IntervalSweep.getIdGroupsOfOverlappingIntervalsBetween(\
+        set_list_columns(lset1),set_list_columns(lset2),False)
 
 def set_list_self_merge_set(lset):
     """
@@ -38,6 +38,7 @@ import shutil
 from pyRepet.launcher.AbstractProgramLauncher import *
 from pyRepet.sql.RepetJobMySQL import Job
 from pyRepet.sql.RepetJobMySQL import RepetJob
+from pyRepetUnit.commons.launcher.JobStatusDirectory import JobStatusDirectory
 from pyRepetUnit.commons.checker.CheckerException import CheckerException
 from pyRepetUnit.commons.utils.FileUtils import FileUtils
 from pyRepetUnit.commons.stat.Stat import Stat
@@ -366,24 +367,33 @@ class AbstractClusterLauncher( object ):
         return jobFile
     
     
-    def getCmdUpdateJobStatusAsString( self, newStatus ):
+    def getJobStatusDirectory( self ):
         """
-        Return the command to update the job status in the table.
+        Return the directory in which the jobs of the group notify their status changes.
         """
-        prg = os.environ["REPET_PATH"] + "/bin/srptChangeJobStatus.py"
-        cmd = prg
-        cmd += " -t %s" % ( self.job.tablename )
-        if str(self.job.jobid).isdigit():
-            cmd += " -j %s" % ( self.job.jobname )
-        else:
-            cmd += " -j %s" % ( self.job.jobid )
-        cmd += " -g %s" % ( self.job.groupid )
-        if self.job.queue != "":
-            cmd += " -q %s" % ( self.job.queue )
-        cmd += " -s %s" % ( newStatus )
-        cmd += " -c %s" % ( self.getConfigFile() )
-        cmd += " -v %i" % ( self._verbose )
-        return "os.system( \"%s\" )\n" % ( cmd )
+        return JobStatusDirectory( JobStatusDirectory.getDefaultPath( self.getCurrentDirectory(), self.job.groupid ) )
+    
+    
+    def getCmdToCreateJobStatusClientAsString( self ):
+        """
+        Return the commands, to insert after the imports of a job file, creating the client which updates the job status in the MySQL table.
+        The 'running' status can be delayed with the environment variable REPET_JOB_RUNNING_DELAY (in seconds), to skip it for short jobs.
+        """
+        cmd = "sys.path.append( \"%s\" )\n" % ( os.environ["REPET_PATH"] )
+        cmd += "from pyRepetUnit.commons.launcher.JobStatusClient import JobStatusClient\n"
+        cmd += "iJobStatus = JobStatusClient( \"%s\", \"%s\", \"%s\", \"%s\"" % ( self.job.tablename, self.job.groupid, self.job.jobname, self.job.queue )
+        cmd += ", cfgFileName=\"%s\"" % ( self.getConfigFile() )
+        cmd += ", runningDelay=%s )\n" % ( float( os.environ.get( "REPET_JOB_RUNNING_DELAY", "0" ) ) )
+        return cmd
+    
+    
+    def getCmdUpdateJobStatusAsString( self, newStatus, indent="" ):
+        """
+        Return the commands to update the job status in the table and to notify it in the status directory.
+        """
+        cmdUpdate = "%siJobStatus.changeStatus( \"%s\" )\n" % ( indent, newStatus )
+        cmdUpdate += self.getJobStatusDirectory().getCmdToWriteStatusAsString( self.job.jobname, newStatus, indent )
+        return cmdUpdate
     
     
     def getCmdToLaunchWrapper( self, fileName, genericCmd, exeWrapper ):
@@ -401,7 +411,7 @@ class AbstractClusterLauncher( object ):
         cmd += " returned exit status '%i'\" % ( exitStatus )\n"
         cmd += "\tos.chdir( \"%s\" )\n" % ( self.getTemporaryDirectory() )
         cmd += "\tshutil.move( newDir, '%s' )\n" % ( self.getCurrentDirectory() )
-        cmd += "\t%s" % ( self.getCmdUpdateJobStatusAsString( "error" ) )
+        cmd += self.getCmdUpdateJobStatusAsString( "error", "\t" )
         cmd += "\tsys.exit(1)\n"
         return cmd
     
@@ -415,7 +425,7 @@ class AbstractClusterLauncher( object ):
             f = f.replace( GENERIC_IN_FILE, fileName )
             cmd += "if not os.path.exists( \"%s\" ):\n" % ( f )
             cmd += "\tprint \"ERROR: output file '%s' doesn't exist\"\n" % ( f )
-            cmd += "\t%s" % ( self.getCmdUpdateJobStatusAsString( "error" ) )
+            cmd += self.getCmdUpdateJobStatusAsString( "error", "\t" )
             cmd += "\tsys.exit(1)\n"
             cmd += "if not os.path.exists( \"%s/%s\" ):\n" \
                    % ( self._currentDir, f )
@@ -446,6 +456,7 @@ class AbstractClusterLauncher( object ):
         cmd += "import sys\n"
         cmd += "import shutil\n"
         cmd += "import time\n"
+        cmd += self.getCmdToCreateJobStatusClientAsString()
         cmd += "\n"
         cmd += "print \"system:\", os.uname()\n"
         cmd += "beginTime = time.time()\n"
@@ -456,12 +467,12 @@ class AbstractClusterLauncher( object ):
         cmd += "if not os.path.exists( \"%s\" ):\n" % ( self.getTemporaryDirectory() )
         cmd += "\tprint \"ERROR: working dir '%s' doesn't exist\"\n" % ( \
             self.getTemporaryDirectory() )
-        cmd += "\t%s" % ( self.getCmdUpdateJobStatusAsString( "error" ) )
+        cmd += self.getCmdUpdateJobStatusAsString( "error", "\t" )
         cmd += "\tsys.exit(1)\n"
         cmd += "freeSpace = os.statvfs( \"%s\" )\n" % ( self.getTemporaryDirectory() )
         cmd += "if ( freeSpace.f_bavail * freeSpace.f_frsize ) / 1073741824.0 < %i:\n" % ( minFreeGigaInTmpDir ) # nb blocs * bloc size in bytes > 1 GigaByte ?
         cmd += "\tprint \"ERROR: less than %iGb in '%s'\"\n" % ( minFreeGigaInTmpDir, self.getTemporaryDirectory() )
-        cmd += "\t%s" % ( self.getCmdUpdateJobStatusAsString( "error" ) )
+        cmd += self.getCmdUpdateJobStatusAsString( "error", "\t" )
         cmd += "\tsys.exit(1)\n"
         cmd += "print \"working dir: %s\"\n" % ( self.getTemporaryDirectory() )
         cmd += "sys.stdout.flush()\n"
@@ -649,11 +660,14 @@ class AbstractClusterLauncher( object ):
         if self.getVerbosityLevel() > 0:
             print "groupid: %s" % ( self.getGroupIdentifier() )
         self.jobdb = RepetJob( cfgFileName=self.getConfigFile() )
+        iStatusDir = self.getJobStatusDirectory()
         if self.jobdb.has_unfinished_job( self.job.tablename, \
                                           self.job.groupid ):
-            self.jobdb.wait_job_group( self.job.tablename, self.job.groupid )
+            self.jobdb.wait_job_group( self.job.tablename, self.job.groupid, statusDir=iStatusDir.getPath() )
             return
         self.jobdb.clean_job_group( self.job.tablename, self.job.groupid )
+        iStatusDir.remove()
+        iStatusDir.create()
         sys.stdout.flush()
         
         
@@ -704,7 +718,8 @@ class AbstractClusterLauncher( object ):
         string += " with groupid '%s'" % ( self.job.groupid )
         string += " (%s)" % ( time.strftime("%Y-%m-%d %H:%M:%S") )
         print string; sys.stdout.flush()
-        self.jobdb.wait_job_group( self.job.tablename, self.job.groupid )
+        iStatusDir = self.getJobStatusDirectory()
+        self.jobdb.wait_job_group( self.job.tablename, self.job.groupid, statusDir=iStatusDir.getPath() )
         if self._nbJobs > 1:
             string = "all jobs with groupid '%s'" % ( self.job.groupid )
             string += " are finished (%s)" % ( time.strftime("%Y-%m-%d %H:%M:%S") )
@@ -715,6 +730,7 @@ class AbstractClusterLauncher( object ):
         print "execution time per job: %s" % statsExecutionTime.string()
         sys.stdout.flush()
         self.jobdb.clean_job_group( self.job.tablename, self.job.groupid )
+        iStatusDir.remove()
         
         if self.getClean():
             self.removeAllJobFiles()
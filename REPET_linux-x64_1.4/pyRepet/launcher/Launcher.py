@@ -17,6 +17,7 @@ sys.path.append( os.environ["REPET_PATH"] )
 from pyRepetUnit.commons.stat.Stat import Stat
 from pyRepet.sql.RepetJobMySQL import Job
 from pyRepet.launcher.programLauncher import programLauncher
+from pyRepetUnit.commons.launcher.JobStatusDirectory import JobStatusDirectory
 
 #------------------------------------------------------------------------------
 
@@ -94,34 +95,44 @@ class Launcher:
         Update the status of each job in the MySQL table.
         Used at the very beginning of each job ('running') and at the very end ('finished').
         Also used after retrieving the output value sent by the program to track 'error' if necessary.
+        The job file has to create the status client first (see getCmdToCreateJobStatusClient()).
         """
         if loop == 0:
-            cmd_test = "os.system( \""
+            cmd_test = ""
         elif loop == 1:
-            cmd_test = "\tos.system( \""
-        cmd_test += os.environ["REPET_PATH"] + "/bin/srptChangeJobStatus.py"
-        cmd_test += " -t " + job.tablename
-        if str(job.jobid).isdigit():
-            cmd_test += " -j " + job.jobname
-        else:
-            cmd_test += " -j " + job.jobid
-        cmd_test += " -g " + job.groupid
-        if job.queue != "":
-            cmd_test += " -q " + job.queue
-        cmd_test += " -s " + newStatus
-        if self.jobdb.host != "":
-            cmd_test += " -H " + self.jobdb.host
-        if self.jobdb.user != "":
-            cmd_test += " -U " + self.jobdb.user
-        if self.jobdb.passwd != "":
-            cmd_test += " -P " + self.jobdb.passwd
-        cmd_test += " -D " + self.jobdb.dbname
-        cmd_test += " -T %i" % ( self.jobdb.port )
-        cmd_test += " -v %i" % ( 1 )
-        cmd_test += "\" )\n"
+            cmd_test = "\t"
+        cmd_test += "iJobStatus.changeStatus( \"%s\" )\n" % ( newStatus )
+        if loop == 0:
+            cmd_test += self.getJobStatusDirectory().getCmdToWriteStatusAsString( job.jobname, newStatus )
+        elif loop == 1:
+            cmd_test += self.getJobStatusDirectory().getCmdToWriteStatusAsString( job.jobname, newStatus, "\t" )
         return cmd_test
     
     
+    def getCmdToCreateJobStatusClient( self, job ):
+        """
+        Return the commands, to insert after the imports of a job file, creating the client which updates the job status in the MySQL table.
+        The job thus updates its status in-process, through one connection.
+        The 'running' status can be delayed with the environment variable REPET_JOB_RUNNING_DELAY (in seconds), to skip it for short jobs.
+        """
+        cmd = "sys.path.append( \"%s\" )\n" % ( os.environ["REPET_PATH"] )
+        cmd += "from pyRepetUnit.commons.launcher.JobStatusClient import JobStatusClient\n"
+        cmd += "iJobStatus = JobStatusClient( \"%s\", \"%s\", \"%s\", \"%s\"" % ( job.tablename, job.groupid, job.jobname, job.queue )
+        cmd += ", host=\"%s\", user=\"%s\", passwd=\"%s\", dbname=\"%s\", port=%i" % ( self.jobdb.host, self.jobdb.user, self.jobdb.passwd, self.jobdb.dbname, self.jobdb.port )
+        cmd += ", runningDelay=%s )\n" % ( float( os.environ.get( "REPET_JOB_RUNNING_DELAY", "0" ) ) )
+        return cmd
+    
+    
+    def getJobStatusDirectory( self ):
+        """
+        Return the directory in which the jobs of the group notify their status changes.
+        """
+        directory = self.cdir
+        if directory == "":
+            directory = os.getcwd()
+        return JobStatusDirectory( JobStatusDirectory.getDefaultPath( directory, self.job.groupid ) )
+    
+    
     def cmd_finish( self, inFileName ):
         """
         Command line to clean temporary files, thus specific of each program.
@@ -140,11 +151,14 @@ class Launcher:
         else:
             self.job.groupid = self.groupid
 
+        iStatusDir = self.getJobStatusDirectory()
         if self.jobdb.has_unfinished_job( self.job.tablename, self.job.groupid ):
-            self.jobdb.wait_job_group( self.job.tablename, self.job.groupid )
+            self.jobdb.wait_job_group( self.job.tablename, self.job.groupid, statusDir=iStatusDir.getPath() )
             return
         
         self.jobdb.clean_job_group( self.job.tablename, self.job.groupid )
+        iStatusDir.remove()
+        iStatusDir.create()
         
         string = "submitting job(s) with groupid '%s' (%s)" % ( self.job.groupid,  time.strftime("%Y-%m-%d %H:%M:%S") )
         print string; sys.stdout.flush()
@@ -183,6 +197,7 @@ class Launcher:
             cmd += "import os\n"
             cmd += "import sys\n"
             cmd += "import time\n"
+            cmd += self.getCmdToCreateJobStatusClient( self.job )
             cmd += "\n"
             cmd += "print os.uname(); sys.stdout.flush()\n"
             cmd += "beginTime = time.time()\n"
@@ -276,6 +291,7 @@ class Launcher:
         cmd += "import sys\n"
         cmd += "import time\n"
         cmd += "import shutil\n"
+        cmd += self.getCmdToCreateJobStatusClient( self.job )
         cmd += "\n"
         cmd += "print os.uname()\n"
         cmd += "beginTime = time.time()\n"
@@ -337,7 +353,8 @@ class Launcher:
         """
         string = "waiting for %i job(s) with groupid '%s' (%s)" % ( self._nbJobs, self.job.groupid, time.strftime("%Y-%m-%d %H:%M:%S") )
         print string; sys.stdout.flush()
-        self.jobdb.wait_job_group( self.job.tablename, self.job.groupid )
+        iStatusDir = self.getJobStatusDirectory()
+        self.jobdb.wait_job_group( self.job.tablename, self.job.groupid, statusDir=iStatusDir.getPath() )
         if self._nbJobs > 1:
             string = "all jobs with groupid '%s' are finished (%s)" % ( self.job.groupid, time.strftime("%Y-%m-%d %H:%M:%S") )
             print string; sys.stdout.flush()
@@ -347,6 +364,7 @@ class Launcher:
         print "execution time per job: %s" % statsExecutionTime.string()
         sys.stdout.flush()
         self.jobdb.clean_job_group( self.job.tablename, self.job.groupid )
+        iStatusDir.remove()
         
         
     def clean( self, acronyme="", stdout=True, stderr=True ):
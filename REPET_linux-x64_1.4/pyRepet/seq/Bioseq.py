@@ -2,6 +2,12 @@
 import sys, re, string, cStringIO, math, random
 
 from pyRepet.coord.Map import *
+from pyRepetUnit.commons.seq.Bioseq import getTranslationTable, ATGCN_TABLE
+from pyRepetUnit.commons.seq.KmerCounter import KmerCounter, MAX_SIZE_COUNT_VECTOR
+
+# complement of the IUPAC symbols in upper case, any other symbol being replaced by N
+COMPLEMENT_SYMBOLS = "ATGCMRWSYKVHDBN"
+COMPLEMENT_TABLE = getTranslationTable( COMPLEMENT_SYMBOLS, "TACGKYWSRMBDHVN", "N" )
 
 #------------------------------------------------------------------------------
 
@@ -213,24 +219,14 @@ class Bioseq:
 
     def occ_word( self, size ):
 
-        occ = {}
-	nbword = 0
-	srch = re.compile('[^ATGC]+')
-	wordlist = self._create_word_list( size )
-	for i in wordlist:
-	    occ[i] = 0
-	lenseq = len(self.sequence)
-	i = 0
-	while i < lenseq-size+1:
-	    word = self.sequence[i:i+size].upper()
-	    m = srch.search(word)
-	    if m == None:
-	        occ[word] = occ[word]+1
-		nbword = nbword + 1
-		i = i + 1
-	    else:
-	        i = i + m.end(0)
-	return occ, nbword
+        """
+        Count the words of size 'size' made only of A, T, G and C.
+        Return a dictionary whose keys are the words (all of them up to size 12), and values their occurrences, and the nb of words.
+        """
+
+        iCounter = KmerCounter( size )
+        counts, nbword = iCounter.count( self.sequence )
+        return iCounter.getCountPerWord( counts, size <= MAX_SIZE_COUNT_VECTOR ), nbword
 
     #--------------------------------------------------------------------------
 
@@ -289,23 +285,9 @@ class Bioseq:
     	compute the entropy of the sequence
 	    """
 
-	freq = self.freq_word( size )
-	my_sum = 0
-	base = math.log(4)
-	if size > 1:
-	    prob = self.markov( size - 1 )		
-	    for i in freq.keys():
-	        evt = i[-1]
-		cond = i[:-1]
-		p = prob[cond][evt]
-		if p != 0:
-		    my_sum = my_sum + freq[i] * (math.log(p)/base)
-	else:
-	    for word in freq.keys():
-	        p = freq[word]
-		if p != 0:
-		    my_sum = my_sum + p * (math.log(p)/base)
-	return -my_sum
+        iCounter = KmerCounter( size )
+        counts, nbword = iCounter.count( self.sequence )
+        return iCounter.getEntropy( counts, nbword )
 
     #--------------------------------------------------------------------------
 
@@ -349,44 +331,8 @@ class Bioseq:
         """
         #We need capital letters !
         Bioseq.upCase( self )
-        complement = ""
-
-	for i in xrange(len(self.sequence)-1,-1,-1):
-	    if self.sequence[i] == "A":
-	        complement += "T"
-	    elif self.sequence[i] == "T":
-	        complement += "A"
-	    elif self.sequence[i] == "C":
-	        complement += "G"
-	    elif self.sequence[i] == "G":
-	        complement += "C"
-	    elif self.sequence[i] == "M":
-	        complement += "K"
-	    elif self.sequence[i] == "R":
-	        complement += "Y"
-	    elif self.sequence[i] == "W":
-	        complement += "W"
-	    elif self.sequence[i] == "S":
-	        complement += "S"
-	    elif self.sequence[i] == "Y":
-	        complement += "R"
-	    elif self.sequence[i] == "K":
-	        complement += "M"
-	    elif self.sequence[i] == "V":
-	        complement += "B"
-	    elif self.sequence[i] == "H":
-	        complement += "D"
-	    elif self.sequence[i] == "D":
-	        complement += "H"
-	    elif self.sequence[i] == "B":
-	        complement += "V"
-	    elif self.sequence[i] == "N":
-	        complement += "N"
-	    else:
-	        print "*** Warning:",self.sequence[i],"unknown, replacing by N"
-		complement += "N"
-
-	return complement
+        self._warnUnknownComplementSymbols()
+        return self.sequence[::-1].translate( COMPLEMENT_TABLE )
 
 #--------------------------------------------------------------------------
 
@@ -396,44 +342,20 @@ class Bioseq:
         return the complement of the sequence
         """
 
-        complement = ""
-        for i in xrange(0,len(self.sequence),1):
-            if self.sequence[i] == "A":
-                complement += "T"
-            elif self.sequence[i] == "T":
-                complement += "A"
-            elif self.sequence[i] == "C":
-                complement += "G"
-            elif self.sequence[i] == "G":
-                complement += "C"
-            elif self.sequence[i] == "M":
-                complement += "K"
-            elif self.sequence[i] == "R":
-                complement += "Y"
-            elif self.sequence[i] == "W":
-                complement += "W"
-            elif self.sequence[i] == "S":
-                complement += "S"
-            elif self.sequence[i] == "Y":
-                complement += "R"
-            elif self.sequence[i] == "K":
-                complement += "M"
-            elif self.sequence[i] == "V":
-                complement += "B"
-            elif self.sequence[i] == "H":
-                complement += "D"
-            elif self.sequence[i] == "D":
-                complement += "H"
-            elif self.sequence[i] == "B":
-                complement += "V"
-            elif self.sequence[i] == "N":
-                complement += "N"
-            else:
-                print "*** Warning:",self.sequence[i],"unknown, replacing by N"
-                complement += "N"
-
-        return complement
+        self._warnUnknownComplementSymbols()
+        return self.sequence.translate( COMPLEMENT_TABLE )
                
+    #--------------------------------------------------------------------------
+
+    def _warnUnknownComplementSymbols( self ):
+
+        """
+        Print a warning, once per sequence, if some symbols can't be complemented.
+        """
+
+        unknownSymbols = self.sequence.translate( None, COMPLEMENT_SYMBOLS )
+        if unknownSymbols != "":
+            print "*** Warning: %i unknown symbol(s) '%s' in '%s', replacing by N" % ( len(unknownSymbols), "".join( sorted( set(unknownSymbols) ) ), self.header )
                 
     #--------------------------------------------------------------------------
 
@@ -593,10 +515,9 @@ class Bioseq:
         Replace any symbol not in (A,T,G,C,N) by another nucleotide it represents.
         """
 
-        newSeq = ""
-
-        for nt in self.sequence:
-            newSeq += self.getATGCNFromIUPAC( nt )
+        newSeq = self.sequence.translate( ATGCN_TABLE )
+        if newSeq.translate( None, "ATGCN" ) != "":
+            newSeq = re.sub( "[RYMKWSBDHV]", lambda m: self.getATGCNFromIUPAC( m.group() ), newSeq )
 
         self.sequence = newSeq
 
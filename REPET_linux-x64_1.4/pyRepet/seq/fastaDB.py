@@ -14,6 +14,8 @@ from pyRepet.seq.Bioseq import *
 from pyRepet.util.Stat import *
 from pyRepet.launcher.programLauncher import *
 from pyRepet.parser.Parser import *
+from pyRepetUnit.commons.seq.FastaUtils import FastaUtils
+from pyRepetUnit.commons.seq.KmerCounter import KmerCounter, MAX_SIZE_COUNT_VECTOR
 
 #------------------------------------------------------------------------------
 
@@ -1122,34 +1124,24 @@ def filterClassifConsensus( inFileName, outFileName, filterSSRs, maxLengthToFilt
 
 #------------------------------------------------------------------------------
 
-def dbWord(inFileName,wordsize):
+def dbWord(inFileName,wordsize,nbProcesses=1):
 	"""
 	deprecated
 	"""
-	vec_len=[]
-	file_db=open(inFileName)
-	seq=Bioseq()
+	iCounter=KmerCounter(wordsize)
 	numseq=0
 	nb_word=0
-	statCount={}
-	while 1:
-		seq.read(file_db)
-		if seq.sequence==None:
-			break
+	statCount=iCounter.getEmptyCounts()
+	for header,length,occ,nb in FastaUtils.dbWordCounts(inFileName,wordsize,nbProcesses):
 		numseq=numseq+1
-		print 'sequence #',numseq,'=',seq.getLength(),'[',seq.header[0:40],'...]'
-		occ,nb=seq.occ_word(wordsize)
+		print 'sequence #',numseq,'=',length,'[',header[0:40],'...]'
 		nb_word=nb_word+nb
-		for i in occ.keys():
-			if i not in statCount.keys():
-				statCount[i]=occ[i]
-			else:
-				statCount[i]=statCount[i]+occ[i]
+		statCount=iCounter.addCounts(statCount,occ)
 
-	file_db.close()
+	dStatCount=iCounter.getCountPerWord(statCount,wordsize<=MAX_SIZE_COUNT_VECTOR)
 	vec_sort=[]
-	for i in statCount.keys():
-		vec_sort.append((-float(statCount[i])/nb_word,i))
+	for i in dStatCount.keys():
+		vec_sort.append((-float(dStatCount[i])/nb_word,i))
 	vec_sort.sort()
 	for i in vec_sort:
 		print i[1],"=",-i[0]
@@ -1205,27 +1197,22 @@ def dbCpG(inFileName):
 
 #------------------------------------------------------------------------------
 
-def dbEntropy(inFileName,wordsize):
+def dbEntropy(inFileName,wordsize,nbProcesses=1):
 	"""
 	deprecated
 	"""
+	iCounter=KmerCounter(wordsize)
 	vec_len=[]
 	stat=Stat()
-	file_db=open(inFileName)
-	seq=Bioseq()
 	numseq=0
-	while 1:
-		seq.read(file_db)
-		if seq.sequence==None:
-			break
-		i=seq.entropy(wordsize)
+	for header,length,occ,nb in FastaUtils.dbWordCounts(inFileName,wordsize,nbProcesses):
+		i=iCounter.getEntropy(occ,nb)
 		stat.add(i)
 
 		numseq=numseq+1
-		print 'sequence #',numseq,'=',seq.getLength(),'[',seq.header[0:40],'...] entropy',i
-		vec_len.append((-i,numseq,seq.header))
+		print 'sequence #',numseq,'=',length,'[',header[0:40],'...] entropy',i
+		vec_len.append((-i,numseq,header))
 
-	file_db.close()
 	vec_len.sort()
 	for s in vec_len:
 		print 'I=',-s[0],'=> #',s[1], s[2]
@@ -1234,50 +1221,28 @@ def dbEntropy(inFileName,wordsize):
 
 #------------------------------------------------------------------------------
 
-def dbRelEntropy(inFileName,wordsize):
+def dbRelEntropy(inFileName,wordsize,nbProcesses=1):
 	"""
 	deprecated
 	"""
-	file_db=open(inFileName)
-	seq=Bioseq()
-	refocc={}
+	iCounter=KmerCounter(wordsize)
+	refocc=iCounter.getEmptyCounts()
 	sumlen=0
-	while 1:
-		seq.read(file_db)
-		if seq.sequence==None:
-			break
-		sumlen=sumlen+seq.getLength()-wordsize
-		occ=seq.occ_word(wordsize)
-		if(len(refocc)==0):
-			refocc=occ
-		else:
-			for w in occ.keys():
-				if refocc.has_key(w):
-					refocc[w]=refocc[w]+occ[w]
-				else:
-					refocc[w]=occ[w]
-       	file_db.close()
-	reffreq={}
-	for w in refocc.keys():
-		reffreq[w]=float(refocc[w]+1)/sumlen
-
+	for header,length,occ,nb in FastaUtils.dbWordCounts(inFileName,wordsize,nbProcesses):
+		sumlen=sumlen+length-wordsize
+		refocc=iCounter.addCounts(refocc,occ)
 
 	vec_len=[]
 	stat=Stat()
 
-	file_db=open(inFileName)
 	numseq=0
-	while 1:
-		seq.read(file_db)
-		if seq.sequence==None:
-			break
-		i=seq.rel_entropy(reffreq)
+	for header,length,occ,nb in FastaUtils.dbWordCounts(inFileName,wordsize,nbProcesses):
+		i=iCounter.getRelativeEntropy(occ,length-wordsize,refocc,sumlen)
 		stat.add(i)
 		numseq=numseq+1
-		print 'sequence #',numseq,'=',seq.getLength(),'[',seq.header[0:40],'...] entropy',i
-		vec_len.append((i,numseq,seq.header))
+		print 'sequence #',numseq,'=',length,'[',header[0:40],'...] entropy',i
+		vec_len.append((i,numseq,header))
 
-	file_db.close()
 	vec_len.sort()
 	for s in vec_len:
 		print 'H=',s[0],'=> #',s[1], s[2]
@@ -1,4 +1,5 @@
 import MySQLdb
+import MySQLdb.cursors
 import os, re, sys, time
 import ConfigParser
 import pyRepet.seq.Bioseq
@@ -167,7 +168,37 @@ class RepetDB:
         """
 
         return self.cursor.fetchall()
-    
+
+    #----------------------------------------------------------------------
+
+    def iterate( self, qry, batchSize=10000 ):
+
+        """
+        Execute a SQL query and give its results one row at a time, the rows
+        being streamed from the server instead of being all held in memory.
+
+        @param qry: SQL query
+        @type qry: string
+
+        @param batchSize: number of rows fetched per round trip
+        @type batchSize: integer
+
+        @warning: no other query can be run on the connection until all the
+        rows have been read or the generator is closed
+        """
+
+        cursor = self.db.cursor( MySQLdb.cursors.SSCursor )
+        try:
+            cursor.execute( qry )
+            while True:
+                lRows = cursor.fetchmany( batchSize )
+                if len(lRows) == 0:
+                    break
+                for row in lRows:
+                    yield row
+        finally:
+            cursor.close()
+
     #----------------------------------------------------------------------
 
     def show_tables(self):
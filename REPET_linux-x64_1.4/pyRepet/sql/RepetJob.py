@@ -5,6 +5,8 @@ import datetime
 import MySQLdb
 
 from pyRepet.sql.RepetDBMySQL import RepetDB
+from pyRepetUnit.commons.launcher.LocalJobExecutor import getLocalJobExecutor
+from pyRepetUnit.commons.launcher.JobStatusDirectory import JobStatusDirectory
 
 
 class Job:
@@ -191,6 +193,26 @@ class RepetJob( RepetDB ):
             return int( res[0][0] )
         
         
+    def getCountPerStatus( self, tablename, groupid ):
+        """
+        Get the number of jobs belonging to the desired groupid for each status, in one query.
+        @param tablename: table name to record the jobs
+        @type tablename: string
+        @param groupid: a group identifier to record related job series 
+        @type groupid: string
+        @return: number of jobs per status
+        @rtype: dictionary
+        """
+        qry = "SELECT status,count(jobname) FROM %s" % ( tablename )
+        qry += " WHERE groupid='%s'" % ( groupid )
+        qry += " GROUP BY status;"
+        self.execute( qry )
+        dStatus2Count = {}
+        for status, count in self.fetchall():
+            dStatus2Count[ status ] = int( count )
+        return dStatus2Count
+    
+    
     def clean_job_group( self, tablename, groupid ):
         """
         Clean all job from a job group.
@@ -245,15 +267,45 @@ class RepetJob( RepetDB ):
         return isJobInQstat
     
     
-    def wait_job_group( self, tablename, groupid, checkInterval=5, maxRelaunch=3, exitIfTooManyErrors=True, timeOutPerJob=60*60 ):
+    def isJobStillHandled( self, jobid, jobname ):
+        """
+        Check if a job is still handled by the queue (SGE or local executor).
+        """
+        if os.environ.get( "REPET_QUEUE" ) == "local":
+            return getLocalJobExecutor().isJobHandled( jobid, jobname )
+        return self.isJobStillHandledBySge( jobid, jobname )
+    
+    
+    def setErrorStatusOfLostLocalJobs( self, tablename, groupid ):
+        """
+        Set in error the jobs of a group which are not finished but not handled by the local executor anymore
+        (job killed before updating its status, or submitted by another process).
+        @param tablename: table name to record the jobs
+        @type tablename: string
+        @param groupid: a group identifier to record related job series 
+        @type groupid: string
+        """
+        qry = "SELECT jobid,jobname,queue FROM %s" % ( tablename )
+        qry += " WHERE groupid='%s'" % ( groupid )
+        qry += " AND status IN ('waiting','running');"
+        self.execute( qry )
+        for jobid, jobname, queue in getLocalJobExecutor().getUnhandledJobList( self.fetchall() ):
+            lostJob = Job( tablename=tablename, jobname=jobname, groupid=groupid, queue=queue )
+            self.change_job_status( lostJob, "error", "db" )
+                
+                
+    def wait_job_group( self, tablename, groupid, checkInterval=5, maxRelaunch=3, exitIfTooManyErrors=True, timeOutPerJob=60*60, statusDir="" ):
         """
         Wait job finished status from a job group.
         @note: job are re-launched if error (max. 3 times)
+        @note: the table is checked more and more rarely while nothing changes (from 1 second to checkInterval)
+        @note: the wait is interrupted as soon as a job ends with the local executor, or as soon as a job notifies
+        a status change in statusDir, in which case the table is checked at least every minute
         @param tablename: table name to record the jobs
         @type tablename: string
         @param groupid: a group identifier to record related job series 
         @type groupid: string
-        @param checkInterval: time laps in seconds between two checks
+        @param checkInterval: max time laps in seconds between two checks
         @type checkInterval: integer (default=5)
         @param maxRelaunch: max nb of times a job in error is relaunch before exiting
         @type maxRelaunch: integer (default=3)
@@ -261,31 +313,53 @@ class RepetJob( RepetDB ):
         @type exitIfTooManyErrors: boolean (default=True)
         @param timeOutPerJob: max nb of seconds after which one tests if a job is still in SGE or not
         @type timeOutPerJob: integer (default=60*60=1h)
+        @param statusDir: directory in which the jobs notify their status changes (see JobStatusDirectory)
+        @type statusDir: string (default=none)
         """
         
         dJob2Err = {}
         
         # retrieve the total number of jobs belonging to the desired groupid
-        qry = "SELECT count(jobname) FROM %s WHERE groupid='%s';" % ( tablename, groupid )
-        self.execute( qry )
-        totalNbJobs = int( self.fetchall()[0][0] )
+        dStatus2Count = self.getCountPerStatus( tablename, groupid )
+        totalNbJobs = sum( dStatus2Count.values() )
+        
+        iStatusDir = None
+        if statusDir != "" and os.path.isdir( statusDir ):
+            iStatusDir = JobStatusDirectory( statusDir )
+            iStatusDir.hasChanged()
+        minCheckInterval = min( 1, checkInterval )
+        currentCheckInterval = minCheckInterval
         
         nbTimeOuts = 0
         
         while True:
-            time.sleep( checkInterval )
+            if os.environ.get( "REPET_QUEUE" ) == "local":
+                getLocalJobExecutor().waitForCompletion( currentCheckInterval )
+                self.setErrorStatusOfLostLocalJobs( tablename, groupid )
+            elif iStatusDir != None:
+                iStatusDir.waitForChange( max( currentCheckInterval, 60 ) )
+            else:
+                time.sleep( currentCheckInterval )
             
-            # retrieve the finished jobs and stop if all jobs are finished
-            nbFinishedJobs = self.getCountStatus( tablename, groupid, "finished" )
-            if nbFinishedJobs == totalNbJobs:
+            # retrieve the nb of jobs per status and stop if all jobs are finished
+            dPreviousStatus2Count = dStatus2Count
+            dStatus2Count = self.getCountPerStatus( tablename, groupid )
+            if dStatus2Count.get( "finished", 0 ) == totalNbJobs:
                 break
+            if dStatus2Count == dPreviousStatus2Count:
+                currentCheckInterval = min( 2 * currentCheckInterval, checkInterval )
+            else:
+                currentCheckInterval = minCheckInterval
             
             # retrieve the jobs in error and relaunch them if they are in error (max. 3 times)
-            qry = "SELECT * FROM %s" % ( tablename )
-            qry += " WHERE groupid='%s'" % ( groupid )
-            qry += " AND status='error';"
-            self.execute( qry )
-            lJobsInError = self.fetchall()   # 0:jobid, 1:jobname, 2:groupid, ...
+            if dStatus2Count.get( "error", 0 ) == 0:
+                lJobsInError = []
+            else:
+                qry = "SELECT * FROM %s" % ( tablename )
+                qry += " WHERE groupid='%s'" % ( groupid )
+                qry += " AND status='error';"
+                self.execute( qry )
+                lJobsInError = self.fetchall()   # 0:jobid, 1:jobname, 2:groupid, ...
             for job in lJobsInError:
                 if not dJob2Err.has_key( job[1] ):
                     dJob2Err[ job[1] ] = 1
@@ -305,10 +379,10 @@ class RepetJob( RepetDB ):
                     msg = "job '%s' in permanent error (>%i)" % ( job[1], maxRelaunch )
                     msg += "\ngroupid = %s" % ( groupid )
                     msg += "\nnb of jobs = %i" % ( totalNbJobs )
-                    msg += "\nnb of finished jobs = %i" % ( self.getCountStatus( tablename, groupid, "finished" ) )
-                    msg += "\nnb of waiting jobs = %i" % ( self.getCountStatus( tablename, groupid, "waiting" ) )
-                    msg += "\nnb of running jobs = %i" % ( self.getCountStatus( tablename, groupid, "running" ) )
-                    msg += "\nnb of jobs in error = %i" % ( self.getCountStatus( tablename, groupid, "error" ) )
+                    msg += "\nnb of finished jobs = %i" % ( dStatus2Count.get( "finished", 0 ) )
+                    msg += "\nnb of waiting jobs = %i" % ( dStatus2Count.get( "waiting", 0 ) )
+                    msg += "\nnb of running jobs = %i" % ( dStatus2Count.get( "running", 0 ) )
+                    msg += "\nnb of jobs in error = %i" % ( dStatus2Count.get( "error", 0 ) )
                     sys.stderr.write( "%s\n" % msg )
                     sys.stderr.flush()
                     if exitIfTooManyErrors:
@@ -318,6 +392,8 @@ class RepetJob( RepetDB ):
                         checkInterval = 60
                         
             # retrieve the date and time at which the oldest, still-running job was submitted
+            if dStatus2Count.get( "running", 0 ) == 0:
+                continue
             sql = "SELECT jobid,jobname,time FROM %s WHERE groupid='%s' AND status='running' ORDER BY time DESC LIMIT 1" % ( tablename, groupid )
             self.execute( sql )
             res = self.fetchall()
@@ -331,10 +407,10 @@ class RepetJob( RepetDB ):
                     continue
                 if delta.seconds >= (nbTimeOuts+1) * timeOutPerJob:
                     nbTimeOuts += 1
-                    if not self.isJobStillHandledBySge( jobid, jobname ):
+                    if not self.isJobStillHandled( jobid, jobname ):
                         time.sleep( 5 )
-                    if not self.isJobStillHandledBySge( jobid, jobname ):
-                        msg = "ERROR: job '%s', supposedly still running, is not handled by SGE anymore" % ( jobid )
+                    if not self.isJobStillHandled( jobid, jobname ):
+                        msg = "ERROR: job '%s', supposedly still running, is not handled by %s anymore" % ( jobid, os.environ.get( "REPET_QUEUE" ) )
                         msg += "\nit was launched the %s (> %.2f hours ago)" % ( dateTimeOldestJob, timeOutPerJob/3600.0 )
                         msg += "\nthis problem can be due to:"
                         msg += "\n* memory shortage, in that case, decrease the size of your jobs;"
@@ -357,8 +433,9 @@ class RepetJob( RepetDB ):
         @type checkInterval: integer (default=30)
         """
         
-        if os.environ.get( "REPET_QUEUE" ) not in [ "SGE", "PBS" ]:
-            print "ERROR: environment variable REPET_QUEUE should be 'SGE' or 'PBS'"
+        isLocal = os.environ.get( "REPET_QUEUE" ) == "local"
+        if os.environ.get( "REPET_QUEUE" ) not in [ "SGE", "PBS", "local" ]:
+            print "ERROR: environment variable REPET_QUEUE should be 'SGE', 'PBS' or 'local'"
             return 1
         
         if not self.exist( job.tablename ):
@@ -377,10 +454,22 @@ class RepetJob( RepetDB ):
             sys.exit(1)
             
         while self.getCountStatus( job.tablename, job.groupid, "waiting" ) > maxNbWaitingJobs:
-            time.sleep( checkInterval )
+            if isLocal:
+                getLocalJobExecutor().waitForCompletion( checkInterval )
+            else:
+                time.sleep( checkInterval )
             
         self.record_job( job )
         
+        if isLocal:
+            jobid = getLocalJobExecutor().submit( job.jobname, job.launcher )
+            if verbose > 0:
+                print "job '%i %s' submitted" % ( jobid, job.jobname )
+                sys.stdout.flush()
+            job.jobid = jobid
+            self.setJobIdFromSge( job, jobid )
+            return 0
+        
         cmd = "echo '%s' | " % ( job.launcher )
         prg = "qsub"
         cmd += prg
@@ -1,7 +1,10 @@
 import os
 import sys
-from pyRepetUnit.align.AlignListUtils import AlignListUtils
-from pyRepetUnit.commons.seq.BioseqUtils import BioseqUtils
+from pyRepetUnit.commons.seq.IndexedFastaDB import IndexedFastaDB
+
+## number of align records transformed at once
+#
+BATCH_SIZE = 10000
 
 ### Transform amino acid query coord in an align format to nucleotide coord 
 ### according to the frame specified at the end of seqName
@@ -14,25 +17,74 @@ class TransformAACoordIntoNtCoordInAlignFormat( object ):
         self._outFileName = None
         self._consensusFileName = None
         self._IsFiltered = True
+        self._consensusDB = None
 
     ## read input file, transform it and write the output file
     # 
     def run(self):   
-        alignUtils = AlignListUtils()         
-        listAlignInstance = alignUtils.read(self._inFileName)
-        self.transformQueryCoord(listAlignInstance)
-        #self.getOriginalQueryNameForAlignList(listAlignInstance)
-        if self._IsFiltered:
-            alignUtils.filterOnAMinimalScore(listAlignInstance, 0)
-        alignUtils.write(listAlignInstance, self._outFileName)
+        inFile = open(self._inFileName, "r")
+        self.writeAlignFileFromRecords(self._iterAlignRecords(inFile))
+        inFile.close()
         if self._clean:
             self.clean()
+
+    ## transform align records and write the output file, in one pass and by batches
+    #
+    # @param iRecords iterable of align records (lists of fields: query, query start, query end, subject, subject start, subject end, E-value, score, identity)
+    #
+    def writeAlignFileFromRecords(self, iRecords):
+        outFile = open(self._outFileName, "w")
+        lRecords = []
+        for record in iRecords:
+            lRecords.append(record)
+            if len(lRecords) == BATCH_SIZE:
+                outFile.writelines(self.transformAlignRecords(lRecords))
+                lRecords = []
+        outFile.writelines(self.transformAlignRecords(lRecords))
+        outFile.close()
+        if self._consensusDB != None:
+            self._consensusDB.close()
+            self._consensusDB = None
+
+    ## Transform a batch of align records into align lines with nucleotide query coord, without the records having a null or negative score if filtered
+    #
+    # @param lRecords list of align records (lists of fields)
+    # @return list of lines in align format
+    #
+    def transformAlignRecords(self, lRecords):
+        lLines = []
+        minScore = 0
+        isFiltered = self._IsFiltered
+        for record in lRecords:
+            score = float(record[7])
+            if isFiltered and score <= minScore:
+                continue
+            queryStart = int(record[1])
+            queryEnd = int(record[2])
+            subjectStart = int(record[4])
+            subjectEnd = int(record[5])
+            # as Align.setFromTuple(), the query is kept on the direct strand
+            if queryStart >= queryEnd:
+                queryStart, queryEnd = queryEnd, queryStart
+                subjectStart, subjectEnd = subjectEnd, subjectStart
+            seqName = record[0]
+            frame = int(seqName[-1])
+            seqName = seqName[:-2]
+            if frame < 4:
+                ntStart = 3 * (queryStart - 1) + frame
+                ntEnd = 3 * queryEnd + frame - 1
+            else:
+                consensusLength = self._getConsensusLength(seqName)
+                ntStart = consensusLength - 3 * (queryEnd - 1) - frame + 2
+                ntEnd = consensusLength - 3 * (queryStart - 1) - frame + 4
+                subjectStart, subjectEnd = subjectEnd, subjectStart
+            lLines.append("%s\t%d\t%d\t%s\t%d\t%d\t%g\t%i\t%f\n" % (seqName, ntStart, ntEnd, record[3], subjectStart, subjectEnd, float(record[6]), score, float(record[8])))
+        return lLines
     
     ## Transform the amino acid query coord into nucleotides and switch subject coord if the strand is reversed
     # @param listAlignInstance list of align object instance
     #
     def transformQueryCoord(self, listAlignInstance):
-        bioseqList = BioseqUtils.extractBioseqListFromFastaFile( self._consensusFileName )
         for alignInstance in listAlignInstance.getList():
             frame = self._extractFrameFromSeqName(alignInstance)
             previousEnd = alignInstance.range_query.end                            
@@ -42,8 +94,7 @@ class TransformAACoordIntoNtCoordInAlignFormat( object ):
                 self._changeStartInAAIntoNtInPositiveFrame(alignInstance, frame, previousStart) 
                 self._changeEndInAAIntoNtInPositiveFrame(alignInstance, frame, previousEnd)                
             else:
-                self._checkIfSeqNameIsInDNASeqFile(bioseqList, alignInstance.range_query.seqname)
-                consensusLength = BioseqUtils.getSeqLengthWithSeqName(bioseqList, alignInstance.range_query.seqname)              
+                consensusLength = self._getConsensusLength(alignInstance.range_query.seqname)
                 self._changeStartInAAIntoNtInNegativeFrame(alignInstance, frame, consensusLength, previousEnd)
                 self._changeEndInAAIntoNtInNegativeFrame(alignInstance, frame, consensusLength, previousStart)
                 self._invertedSubjectCoord(alignInstance)
@@ -115,12 +166,23 @@ class TransformAACoordIntoNtCoordInAlignFormat( object ):
         frame = int(alignInstance.range_query.seqname[len(alignInstance.range_query.seqname) - 1])
         return frame
 
-    def _checkIfSeqNameIsInDNASeqFile(self, bioseqList, seqName):
-        isSeqNameInBioseqList = False
-        for bioseq in bioseqList:
-            if seqName == bioseq.header:
-                isSeqNameInBioseqList = True
-        if not isSeqNameInBioseqList:
+    def _checkIfSeqNameIsInDNASeqFile(self, consensusDB, seqName):
+        if not seqName in consensusDB:
             sys.stderr.write("seqName : " + seqName + " is not in the consensus file " + self._consensusFileName + "\n")
             sys.exit(1)
+
+    ## Return the length of a consensus, the consensus file being indexed once (the '.fai' index being reused if up to date)
+    #
+    def _getConsensusLength(self, seqName):
+        if self._consensusDB == None:
+            self._consensusDB = IndexedFastaDB(self._consensusFileName)
+        self._checkIfSeqNameIsInDNASeqFile(self._consensusDB, seqName)
+        return self._consensusDB.getSeqLength(seqName)
+
+    def _iterAlignRecords(self, inFile):
+        for line in inFile:
+            lFields = line.split("\t")
+            if len(lFields) < 5:
+                break
+            yield lFields
     
\ No newline at end of file
@@ -0,0 +1,191 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import os
+import heapq
+import marshal
+
+
+## Static methods to remove doublons of Align, Path, Match or Set instances
+#
+# @note two instances are doublons if they have the same canonical key (see the 'get*Key' methods)
+# @note lists are processed with a dictionary of the keys already seen, files with an external sort by key
+#
+class DoublonUtils( object ):
+    
+    ## Return the coordinates and sequence names of an Align, Path or Match instance, or of a Set instance
+    #
+    def getCoordKey( iObject ):
+        if hasattr( iObject, "range_query" ):
+            return ( iObject.range_query.seqname, iObject.range_query.start, iObject.range_query.end,
+                     iObject.range_subject.seqname, iObject.range_subject.start, iObject.range_subject.end )
+        return ( iObject.seqname, iObject.start, iObject.end )
+    
+    getCoordKey = staticmethod( getCoordKey )
+    
+    ## Return the key of an Align instance, equal for two instances iff they are equal (see Align.__eq__())
+    #
+    def getAlignKey( iAlign ):
+        return DoublonUtils.getCoordKey( iAlign ) + ( iAlign.e_value, iAlign.score, iAlign.identity )
+    
+    getAlignKey = staticmethod( getAlignKey )
+    
+    ## Return the key of a Path instance, equal for two instances iff they are equal (see Path.__eq__())
+    #
+    def getPathKey( iPath ):
+        return ( iPath.id, ) + DoublonUtils.getAlignKey( iPath )
+    
+    getPathKey = staticmethod( getPathKey )
+    
+    ## Return the key of a Set instance, equal for two instances iff they are equal (see Set.__eq__())
+    #
+    def getSetKey( iSet ):
+        return ( iSet.id, iSet.name ) + DoublonUtils.getCoordKey( iSet )
+    
+    getSetKey = staticmethod( getSetKey )
+    
+    ## Return the key of a Match (or Align) instance, equal for two instances iff they are doublons (see Match.isDoublonWith())
+    #
+    # @param ignoreStrands boolean if True, compare only the min and max of the coordinates (as the Range instances of pyRepet.coord)
+    # @note when query and subject have different names, the key is the same if they are swapped
+    #
+    def getMatchDoublonKey( iMatch, ignoreStrands=False ):
+        if ignoreStrands:
+            query = ( iMatch.range_query.seqname, iMatch.range_query.getMin(), iMatch.range_query.getMax() )
+            subject = ( iMatch.range_subject.seqname, iMatch.range_subject.getMin(), iMatch.range_subject.getMax() )
+        else:
+            query = ( iMatch.range_query.seqname, iMatch.range_query.start, iMatch.range_query.end )
+            subject = ( iMatch.range_subject.seqname, iMatch.range_subject.start, iMatch.range_subject.end )
+        if query[0] != subject[0] and subject < query:
+            query, subject = subject, query
+        return ( iMatch.identity, iMatch.score, iMatch.e_value ) + query + subject
+    
+    getMatchDoublonKey = staticmethod( getMatchDoublonKey )
+    
+    ## Return a new list without doublons, keeping the first instance of each key
+    #
+    # @param lObjects list of instances
+    # @param getKey function returning the key of an instance
+    #
+    def getListWithoutDoublons( lObjects, getKey ):
+        lUniqObjects = []
+        dKeys = {}
+        for iObject in lObjects:
+            key = getKey( iObject )
+            if not dKeys.has_key( key ):
+                dKeys[ key ] = True
+                lUniqObjects.append( iObject )
+        return lUniqObjects
+    
+    getListWithoutDoublons = staticmethod( getListWithoutDoublons )
+    
+    ## Write a file without doublons, the instances being sorted by key
+    #
+    # @param inFileName name of the input file (one instance per line, e.g. format 'path')
+    # @param outFileName name of the output file
+    # @param objectClass class of the instances (Align, Path, Match, Set...), having setFromString() and toString()
+    # @param getKey function returning the key of an instance
+    # @param getRank function returning the rank of an instance, the one of lowest rank is kept among doublons (default: the first one in the file)
+    # @param maxNbInstancesInMemory maximum number of instances sorted in memory, the sorted blocks being written in temporary files then merged
+    # @return number of instances in the input file and in the output file
+    #
+    def writeFileWithoutDoublons( inFileName, outFileName, objectClass, getKey, getRank=None, maxNbInstancesInMemory=1000000 ):
+        lBlockFileNames = []
+        nbInstances = 0
+        lRecords = []
+        inFile = open( inFileName, "r" )
+        for line in inFile:
+            if line.strip() == "":
+                continue
+            iObject = objectClass()
+            iObject.setFromString( line )
+            if getRank == None:
+                rank = nbInstances
+            else:
+                rank = getRank( iObject )
+            lRecords.append( ( getKey( iObject ), rank, nbInstances, iObject.toString() ) )
+            nbInstances += 1
+            if len(lRecords) == maxNbInstancesInMemory:
+                lBlockFileNames.append( DoublonUtils._writeSortedBlock( lRecords, "%s.tmp%i-%i" % ( outFileName, os.getpid(), len(lBlockFileNames) ) ) )
+                lRecords = []
+        inFile.close()
+        
+        if lBlockFileNames == []:
+            lRecords.sort()
+            iterRecords = iter( lRecords )
+        else:
+            if lRecords != []:
+                lBlockFileNames.append( DoublonUtils._writeSortedBlock( lRecords, "%s.tmp%i-%i" % ( outFileName, os.getpid(), len(lBlockFileNames) ) ) )
+                lRecords = []
+            iterRecords = heapq.merge( *[ DoublonUtils._readSortedBlock( blockFileName ) for blockFileName in lBlockFileNames ] )
+            
+        nbUniqInstances = 0
+        outFile = open( outFileName, "w" )
+        previousKey = None
+        for key, rank, index, string in iterRecords:
+            if nbUniqInstances == 0 or key != previousKey:
+                outFile.write( "%s\n" % ( string ) )
+                previousKey = key
+                nbUniqInstances += 1
+        outFile.close()
+        for blockFileName in lBlockFileNames:
+            os.remove( blockFileName )
+        return nbInstances, nbUniqInstances
+    
+    writeFileWithoutDoublons = staticmethod( writeFileWithoutDoublons )
+    
+    ## Sort records and write them in a file, keeping only the first record of each key
+    #
+    def _writeSortedBlock( lRecords, blockFileName ):
+        lRecords.sort()
+        blockFile = open( blockFileName, "wb" )
+        previousKey = None
+        for i in xrange( 0, len(lRecords) ):
+            if i == 0 or lRecords[i][0] != previousKey:
+                marshal.dump( lRecords[i], blockFile )
+                previousKey = lRecords[i][0]
+        blockFile.close()
+        return blockFileName
+    
+    _writeSortedBlock = staticmethod( _writeSortedBlock )
+    
+    ## Yield the records of a file written by _writeSortedBlock()
+    #
+    def _readSortedBlock( blockFileName ):
+        blockFile = open( blockFileName, "rb" )
+        while True:
+            try:
+                yield marshal.load( blockFile )
+            except EOFError:
+                break
+        blockFile.close()
+    
+    _readSortedBlock = staticmethod( _readSortedBlock )
@@ -0,0 +1,185 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+## Union-find (disjoint sets) of identifiers, remembering the order in which they were added
+#
+class _UnionFind( object ):
+
+    def __init__( self ):
+        self._dParent = {}
+        self._lNodes = []
+
+
+    def find( self, node ):
+        if not self._dParent.has_key( node ):
+            self._dParent[ node ] = node
+            self._lNodes.append( node )
+            return node
+        root = node
+        while self._dParent[ root ] != root:
+            root = self._dParent[ root ]
+        while self._dParent[ node ] != root:
+            self._dParent[ node ], node = root, self._dParent[ node ]
+        return root
+
+
+    def union( self, node1, node2 ):
+        root1 = self.find( node1 )
+        root2 = self.find( node2 )
+        if root1 != root2:
+            self._dParent[ root2 ] = root1
+
+
+    ## Return the list of the node lists of each component, in the order of their first node
+    #
+    def getGroups( self ):
+        dRoot2Group = {}
+        lGroups = []
+        for node in self._lNodes:
+            root = self.find( node )
+            if not dRoot2Group.has_key( root ):
+                dRoot2Group[ root ] = []
+                lGroups.append( dRoot2Group[ root ] )
+            dRoot2Group[ root ].append( node )
+        return lGroups
+
+
+## Sweep-line over intervals given as columns (sequence names, starts, ends, identifiers)
+#
+# @note the columns can be lists, array.array or numpy arrays; coordinates are inclusive
+# @note an interval is on the direct strand if start <= end; with 'isStrandAware', intervals on different strands never overlap
+#
+class IntervalSweep( object ):
+    
+    ## Return the list of identifier lists of overlapping intervals, transitively (connected components)
+    #
+    # @param lSeqnames column of sequence names
+    # @param lStarts column of starts
+    # @param lEnds column of ends
+    # @param lIds column of identifiers, several intervals can share the same identifier
+    # @param isStrandAware boolean
+    # @return list of identifier lists, each with at least two identifiers
+    #
+    def getIdGroupsOfOverlappingIntervals( lSeqnames, lStarts, lEnds, lIds, isStrandAware=True ):
+        iUnionFind = _UnionFind()
+        currentKey = None
+        currentMax = None
+        currentId = None
+        for key, intervalMin, intervalMax, id, isSubject in IntervalSweep._getSortedIntervals( lSeqnames, lStarts, lEnds, lIds, isStrandAware ):
+            if key == currentKey and intervalMin <= currentMax:
+                if id != currentId:
+                    iUnionFind.union( currentId, id )
+                if intervalMax > currentMax:
+                    currentMax = intervalMax
+            else:
+                currentKey = key
+                currentMax = intervalMax
+                currentId = id
+        return iUnionFind.getGroups()
+    
+    getIdGroupsOfOverlappingIntervals = staticmethod( getIdGroupsOfOverlappingIntervals )
+    
+    ## Return the list of identifier lists of reference and subject intervals linked by overlaps between a reference and a subject interval (connected components)
+    #
+    # @param lRefColumns list of the reference columns (sequence names, starts, ends, identifiers)
+    # @param lSubjectColumns list of the subject columns (sequence names, starts, ends, identifiers)
+    # @param isStrandAware boolean
+    # @return list of identifier lists, the subject identifiers being multiplied by -1
+    # @note two reference (or two subject) intervals are only grouped if they are linked through intervals of the other list
+    #
+    def getIdGroupsOfOverlappingIntervalsBetween( lRefColumns, lSubjectColumns, isStrandAware=True ):
+        lIntervals = IntervalSweep._getIntervals( isStrandAware=isStrandAware, *lRefColumns )
+        lIntervals.extend( IntervalSweep._getIntervals( isStrandAware=isStrandAware, isSubject=True, *lSubjectColumns ) )
+        lIntervals.sort()
+        iUnionFind = _UnionFind()
+        currentKey = None
+        # per list (0: reference, 1: subject), [max, id] of the ongoing intervals, those already grouped together being gathered
+        lOngoing = [ [], [] ]
+        for key, intervalMin, intervalMax, id, isSubject in lIntervals:
+            if key != currentKey:
+                currentKey = key
+                lOngoing = [ [], [] ]
+            lOverlapping = [ ongoing for ongoing in lOngoing[ not isSubject ] if ongoing[0] >= intervalMin ]
+            if lOverlapping != []:
+                groupMax = lOverlapping[0][0]
+                for ongoingMax, ongoingId in lOverlapping:
+                    iUnionFind.union( ongoingId, id )
+                    if ongoingMax > groupMax:
+                        groupMax = ongoingMax
+                lOverlapping = [ [ groupMax, id ] ]
+            lOngoing[ not isSubject ] = lOverlapping
+            lOngoing[ isSubject ].append( [ intervalMax, id ] )
+        return iUnionFind.getGroups()
+    
+    getIdGroupsOfOverlappingIntervalsBetween = staticmethod( getIdGroupsOfOverlappingIntervalsBetween )
+    
+    ## Return the intervals as a list of (key, min, max, identifier, isSubject) tuples, the subject identifiers being multiplied by -1
+    #
+    def _getIntervals( lSeqnames, lStarts, lEnds, lIds, isStrandAware=True, isSubject=False ):
+        lSeqnames = IntervalSweep._getList( lSeqnames )
+        lStarts = IntervalSweep._getList( lStarts )
+        lEnds = IntervalSweep._getList( lEnds )
+        lIds = IntervalSweep._getList( lIds )
+        lIntervals = []
+        for i in xrange( 0, len(lStarts) ):
+            start = lStarts[i]
+            end = lEnds[i]
+            if isStrandAware:
+                key = ( lSeqnames[i], start <= end )
+            else:
+                key = lSeqnames[i]
+            if start <= end:
+                interval = ( key, start, end )
+            else:
+                interval = ( key, end, start )
+            if isSubject:
+                lIntervals.append( interval + ( lIds[i] * -1, True ) )
+            else:
+                lIntervals.append( interval + ( lIds[i], False ) )
+        return lIntervals
+    
+    _getIntervals = staticmethod( _getIntervals )
+    
+    def _getSortedIntervals( lSeqnames, lStarts, lEnds, lIds, isStrandAware=True ):
+        lIntervals = IntervalSweep._getIntervals( lSeqnames, lStarts, lEnds, lIds, isStrandAware )
+        lIntervals.sort()
+        return lIntervals
+    
+    _getSortedIntervals = staticmethod( _getSortedIntervals )
+    
+    ## Return a column as a list of Python values (numpy and array.array columns are converted at once)
+    #
+    def _getList( column ):
+        if hasattr( column, "tolist" ):
+            return column.tolist()
+        return column
+    
+    _getList = staticmethod( _getList )
@@ -0,0 +1,125 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+import bisect
+
+
+## Nested containment list: in-memory index of the intervals of one sequence
+#
+# @note intervals are (min, max, identifier) triplets, coordinates are inclusive
+# @note see Alekseyenko and Lee, Bioinformatics 2007
+#
+class NCList( object ):
+    
+    ## Constructor
+    #
+    # @param lIntervals list of (min, max, identifier) tuples
+    #
+    def __init__( self, lIntervals = [] ):
+        self._lMins = []
+        self._lMaxs = []
+        self._lIds = []
+        self._lChildren = []
+        self._size = 0
+        self.build( lIntervals )
+        
+    ## Build the index, replacing any previous content
+    #
+    # @param lIntervals list of (min, max, identifier) tuples
+    #
+    def build( self, lIntervals ):
+        self._lMins = [ [] ]
+        self._lMaxs = [ [] ]
+        self._lIds = [ [] ]
+        self._lChildren = [ [] ]
+        self._size = len(lIntervals)
+        lSorted = sorted( lIntervals, key=lambda t: ( t[0], -t[1] ) )
+        lStack = []   # (sublist, position, max) of the enclosing intervals
+        for start, end, id in lSorted:
+            while lStack != [] and end > lStack[-1][2]:
+                lStack.pop()
+            if lStack == []:
+                sublist = 0
+            else:
+                parentSublist, parentPos, parentMax = lStack[-1]
+                sublist = self._lChildren[ parentSublist ][ parentPos ]
+                if sublist == -1:
+                    sublist = len(self._lMins)
+                    self._lMins.append( [] )
+                    self._lMaxs.append( [] )
+                    self._lIds.append( [] )
+                    self._lChildren.append( [] )
+                    self._lChildren[ parentSublist ][ parentPos ] = sublist
+            self._lMins[ sublist ].append( start )
+            self._lMaxs[ sublist ].append( end )
+            self._lIds[ sublist ].append( id )
+            self._lChildren[ sublist ].append( -1 )
+            lStack.append( ( sublist, len(self._lMins[ sublist ]) - 1, end ) )
+            
+    ## Return the number of intervals in the index
+    #
+    def getSize( self ):
+        return self._size
+    
+    ## Return the list of (min, max, identifier) tuples overlapping a given region
+    #
+    # @param start integer start coordinate
+    # @param end integer end coordinate
+    #
+    def getOverlappingIntervals( self, start, end ):
+        qmin = min( start, end )
+        qmax = max( start, end )
+        lOut = []
+        lToVisit = [ 0 ]
+        while lToVisit != []:
+            sublist = lToVisit.pop()
+            lMins = self._lMins[ sublist ]
+            lMaxs = self._lMaxs[ sublist ]
+            lIds = self._lIds[ sublist ]
+            lChildren = self._lChildren[ sublist ]
+            i = bisect.bisect_left( lMaxs, qmin )   # within a sublist, max values are sorted too
+            n = len(lMins)
+            while i < n and lMins[i] <= qmax:
+                lOut.append( ( lMins[i], lMaxs[i], lIds[i] ) )
+                if lChildren[i] != -1:
+                    lToVisit.append( lChildren[i] )
+                i += 1
+        return lOut
+    
+    ## Return the list of distinct identifiers whose interval overlaps a given region
+    #
+    # @param start integer start coordinate
+    # @param end integer end coordinate
+    #
+    def getIdListOverlapping( self, start, end ):
+        dIds = {}
+        for t in self.getOverlappingIntervals( start, end ):
+            dIds[ t[2] ] = True
+        return dIds.keys()
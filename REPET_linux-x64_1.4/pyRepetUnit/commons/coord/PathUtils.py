@@ -36,6 +36,7 @@ from pyRepetUnit.commons.coord.Path import Path
 from pyRepetUnit.commons.coord.SetUtils import SetUtils
 from pyRepetUnit.commons.coord.Map import Map
 from pyRepetUnit.commons.coord.AlignUtils import AlignUtils
+from pyRepetUnit.commons.coord.DoublonUtils import DoublonUtils
 
 ## Static methods for the manipulation of Path instances
 #
@@ -173,21 +174,9 @@ class PathUtils ( object ):
         if len(lPaths) < 2:
             return lPaths
         lSortedPaths = PathUtils.getPathListSortedByIncreasingMinQueryThenMaxQueryThenIdentifier( lPaths )
-        lUniqPaths = [ lSortedPaths[0] ]
         if useOnlyCoord:
-            for iPath in lSortedPaths[1:]:
-                if iPath.range_query.start != lUniqPaths[-1].range_query.start \
-                or iPath.range_query.end != lUniqPaths[-1].range_query.end \
-                or iPath.range_query.seqname != lUniqPaths[-1].range_query.seqname \
-                or iPath.range_subject.start != lUniqPaths[-1].range_subject.start \
-                or iPath.range_subject.end != lUniqPaths[-1].range_subject.end \
-                or iPath.range_subject.seqname != lUniqPaths[-1].range_subject.seqname:
-                    lUniqPaths.append( iPath )
-        else:
-            for iPath in lSortedPaths[1:]:
-                if iPath != lUniqPaths[-1]:
-                    lUniqPaths.append( iPath )
-        return lUniqPaths
+            return DoublonUtils.getListWithoutDoublons( lSortedPaths, DoublonUtils.getCoordKey )
+        return DoublonUtils.getListWithoutDoublons( lSortedPaths, DoublonUtils.getPathKey )
     
     getPathListWithoutDuplicates = staticmethod( getPathListWithoutDuplicates )
     
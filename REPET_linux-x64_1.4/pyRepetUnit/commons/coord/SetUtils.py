@@ -30,6 +30,7 @@
 
 
 from pyRepetUnit.commons.coord.Set import Set
+from pyRepetUnit.commons.coord.IntervalSweep import IntervalSweep
 
 ## Static methods for the manipulation of Path instances
 #
@@ -264,21 +265,14 @@ class SetUtils( object ):
         
         lSortedSets = SetUtils.getSetListSortedByIncreasingMinThenInvLength( lSets )
         
-        prev_count = 0
-        for iSet in lSortedSets[0:]:
-            if prev_count != len(lSortedSets):
-                for i in lSortedSets[ prev_count + 1: ]:
-                    if iSet.isOverlapping( i ):
-                        iSet.merge( i )
-                IsAlreadyInList = False
-                for newSet in l:
-                    if newSet.isOverlapping( iSet ):
-                        IsAlreadyInList = True
-                        newSet.merge( iSet )
-                        l [ l.index( newSet ) ] = newSet
-                if not IsAlreadyInList:
-                    l.append( iSet )
-                prev_count += 1
+        # sweep-line: the sets are sorted by min, a set overlaps the last merged set of its sequence iff it starts before its max
+        dSeqname2LastSet = {}
+        for iSet in lSortedSets:
+            if dSeqname2LastSet.has_key( iSet.seqname ) and iSet.getMin() <= dSeqname2LastSet[ iSet.seqname ].getMax():
+                dSeqname2LastSet[ iSet.seqname ].merge( iSet )
+            else:
+                dSeqname2LastSet[ iSet.seqname ] = iSet
+                l.append( iSet )
         return l
     
     mergeSetsInList = staticmethod( mergeSetsInList )
@@ -359,50 +353,32 @@ class SetUtils( object ):
     
     getSetListSortedByIncreasingMinThenInvLength = staticmethod( getSetListSortedByIncreasingMinThenInvLength )
  
+    ## Return the columns of a list of Set instances, to be given to IntervalSweep
+    #
+    # @param lSets list of Set instances
+    # @return tuple of four lists: sequence names, starts, ends and identifiers
+    #
+    def getColumnsOfSetList( lSets ):
+        lSeqnames = []
+        lStarts = []
+        lEnds = []
+        lIds = []
+        for iSet in lSets:
+            lSeqnames.append( iSet.seqname )
+            lStarts.append( iSet.start )
+            lEnds.append( iSet.end )
+            lIds.append( iSet.id )
+        return lSeqnames, lStarts, lEnds, lIds
+    
+    getColumnsOfSetList = staticmethod( getColumnsOfSetList )
+    
     ## Return a list of identifier lists of overlapping Sets from the subject list, according to the reference list
     #
     # @param lRef list of Set instances
     # @param lSubject list of Set instances
     #
     def getListOfIdListOfOverlappingSets(lRef,lSubject):
-        lSortedRef = SetUtils.getSetListSortedByIncreasingMinThenMax( lRef )
-        lSortedSubject = SetUtils.getSetListSortedByIncreasingMinThenMax( lSubject )
-
-        lOverlappingSet = []
-        lOverlappingSetCounter = 0
-
-        id2LOverlappingSet_pos = {}
-    
-        i = 0
-        j = 0
-        while i!= len(lSortedRef):
-            while j!= len(lSortedSubject) and lSortedRef[i].getMin()>lSortedSubject[j].getMax()\
-                and not(lSortedRef[i].isOverlapping(lSortedSubject[j])\
-                      and lSortedRef[i].isOnDirectStrand()==lSortedSubject[j].isOnDirectStrand()):
-                j+=1
-            jj=j
-            while jj!= len(lSortedSubject) and lSortedRef[i].isOverlapping(lSortedSubject[jj])\
-                  and lSortedRef[i].isOnDirectStrand()==lSortedSubject[jj].isOnDirectStrand():
-                id1=lSortedRef[i].id
-                id2=lSortedSubject[jj].id*-1
-                if id2LOverlappingSet_pos.has_key(id1) \
-                   and not id2LOverlappingSet_pos.has_key(id2):
-                    lOverlappingSet[id2LOverlappingSet_pos[id1]].append(id2)
-                    id2LOverlappingSet_pos[id2]=id2LOverlappingSet_pos[id1]
-                if id2LOverlappingSet_pos.has_key(id2) \
-                   and not id2LOverlappingSet_pos.has_key(id1):
-                    lOverlappingSet[id2LOverlappingSet_pos[id2]].append(id1)
-                    id2LOverlappingSet_pos[id1]=id2LOverlappingSet_pos[id2]
-                if not id2LOverlappingSet_pos.has_key(id2) \
-                   and not id2LOverlappingSet_pos.has_key(id1):
-                    lOverlappingSet.append([id1,id2])
-                    id2LOverlappingSet_pos[id1]=lOverlappingSetCounter
-                    id2LOverlappingSet_pos[id2]=lOverlappingSetCounter
-                    lOverlappingSetCounter+=1
-                jj+=1
-            i+=1
-    
-        return lOverlappingSet
+        return IntervalSweep.getIdGroupsOfOverlappingIntervalsBetween( SetUtils.getColumnsOfSetList( lRef ), SetUtils.getColumnsOfSetList( lSubject ) )
     
     getListOfIdListOfOverlappingSets = staticmethod (getListOfIdListOfOverlappingSets)
     
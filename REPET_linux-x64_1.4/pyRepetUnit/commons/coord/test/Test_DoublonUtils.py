@@ -0,0 +1,137 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import os
+import shutil
+import random
+import tempfile
+from pyRepetUnit.commons.coord.Range import Range
+from pyRepetUnit.commons.coord.Path import Path
+from pyRepetUnit.commons.coord.Match import Match
+from pyRepetUnit.commons.coord.DoublonUtils import DoublonUtils
+
+
+class Test_DoublonUtils( unittest.TestCase ):
+    
+    def setUp( self ):
+        self._dir = tempfile.mkdtemp()
+        
+    def tearDown( self ):
+        shutil.rmtree( self._dir )
+        
+    # Random coordinates in a small space, so that many instances are doublons
+    #
+    def _setRandomAlign( self, iAlign ):
+        lCoords = [ random.randint( 1, 3 ) for i in xrange( 0, 4 ) ]
+        iAlign.range_query = Range( random.choice( [ "seq1", "seq2" ] ), lCoords[0], lCoords[1] )
+        iAlign.range_subject = Range( random.choice( [ "seq1", "seq2" ] ), lCoords[2], lCoords[3] )
+        iAlign.e_value = random.choice( [ 0.0, 1e-10 ] )
+        iAlign.score = random.randint( 10, 11 )
+        iAlign.identity = 90.0
+        return iAlign
+    
+    def _getRandomPath( self ):
+        iPath = self._setRandomAlign( Path() )
+        iPath.id = random.randint( 1, 3 )
+        return iPath
+    
+    def test_getMatchDoublonKey_sameAsIsDoublonWith( self ):
+        random.seed( 0 )
+        lMatches = [ self._setRandomAlign( Match() ) for i in xrange( 0, 200 ) ]
+        for iMatch1 in lMatches:
+            for iMatch2 in lMatches:
+                self.assertEqual( iMatch1.isDoublonWith( iMatch2 ), DoublonUtils.getMatchDoublonKey( iMatch1 ) == DoublonUtils.getMatchDoublonKey( iMatch2 ) )
+                
+    def test_getPathKey_sameAsEq( self ):
+        random.seed( 0 )
+        lPaths = [ self._getRandomPath() for i in xrange( 0, 200 ) ]
+        for iPath1 in lPaths:
+            for iPath2 in lPaths:
+                self.assertEqual( iPath1 == iPath2, DoublonUtils.getPathKey( iPath1 ) == DoublonUtils.getPathKey( iPath2 ) )
+                
+    def test_getListWithoutDoublons( self ):
+        random.seed( 0 )
+        lMatches = [ self._setRandomAlign( Match() ) for i in xrange( 0, 300 ) ]
+        lExp = []
+        for iMatch in lMatches:
+            isDoublon = False
+            for iUniqMatch in lExp:
+                if iMatch.isDoublonWith( iUniqMatch ):
+                    isDoublon = True
+                    break
+            if not isDoublon:
+                lExp.append( iMatch )
+        lObs = DoublonUtils.getListWithoutDoublons( lMatches, DoublonUtils.getMatchDoublonKey )
+        self.assertEqual( len(lExp), len(lObs) )
+        for i in xrange( 0, len(lExp) ):
+            self.assertTrue( lExp[i] is lObs[i] )
+            
+    def test_writeFileWithoutDoublons_keepLowestRank( self ):
+        random.seed( 0 )
+        lPaths = [ self._getRandomPath() for i in xrange( 0, 500 ) ]
+        inFileName = os.path.join( self._dir, "dummy.path" )
+        inFile = open( inFileName, "w" )
+        for iPath in lPaths:
+            inFile.write( "%s\n" % ( iPath.toString() ) )
+        inFile.close()
+        # as read from the file, the query being on the direct strand
+        lReadPaths = []
+        for iPath in lPaths:
+            iReadPath = Path()
+            iReadPath.setFromString( iPath.toString() )
+            lReadPaths.append( iReadPath )
+        dKey2Path = {}
+        for iPath in lReadPaths:
+            key = DoublonUtils.getAlignKey( iPath )
+            if not dKey2Path.has_key( key ) or iPath.id < dKey2Path[ key ].id:
+                dKey2Path[ key ] = iPath
+        lExpLines = sorted( [ "%s\n" % ( iPath.toString() ) for iPath in dKey2Path.values() ] )
+        
+        lOutputs = []
+        for maxNbInstancesInMemory in [ 1000000, 7, 1 ]:
+            outFileName = os.path.join( self._dir, "dummyUniq%i.path" % ( maxNbInstancesInMemory ) )
+            nbInstances, nbUniqInstances = DoublonUtils.writeFileWithoutDoublons( inFileName, outFileName, Path, DoublonUtils.getAlignKey,
+                                                                                  lambda iPath: iPath.id, maxNbInstancesInMemory )
+            self.assertEqual( ( 500, len(lExpLines) ), ( nbInstances, nbUniqInstances ) )
+            outFile = open( outFileName, "r" )
+            lOutputs.append( outFile.readlines() )
+            outFile.close()
+            self.assertEqual( lExpLines, sorted( lOutputs[-1] ) )
+        self.assertEqual( lOutputs[0], lOutputs[1] )
+        self.assertEqual( lOutputs[0], lOutputs[2] )
+        self.assertEqual( 4, len( os.listdir( self._dir ) ) )
+        
+        
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_DoublonUtils ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
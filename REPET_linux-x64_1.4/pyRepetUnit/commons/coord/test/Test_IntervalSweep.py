@@ -0,0 +1,125 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import random
+from pyRepetUnit.commons.coord.IntervalSweep import IntervalSweep
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Test_IntervalSweep( unittest.TestCase ):
+    
+    # Columns of random intervals on both strands, several intervals sharing some identifiers
+    #
+    def _getRandomColumns( self, nbIntervals, maxId ):
+        lColumns = [ [], [], [], [] ]
+        for i in xrange( 0, nbIntervals ):
+            start = random.randint( 1, 5000 )
+            end = start + random.randint( 0, 100 )
+            if random.random() < 0.5:
+                start, end = end, start
+            lColumns[0].append( random.choice( [ "chr1", "chr2" ] ) )
+            lColumns[1].append( start )
+            lColumns[2].append( end )
+            lColumns[3].append( random.randint( 1, maxId ) )
+        return lColumns
+    
+    def _getIntervals( self, lColumns, isStrandAware, sign=1 ):
+        lIntervals = []
+        for i in xrange( 0, len(lColumns[0]) ):
+            start, end = lColumns[1][i], lColumns[2][i]
+            lIntervals.append( ( lColumns[0][i], start <= end or not isStrandAware, min( start, end ), max( start, end ), sign * lColumns[3][i] ) )
+        return lIntervals
+    
+    # Connected components of the identifiers linked by overlapping intervals of different identifiers
+    #
+    def _getExpGroups( self, lPairs ):
+        dId2Group = {}
+        for interval1, interval2 in lPairs:
+            if interval1[:2] == interval2[:2] and interval1[2] <= interval2[3] and interval2[2] <= interval1[3] and interval1[4] != interval2[4]:
+                group = dId2Group.get( interval1[4], set( [ interval1[4] ] ) ) | dId2Group.get( interval2[4], set( [ interval2[4] ] ) )
+                for id in group:
+                    dId2Group[ id ] = group
+        lGroups = []
+        for group in dId2Group.values():
+            if sorted( group ) not in lGroups:
+                lGroups.append( sorted( group ) )
+        return sorted( lGroups )
+    
+    def _getSortedGroups( self, lGroups ):
+        return sorted( [ sorted( group ) for group in lGroups ] )
+    
+    def test_getIdGroupsOfOverlappingIntervals_sameAsBruteForce( self ):
+        random.seed( 0 )
+        for i in xrange( 0, 50 ):
+            lColumns = self._getRandomColumns( random.randint( 0, 150 ), 100 )
+            for isStrandAware in [ True, False ]:
+                lIntervals = self._getIntervals( lColumns, isStrandAware )
+                lExp = self._getExpGroups( [ ( interval1, interval2 ) for interval1 in lIntervals for interval2 in lIntervals ] )
+                lObs = IntervalSweep.getIdGroupsOfOverlappingIntervals( isStrandAware=isStrandAware, *lColumns )
+                self.assertEqual( lExp, self._getSortedGroups( lObs ) )
+                
+    def test_getIdGroupsOfOverlappingIntervalsBetween_sameAsBruteForce( self ):
+        random.seed( 0 )
+        for i in xrange( 0, 50 ):
+            lRefColumns = self._getRandomColumns( random.randint( 0, 100 ), 60 )
+            lSubjectColumns = self._getRandomColumns( random.randint( 0, 100 ), 60 )
+            for isStrandAware in [ True, False ]:
+                lRefIntervals = self._getIntervals( lRefColumns, isStrandAware )
+                lSubjectIntervals = self._getIntervals( lSubjectColumns, isStrandAware, -1 )
+                lExp = self._getExpGroups( [ ( interval1, interval2 ) for interval1 in lRefIntervals for interval2 in lSubjectIntervals ] )
+                lObs = IntervalSweep.getIdGroupsOfOverlappingIntervalsBetween( lRefColumns, lSubjectColumns, isStrandAware )
+                self.assertEqual( lExp, self._getSortedGroups( lObs ) )
+                
+    def test_getIdGroupsOfOverlappingIntervals_independentOfOrder( self ):
+        random.seed( 0 )
+        lColumns = self._getRandomColumns( 500, 200 )
+        lExp = IntervalSweep.getIdGroupsOfOverlappingIntervals( *lColumns )
+        lIndices = range( 0, 500 )
+        random.shuffle( lIndices )
+        lShuffledColumns = [ [ column[i] for i in lIndices ] for column in lColumns ]
+        self.assertEqual( lExp, IntervalSweep.getIdGroupsOfOverlappingIntervals( *lShuffledColumns ) )
+        
+    @unittest.skipIf( numpy == None, "numpy not installed" )
+    def test_getIdGroupsOfOverlappingIntervals_numpyColumns( self ):
+        random.seed( 0 )
+        lColumns = self._getRandomColumns( 500, 200 )
+        lNumpyColumns = [ lColumns[0], numpy.array( lColumns[1] ), numpy.array( lColumns[2] ), numpy.array( lColumns[3] ) ]
+        self.assertEqual( IntervalSweep.getIdGroupsOfOverlappingIntervals( *lColumns ), IntervalSweep.getIdGroupsOfOverlappingIntervals( *lNumpyColumns ) )
+        
+        
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_IntervalSweep ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
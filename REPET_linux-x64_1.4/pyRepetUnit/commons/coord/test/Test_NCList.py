@@ -0,0 +1,75 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import random
+from pyRepetUnit.commons.coord.NCList import NCList
+
+
+class Test_NCList( unittest.TestCase ):
+    
+    def _getRandomIntervals( self, nbIntervals, maxCoord, maxLength ):
+        lIntervals = []
+        for i in xrange( 0, nbIntervals ):
+            start = random.randint( 1, maxCoord )
+            lIntervals.append( ( start, start + random.randint( 0, maxLength ), i + 1 ) )
+        return lIntervals
+    
+    def test_getOverlappingIntervals_empty( self ):
+        iNCList = NCList()
+        self.assertEqual( 0, iNCList.getSize() )
+        self.assertEqual( [], iNCList.getOverlappingIntervals( 1, 100 ) )
+        
+    def test_getOverlappingIntervals_nested( self ):
+        lIntervals = [ ( 1, 100, 1 ), ( 10, 20, 2 ), ( 15, 18, 3 ), ( 30, 120, 4 ), ( 200, 300, 5 ) ]
+        iNCList = NCList( lIntervals )
+        self.assertEqual( 5, iNCList.getSize() )
+        self.assertEqual( [ ( 1, 100, 1 ), ( 10, 20, 2 ), ( 15, 18, 3 ) ], sorted( iNCList.getOverlappingIntervals( 16, 17 ) ) )
+        self.assertEqual( [ 1, 4 ], sorted( iNCList.getIdListOverlapping( 100, 21 ) ) )
+        self.assertEqual( [ 4, 5 ], sorted( iNCList.getIdListOverlapping( 120, 200 ) ) )
+        self.assertEqual( [], iNCList.getIdListOverlapping( 121, 199 ) )
+        
+    def test_getOverlappingIntervals_sameAsBruteForce( self ):
+        random.seed( 0 )
+        lIntervals = self._getRandomIntervals( 2000, 100000, 3000 )
+        iNCList = NCList( lIntervals )
+        for i in xrange( 0, 500 ):
+            start = random.randint( 1, 105000 )
+            end = start + random.randint( 0, 2000 )
+            lExp = [ t for t in lIntervals if t[0] <= end and t[1] >= start ]
+            self.assertEqual( sorted( lExp ), sorted( iNCList.getOverlappingIntervals( start, end ) ) )
+            self.assertEqual( sorted( lExp ), sorted( iNCList.getOverlappingIntervals( end, start ) ) )
+            
+            
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_NCList ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
@@ -0,0 +1,299 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import os
+import sys
+import time
+import shutil
+import traceback
+import multiprocessing
+from pyRepetUnit.commons.launcher.JobStatusClient import JobStatusClient
+from pyRepetUnit.commons.launcher.JobStatusDirectory import JobStatusDirectory
+
+
+## Return True if the jobs of Launcher.runSingleJob() are run by a pool of long-lived worker processes
+#  instead of one job file each (REPET_QUEUE=local and REPET_LOCAL_POOL=1)
+#
+def isJobPoolEnabled():
+    return os.environ.get( "REPET_QUEUE" ) == "local" and os.environ.get( "REPET_LOCAL_POOL", "0" ) == "1"
+
+
+## Descriptor of a job run by a worker of the local pool: the commands of a job file, without the job file
+#
+# A worker runs the job as the file generated by Launcher.runSingleJob() would: in a new directory of the
+# temporary directory, with the same job table and status directory updates, and the same output in
+# 'jobname.o<jobid>' and 'jobname.e<jobid>'. Only the interpreter start and the job file are saved.
+#
+class JobBody( object ):
+    
+    ## Constructor
+    #
+    # @param job Job instance (tablename, groupid, jobname, queue)
+    # @param dDbParams dictionary connection parameters of the job table (host, user, passwd, dbname, port)
+    # @param statusDirPath string path of the status directory of the job group
+    # @param tmpdir string directory in which the job works
+    # @param cdir string directory in which the working directory is moved if the job fails
+    # @param cmdStart string python commands of the job, setting 'log' to its exit status
+    # @param cmdFinish string python commands run if the job succeeded
+    # @param minFreeGiga integer min nb of free Gb in the temporary directory
+    #
+    def __init__( self, job, dDbParams, statusDirPath, tmpdir, cdir, cmdStart, cmdFinish="", minFreeGiga=1 ):
+        self.tablename = job.tablename
+        self.groupid = job.groupid
+        self.jobname = job.jobname
+        self.queue = job.queue
+        self.dDbParams = dDbParams
+        self.statusDirPath = statusDirPath
+        self.tmpdir = tmpdir
+        self.cdir = cdir
+        self.cmdStart = cmdStart
+        self.cmdFinish = cmdFinish
+        self.minFreeGiga = minFreeGiga
+        
+        
+    ## Return the launcher under which the job is recorded in the job table
+    #
+    def getLauncher( self ):
+        return "JobBody_%s_%s" % ( self.groupid, self.jobname )
+    
+    
+    ## Run the job in the current process
+    #
+    # @param iJobStatus JobStatusClient instance, set to this job
+    # @return integer exit status (0 if the job finished, 1 otherwise)
+    #
+    def run( self, iJobStatus ):
+        iJobStatus.setJob( self.tablename, self.groupid, self.jobname, self.queue )
+        iStatusDir = JobStatusDirectory( self.statusDirPath )
+        print os.uname()
+        beginTime = time.time()
+        print 'beginTime=%f' % ( beginTime )
+        print "work in dir '%s'" % ( self.tmpdir )
+        sys.stdout.flush()
+        if not os.path.exists( self.tmpdir ):
+            print "ERROR: temporary directory '%s' doesn't exist" % ( self.tmpdir )
+            return self._endWithError( iJobStatus, iStatusDir )
+        freeSpace = os.statvfs( self.tmpdir )
+        if ( freeSpace.f_bavail * freeSpace.f_frsize ) / 1073741824.0 < self.minFreeGiga:
+            print "ERROR: less than %iGb in '%s'" % ( self.minFreeGiga, self.tmpdir )
+            return self._endWithError( iJobStatus, iStatusDir )
+        os.chdir( self.tmpdir )
+        newDir = "%s_%s_%s" % ( self.groupid, self.jobname, time.strftime("%Y%m%d-%H%M%S") )
+        if os.path.exists( newDir ):
+            shutil.rmtree( newDir )
+        os.mkdir( newDir )
+        os.chdir( newDir )
+        iJobStatus.changeStatus( "running" )
+        iStatusDir.writeStatus( self.jobname, "running" )
+        
+        dNamespace = { "os": os, "sys": sys, "time": time, "shutil": shutil,
+                       "iJobStatus": iJobStatus, "newDir": newDir, "beginTime": beginTime }
+        log = self._execute( self.cmdStart, dNamespace )
+        if log == 0:
+            log = dNamespace.get( "log", 1 )
+        if log != 0:
+            print "ERROR: job returned " + str(log)
+            os.chdir( self.tmpdir )
+            os.system( "mv " + newDir + " %s" % ( self.cdir ) )
+            return self._endWithError( iJobStatus, iStatusDir )
+        print "job finished successfully"
+        sys.stdout.flush()
+        # as in the job file, the finish commands may be indented in the block of the successful job
+        if self._execute( "if True:\n\tpass\n" + self.cmdFinish, dNamespace ) != 0:
+            return self._endWithError( iJobStatus, iStatusDir )
+        os.chdir( self.tmpdir )
+        shutil.rmtree( newDir, True )
+        
+        iJobStatus.changeStatus( "finished" )
+        iStatusDir.writeStatus( self.jobname, "finished" )
+        endTime = time.time()
+        print 'endTime=%f' % ( endTime)
+        print 'executionTime=%f' % ( endTime - beginTime )
+        print os.uname()
+        sys.stdout.flush()
+        return 0
+    
+    
+    ## Execute python commands, return 0 or the exit status if they end with an exception
+    #
+    def _execute( self, cmd, dNamespace ):
+        try:
+            exec cmd in dNamespace
+        except SystemExit, e:
+            if e.code == None:
+                return 0
+            if type(e.code) != int:
+                print e.code
+                return 1
+            return e.code
+        except Exception:
+            traceback.print_exc()
+            return 1
+        return 0
+    
+    
+    def _endWithError( self, iJobStatus, iStatusDir ):
+        iJobStatus.changeStatus( "error" )
+        iStatusDir.writeStatus( self.jobname, "error" )
+        sys.stdout.flush()
+        return 1
+    
+    
+## Long-lived worker process running the jobs sent to it, one at a time
+#
+# Unlike a multiprocessing.Pool, the worker running a job is known: if it dies during a job
+# (killed, segmentation fault, os._exit() in the job), the job ends with an error.
+#
+class JobWorker( object ):
+    
+    def __init__( self ):
+        self._conn, childConn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process( target=runJobBodies, args=( childConn, ) )
+        self._process.daemon = True
+        self._process.start()
+        childConn.close()
+        self._isAlive = True
+        
+        
+    ## Send a job to the worker
+    #
+    # @param iJobBody JobBody instance
+    # @param jobid integer job identifier
+    # @param directory string submission directory
+    #
+    def start( self, iJobBody, jobid, directory ):
+        self._conn.send( ( iJobBody, jobid, directory ) )
+        
+        
+    ## Return the exit status of the current job if it ended (1 if the worker died), None otherwise
+    #
+    def getReturnCode( self ):
+        if not self._conn.poll():
+            if self._process.is_alive():
+                return None
+            # a result sent just before the worker ended is still in the pipe
+            if not self._conn.poll():
+                return self._setDead()
+        try:
+            return self._conn.recv()
+        except ( EOFError, IOError ):
+            return self._setDead()
+        
+        
+    ## Return False if the worker died
+    #
+    def isAlive( self ):
+        return self._isAlive
+    
+    
+    ## Stop the worker once its current job ended
+    #
+    def stop( self ):
+        if self._isAlive:
+            try:
+                self._conn.send( None )
+            except IOError:
+                pass
+            self._process.join()
+        self._conn.close()
+        self._isAlive = False
+        
+        
+    def _setDead( self ):
+        self._isAlive = False
+        self._process.join()
+        sys.stderr.write( "ERROR: worker %i died with exit code %s\n" % ( self._process.pid, self._process.exitcode ) )
+        sys.stderr.flush()
+        return 1
+    
+    
+# Functions (module level, to be usable by a worker process)
+
+# status client of the worker, reused (with its connection) by all the jobs the worker runs
+_iJobStatus = None
+
+## Run a job in a worker, its stdout and stderr being redirected in 'jobname.o<jobid>' and 'jobname.e<jobid>'
+#
+# @param iJobBody JobBody instance
+# @param jobid integer job identifier
+# @param directory string submission directory
+# @return integer exit status of the job
+#
+def runJobBody( iJobBody, jobid, directory ):
+    global _iJobStatus
+    if _iJobStatus == None:
+        dDbParams = iJobBody.dDbParams
+        _iJobStatus = JobStatusClient( iJobBody.tablename, iJobBody.groupid, iJobBody.jobname, iJobBody.queue,
+                                       host=dDbParams["host"], user=dDbParams["user"], passwd=dDbParams["passwd"],
+                                       dbname=dDbParams["dbname"], port=dDbParams["port"],
+                                       runningDelay=float( os.environ.get( "REPET_JOB_RUNNING_DELAY", "0" ) ) )
+    workerDir = os.getcwd()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    savedStdout = os.dup( 1 )
+    savedStderr = os.dup( 2 )
+    stdoutFile = open( "%s/%s.o%i" % ( directory, iJobBody.jobname, jobid ), "w" )
+    stderrFile = open( "%s/%s.e%i" % ( directory, iJobBody.jobname, jobid ), "w" )
+    os.dup2( stdoutFile.fileno(), 1 )
+    os.dup2( stderrFile.fileno(), 2 )
+    stdoutFile.close()
+    stderrFile.close()
+    try:
+        try:
+            returnCode = iJobBody.run( _iJobStatus )
+        except Exception:
+            traceback.print_exc()
+            returnCode = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2( savedStdout, 1 )
+        os.dup2( savedStderr, 2 )
+        os.close( savedStdout )
+        os.close( savedStderr )
+        os.chdir( workerDir )
+    return returnCode
+
+
+## Main loop of a JobWorker: run the jobs received through a connection until None is received
+#
+# @param conn Connection instance
+#
+def runJobBodies( conn ):
+    while True:
+        try:
+            args = conn.recv()
+        except EOFError:
+            break
+        if args == None:
+            break
+        conn.send( runJobBody( *args ) )
+    conn.close()
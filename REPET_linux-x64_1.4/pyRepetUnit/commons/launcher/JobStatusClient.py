@@ -0,0 +1,170 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import os
+import sys
+import time
+import threading
+import ConfigParser
+import MySQLdb
+
+
+## MySQL client errors meaning the connection was dropped (as in DbMySql)
+#
+_lConnectionLostErrors = [ 2006, 2013 ]
+
+
+## Update the status of a job in the job table from the job itself, through one connection opened on demand
+#
+# This module only depends on MySQLdb, so that importing it in a job file is cheap.
+# With a delay, the 'running' status is sent only if the job still runs after that delay:
+# a shorter job only sends its final status.
+#
+class JobStatusClient( object ):
+    
+    ## Constructor
+    #
+    # @param tablename string table name recording the jobs
+    # @param groupid string group identifier of the job
+    # @param jobname string job name
+    # @param queue string queue name of the job
+    # @param host string db host name
+    # @param user string db user name
+    # @param passwd string db user password
+    # @param dbname string database name
+    # @param port integer database port
+    # @param cfgFileName string configuration file name (replaces the connection parameters above)
+    # @param runningDelay float nb of seconds before sending the 'running' status (default = 0, i.e. immediately)
+    #
+    def __init__( self, tablename, groupid, jobname, queue="", host="", user="", passwd="", dbname="", port=3306, cfgFileName="", runningDelay=0 ):
+        self._tablename = tablename
+        self._groupid = groupid
+        self._jobname = jobname
+        self._queue = queue
+        if queue == "none":
+            self._queue = ""
+        if cfgFileName != "":
+            config = ConfigParser.ConfigParser()
+            config.readfp( open(cfgFileName) )
+            host = config.get("repet_env","repet_host")
+            user = config.get("repet_env","repet_user")
+            passwd = config.get("repet_env","repet_pw")
+            dbname = config.get("repet_env","repet_db")
+            port = config.get("repet_env","repet_port")
+        self._dConnectionParams = { "host": host, "user": user, "passwd": passwd, "db": dbname, "port": int(port) }
+        self._runningDelay = runningDelay
+        self._db = None
+        self._timer = None
+        self._lock = threading.Lock()
+        self._lastStatus = None
+        
+        
+    ## Set the job whose status is changed, to reuse the client (and its connection) for another job
+    #
+    # @param tablename string table name recording the jobs
+    # @param groupid string group identifier of the job
+    # @param jobname string job name
+    # @param queue string queue name of the job
+    #
+    def setJob( self, tablename, groupid, jobname, queue="" ):
+        if self._timer != None:
+            self._timer.cancel()
+            self._timer = None
+        self._lock.acquire()
+        try:
+            self._tablename = tablename
+            self._groupid = groupid
+            self._jobname = jobname
+            self._queue = queue
+            if queue == "none":
+                self._queue = ""
+            self._lastStatus = None
+        finally:
+            self._lock.release()
+            
+            
+    ## Change the status of the job
+    #
+    # @param newStatus string new status (running, finished, error)
+    #
+    def changeStatus( self, newStatus ):
+        if newStatus == "running" and self._runningDelay > 0:
+            self._timer = threading.Timer( self._runningDelay, self._update, [ newStatus ] )
+            self._timer.setDaemon( True )
+            self._timer.start()
+            return
+        if self._timer != None:
+            self._timer.cancel()
+            self._timer = None
+        self._update( newStatus )
+        
+        
+    ## Close the connection
+    #
+    def close( self ):
+        if self._timer != None:
+            self._timer.cancel()
+            self._timer = None
+        if self._db != None:
+            self._db.close()
+            self._db = None
+            
+            
+    def _update( self, newStatus, maxNbTry=10 ):
+        sqlCmd = "UPDATE %s" % ( self._tablename )
+        sqlCmd += " SET status=%s, node=%s"
+        sqlCmd += " WHERE groupid=%s AND jobname=%s AND queue=%s"
+        params = ( newStatus, os.getenv( "HOSTNAME" ), self._groupid, self._jobname, self._queue )
+        self._lock.acquire()
+        try:
+            # a delayed 'running' status can't overwrite the final status
+            if newStatus == "running" and self._lastStatus in [ "finished", "error" ]:
+                return
+            self._lastStatus = newStatus
+            for i in xrange( 1, maxNbTry + 1 ):
+                try:
+                    if self._db == None:
+                        self._db = MySQLdb.connect( **self._dConnectionParams )
+                    cursor = self._db.cursor()
+                    cursor.execute( sqlCmd, params )
+                    cursor.close()
+                    self._db.commit()
+                    return
+                except MySQLdb.Error, e:
+                    if self._db != None and e.args[0] in _lConnectionLostErrors:
+                        self._db = None
+                    if i == maxNbTry:
+                        sys.stderr.write( "ERROR: can't change the status of job '%s' to '%s': %s\n" % ( self._jobname, newStatus, e ) )
+                        sys.stderr.flush()
+                        return
+                    time.sleep( 2 )
+        finally:
+            self._lock.release()
@@ -0,0 +1,185 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import os
+import time
+import shutil
+
+
+## Directory in which the jobs of a group notify their status changes, one file per job
+#
+# A job writes its status in a temporary file then renames it, so that the waiting process
+# only has to check the modification time of the directory to know that something happened.
+#
+class JobStatusDirectory( object ):
+    
+    _mtimeResolution = 2.0   # seconds, coarsest mtime resolution of the usual file systems
+    
+    ## Constructor
+    #
+    # @param path string path of the directory
+    #
+    def __init__( self, path ):
+        self._path = path
+        self._lastDirState = None
+        self._lastDirChangeTime = None
+        self._lastEntryInodes = None
+        
+        
+    ## Return the default path of the status directory of a job group
+    #
+    # @param directory string directory shared by the jobs (usually the submission directory)
+    # @param groupid string a group identifier to record related job series
+    #
+    def getDefaultPath( directory, groupid ):
+        return "%s/jobStatus_%s" % ( directory.rstrip("/"), groupid )
+    
+    getDefaultPath = staticmethod( getDefaultPath )
+    
+    
+    def getPath( self ):
+        return self._path
+    
+    
+    ## Create the directory if it doesn't exist
+    #
+    def create( self ):
+        if not os.path.isdir( self._path ):
+            os.mkdir( self._path )
+            
+            
+    ## Remove the directory and the status files
+    #
+    def remove( self ):
+        if os.path.isdir( self._path ):
+            shutil.rmtree( self._path )
+            
+            
+    ## Return the python command, to insert in a job file, writing the new status of a job
+    #
+    # @param jobname string job name
+    # @param newStatus string new status (running, finished, error)
+    # @param indent string indentation of the command in the job file
+    #
+    def getCmdToWriteStatusAsString( self, jobname, newStatus, indent="" ):
+        statusFile = "%s/%s" % ( self._path, jobname )
+        cmd = "%sif os.path.isdir( \"%s\" ):" % ( indent, self._path )
+        cmd += " fH = open( \"%s.tmp\", \"w\" );" % ( statusFile )
+        cmd += " fH.write( \"%s\\n\" );" % ( newStatus )
+        cmd += " fH.close();"
+        cmd += " os.rename( \"%s.tmp\", \"%s\" )\n" % ( statusFile, statusFile )
+        return cmd
+    
+    
+    ## Write the new status of a job, as the command returned by getCmdToWriteStatusAsString() does
+    #
+    # @param jobname string job name
+    # @param newStatus string new status (running, finished, error)
+    #
+    def writeStatus( self, jobname, newStatus ):
+        if not os.path.isdir( self._path ):
+            return
+        statusFile = "%s/%s" % ( self._path, jobname )
+        fH = open( "%s.tmp" % ( statusFile ), "w" )
+        fH.write( "%s\n" % ( newStatus ) )
+        fH.close()
+        os.rename( "%s.tmp" % ( statusFile ), statusFile )
+        
+        
+    ## Return a dictionary whose keys are job names and values their last notified status
+    #
+    def getStatusPerJob( self ):
+        dJob2Status = {}
+        if not os.path.isdir( self._path ):
+            return dJob2Status
+        for jobname in os.listdir( self._path ):
+            if jobname.endswith( ".tmp" ):
+                continue
+            statusFile = open( "%s/%s" % ( self._path, jobname ), "r" )
+            dJob2Status[ jobname ] = statusFile.readline().rstrip()
+            statusFile.close()
+        return dJob2Status
+    
+    
+    ## Return True if a job notified a status change since the last call
+    #
+    # @note each call only stats the directory, whose mtime changes with each notification (a status file is renamed)
+    # @note a notification in the same mtime tick as the last observed change leaves the directory unchanged, so during
+    #   _mtimeResolution seconds after a change was observed the inodes of the entries are compared too (the renamed
+    #   status file has a new inode); later notifications are in a new tick
+    #
+    def hasChanged( self ):
+        if not os.path.isdir( self._path ):
+            return False
+        st = os.stat( self._path )
+        dirState = ( float( st.st_mtime ), st.st_ino, st.st_nlink, st.st_size )
+        if dirState != self._lastDirState:
+            self._lastDirState = dirState
+            self._lastDirChangeTime = time.time()
+            self._lastEntryInodes = self._getEntryInodes()
+            return True
+        if time.time() - self._lastDirChangeTime > self._mtimeResolution:
+            return False
+        entryInodes = self._getEntryInodes()
+        if entryInodes == self._lastEntryInodes:
+            return False
+        self._lastEntryInodes = entryInodes
+        return True
+    
+    
+    def _getEntryInodes( self ):
+        lInodes = []
+        for name in os.listdir( self._path ):
+            try:
+                lInodes.append( os.lstat( "%s/%s" % ( self._path, name ) ).st_ino )
+            except OSError:
+                continue
+        lInodes.sort()
+        return tuple( lInodes )
+    
+    
+    ## Wait until a job notifies a status change, checking more and more rarely, or until the time out
+    #
+    # @param timeOut float max nb of seconds to wait
+    # @param minInterval float nb of seconds before the first check, doubled after each check
+    # @return True if a status changed
+    #
+    def waitForChange( self, timeOut, minInterval=0.1 ):
+        endTime = time.time() + timeOut
+        interval = minInterval
+        while True:
+            remainingTime = endTime - time.time()
+            if remainingTime <= 0:
+                return False
+            time.sleep( min( interval, remainingTime ) )
+            if self.hasChanged():
+                return True
+            interval = min( 2 * interval, 2.0 )
@@ -5,6 +5,8 @@ import time
 import glob
 from pyRepetUnit.commons.sql.Job import Job
 from pyRepetUnit.commons.stat.Stat import Stat
+from pyRepetUnit.commons.launcher.JobBody import JobBody, isJobPoolEnabled
+from pyRepetUnit.commons.launcher.LocalJobExecutor import getLocalJobExecutor
 from pyRepet.launcher.Launcher import Launcher
 from repet_tools.CleanClusterNodesAfterRepet import CleanClusterNodesAfterRepet
 
@@ -54,10 +56,13 @@ class Launcher(Launcher):
     def beginRun( self ):
         self.createGroupidIfItNotExist()
 
+        iStatusDir = self.getJobStatusDirectory()
         if self.jobdb.hasUnfinishedJob(self.job.tablename, self.job.groupid):
-            self.jobdb.waitJobGroup(self.job.tablename, self.job.groupid)
+            self.jobdb.waitJobGroup(self.job.tablename, self.job.groupid, statusDir=iStatusDir.getPath())
         else:
             self.jobdb.cleanJobGroup( self.job.tablename, self.job.groupid )
+            iStatusDir.remove()
+            iStatusDir.create()
 
     def runSingleJob( self, cmd_start, cmd_finish="" ):
         """
@@ -67,8 +72,12 @@ class Launcher(Launcher):
         @param cmd_finish: command to retrieve result files and remove temporary files
         @type cmd_finish: string
         @warning: the jobname has to be defined outside from this method
+        @note: with REPET_QUEUE=local and REPET_LOCAL_POOL=1, the job is run by a worker of the local pool, without job file
         """
         self._nbJobs = 1
+        if isJobPoolEnabled():
+            self.submitJobBody( cmd_start, cmd_finish )
+            return
         pid = str(os.getpid())
         now = time.localtime()
         pyFileName = self.cdir + "/ClusterLauncher_" + self.job.groupid + "_" +\
@@ -83,6 +92,7 @@ class Launcher(Launcher):
         cmd += "import sys\n"
         cmd += "import time\n"
         cmd += "import shutil\n"
+        cmd += self.getCmdToCreateJobStatusClient( self.job )
         cmd += "\n"
         cmd += "print os.uname()\n"
         cmd += "beginTime = time.time()\n"
@@ -141,6 +151,27 @@ class Launcher(Launcher):
             print "ERROR while submitting job to the cluster"
             sys.exit(1)
     
+    def submitJobBody( self, cmd_start, cmd_finish="" ):
+        """
+        Submit the commands of one job to the local pool of workers, which runs them as the job file of runSingleJob() would.
+        The job is recorded in the job table as any other job, its launcher being the name under which it is registered.
+        """
+        dDbParams = { "host": self.jobdb.host, "user": self.jobdb.user, "passwd": self.jobdb.passwd,
+                      "dbname": self.jobdb.dbname, "port": self.jobdb.port }
+        iJobBody = JobBody( self.job, dDbParams, self.getJobStatusDirectory().getPath(),
+                            self.tmpdir, self.cdir, cmd_start, cmd_finish )
+        getLocalJobExecutor().registerJobBody( iJobBody.getLauncher(), iJobBody )
+        self.job.command = iJobBody.getLauncher()
+        self.job.launcher = iJobBody.getLauncher()
+        
+        string = "submitting job(s) with groupid '%s' (%s)" % ( self.job.groupid,  time.strftime("%Y-%m-%d %H:%M:%S") )
+        print string
+        sys.stdout.flush()
+        log = self.jobdb.submitJob( self.job )
+        if log != 0:
+            print "ERROR while submitting job to the cluster"
+            sys.exit(1)
+    
     #TODO: to remove ?
     def runArrayJob( self, directory, lCmdStart, lCmdFinish=[] ):
         """
@@ -176,6 +207,7 @@ class Launcher(Launcher):
             cmd += "import sys\n"
             cmd += "import time\n"
             cmd += "import shutil\n"
+            cmd += self.getCmdToCreateJobStatusClient( self.job )
             cmd += "\n"
             cmd += "print os.uname()\n"
             cmd += "beginTime = time.time()\n"
@@ -247,36 +279,13 @@ class Launcher(Launcher):
         launcherFile.close()
         
     def writeSrptChangeJobStatusCmd( self, job, newStatus, loop ):
-        if loop == 0:
-            cmd_test = "os.system( \""
-        elif loop == 1:
-            cmd_test = "\tos.system( \""
-        cmd_test += os.environ["REPET_PATH"] + "/bin/srptChangeJobStatus.py"
-        cmd_test += " -t " + job.tablename
-        if str(job.jobid).isdigit():
-            cmd_test += " -j " + job.jobname
-        else:
-            cmd_test += " -j " + job.jobid
-        cmd_test += " -g " + job.groupid
-        if job.queue != "":
-            cmd_test += " -q " + job.queue
-        cmd_test += " -s " + newStatus
-        if self.jobdb.host != "":
-            cmd_test += " -H " + self.jobdb.host
-        if self.jobdb.user != "":
-            cmd_test += " -U " + self.jobdb.user
-        if self.jobdb.passwd != "":
-            cmd_test += " -P " + self.jobdb.passwd
-        cmd_test += " -D " + self.jobdb.dbname
-        cmd_test += " -T %i" % ( self.jobdb.port )
-        cmd_test += " -v %i" % ( 1 )
-        cmd_test += "\" )\n"
-        return cmd_test
+        return self.cmd_test( job, newStatus, loop )
     
     def endRun( self, cleanNodes = False ):
         string = "waiting for %i job(s) with groupid '%s' (%s)" % ( self._nbJobs, self.job.groupid, time.strftime("%Y-%m-%d %H:%M:%S") )
         print string; sys.stdout.flush()
-        self.jobdb.waitJobGroup( self.job.tablename, self.job.groupid )
+        iStatusDir = self.getJobStatusDirectory()
+        self.jobdb.waitJobGroup( self.job.tablename, self.job.groupid, statusDir=iStatusDir.getPath() )
         if self._nbJobs > 1:
             string = "all jobs with groupid '%s' are finished (%s)" % ( self.job.groupid, time.strftime("%Y-%m-%d %H:%M:%S") )
             print string; sys.stdout.flush()
@@ -290,6 +299,7 @@ class Launcher(Launcher):
         print "execution time per job: %s" % statsExecutionTime.string()
         sys.stdout.flush()
         self.jobdb.cleanJobGroup( self.job.tablename, self.job.groupid )
+        iStatusDir.remove()
         
     def getStatsOfExecutionTime( self, acronyme="" ):
         stat = Stat()
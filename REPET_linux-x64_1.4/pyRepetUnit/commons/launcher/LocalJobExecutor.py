@@ -0,0 +1,223 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import os
+import sys
+import time
+import atexit
+import subprocess
+import multiprocessing
+from pyRepetUnit.commons.launcher.JobBody import JobWorker
+
+
+## Run job launchers as sub-processes of the current host, at most nbProcesses at a time (REPET_QUEUE=local)
+#
+# @note as with SGE '-cwd', the stdout and stderr of a job are written in 'jobname.o<jobid>' and 'jobname.e<jobid>' in the submission directory
+# @note the launchers registered with a JobBody are run by long-lived worker processes (JobWorker), without job file;
+# the idle workers are kept for the next job groups and stopped by close()
+#
+class LocalJobExecutor( object ):
+    
+    ## Constructor
+    #
+    # @param nbProcesses integer max nb of jobs running at the same time (default=REPET_LOCAL_NB_PROCESSES or nb of CPUs)
+    #
+    def __init__( self, nbProcesses=0 ):
+        if nbProcesses <= 0:
+            nbProcesses = int( os.environ.get( "REPET_LOCAL_NB_PROCESSES", "0" ) )
+        if nbProcesses <= 0:
+            nbProcesses = multiprocessing.cpu_count()
+        self._nbProcesses = nbProcesses
+        self._lastJobId = 0
+        self._lPendingJobs = []   # (jobid, jobname, launcher, directory)
+        self._dJobId2Process = {}
+        self._dJobId2Name = {}
+        self._dJobId2ReturnCode = {}
+        self._dLauncher2JobBody = {}
+        self._lIdleWorkers = []
+        
+        
+    ## Return the max nb of jobs running at the same time
+    #
+    def getNbProcesses( self ):
+        return self._nbProcesses
+    
+    
+    ## Queue a job and start it as soon as a process is available
+    #
+    # @param jobname string job name
+    # @param launcher string command launching the job (the job file)
+    # @return integer job identifier
+    #
+    def submit( self, jobname, launcher ):
+        self._lastJobId += 1
+        jobid = self._lastJobId
+        self._dJobId2Name[ jobid ] = jobname
+        self._lPendingJobs.append( ( jobid, jobname, launcher, os.getcwd() ) )
+        self.update()
+        return jobid
+    
+    
+    ## Register the job run by a worker when a launcher is submitted (the registration is kept, to relaunch the job)
+    #
+    # @param launcher string launcher recorded in the job table
+    # @param iJobBody JobBody instance
+    #
+    def registerJobBody( self, launcher, iJobBody ):
+        self._dLauncher2JobBody[ launcher ] = iJobBody
+        
+        
+    ## Terminate the idle workers (the workers running a job are kept)
+    #
+    # @note called at the exit of the process for the shared executor (see getLocalJobExecutor)
+    #
+    def close( self ):
+        for iWorker in self._lIdleWorkers:
+            iWorker.stop()
+        self._lIdleWorkers = []
+            
+            
+    ## Start a job in a sub-process, or in a worker if its launcher is registered
+    #
+    def _start( self, jobid, jobname, launcher, directory ):
+        if self._dLauncher2JobBody.has_key( launcher ):
+            if self._lIdleWorkers != []:
+                iWorker = self._lIdleWorkers.pop()
+            else:
+                iWorker = JobWorker()
+            iWorker.start( self._dLauncher2JobBody[ launcher ], jobid, directory )
+            self._dJobId2Process[ jobid ] = iWorker
+            return
+        stdoutFile = open( "%s/%s.o%i" % ( directory, jobname, jobid ), "w" )
+        stderrFile = open( "%s/%s.e%i" % ( directory, jobname, jobid ), "w" )
+        self._dJobId2Process[ jobid ] = subprocess.Popen( launcher, shell=True, cwd=directory,
+                                                          stdout=stdoutFile, stderr=stderrFile, close_fds=True )
+        stdoutFile.close()
+        stderrFile.close()
+        
+        
+    ## Record the jobs which ended and start the pending ones
+    #
+    # @return integer nb of jobs which ended since the last update
+    #
+    def update( self ):
+        nbEndedJobs = 0
+        for jobid in self._dJobId2Process.keys():
+            returnCode = self._getReturnCode( self._dJobId2Process[ jobid ] )
+            if returnCode != None:
+                if isinstance( self._dJobId2Process[ jobid ], JobWorker ) and self._dJobId2Process[ jobid ].isAlive():
+                    self._lIdleWorkers.append( self._dJobId2Process[ jobid ] )
+                self._dJobId2ReturnCode[ jobid ] = returnCode
+                del self._dJobId2Process[ jobid ]
+                nbEndedJobs += 1
+        while self._lPendingJobs != [] and len(self._dJobId2Process) < self._nbProcesses:
+            self._start( *self._lPendingJobs.pop(0) )
+        return nbEndedJobs
+    
+    
+    ## Return the exit status of a sub-process or of a job run by a worker if it ended, None otherwise
+    #
+    def _getReturnCode( self, process ):
+        if isinstance( process, subprocess.Popen ):
+            return process.poll()
+        return process.getReturnCode()
+        
+        
+    ## Wait until at least one job ends, or until the time out
+    #
+    # @param timeOut float max nb of seconds to wait
+    # @return integer nb of jobs which ended
+    #
+    # @note without any job running, it sleeps until the time out, so that a polling caller doesn't spin
+    #
+    def waitForCompletion( self, timeOut ):
+        endTime = time.time() + timeOut
+        while True:
+            nbEndedJobs = self.update()
+            if nbEndedJobs > 0:
+                return nbEndedJobs
+            if self._dJobId2Process == {}:
+                time.sleep( max( 0, endTime - time.time() ) )
+                return 0
+            remainingTime = endTime - time.time()
+            if remainingTime <= 0:
+                return 0
+            time.sleep( min( 0.1, remainingTime ) )
+            
+            
+    ## Return True if the job is pending or running
+    #
+    # @param jobid integer job identifier
+    # @param jobname string job name
+    #
+    def isJobHandled( self, jobid, jobname ):
+        jobid = int(jobid)
+        if self._dJobId2Name.get( jobid ) != jobname:
+            return False
+        return not self._dJobId2ReturnCode.has_key( jobid )
+    
+    
+    ## Return the list of (jobid, jobname) of the jobs pending or running
+    #
+    def getHandledJobList( self ):
+        lJobs = []
+        for jobid in self._dJobId2Name.keys():
+            if not self._dJobId2ReturnCode.has_key( jobid ):
+                lJobs.append( ( jobid, self._dJobId2Name[ jobid ] ) )
+        return lJobs
+    
+    
+    ## Return the jobs of a list which are neither pending nor running
+    #
+    # @param lJobs list of tuples starting with (jobid, jobname), e.g. rows of a job table
+    # @return list of the tuples of lJobs whose job is not handled, in the same order
+    #
+    def getUnhandledJobList( self, lJobs ):
+        sHandledJobs = set( self.getHandledJobList() )
+        return [ job for job in lJobs if ( int(job[0]), job[1] ) not in sHandledJobs ]
+    
+    
+    ## Return the exit status of a job which ended, None otherwise
+    #
+    def getReturnCode( self, jobid ):
+        return self._dJobId2ReturnCode.get( int(jobid) )
+    
+    
+_iLocalJobExecutor = None
+
+## Return the executor shared by all the job connectors of the current process, its workers being stopped at exit
+#
+def getLocalJobExecutor():
+    global _iLocalJobExecutor
+    if _iLocalJobExecutor == None:
+        _iLocalJobExecutor = LocalJobExecutor()
+        atexit.register( _iLocalJobExecutor.close )
+    return _iLocalJobExecutor
@@ -0,0 +1,98 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import os
+import time
+import shutil
+import tempfile
+from pyRepetUnit.commons.launcher.JobStatusDirectory import JobStatusDirectory
+
+
+class Test_JobStatusDirectory( unittest.TestCase ):
+    
+    def setUp( self ):
+        self._dir = tempfile.mkdtemp()
+        self._iStatusDir = JobStatusDirectory( "%s/jobStatus_dummy" % ( self._dir ) )
+        self._iStatusDir.create()
+        self._nbListdir = 0
+        self._listdir = os.listdir
+        
+    def tearDown( self ):
+        os.listdir = self._listdir
+        shutil.rmtree( self._dir )
+        
+    def _countingListdir( self, path ):
+        self._nbListdir += 1
+        return self._listdir( path )
+    
+    # Write a status keeping the mtime of the directory, as a notification in the same mtime tick
+    #
+    def _writeStatusInSameTick( self, jobname, status ):
+        st = os.stat( self._iStatusDir.getPath() )
+        self._iStatusDir.writeStatus( jobname, status )
+        os.utime( self._iStatusDir.getPath(), ( st.st_atime, st.st_mtime ) )
+        
+    def test_hasChanged( self ):
+        self.assertTrue( self._iStatusDir.hasChanged() )
+        self.assertFalse( self._iStatusDir.hasChanged() )
+        self._iStatusDir.writeStatus( "job1", "running" )
+        self.assertTrue( self._iStatusDir.hasChanged() )
+        self.assertFalse( self._iStatusDir.hasChanged() )
+        self.assertEqual( { "job1": "running" }, self._iStatusDir.getStatusPerJob() )
+        
+    def test_hasChanged_sameMtimeTick( self ):
+        self._iStatusDir.writeStatus( "job1", "running" )
+        self.assertTrue( self._iStatusDir.hasChanged() )
+        self._writeStatusInSameTick( "job1", "finished" )
+        self.assertTrue( self._iStatusDir.hasChanged() )
+        self.assertFalse( self._iStatusDir.hasChanged() )
+        
+    def test_hasChanged_onlyStatsTheDirectoryAfterTheResolution( self ):
+        self._iStatusDir._mtimeResolution = 0.2
+        for i in xrange( 0, 100 ):
+            self._iStatusDir.writeStatus( "job%i" % ( i ), "running" )
+        self.assertTrue( self._iStatusDir.hasChanged() )
+        os.listdir = self._countingListdir
+        self.assertFalse( self._iStatusDir.hasChanged() )
+        self.assertEqual( 1, self._nbListdir )
+        time.sleep( 0.3 )
+        for i in xrange( 0, 10 ):
+            self.assertFalse( self._iStatusDir.hasChanged() )
+        self.assertEqual( 1, self._nbListdir )
+        self._iStatusDir.writeStatus( "job1", "finished" )
+        self.assertTrue( self._iStatusDir.hasChanged() )
+        
+        
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_JobStatusDirectory ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
@@ -0,0 +1,121 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import os
+import shutil
+import tempfile
+from pyRepetUnit.commons.sql.Job import Job
+from pyRepetUnit.commons.launcher.JobBody import JobBody
+from pyRepetUnit.commons.launcher.LocalJobExecutor import LocalJobExecutor
+
+
+# JobBody printing a message and returning an exit status, or killing its worker
+#
+class DummyJobBody( JobBody ):
+    
+    def __init__( self, jobname, returnCode ):
+        dDbParams = { "host": "", "user": "", "passwd": "", "dbname": "", "port": 3306 }
+        JobBody.__init__( self, Job( "dummyJobs", 0, jobname, "dummyGroup", "" ), dDbParams, "", "", "", "" )
+        self.returnCode = returnCode
+        
+    def run( self, iJobStatus ):
+        print "job %s in worker %i" % ( self.jobname, os.getpid() )
+        if self.returnCode == "kill":
+            os._exit( 5 )
+        return self.returnCode
+    
+    
+class Test_LocalJobExecutor( unittest.TestCase ):
+    
+    def setUp( self ):
+        self._dir = tempfile.mkdtemp()
+        self._cwd = os.getcwd()
+        os.chdir( self._dir )
+        self._iExecutor = LocalJobExecutor( 2 )
+        
+    def tearDown( self ):
+        self._iExecutor.close()
+        os.chdir( self._cwd )
+        shutil.rmtree( self._dir )
+        
+    def _readFile( self, fileName ):
+        inFile = open( fileName, "r" )
+        content = inFile.read()
+        inFile.close()
+        return content
+    
+    def _waitForAllJobs( self ):
+        while self._iExecutor.getHandledJobList() != []:
+            self._iExecutor.waitForCompletion( 0.1 )
+            
+    def _submitJobBody( self, jobname, returnCode ):
+        iJobBody = DummyJobBody( jobname, returnCode )
+        self._iExecutor.registerJobBody( iJobBody.getLauncher(), iJobBody )
+        return self._iExecutor.submit( jobname, iJobBody.getLauncher() )
+    
+    def test_submit_launchers( self ):
+        lJobIds = [ self._iExecutor.submit( "job%i" % ( i ), "echo job%i; exit %i" % ( i, i ) ) for i in xrange( 0, 4 ) ]
+        self._waitForAllJobs()
+        for i in xrange( 0, 4 ):
+            self.assertEqual( i, self._iExecutor.getReturnCode( lJobIds[i] ) )
+            self.assertEqual( "job%i\n" % ( i ), self._readFile( "job%i.o%i" % ( i, lJobIds[i] ) ) )
+        self.assertEqual( [ ( 1, "job0" ) ], self._iExecutor.getUnhandledJobList( [ ( 1, "job0" ) ] ) )
+        
+    def test_submit_jobBodies_workersReused( self ):
+        lJobIds = [ self._submitJobBody( "job%i" % ( i ), i % 2 ) for i in xrange( 0, 6 ) ]
+        self._waitForAllJobs()
+        lPids = []
+        for i in xrange( 0, 6 ):
+            self.assertEqual( i % 2, self._iExecutor.getReturnCode( lJobIds[i] ) )
+            output = self._readFile( "job%i.o%i" % ( i, lJobIds[i] ) )
+            self.assertTrue( output.startswith( "job job%i in worker " % ( i ) ) )
+            lPids.append( output.split()[-1] )
+        self.assertEqual( 2, len( set( lPids ) ) )
+        
+        # the idle workers are kept for the next jobs
+        jobid = self._submitJobBody( "jobNextGroup", 0 )
+        self._waitForAllJobs()
+        self.assertTrue( self._readFile( "jobNextGroup.o%i" % ( jobid ) ).split()[-1] in lPids )
+        
+    def test_submit_jobBody_deadWorker( self ):
+        killedJobId = self._submitJobBody( "jobKilled", "kill" )
+        self._waitForAllJobs()
+        self.assertEqual( 1, self._iExecutor.getReturnCode( killedJobId ) )
+        jobid = self._submitJobBody( "jobAfter", 0 )
+        self._waitForAllJobs()
+        self.assertEqual( 0, self._iExecutor.getReturnCode( jobid ) )
+        
+        
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_LocalJobExecutor ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
@@ -36,6 +36,10 @@ from pyRepetUnit.commons.coord.Align import Align
 from pyRepetUnit.commons.coord.Range import Range
 from pyRepet.util.Stat import Stat
 from math import log
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 ## Multiple Sequence Alignment Representation   
@@ -43,6 +47,9 @@ from math import log
 #
 class AlignedBioseqDB( BioseqDB ):
     
+    _dIUPAC2ATGC = { "U":"T", "R":"AG", "Y":"CT", "M":"CA", "K":"TG", "W":"TA", "S":"CG",
+                     "B":"CTG", "D":"ATG", "H":"ATC", "V":"ACG" }
+    
     def __init__( self, name="" ):
         BioseqDB.__init__( self, name )
         seqLength = self.getLength()
@@ -84,6 +91,16 @@ class AlignedBioseqDB( BioseqDB ):
     # @return: list of dico whose keys are symbols and values are their occurrences
     #
     def getListOccPerSite( self ):
+        if self.isProfileMatrixAvailable():
+            lSymbols, aCounts = self.getProfileMatrix()
+            lOccPerSite = []
+            for i in xrange( aCounts.shape[1] ):
+                lOccPerSite.append( {} )
+            for j in xrange( len(lSymbols) ):
+                for i in numpy.flatnonzero( aCounts[j] ):
+                    lOccPerSite[i][ lSymbols[j] ] = int( aCounts[j,i] )
+            return lOccPerSite
+        
         lOccPerSite = []   # list of dictionaries, one per position on the sequence
         n = 0    # nb of sequences parsed from the input file
         firstSeq = True
@@ -111,6 +128,49 @@ class AlignedBioseqDB( BioseqDB ):
         return lOccPerSite
     
     
+    ## Return True if the occurrences can be computed in bulk (NumPy available and sequences of same length)
+    #
+    def isProfileMatrixAvailable( self ):
+        if numpy == None or self.db == [] or self.getLength() == 0:
+            return False
+        seqLength = self.getLength()
+        for bs in self.db:
+            if bs.sequence == None or bs.getLength() != seqLength:
+                return False
+        return True
+    
+    
+    ## Return the MSA as a matrix of upper-case ASCII codes, one row per sequence
+    #
+    # @return numpy array of uint8 (nb of sequences x nb of sites)
+    #
+    def getEncodedMatrix( self ):
+        lSeqs = []
+        for bs in self.db:
+            lSeqs.append( bs.sequence.upper() )
+        aEncoded = numpy.fromstring( "".join( lSeqs ), dtype=numpy.uint8 )
+        return aEncoded.reshape( ( self.getSize(), self.getLength() ) )
+    
+    
+    ## Record the occurrences of symbols (A, T, G, C, N, -, ...) at each site as a profile matrix
+    #
+    # @param aEncoded encoded MSA (see getEncodedMatrix), computed if not given
+    # @return list of symbols and numpy array of their occurrences (nb of symbols x nb of sites)
+    #
+    def getProfileMatrix( self, aEncoded=None ):
+        if aEncoded is None:
+            aEncoded = self.getEncodedMatrix()
+        nbSites = aEncoded.shape[1]
+        lCodes = numpy.flatnonzero( numpy.bincount( aEncoded.ravel(), minlength=256 ) )
+        aCode2Row = numpy.zeros( 256, dtype=numpy.int64 )
+        aCode2Row[ lCodes ] = numpy.arange( len(lCodes) )
+        # each cell of the MSA is counted in the bin (row of its symbol, site)
+        aBins = aCode2Row[ aEncoded ] * nbSites + numpy.arange( nbSites )
+        aCounts = numpy.bincount( aBins.ravel(), minlength=len(lCodes)*nbSites ).reshape( ( len(lCodes), nbSites ) )
+        lSymbols = [ chr(code) for code in lCodes ]
+        return lSymbols, aCounts
+    
+    
     ## Make a consensus from the MSA
     #
     # @param minNbNt: minimum nb of nucleotides to edit a consensus
@@ -135,6 +195,50 @@ class AlignedBioseqDB( BioseqDB ):
             print "ERROR: minPropNt=%.2f should be a proportion (below 1.0)" % ( minPropNt )
             sys.exit(1)
 
+        if self.isProfileMatrixAvailable():
+            seqConsensus, nbRmvColumns, nbSites = self._getConsensusSequenceFromProfileMatrix( minNbNt, minPropNt, verbose )
+        else:
+            seqConsensus, nbRmvColumns, nbSites = self._getConsensusSequenceFromListOccPerSite( minNbNt, minPropNt, verbose )
+
+        if nbRmvColumns:
+            print "WARNING: %i sites were removed (%.2f%%)" % ( nbRmvColumns, nbRmvColumns / float(nbSites) * 100 )
+            sys.stdout.flush()
+            if seqConsensus == "":
+                print "WARNING: no consensus can be built (no sequence left)"
+                return
+
+        propN = seqConsensus.count("N") / float(len(seqConsensus))
+        if propN >= maxPropN:
+            print "WARNING: no consensus can be built (%i%% of N's >= %i%%)" % ( propN * 100, maxPropN * 100 )
+            return
+        elif propN >= maxPropN * 0.5:
+            print "WARNING: %i%% of N's" % ( propN * 100 )
+
+        consensus = Bioseq()
+        consensus.sequence = seqConsensus
+        consensus.header = "consensus=%s length=%i nbAlign=%i" % ( self.name, len(seqConsensus), self.getSize() )
+
+        if verbose > 0:
+       
+            statEntropy = self.getEntropy( verbose - 1 )
+            print "entropy: %s" % ( statEntropy.stringQuantiles() )
+            sys.stdout.flush()
+
+        return consensus
+    
+    
+    ## Return the rank of a symbol to break ties between the predominant symbols of a site: A, C, G, T, then the other symbols in alphabetical order
+    #
+    def _getConsensusTieRank( self, symbol ):
+        return ( symbol not in "ACGT", symbol )
+    
+    
+    ## Make the consensus sequence site by site from the occurrences recorded in dictionaries
+    #
+    # @note ties between symbols are broken by _getConsensusTieRank
+    # @return consensus sequence, nb of sites without nucleotide, nb of sites
+    #
+    def _getConsensusSequenceFromListOccPerSite( self, minNbNt, minPropNt=0.0, verbose=0 ):
         lOccPerSite = self.getListOccPerSite()
         nbSites = len(lOccPerSite)
         if verbose > 0:
@@ -156,7 +260,7 @@ class AlignedBioseqDB( BioseqDB ):
             nbNt = 0   # total nb of A, T, G and C (no gap)
 
             # for each distinct symbol at this site (A, T, G, C, N, -,...)
-            for j in dNt2Occ.keys():
+            for j in sorted( dNt2Occ.keys(), key=self._getConsensusTieRank ):
                 if j != "-":
                     nbNt += dNt2Occ[j]
                     if verbose > 1:
@@ -181,31 +285,55 @@ class AlignedBioseqDB( BioseqDB ):
                 if verbose > 1:
                     print "-> %s" % ( bestNt )
 
-        if nbRmvColumns:
-            print "WARNING: %i sites were removed (%.2f%%)" % ( nbRmvColumns, nbRmvColumns / float(nbSites) * 100 )
-            sys.stdout.flush()
-            if seqConsensus == "":
-                print "WARNING: no consensus can be built (no sequence left)"
-                return
-
-        propN = seqConsensus.count("N") / float(len(seqConsensus))
-        if propN >= maxPropN:
-            print "WARNING: no consensus can be built (%i%% of N's >= %i%%)" % ( propN * 100, maxPropN * 100 )
-            return
-        elif propN >= maxPropN * 0.5:
-            print "WARNING: %i%% of N's" % ( propN * 100 )
-
-        consensus = Bioseq()
-        consensus.sequence = seqConsensus
-        consensus.header = "consensus=%s length=%i nbAlign=%i" % ( self.name, len(seqConsensus), self.getSize() )
+        return seqConsensus, nbRmvColumns, nbSites
 
+    
+    ## Make the consensus sequence from the profile matrix, all sites at once
+    #
+    # @note ties between symbols are broken by _getConsensusTieRank, as in _getConsensusSequenceFromListOccPerSite
+    # @return consensus sequence, nb of sites without nucleotide, nb of sites
+    #
+    def _getConsensusSequenceFromProfileMatrix( self, minNbNt, minPropNt=0.0, verbose=0 ):
+        lSymbols, aCounts = self.getProfileMatrix()
+        nbSites = aCounts.shape[1]
         if verbose > 0:
-       
-            statEntropy = self.getEntropy( verbose - 1 )
-            print "entropy: %s" % ( statEntropy.stringQuantiles() )
+            print "nb of sites: %i" % ( nbSites ); sys.stdout.flush()
+        if "-" in lSymbols:
+            gapIndex = lSymbols.index( "-" )
+            lSymbols = lSymbols[:gapIndex] + lSymbols[gapIndex+1:]
+            aCounts = numpy.delete( aCounts, gapIndex, axis=0 )
+        if lSymbols == []:
+            return "", nbSites, nbSites
+        
+        # sort the symbols by tie rank, argmax keeping the first of the predominant symbols
+        lRows = sorted( xrange( len(lSymbols) ), key=lambda j: self._getConsensusTieRank( lSymbols[j] ) )
+        lSymbols = [ lSymbols[j] for j in lRows ]
+        aCounts = aCounts[ lRows ]
+        
+        aNbNt = aCounts.sum( axis=0 )   # total nb of A, T, G and C (no gap)
+        aOccMaxNt = aCounts.max( axis=0 )   # occurrences of the predominant nucleotide at each site
+        aBestNt = numpy.array( lSymbols )[ aCounts.argmax( axis=0 ) ]
+        
+        # if the predominant nucleotide occurs in less than x% of the sequences, put a "N"
+        if minPropNt > 0.0:
+            aPropMaxNt = aOccMaxNt / numpy.maximum( aNbNt, 1 ).astype( float )
+            aBestNt[ ( aNbNt != 0 ) & ( aPropMaxNt < minPropNt ) ] = "N"
+            
+        # sites without nucleotide keep the symbol of the previous site
+        lSitesWithoutNt = numpy.flatnonzero( aNbNt == 0 )
+        for i in lSitesWithoutNt:
+            if i > 0:
+                aBestNt[i] = aBestNt[i-1]
+                
+        aKeptSites = aNbNt >= int(minNbNt)
+        if len(lSitesWithoutNt) > 0 and lSitesWithoutNt[0] == 0:
+            aKeptSites[0] = False
+        if verbose > 1:
+            for i in numpy.flatnonzero( aKeptSites ):
+                print "site %s / %i -> %s" % ( str(i+1).zfill( len(str(nbSites)) ), nbSites, aBestNt[i] )
             sys.stdout.flush()
-
-        return consensus
+            
+        return "".join( aBestNt[ aKeptSites ] ), len(lSitesWithoutNt), nbSites
     
     
     ## Get the entropy of the whole multiple alignment (only for A, T, G and C)
@@ -218,6 +346,14 @@ class AlignedBioseqDB( BioseqDB ):
 
         stats = Stat()
 
+        if self.isProfileMatrixAvailable():
+            aEntropy, aNbNt = self._getEntropyPerSiteFromProfileMatrix()
+            for i in xrange( len(aEntropy) ):
+                if verbose > 1:
+                    print "site %i (%i nt): entropy = %.3f" % ( i + 1, aNbNt[i], aEntropy[i] )
+                stats.add( float( aEntropy[i] ) )
+            return stats
+
         # get the occurrences of symbols at each site
         lOccPerSite = self.getListOccPerSite()
 
@@ -259,6 +395,80 @@ class AlignedBioseqDB( BioseqDB ):
         return stats
     
     
+    ## Compute the entropy of each site from the profile matrix (only for A, T, G and C, see getEntropy)
+    #
+    # @return numpy arrays of the entropy and of the nb of nucleotides per site
+    #
+    def _getEntropyPerSiteFromProfileMatrix( self ):
+        aEncoded = self.getEncodedMatrix()
+        lSymbols, aCounts = self.getProfileMatrix( aEncoded )
+        nbSites = aCounts.shape[1]
+        dSymbol2Counts = {}
+        for j in xrange( len(lSymbols) ):
+            dSymbol2Counts[ lSymbols[j] ] = aCounts[j]
+        dAmbiguous2CheckedNts = self._getCheckedNtsOfAmbiguousSymbols( aEncoded, lSymbols, dSymbol2Counts )
+        aNoCounts = numpy.zeros( nbSites, dtype=numpy.int64 )
+        
+        aNbNt = numpy.zeros( nbSites, dtype=numpy.int64 )
+        dATGC2Occ = {}
+        for base in ["A","T","G","C"]:
+            dATGC2Occ[ base ] = numpy.zeros( nbSites )
+        for nt in lSymbols:
+            if nt == "-":
+                continue
+            aNbNt += dSymbol2Counts[ nt ]
+            aPresent = dSymbol2Counts[ nt ] > 0
+            # an ambiguous symbol is replaced by one of its nucleotides, drawn at random for each site (see getATGCNFromIUPAC)
+            if nt in ["A","T","G","C","N"]:
+                lCheckedNts = [ nt ]
+            else:
+                lCheckedNts = list( self._dIUPAC2ATGC.get( nt, "N" ) )
+            if len(lCheckedNts) == 1:
+                aCheckedNts = numpy.array( lCheckedNts * nbSites )
+            else:
+                aCheckedNts = dAmbiguous2CheckedNts[ nt ]
+            for checkedNt in lCheckedNts:
+                aMask = aPresent & ( aCheckedNts == checkedNt )
+                aOcc = numpy.where( aMask, dSymbol2Counts.get( checkedNt, aNoCounts ), 0 )
+                if checkedNt in ["A","T","G","C"]:
+                    dATGC2Occ[ checkedNt ] += aOcc
+                else:   # for 'N'
+                    for base in ["A","T","G","C"]:
+                        dATGC2Occ[ base ] += 0.25 * aOcc
+                        
+        aEntropy = numpy.zeros( nbSites )
+        aNbNtNotNull = numpy.maximum( aNbNt, 1 ).astype( float )
+        for base in dATGC2Occ.keys():
+            aFreq = dATGC2Occ[ base ] / aNbNtNotNull
+            aFreq[ aFreq == 0.0 ] = 1.0
+            aEntropy -= aFreq * numpy.log( aFreq ) / log(2)
+        return aEntropy, aNbNt
+    
+    
+    ## Draw the nucleotide replacing each ambiguous IUPAC symbol at each site where it occurs (see getATGCNFromIUPAC)
+    #
+    # @note the draws are made site by site and, within a site, in the order of the keys of the dictionary
+    # of getListOccPerSite, so that a given seed of the random module gives the same entropy as the site-by-site code
+    # @return dict whose keys are the ambiguous symbols and values are numpy arrays of nucleotides, one per site
+    #
+    def _getCheckedNtsOfAmbiguousSymbols( self, aEncoded, lSymbols, dSymbol2Counts ):
+        nbSites = aEncoded.shape[1]
+        dAmbiguous2CheckedNts = {}
+        aHasAmbiguous = numpy.zeros( nbSites, dtype=bool )
+        for nt in lSymbols:
+            if len( self._dIUPAC2ATGC.get( nt, "" ) ) > 1:
+                dAmbiguous2CheckedNts[ nt ] = numpy.array( [ "N" ] * nbSites )
+                aHasAmbiguous |= dSymbol2Counts[ nt ] > 0
+        for i in numpy.flatnonzero( aHasAmbiguous ):
+            dSymbol2Occ = {}
+            for code in aEncoded[:,i]:
+                dSymbol2Occ[ chr(code) ] = 0
+            for nt in dSymbol2Occ.keys():
+                if dAmbiguous2CheckedNts.has_key( nt ):
+                    dAmbiguous2CheckedNts[ nt ][i] = self.getATGCNFromIUPAC( nt )
+        return dAmbiguous2CheckedNts
+    
+    
     ## Get A, T, G, C or N from an IUPAC letter
     #  IUPAC = ['A','T','G','C','U','R','Y','M','K','W','S','B','D','H','V','N']
     #
@@ -282,6 +492,14 @@ class AlignedBioseqDB( BioseqDB ):
     ## Save the multiple alignment as a matrix with '0' if gap, '1' otherwise
     #
     def saveAsBinaryMatrix( self, outFile ):
+        if self.isProfileMatrixAvailable():
+            aBinary = ( self.getEncodedMatrix() != ord("-") ).astype( numpy.uint8 ) + ord("0")
+            outFileHandler = open( outFile, "w" )
+            for i in xrange( self.getSize() ):
+                outFileHandler.write( "%s\t%s\n" % ( self.db[i].header, "\t".join( aBinary[i].tostring() ) ) )
+            outFileHandler.close()
+            return
+        
         outFileHandler = open( outFile, "w" )
         for bs in self.db:
             string = "%s" % ( bs.header )
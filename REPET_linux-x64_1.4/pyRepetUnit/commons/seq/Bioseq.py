@@ -35,11 +35,32 @@ import re
 import random
 import cStringIO
 from pyRepetUnit.commons.coord.Map import Map
+from pyRepetUnit.commons.seq.KmerCounter import KmerCounter, MAX_SIZE_COUNT_VECTOR
 
 DNA_ALPHABET_WITH_N = set( ['A','T','G','C','N'] )
 IUPAC = set(['A','T','G','C','U','R','Y','M','K','W','S','B','D','H','V','N'])
 
 
+## Return a translation table for str.translate(), any symbol not in 'fromSymbols' being replaced by 'defaultSymbol'
+#
+# @param fromSymbols string symbols to translate
+# @param toSymbols string their translations, in the same order
+# @param defaultSymbol string translation of the other symbols
+#
+def getTranslationTable( fromSymbols, toSymbols, defaultSymbol ):
+    lTable = [ defaultSymbol ] * 256
+    for i in xrange( 0, len(fromSymbols) ):
+        lTable[ ord(fromSymbols[i]) ] = toSymbols[i]
+    return "".join( lTable )
+
+# complement of the IUPAC symbols and gap (in upper or lower case, the complement being in upper case)
+COMPLEMENT_SYMBOLS = "ATGCMRWSYKVHDBN-atgcmrwsykvhdbn"
+COMPLEMENT_TABLE = getTranslationTable( COMPLEMENT_SYMBOLS, "TACGKYWSRMBDHVN-TACGKYWSRMBDHVN", "N" )
+
+# A, T, G, C and N unchanged, U into T, the ambiguous IUPAC symbols kept to be drawn afterwards, other symbols into N
+ATGCN_TABLE = getTranslationTable( "ATGCNURYMKWSBDHV", "ATGCNTRYMKWSBDHV", "N" )
+
+
 ## Record a sequence with its header
 #
 class Bioseq( object ):
@@ -122,45 +143,10 @@ class Bioseq( object ):
     #  @warning: old name in pyRepet.Bioseq realComplement
     #
     def complement( self ):
-        complement = ""
-        self.upCase()
-        for i in xrange(0,len(self.sequence),1):
-            if self.sequence[i] == "A":
-                complement += "T"
-            elif self.sequence[i] == "T":
-                complement += "A"
-            elif self.sequence[i] == "C":
-                complement += "G"
-            elif self.sequence[i] == "G":
-                complement += "C"
-            elif self.sequence[i] == "M":
-                complement += "K"
-            elif self.sequence[i] == "R":
-                complement += "Y"
-            elif self.sequence[i] == "W":
-                complement += "W"
-            elif self.sequence[i] == "S":
-                complement += "S"
-            elif self.sequence[i] == "Y":
-                complement += "R"
-            elif self.sequence[i] == "K":
-                complement += "M"
-            elif self.sequence[i] == "V":
-                complement += "B"
-            elif self.sequence[i] == "H":
-                complement += "D"
-            elif self.sequence[i] == "D":
-                complement += "H"
-            elif self.sequence[i] == "B":
-                complement += "V"
-            elif self.sequence[i] == "N":
-                complement += "N"
-            elif self.sequence[i] == "-":
-                complement += "-"
-            else:
-                print "WARNING: unknown symbol '%s', replacing it by N" % ( self.sequence[i] )
-                complement += "N"
-        self.sequence = complement
+        unknownSymbols = self.sequence.translate( None, COMPLEMENT_SYMBOLS )
+        if unknownSymbols != "":
+            print "WARNING: %i unknown symbol(s) '%s' in '%s', replaced by N" % ( len(unknownSymbols), "".join( sorted( set(unknownSymbols) ) ), self.header )
+        self.sequence = self.sequence.translate( COMPLEMENT_TABLE )
         
         
     ## Reverse and complement the sequence
@@ -313,27 +299,14 @@ class Bioseq( object ):
     #
     # @param size integer required length word
     #
+    # @note all the words are keys up to MAX_SIZE_COUNT_VECTOR, only the words found above
+    #
     def occ_word( self, size ):
-        occ = {}
         if size == 0:
-            return occ,0
-        nbword = 0
-        srch = re.compile('[^ATGC]+')
-        wordlist = self._createWordList( size )
-        for i in wordlist:
-            occ[i] = 0
-        lenseq = len(self.sequence)
-        i = 0
-        while i < lenseq-size+1:
-            word = self.sequence[i:i+size].upper()
-            m = srch.search(word)
-            if m == None:
-                occ[word] = occ[word]+1
-                nbword = nbword + 1
-                i = i + 1
-            else:
-                i = i + m.end(0)
-        return occ, nbword
+            return {}, 0
+        iCounter = KmerCounter( size )
+        counts, nbword = iCounter.count( self.sequence )
+        return iCounter.getCountPerWord( counts, size <= MAX_SIZE_COUNT_VECTOR ), nbword
     
     
     ## Return a dictionary with the frequency of occurs for each combination of ATGC of specified size
@@ -454,10 +427,12 @@ class Bioseq( object ):
             return "N"
         
         
+    ## Get the sequence with only A, T, G, C or N, the ambiguous IUPAC symbols being replaced by one of the nucleotides they represent
+    #
     def getSeqWithOnlyATGCN( self ):
-        newSeq = ""
-        for nt in self.sequence:
-            newSeq += self.getATGCNFromIUPAC( nt )
+        newSeq = self.sequence.translate( ATGCN_TABLE )
+        if newSeq.translate( None, "ATGCN" ) != "":
+            newSeq = re.sub( "[RYMKWSBDHV]", lambda m: self.getATGCNFromIUPAC( m.group() ), newSeq )
         return newSeq
     
     
@@ -29,10 +29,59 @@
 # knowledge of the CeCILL license and that you accept its terms.
 
 
-import math
-import re
+import itertools
+import cStringIO
+import multiprocessing
 from pyRepetUnit.commons.seq.Bioseq import Bioseq
 
+
+## Codon table (standard genetic code), filled on demand with the codons having ambiguous or unknown nucleotides
+#
+class _CodonTable( dict ):
+    
+    _lBases = [ "T", "C", "A", "G" ]
+    _aminoAcids = "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG"
+    
+    # two first nucleotides of the codons whose amino acid doesn't depend on the third one
+    _dFourFoldPrefix2AminoAcid = { "CT":"L", "GT":"V", "TC":"S", "CC":"P", "AC":"T", "GC":"A", "CG":"R", "GG":"G" }
+    
+    #We don't know the amino acid because we don't have the nucleotide
+    #R      Purine (A or G)
+    #Y      Pyrimidine (C, T, or U)
+    #M      C or A
+    #K      T, U, or G
+    #W      T, U, or A
+    #S      C or G
+    #B      C, T, U, or G (not A)
+    #D      A, T, U, or G (not C)
+    #H      A, T, U, or C (not G)
+    #V      A, C, or G (not T, not U)
+    #N      Unknown nucleotide
+    _sAmbiguousNucleotides = set( "NRYMKWSBDHV" )
+    
+    def __init__( self ):
+        dict.__init__( self )
+        i = 0
+        for b1 in self._lBases:
+            for b2 in self._lBases:
+                for b3 in self._lBases:
+                    self[ b1 + b2 + b3 ] = self._aminoAcids[i]
+                    i += 1
+                    
+    ## Return the amino acid of a codon not in the table ('X' if ambiguous, empty string if unknown) and record it
+    #
+    def __missing__( self, codon ):
+        if self._dFourFoldPrefix2AminoAcid.has_key( codon[:2] ):
+            aminoAcid = self._dFourFoldPrefix2AminoAcid[ codon[:2] ]
+        elif self._sAmbiguousNucleotides.intersection( codon ):
+            aminoAcid = "X"
+        else:
+            aminoAcid = ""
+        self[ codon ] = aminoAcid
+        return aminoAcid
+    
+_dCodon2AminoAcid = _CodonTable()
+
 ## Static methods for sequences manipulation
 #
 class BioseqUtils(object):
@@ -43,81 +92,25 @@ class BioseqUtils(object):
     # @param phase a integer : 1 (default), 2 or 3
     # 
     def translateSequence(bioSeqInstanceToTranslate, phase=1):
-        pep = ""
-        #length = math.floor((len(self.sequence)-phase-1)/3)*3
-        length = int( math.floor( ( len(bioSeqInstanceToTranslate.sequence )-( phase-1 ) )/3 )*3 )
         #We need capital letters !
         bioSeqInstanceToTranslate.upCase() 
-        sequence = bioSeqInstanceToTranslate.sequence                
-        for i in xrange(phase-1,length,3):
-            if (sequence[i:i+3] == "TTT" or sequence[i:i+3] == "TTC"):
-                pep = pep + "F"
-            elif ( sequence[i:i+3] == "TTA" or sequence[i:i+3] == "TTG" ):
-                pep = pep + "L"
-            elif ( sequence[i:i+2] == "CT" ):
-                pep = pep + "L"
-            elif ( sequence[i:i+3] == "ATT" or sequence[i:i+3] == "ATC" or sequence[i:i+3] == "ATA" ):
-                pep = pep + "I"
-            elif ( sequence[i:i+3] == "ATG" ):
-                pep = pep + "M"
-            elif ( sequence[i:i+2] == "GT" ):
-                pep = pep + "V"
-            elif ( sequence[i:i+2] == "TC" ) :
-                pep = pep + "S"
-            elif ( sequence[i:i+2] == "CC" ) :
-                pep = pep + "P"
-            elif ( sequence[i:i+2] == "AC" ) :
-                pep = pep + "T"
-            elif ( sequence[i:i+2] == "GC" ) :
-                pep = pep + "A"
-            elif ( sequence[i:i+3] == "TAT" or sequence[i:i+3] == "TAC" ) :
-                pep = pep + "Y"
-            elif ( sequence[i:i+3] == "TAA" or sequence[i:i+3] == "TAG" ) :
-                pep = pep + "*"
-            elif ( sequence[i:i+3] == "CAT" or sequence[i:i+3] == "CAC" ) :
-                pep = pep + "H"
-            elif ( sequence[i:i+3] == "CAA" or sequence[i:i+3] == "CAG" ) :
-                pep = pep + "Q"
-            elif ( sequence[i:i+3] == "AAT" or sequence[i:i+3] == "AAC" ) :
-                pep = pep + "N"
-            elif ( sequence[i:i+3] == "AAA" or sequence[i:i+3] == "AAG" ) :
-                pep = pep + "K"
-            elif ( sequence[i:i+3] == "GAT" or sequence[i:i+3] == "GAC" ) :
-                pep = pep + "D"
-            elif ( sequence[i:i+3] == "GAA" or sequence[i:i+3] == "GAG" ) :
-                pep = pep + "E"
-            elif ( sequence[i:i+3] == "TGT" or sequence[i:i+3] == "TGC" ) :
-                pep = pep + "C"
-            elif ( sequence[i:i+3] == "TGA" ) :
-                pep = pep + "*"
-            elif ( sequence[i:i+3] == "TGG" ) :
-                pep = pep + "W"
-            elif ( sequence[i:i+2] == "CG" ) :
-                pep = pep + "R"
-            elif ( sequence[i:i+3] == "AGT" or sequence[i:i+3] == "AGC" ) :
-                pep = pep + "S"
-            elif ( sequence[i:i+3] == "AGA" or sequence[i:i+3] == "AGG" ) :
-                pep = pep + "R"
-            elif ( sequence[i:i+2] == "GG" ):
-                pep = pep + "G"
-            #We don't know the amino acid because we don't have the nucleotide
-            #R      Purine (A or G)
-            #Y      Pyrimidine (C, T, or U)
-            #M      C or A
-            #K      T, U, or G
-            #W      T, U, or A
-            #S      C or G
-            #B      C, T, U, or G (not A)
-            #D      A, T, U, or G (not C)
-            #H      A, T, U, or C (not G)
-            #V      A, C, or G (not T, not U)
-            #N      Unknown nucleotide
-            elif ( re.search("N|R|Y|M|K|W|S|B|D|H|V", sequence[i:i+3])):
-                pep = pep + "X"                      
-        bioSeqInstanceToTranslate.sequence = pep
+        bioSeqInstanceToTranslate.sequence = BioseqUtils.translateString( bioSeqInstanceToTranslate.sequence, phase )
         
     translateSequence = staticmethod(translateSequence)
     
+    ## Translate a nucleotide string in upper case with the codon table
+    #
+    # @param sequence string nucleotide sequence in upper case
+    # @param phase a integer : 1 (default), 2 or 3
+    # @return string the amino acid sequence ('X' for the codons with ambiguous nucleotides)
+    #
+    def translateString( sequence, phase=1 ):
+        start = phase - 1
+        end = start + ( ( len(sequence) - start ) / 3 ) * 3
+        return "".join( [ _dCodon2AminoAcid[ sequence[i:i+3] ] for i in xrange( start, end, 3 ) ] )
+    
+    translateString = staticmethod( translateString )
+    
     ## Add the frame info in header
     #
     # @param bioSeqInstance a bioseq instance to translate
@@ -137,12 +130,17 @@ class BioseqUtils(object):
     #
     # @param bioSeqInstanceToTranslate a bioseq instance to translate
     #
+    # @note the reverse complement is computed only once for the three negative frames
+    #
     def translateInAllFrame( bioSeqInstanceToTranslate ):
-        positives = BioseqUtils._translateInPositiveFrames( bioSeqInstanceToTranslate )        
-        negatives = BioseqUtils._translateInNegativeFrames( bioSeqInstanceToTranslate )         
+        iRevComp = bioSeqInstanceToTranslate.copyBioseqInstance()
+        iRevComp.reverseComplement()
         listAll6Frames = []
-        listAll6Frames.extend(positives)
-        listAll6Frames.extend(negatives)
+        for sequence, firstFrame in [ ( bioSeqInstanceToTranslate.sequence.upper(), 1 ), ( iRevComp.sequence, 4 ) ]:
+            for phase in [ 1, 2, 3 ]:
+                iBs = Bioseq( bioSeqInstanceToTranslate.header, BioseqUtils.translateString( sequence, phase ) )
+                BioseqUtils.setFrameInfoOnHeader( iBs, firstFrame + phase - 1 )
+                listAll6Frames.append( iBs )
         return listAll6Frames
             
     translateInAllFrame = staticmethod(translateInAllFrame)
@@ -169,6 +167,31 @@ class BioseqUtils(object):
     
     translateBioseqListInAllFrames = staticmethod( translateBioseqListInAllFrames )
     
+    ## Translate all the sequences of a fasta file in all frames, reading and writing one sequence at a time
+    #
+    # @param inFileName string name of the input fasta file (nucleotides)
+    # @param outFileName string name of the output fasta file (amino acids, 6 sequences per input sequence)
+    # @param replaceStopCodonsByX boolean replace the stop codons by X (default = False)
+    # @param nbProcesses integer number of sequences translated in parallel (default = 1)
+    #
+    def translateFastaFileInAllFrames( inFileName, outFileName, replaceStopCodonsByX=False, nbProcesses=1 ):
+        inFileHandler = open( inFileName, "r" )
+        outFileHandler = open( outFileName, "w" )
+        lArgs = ( ( iBs.header, iBs.sequence, replaceStopCodonsByX ) for iBs in _readBioseqs( inFileHandler ) )
+        if nbProcesses > 1:
+            pool = multiprocessing.Pool( nbProcesses )
+            for fasta in pool.imap( _translateInAllFramesAsFasta, lArgs, 16 ):
+                outFileHandler.write( fasta )
+            pool.close()
+            pool.join()
+        else:
+            for fasta in itertools.imap( _translateInAllFramesAsFasta, lArgs ):
+                outFileHandler.write( fasta )
+        inFileHandler.close()
+        outFileHandler.close()
+        
+    translateFastaFileInAllFrames = staticmethod( translateFastaFileInAllFrames )
+    
     ## Replace the stop codons by X for each sequence of a bioseq list
     #
     # @param lBioseqWithStops a list of bioseq instances
@@ -232,33 +255,12 @@ class BioseqUtils(object):
     getSeqLengthWithSeqName = staticmethod( getSeqLengthWithSeqName )
 
     def _translateInPositiveFrames( bioSeqInstanceToTranslate ):
-        seq1 = bioSeqInstanceToTranslate.copyBioseqInstance()
-        BioseqUtils.setFrameInfoOnHeader(seq1, 1)
-        BioseqUtils.translateSequence(seq1, 1)
-        seq2 = bioSeqInstanceToTranslate.copyBioseqInstance()
-        BioseqUtils.setFrameInfoOnHeader(seq2, 2)
-        BioseqUtils.translateSequence(seq2, 2)
-        seq3 = bioSeqInstanceToTranslate.copyBioseqInstance()
-        BioseqUtils.setFrameInfoOnHeader(seq3, 3)
-        BioseqUtils.translateSequence(seq3, 3)
-        return [seq1, seq2, seq3]
+        return BioseqUtils.translateInAllFrame( bioSeqInstanceToTranslate )[:3]
     
     _translateInPositiveFrames = staticmethod( _translateInPositiveFrames )
     
     def _translateInNegativeFrames(bioSeqInstanceToTranslate):
-        seq4 = bioSeqInstanceToTranslate.copyBioseqInstance()
-        seq4.reverseComplement()
-        BioseqUtils.setFrameInfoOnHeader(seq4, 4)
-        BioseqUtils.translateSequence(seq4, 1)
-        seq5 = bioSeqInstanceToTranslate.copyBioseqInstance()
-        seq5.reverseComplement()
-        BioseqUtils.setFrameInfoOnHeader(seq5, 5)
-        BioseqUtils.translateSequence(seq5, 2)
-        seq6 = bioSeqInstanceToTranslate.copyBioseqInstance()
-        seq6.reverseComplement()
-        BioseqUtils.setFrameInfoOnHeader(seq6, 6)
-        BioseqUtils.translateSequence(seq6, 3)
-        return [seq4, seq5, seq6]
+        return BioseqUtils.translateInAllFrame( bioSeqInstanceToTranslate )[3:]
     
     _translateInNegativeFrames = staticmethod( _translateInNegativeFrames )
     
@@ -294,3 +296,30 @@ class BioseqUtils(object):
         return sorted( lBioseqs, key=lambda iBs: ( len(iBs.sequence.replace("-","")) ), reverse=True )
     
     getBioseqListSortedByDecreasingLengthWithoutGaps = staticmethod( getBioseqListSortedByDecreasingLengthWithoutGaps )
+    
+    
+# Functions (module level, to be usable by a multiprocessing pool)
+
+# Yield the Bioseq instances of a fasta file, one at a time
+#
+def _readBioseqs( inFileHandler ):
+    while True:
+        iBs = Bioseq()
+        iBs.read( inFileHandler )
+        if iBs.sequence == None:
+            break
+        yield iBs
+        
+        
+# Return the translations in all frames of a sequence, formatted in fasta
+#
+# @param args tuple (header, sequence, replaceStopCodonsByX)
+#
+def _translateInAllFramesAsFasta( args ):
+    header, sequence, replaceStopCodonsByX = args
+    outString = cStringIO.StringIO()
+    for iBs in BioseqUtils.translateInAllFrame( Bioseq( header, sequence ) ):
+        if replaceStopCodonsByX:
+            BioseqUtils.replaceStopCodonsByX( iBs )
+        iBs.write( outString )
+    return outString.getvalue()
@@ -36,8 +36,12 @@ import math
 import shutil
 import re
 import glob
+import mmap
+import multiprocessing
 from pyRepetUnit.commons.seq.BioseqDB import BioseqDB
 from pyRepetUnit.commons.seq.Bioseq import Bioseq
+from pyRepetUnit.commons.seq.IndexedFastaDB import IndexedFastaDB
+from pyRepetUnit.commons.seq.KmerCounter import KmerCounter
 from pyRepetUnit.commons.coord.MapUtils import MapUtils
 from repet_base.ConvCoord import ConvCoord
 from pyRepetUnit.commons.coord.Range import Range
@@ -149,34 +153,24 @@ class FastaUtils( object ):
     # @param chkOver string chunk overlap (in bp, default=10000)
     # @param wordN string N stretch word length (default=11, 0 for no detection)
     # @param outFilePrefix string prefix of the output files (default=inFileName + '_chunks.fa' and '_chunks.map')
-    # @param clean boolean remove 'cut' and 'Nstretch' files
+    # @param clean boolean remove 'Nstretch' file
     # @param verbose integer (default = 0)
+    # @param nbProcesses integer number of sequences cut in parallel (default = 1)
     #
-    def dbChunks( inFileName, chkLgth="200000", chkOver="10000", wordN="11", outFilePrefix="", clean=False, verbose=0 ):
-        nbSeq = FastaUtils.dbSize( inFileName )
-        if verbose > 0:
-            print "cut the %i input sequences with cutterDB..." % ( nbSeq )
-            sys.stdout.flush()
-            
-        prg = "cutterDB"
-        cmd = prg
-        cmd += " -l %s" % ( chkLgth )
-        cmd += " -o %s"  %( chkOver )
-        cmd += " -w %s" % ( wordN )
-        cmd += " %s" % ( inFileName )
-        returnStatus = os.system( cmd )
-        if returnStatus != 0:
-            msg = "ERROR: '%s' returned '%i'" % ( prg, returnStatus )
+    # @note same output as 'cutterDB': the sequences are split at the N stretches, each stretch-free segment is cut into chunks (chunks shorter than 14 bp are not written, sequence lines are 60 bp long), the N stretches are recorded in inFileName + '.Nstretch.map'
+    #
+    def dbChunks( inFileName, chkLgth="200000", chkOver="10000", wordN="11", outFilePrefix="", clean=False, verbose=0, nbProcesses=1 ):
+        chkLgth = int( chkLgth )
+        chkOver = int( chkOver )
+        wordN = int( wordN )
+        if chkOver >= chkLgth:
+            msg = "ERROR: chunk overlap (%i) must be shorter than chunk length (%i)" % ( chkOver, chkLgth )
             sys.stderr.write( "%s\n" % ( msg ) )
             sys.exit(1)
             
-        nbChunks = FastaUtils.dbSize( "%s_cut" % ( inFileName ) )
-        if verbose > 0:
-            print "done (%i chunks)" % ( nbChunks )
-            sys.stdout.flush()
-            
+        lRecords = _getFastaRecordOffsets( inFileName )
         if verbose > 0:
-            print "rename the headers..."
+            print "cut the %i input sequences..." % ( len(lRecords) )
             sys.stdout.flush()
             
         if outFilePrefix == "":
@@ -186,46 +180,86 @@ class FastaUtils( object ):
             outFastaName = outFilePrefix + ".fa"
             outMapName = outFilePrefix + ".map"
             
-        inFile = open( "%s_cut" % ( inFileName ), "r" )
-        line = inFile.readline()
-        
-        outFasta = open( outFastaName, "w" )
-        outMap = open( outMapName, "w" )
-        
-        # read line after line (no need for big RAM) and change the sequence headers
-        while True:
-            
-            if line == "":
-                break
+        lArgs = []
+        for i in xrange( 0, len(lRecords) ):
+            header, seqStart, seqEnd = lRecords[i]
+            tmpFileName = "%s.tmp%i_%i" % ( outFastaName, os.getpid(), i )
+            lArgs.append( ( inFileName, header, seqStart, seqEnd, chkLgth, chkOver, wordN, tmpFileName ) )
+        if nbProcesses > 1 and len(lArgs) > 1:
+            pool = multiprocessing.Pool( min( nbProcesses, len(lArgs) ) )
+            lResults = pool.map( _cutSequenceIntoChunks, lArgs, 1 )
+            pool.close()
+            pool.join()
+        else:
+            lResults = map( _cutSequenceIntoChunks, lArgs )
             
-            if line[0] == ">":
-                if verbose > 1:
-                    print "rename '%s'" % ( line[:-1] ); sys.stdout.flush()
-                data = line[:-1].split(" ")
-                seqID = data[0].split(">")[1]
-                newHeader = "chunk%s" % ( str(seqID).zfill( len(str(nbChunks)) ) )
-                oldHeader = data[2]
-                seqStart = data[4].split("..")[0]
-                seqEnd = data[4].split("..")[1]
-                outMap.write( "%s\t%s\t%s\t%s\n" % ( newHeader, oldHeader, seqStart, seqEnd ) )
-                outFasta.write( ">%s\n" % ( newHeader ) )
-                
-            else:
-                outFasta.write( line.upper() )
-                
-            line = inFile.readline()
+        nbChunks = 0
+        for lChunks, lNstretches in lResults:
+            nbChunks += len(lChunks)
+        if verbose > 0:
+            print "done (%i chunks)" % ( nbChunks )
+            sys.stdout.flush()
             
-        inFile.close()
+        # concatenate the chunks of each sequence, numbering them globally
+        outFasta = open( outFastaName, "w" )
+        outMap = open( outMapName, "w" )
+        outNstretch = open( "%s.Nstretch.map" % ( inFileName ), "w" )
+        chunkId = 0
+        for i in xrange( 0, len(lArgs) ):
+            seqName = lArgs[i][1].split()[0]
+            lChunks, lNstretches = lResults[i]
+            for start, end in lNstretches:
+                outNstretch.write( "N_stretch\t%s\t%i\t%i\n" % ( seqName, start, end ) )
+            tmpFile = open( lArgs[i][7], "r" )
+            for line in tmpFile:
+                if line[0] == ">":
+                    start, end = lChunks[ int(line[1:]) ]
+                    chunkId += 1
+                    newHeader = "chunk%s" % ( str(chunkId).zfill( len(str(nbChunks)) ) )
+                    if verbose > 1:
+                        print "%s: %s %i..%i" % ( newHeader, seqName, start, end ); sys.stdout.flush()
+                    outMap.write( "%s\t%s\t%i\t%i\n" % ( newHeader, seqName, start, end ) )
+                    outFasta.write( ">%s\n" % ( newHeader ) )
+                else:
+                    outFasta.write( line )
+            tmpFile.close()
+            os.remove( lArgs[i][7] )
         outFasta.close()
         outMap.close()
+        outNstretch.close()
         
         if clean == True:
-            os.remove(inFileName + "_cut")
             os.remove(inFileName + ".Nstretch.map")
             
     dbChunks = staticmethod( dbChunks )
     
     
+    ## Count the words made only of A, T, G and C in each sequence of a fasta file, one sequence at a time
+    #
+    # @param inFileName string name of the input fasta file
+    # @param wordSize integer size of the words
+    # @param nbProcesses integer number of sequences processed in parallel (default = 1)
+    # @return iterator over (header, sequence length, counts, number of words) for each sequence, in the order of the file
+    #
+    # @note see KmerCounter for the counts (vector or dictionary) and the entropies computed from them
+    #
+    def dbWordCounts( inFileName, wordSize, nbProcesses=1 ):
+        lArgs = []
+        for header, seqStart, seqEnd in _getFastaRecordOffsets( inFileName ):
+            lArgs.append( ( inFileName, header, seqStart, seqEnd, wordSize ) )
+        if nbProcesses > 1 and len(lArgs) > 1:
+            pool = multiprocessing.Pool( min( nbProcesses, len(lArgs) ) )
+            for result in pool.imap( _countWordsInSequence, lArgs ):
+                yield result
+            pool.close()
+            pool.join()
+        else:
+            for args in lArgs:
+                yield _countWordsInSequence( args )
+                
+    dbWordCounts = staticmethod( dbWordCounts )
+    
+    
     ## Split the input fasta file in several output files
     #
     # @param inFile string name of the input fasta file
@@ -935,29 +969,30 @@ class FastaUtils( object ):
     # @note the coordinates should be merged beforehand!
     #
     def spliceFromCoords( genomeFile, coordFile, obsFile ):
-        genomeFileHandler = open( genomeFile, "r" )
+        iGenomeDB = IndexedFastaDB( genomeFile )
         obsFileHandler = open( obsFile, "w" )
         dChr2Maps = MapUtils.getDictPerSeqNameFromMapFile( coordFile )
         
-        while True:
-            bs = Bioseq()
-            bs.read( genomeFileHandler )
-            if bs.sequence == None:
-                break
-            if dChr2Maps.has_key( bs.header ):
-                lCoords = MapUtils.getMapListSortedByIncreasingMinThenMax( dChr2Maps[ bs.header ] )
-                splicedSeq = ""
+        for header in iGenomeDB.getHeaderList():
+            bs = Bioseq( header )
+            if dChr2Maps.has_key( header ):
+                seqLength = iGenomeDB.getSeqLength( header )
+                lCoords = MapUtils.getMapListSortedByIncreasingMinThenMax( dChr2Maps[ header ] )
+                lSplicedParts = []
                 currentSite = 0
                 for iMap in lCoords:
-                    minSplice = iMap.getMin() - 1
+                    minSplice = min( iMap.getMin() - 1, seqLength )
                     if minSplice > currentSite:
-                        splicedSeq += bs.sequence[ currentSite : minSplice ]
+                        lSplicedParts.append( iGenomeDB.subseq( header, currentSite + 1, minSplice ) )
                     currentSite = iMap.getMax()
-                splicedSeq += bs.sequence[ currentSite : ]
-                bs.sequence = splicedSeq
+                if currentSite < seqLength:
+                    lSplicedParts.append( iGenomeDB.subseq( header, currentSite + 1, seqLength ) )
+                bs.sequence = "".join( lSplicedParts )
+            else:
+                bs.sequence = iGenomeDB.fetch( header ).sequence
             bs.write( obsFileHandler )
             
-        genomeFileHandler.close()
+        iGenomeDB.close()
         obsFileHandler.close()
         
     spliceFromCoords = staticmethod( spliceFromCoords )
@@ -1001,3 +1036,193 @@ class FastaUtils( object ):
                     sys.exit(1)
                     
     dbShuffle = staticmethod( dbShuffle )
+    
+    
+# Functions (module level, to be usable by a multiprocessing pool)
+
+# Return a list of (header, sequence start offset, sequence end offset) for each record of a fasta file, using a memory map
+#
+def _getFastaRecordOffsets( inFileName ):
+    lRecords = []
+    if os.path.getsize( inFileName ) == 0:
+        return lRecords
+    inFile = open( inFileName, "r" )
+    mm = mmap.mmap( inFile.fileno(), 0, access=mmap.ACCESS_READ )
+    pos = 0
+    if mm[0] != ">":
+        pos = mm.find( "\n>" ) + 1
+    while pos > 0 or ( pos == 0 and mm[0] == ">" ):
+        headerEnd = mm.find( "\n", pos )
+        if headerEnd == -1:
+            headerEnd = mm.size()
+        nextPos = mm.find( "\n>", headerEnd - 1 )
+        if nextPos == -1:
+            seqEnd = mm.size()
+        else:
+            seqEnd = nextPos + 1
+        lRecords.append( ( mm[ pos+1 : headerEnd ].rstrip("\r"), min( headerEnd + 1, seqEnd ), seqEnd ) )
+        if nextPos == -1:
+            break
+        pos = nextPos + 1
+    mm.close()
+    inFile.close()
+    return lRecords
+
+# Return (line length, end of line length, sequence length) of a sequence of a fasta file read via a memory map,
+# or None if its lines (except the last one) don't all have the same length
+#
+def _getSequenceLayout( mm, seqStart, seqEnd ):
+    firstEol = mm.find( "\n", seqStart, seqEnd )
+    if firstEol == -1:
+        lineLength = len( mm[ seqStart : seqEnd ].rstrip( "\r" ) )
+        if lineLength == 0:
+            return None
+        return lineLength, 1, lineLength
+    eolLength = 1
+    lineEnd = firstEol
+    if lineEnd > seqStart and mm[ lineEnd - 1 ] == "\r":
+        eolLength = 2
+        lineEnd -= 1
+    lineLength = lineEnd - seqStart
+    if lineLength == 0:
+        return None
+    eol = mm[ lineEnd : lineEnd + eolLength ]
+    pos = seqStart
+    while pos + lineLength + eolLength <= seqEnd:
+        if mm.find( "\n", pos, pos + lineLength ) != -1 or mm[ pos + lineLength : pos + lineLength + eolLength ] != eol:
+            return None
+        pos += lineLength + eolLength
+    lastLine = mm[ pos : seqEnd ].rstrip( "\r\n" )
+    if "\n" in lastLine or "\r" in lastLine:
+        return None
+    return lineLength, eolLength, ( pos - seqStart ) / ( lineLength + eolLength ) * lineLength + len(lastLine)
+
+# Return the offset in the data of a position (0-based) of the sequence
+#
+def _getDataOffset( seqStart, layout, pos ):
+    lineLength, eolLength = layout[0], layout[1]
+    return seqStart + ( pos / lineLength ) * ( lineLength + eolLength ) + pos % lineLength
+
+# Return the position (0-based) in the sequence of an offset in the data
+#
+def _getSequencePosition( seqStart, layout, offset ):
+    lineLength, eolLength = layout[0], layout[1]
+    line, column = divmod( offset - seqStart, lineLength + eolLength )
+    return line * lineLength + column
+
+# Return the sub-sequence [start, end[ (0-based), in upper case, read from the data without copying the whole sequence
+#
+def _getSubSequence( data, seqStart, layout, start, end ):
+    subSeq = data[ _getDataOffset( seqStart, layout, start ) : _getDataOffset( seqStart, layout, end - 1 ) + 1 ]
+    return subSeq.replace( "\n", "" ).replace( "\r", "" ).upper()
+
+_nRunPattern = re.compile( "[Nn]+" )
+
+# Iterate over the runs of consecutive N's of a sequence as (start, end) coordinates (0-based, end excluded), a run
+# possibly spanning several lines of the data
+#
+def _iterNruns( data, seqStart, seqEnd, layout ):
+    runStart = None
+    runEnd = None
+    for m in _nRunPattern.finditer( data, seqStart, seqEnd ):
+        start = _getSequencePosition( seqStart, layout, m.start() )
+        end = _getSequencePosition( seqStart, layout, m.end() - 1 ) + 1
+        if start == runEnd:
+            runEnd = end
+            continue
+        if runStart != None:
+            yield runStart, runEnd
+        runStart, runEnd = start, end
+    if runStart != None:
+        yield runStart, runEnd
+
+# Return the N stretches of a sequence as a list of (start, end) coordinates (1-based), from its runs of N's
+#
+# @note as cutterDB, the runs of N's separated by at most wordN+1 other letters are clustered, and a cluster is a stretch if it has more than wordN N's
+#
+def _getNstretches( iNruns, wordN ):
+    lNstretches = []
+    clusterStart = None
+    clusterEnd = None
+    nbN = 0
+    for start, end in iNruns:
+        if clusterEnd != None and start - clusterEnd <= wordN + 1:
+            clusterEnd = end
+            nbN += end - start
+            continue
+        if nbN > wordN:
+            lNstretches.append( ( clusterStart + 1, clusterEnd ) )
+        clusterStart, clusterEnd, nbN = start, end, end - start
+    if nbN > wordN:
+        lNstretches.append( ( clusterStart + 1, clusterEnd ) )
+    return lNstretches
+
+# chunks shorter than this are not written, as cutterDB
+_minChunkLength = 14
+
+# Cut one sequence of a fasta file into chunks, write them with their local index as header, return the chunk and N stretch coordinates
+#
+# @param args tuple (inFileName, header, seqStart, seqEnd, chkLgth, chkOver, wordN, outFileName)
+#
+# @note the chunks are sliced from the memory map, unless the lines of the sequence don't all have the same length (the sequence is then copied)
+#
+def _cutSequenceIntoChunks( args ):
+    inFileName, header, seqStart, seqEnd, chkLgth, chkOver, wordN, outFileName = args
+    inFile = open( inFileName, "r" )
+    mm = mmap.mmap( inFile.fileno(), 0, access=mmap.ACCESS_READ )
+    data = mm
+    layout = _getSequenceLayout( mm, seqStart, seqEnd )
+    if layout == None:
+        data = mm[ seqStart : seqEnd ].replace( "\n", "" ).replace( "\r", "" ).upper()
+        seqStart = 0
+        seqEnd = len(data)
+        layout = ( max( len(data), 1 ), 0, len(data) )
+    seqLength = layout[2]
+    
+    lNstretches = []
+    if wordN > 0:
+        lNstretches = _getNstretches( _iterNruns( data, seqStart, seqEnd, layout ), wordN )
+    lSegments = []
+    segStart = 1
+    for nStart, nEnd in lNstretches:
+        if nStart > segStart:
+            lSegments.append( ( segStart, nStart - 1 ) )
+        segStart = nEnd + 1
+    if segStart <= seqLength:
+        lSegments.append( ( segStart, seqLength ) )
+        
+    lChunks = []
+    outFile = open( outFileName, "w" )
+    for segStart, segEnd in lSegments:
+        start = segStart
+        while True:
+            end = min( start + chkLgth - 1, segEnd )
+            if end - start + 1 >= _minChunkLength:
+                outFile.write( ">%i\n" % ( len(lChunks) ) )
+                chunk = _getSubSequence( data, seqStart, layout, start - 1, end )
+                for i in xrange( 0, len(chunk), 60 ):
+                    outFile.write( "%s\n" % ( chunk[ i : i + 60 ] ) )
+                lChunks.append( ( start, end ) )
+            if end == segEnd:
+                break
+            start += chkLgth - chkOver
+    outFile.close()
+    mm.close()
+    inFile.close()
+    return lChunks, lNstretches
+
+
+# Count the words of a sequence of a fasta file, read via a memory map
+#
+# @param args tuple (inFileName, header, seqStart, seqEnd, wordSize)
+# @return tuple (header, sequence length, counts, number of words)
+#
+def _countWordsInSequence( args ):
+    inFileName, header, seqStart, seqEnd, wordSize = args
+    inFile = open( inFileName, "r" )
+    mm = mmap.mmap( inFile.fileno(), 0, access=mmap.ACCESS_READ )
+    seq = mm[ seqStart : seqEnd ].replace( "\n", "" ).replace( "\r", "" )
+    mm.close()
+    inFile.close()
+    counts, nbWords = KmerCounter( wordSize ).count( seq )
+    return header.rstrip(), len(seq), counts, nbWords
@@ -0,0 +1,354 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import os
+import sys
+import mmap
+from pyRepetUnit.commons.seq.Bioseq import Bioseq
+from pyRepetUnit.commons.coord.SetUtils import SetUtils
+
+
+## Give a random access to the sequences of a fasta file without loading it in memory
+#
+# The file is indexed in a samtools-compatible '.fai' file (name, length, offset, nb of residues per line, nb of bytes per line),
+# which is reused if it is more recent than the fasta file, and is memory-mapped.
+# The index is only kept in memory if the '.fai' file can't be written or if samtools couldn't read it
+# (lines of different lengths within a sequence).
+#
+class IndexedFastaDB( object ):
+    
+    ## Constructor
+    #
+    # @param inFaFileName string name of the fasta file
+    # @param verbose integer verbosity level
+    #
+    def __init__( self, inFaFileName, verbose=0 ):
+        self.name = inFaFileName
+        self._faiFileName = "%s.fai" % ( inFaFileName )
+        self._verbose = verbose
+        self._lNames = []
+        self._dName2Entry = {}
+        self._dHeader2Name = {}
+        self._faFile = None
+        self._mm = None
+        self.open()
+        
+        
+    ## Memory-map the fasta file and load its index (build it if necessary)
+    #
+    def open( self ):
+        if not os.path.exists( self.name ):
+            sys.stderr.write( "ERROR: fasta file '%s' doesn't exist\n" % ( self.name ) )
+            sys.exit(1)
+        self._faFile = open( self.name, "r" )
+        if os.path.getsize( self.name ) > 0:
+            self._mm = mmap.mmap( self._faFile.fileno(), 0, access=mmap.ACCESS_READ )
+        if self.isIndexUpToDate():
+            lEntries = self.loadIndex()
+        else:
+            lEntries = self.buildIndex()
+        self._setIndex( lEntries )
+        
+        
+    ## Release the memory map and the file
+    #
+    def close( self ):
+        if self._mm != None:
+            self._mm.close()
+            self._mm = None
+        if self._faFile != None:
+            self._faFile.close()
+            self._faFile = None
+            
+            
+    ## Return True if the '.fai' file exists and is more recent than the fasta file
+    #
+    def isIndexUpToDate( self ):
+        return os.path.exists( self._faiFileName ) \
+            and os.path.getmtime( self._faiFileName ) >= os.path.getmtime( self.name )
+            
+            
+    ## Index the fasta file and write the '.fai' file if all the sequences are regular
+    #
+    # @return lEntries list of tuples (name, length, offset, nb of residues per line, nb of bytes per line)
+    # @note as with samtools, all lines of a sequence except the last one must have the same length,
+    # otherwise the sequence gets 0 residues per line and is read without the line lengths
+    #
+    def buildIndex( self ):
+        if self._verbose > 0:
+            print "build index of '%s'..." % ( self.name ); sys.stdout.flush()
+        lEntries = []
+        if self._mm == None:
+            self._writeIndex( lEntries )
+            return lEntries
+        isIndexReadableBySamtools = True
+        mm = self._mm
+        size = mm.size()
+        pos = 0
+        if mm[0] != ">":
+            pos = mm.find( "\n>" ) + 1
+            if pos == 0:
+                pos = size
+        while pos < size:
+            headerEnd = mm.find( "\n", pos )
+            if headerEnd == -1:
+                headerEnd = size
+            lWords = mm[ pos+1 : headerEnd ].split()
+            name = ""
+            if lWords != []:
+                name = lWords[0]
+            offset = min( headerEnd + 1, size )
+            nextPos = mm.find( "\n>", headerEnd - 1 )
+            if nextPos == -1:
+                seqEnd = size
+            else:
+                seqEnd = nextPos + 1
+            length = 0
+            lineBases = 0
+            lineWidth = 0
+            lastLine = False
+            isRegular = True
+            linePos = offset
+            while linePos < seqEnd:
+                lineEnd = mm.find( "\n", linePos, seqEnd )
+                if lineEnd == -1:
+                    lineEnd = seqEnd - 1
+                line = mm[ linePos : lineEnd + 1 ]
+                nbBases = len( line.rstrip("\r\n") )
+                if nbBases > 0:
+                    if lastLine:
+                        isRegular = False
+                    if lineBases == 0:
+                        lineBases = nbBases
+                        lineWidth = len(line)
+                    elif nbBases > lineBases:
+                        isRegular = False
+                    elif nbBases < lineBases or len(line) != lineWidth:
+                        lastLine = True
+                    length += nbBases
+                else:
+                    lastLine = lineBases > 0
+                linePos = lineEnd + 1
+            if not isRegular:
+                if self._verbose > 0:
+                    print "WARNING: lines of different lengths in sequence '%s'" % ( name ); sys.stdout.flush()
+                lineBases = 0
+                lineWidth = 0
+                isIndexReadableBySamtools = False
+            lEntries.append( ( name, length, offset, lineBases, lineWidth ) )
+            pos = seqEnd
+        if isIndexReadableBySamtools:
+            self._writeIndex( lEntries )
+        elif self._verbose > 0:
+            print "WARNING: index of '%s' kept in memory" % ( self.name ); sys.stdout.flush()
+        return lEntries
+    
+    
+    ## Write the '.fai' file, one line per sequence, or keep the index in memory if the file can't be written
+    #
+    # @param lEntries list of tuples (name, length, offset, nb of residues per line, nb of bytes per line)
+    # @note the file is written under a temporary name then renamed, so that other processes never read it partially
+    #
+    def _writeIndex( self, lEntries ):
+        tmpFileName = "%s.tmp%i" % ( self._faiFileName, os.getpid() )
+        try:
+            faiFile = open( tmpFileName, "w" )
+            for entry in lEntries:
+                faiFile.write( "%s\t%i\t%i\t%i\t%i\n" % entry )
+            faiFile.close()
+            os.rename( tmpFileName, self._faiFileName )
+        except (IOError, OSError):
+            if os.path.exists( tmpFileName ):
+                os.remove( tmpFileName )
+            if self._verbose > 0:
+                print "WARNING: can't write '%s', index kept in memory" % ( self._faiFileName ); sys.stdout.flush()
+                
+                
+    ## Read the '.fai' file
+    #
+    # @return lEntries list of tuples (name, length, offset, nb of residues per line, nb of bytes per line)
+    #
+    def loadIndex( self ):
+        faiFile = open( self._faiFileName, "r" )
+        lEntries = []
+        for line in faiFile:
+            tokens = line.rstrip("\n").split("\t")
+            lEntries.append( ( tokens[0], int(tokens[1]), int(tokens[2]), int(tokens[3]), int(tokens[4]) ) )
+        faiFile.close()
+        return lEntries
+    
+    
+    ## Set the index of the sequences from the entries of the '.fai' file
+    #
+    # @param lEntries list of tuples (name, length, offset, nb of residues per line, nb of bytes per line)
+    #
+    def _setIndex( self, lEntries ):
+        self._lNames = []
+        self._dName2Entry = {}
+        self._dHeader2Name = {}
+        for i in xrange( len(lEntries) ):
+            name, length, offset, lineBases, lineWidth = lEntries[i]
+            headerStart = self._mm.rfind( ">", 0, offset )
+            if i < len(lEntries) - 1:
+                recordEnd = self._mm.rfind( ">", 0, lEntries[i+1][2] )
+            else:
+                recordEnd = self._mm.size()
+            self._lNames.append( name )
+            self._dName2Entry[ name ] = ( length, offset, lineBases, lineWidth, recordEnd )
+            self._dHeader2Name[ self._mm[ headerStart + 1 : offset ].rstrip() ] = name
+        if self._verbose > 0:
+            print "nb of sequences in '%s': %i" % ( self.name, len(self._lNames) ); sys.stdout.flush()
+            
+            
+    ## Return the name of a sequence in the index from its full header or its name
+    #
+    def _getName( self, header ):
+        if self._dHeader2Name.has_key( header ):
+            return self._dHeader2Name[ header ]
+        if self._dName2Entry.has_key( header ):
+            return header
+        sys.stderr.write( "ERROR: sequence '%s' absent from '%s'\n" % ( header, self.name ) )
+        sys.exit(1)
+        
+        
+    ## Return the full header of a sequence from its name
+    #
+    def _getHeader( self, name ):
+        offset = self._dName2Entry[ name ][1]
+        return self._mm[ self._mm.rfind( ">", 0, offset ) + 1 : offset ].rstrip()
+    
+    
+    ## Return the sequence between two positions of the file (0-based, end excluded), without the line breaks
+    #
+    def _getSeqSlice( self, name, start, end ):
+        length, offset, lineBases, lineWidth, recordEnd = self._dName2Entry[ name ]
+        if start >= end:
+            return ""
+        if lineBases == 0:
+            return self._mm[ offset : recordEnd ].replace( "\n", "" ).replace( "\r", "" )[ start : end ]
+        startByte = offset + ( start / lineBases ) * lineWidth + start % lineBases
+        endByte = offset + ( ( end - 1 ) / lineBases ) * lineWidth + ( end - 1 ) % lineBases + 1
+        return self._mm[ startByte : endByte ].replace( "\n", "" ).replace( "\r", "" )
+    
+    
+    ## Return True if the sequence is in the bank
+    #
+    # @param header full header or name (first word of the header) of the sequence
+    #
+    def __contains__( self, header ):
+        return self._dHeader2Name.has_key( header ) or self._dName2Entry.has_key( header )
+    
+    
+    ## Return the number of sequences in the bank
+    #
+    def getSize( self ):
+        return len(self._lNames)
+    
+    
+    ## Return the cumulative length of all the sequences
+    #
+    def getLength( self ):
+        length = 0
+        for name in self._lNames:
+            length += self._dName2Entry[ name ][0]
+        return length
+    
+    
+    ## Return the length of a sequence
+    #
+    # @param header full header or name (first word of the header) of the sequence
+    #
+    def getSeqLength( self, header ):
+        return self._dName2Entry[ self._getName( header ) ][0]
+    
+    
+    ## Return the list of the full headers, in the order of the file
+    #
+    def getHeaderList( self ):
+        lHeaders = []
+        for name in self._lNames:
+            lHeaders.append( self._getHeader( name ) )
+        return lHeaders
+    
+    
+    ## Give the Bioseq instance of a sequence
+    #
+    # @param header full header or name (first word of the header) of the sequence
+    # @return a Bioseq instance
+    #
+    def fetch( self, header ):
+        name = self._getName( header )
+        return Bioseq( self._getHeader( name ), self._getSeqSlice( name, 0, self._dName2Entry[ name ][0] ) )
+    
+    
+    ## Return a subsequence, reverse complemented if start > end
+    #
+    # @param header full header or name (first word of the header) of the sequence
+    # @param start integer start coordinate (1-based)
+    # @param end integer end coordinate (1-based, included)
+    # @return a string
+    #
+    def subseq( self, header, start, end ):
+        name = self._getName( header )
+        length = self._dName2Entry[ name ][0]
+        if start <= 0 or end <= 0:
+            sys.stderr.write( "ERROR with coordinates start=%i or end=%i\n" % ( start, end ) )
+            sys.exit(1)
+        if start > length or end > length:
+            sys.stderr.write( "ERROR: coordinates start=%i end=%i out of sequence '%s' range (%i bp)\n" % ( start, end, name, length ) )
+            sys.exit(1)
+        bs = Bioseq( name, self._getSeqSlice( name, min(start,end) - 1, max(start,end) ) )
+        if start > end:
+            bs.reverseComplement()
+        return bs.sequence
+    
+    
+    ## Return a Bioseq instance built from a list of sets (same header as TableSeqAdaptator.getBioseqFromSetList)
+    #
+    # @param lSets list of Set instances
+    #
+    def getBioseqFromSetList( self, lSets ):
+        header = "%s::%i %s " % ( lSets[0].name, lSets[0].id, lSets[0].seqname )
+        lSeqs = []
+        lSortedSets = SetUtils.getSetListSortedByIncreasingMinThenMax( lSets )
+        if not lSets[0].isOnDirectStrand():
+            lSortedSets.reverse()
+        for iSet in lSortedSets:
+            header += "%i..%i," % ( iSet.getStart(), iSet.getEnd() )
+            lSeqs.append( self.subseq( iSet.seqname, iSet.getStart(), iSet.getEnd() ) )
+        return Bioseq( header[:-1], "".join( lSeqs ) )
+    
+    
+    ## Iterate over the Bioseq instances, in the order of the file
+    #
+    def __iter__( self ):
+        for name in self._lNames:
+            yield self.fetch( name )
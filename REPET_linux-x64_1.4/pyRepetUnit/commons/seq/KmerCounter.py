@@ -0,0 +1,225 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import re
+import math
+import itertools
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+## Maximum word size for which the counts are recorded in a vector indexed by the word codes (4^12 integers)
+#
+MAX_SIZE_COUNT_VECTOR = 12
+
+
+## Count the words (k-mers) made only of A, T, G and C in a sequence
+#
+#  Each nucleotide is encoded on 2 bits (A=0, C=1, G=2, T=3), the code of a word being the concatenation of the codes of its nucleotides.
+#  Up to MAX_SIZE_COUNT_VECTOR (and if numpy is available), the counts are a numpy vector indexed by the word codes.
+#  Otherwise, they are a dictionary whose keys are the words and values their numbers of occurrences.
+#  In both cases, the words overlapping a symbol other than A, T, G or C (in upper or lower case) are skipped.
+#
+class KmerCounter( object ):
+
+    _nucleotides = "ACGT"
+
+    # 2-bit code of each symbol, 4 for the symbols other than A, C, G or T
+    _codeTable = "".join( [ chr( "ACGT".find( chr(i).upper() ) % 5 ) for i in xrange( 0, 256 ) ] )
+
+    _nonATGCSymbols = re.compile( "[^ACGT]+" )
+
+    # nb of words counted at once with the vector, to bound the memory
+    _blockSize = 2 ** 22
+
+    ## Constructor
+    #
+    # @param size integer word size
+    #
+    def __init__( self, size ):
+        self._size = size
+        self._isVector = numpy != None and size <= MAX_SIZE_COUNT_VECTOR
+
+
+    def getSize( self ):
+        return self._size
+
+
+    ## Return True if the counts are recorded in a numpy vector, False if in a dictionary
+    #
+    def isCountVector( self ):
+        return self._isVector
+
+
+    ## Return the counts of a sequence without any word
+    #
+    def getEmptyCounts( self ):
+        if self._isVector:
+            return numpy.zeros( 4 ** self._size, dtype=numpy.int64 )
+        return {}
+
+
+    ## Return the word corresponding to a code
+    #
+    # @param code integer
+    #
+    def getWord( self, code ):
+        word = ""
+        for i in xrange( 0, self._size ):
+            word = self._nucleotides[ code & 3 ] + word
+            code >>= 2
+        return word
+
+
+    ## Count the words of a sequence
+    #
+    # @param sequence string
+    # @return counts (vector or dictionary) and number of words
+    #
+    def count( self, sequence ):
+        if self._size <= 0:
+            return self.getEmptyCounts(), 0
+        if self._isVector:
+            return self._countWithVector( sequence )
+        return self._countWithDictionary( sequence )
+
+
+    ## Add counts to other counts and return the result
+    #
+    def addCounts( self, counts, otherCounts ):
+        if self._isVector:
+            return counts + otherCounts
+        for word, count in otherCounts.iteritems():
+            counts[ word ] = counts.get( word, 0 ) + count
+        return counts
+
+
+    ## Return a dictionary whose keys are the words and values their numbers of occurrences
+    #
+    # @param counts vector or dictionary
+    # @param withAbsentWords boolean record also the words without occurrence (4^size words)
+    #
+    def getCountPerWord( self, counts, withAbsentWords=False ):
+        if self._isVector:
+            dWord2Count = {}
+            for code in numpy.flatnonzero( counts ):
+                dWord2Count[ self.getWord( code ) ] = int( counts[ code ] )
+        else:
+            dWord2Count = dict( counts )
+        if withAbsentWords:
+            for lNucleotides in itertools.product( self._nucleotides, repeat=self._size ):
+                dWord2Count.setdefault( "".join( lNucleotides ), 0 )
+        return dWord2Count
+
+
+    ## Return the entropy of the counts (base 4), the probability of the last nucleotide of a word being conditioned by the preceding ones
+    #
+    # @param counts vector or dictionary
+    # @param nbWords integer number of words
+    #
+    def getEntropy( self, counts, nbWords ):
+        if nbWords == 0:
+            return 0.0
+        mySum = 0.0
+        if self._isVector:
+            aCountsPerPrefix = counts.reshape( -1, 4 )
+            aPrefixCounts = aCountsPerPrefix.sum( axis=1 ).repeat( 4 )
+            aIsPresent = counts > 0
+            aCounts = counts[ aIsPresent ].astype( numpy.float64 )
+            mySum = ( aCounts * numpy.log( aCounts / aPrefixCounts[ aIsPresent ] ) ).sum()
+        else:
+            dPrefix2Count = {}
+            for word, count in counts.iteritems():
+                dPrefix2Count[ word[:-1] ] = dPrefix2Count.get( word[:-1], 0 ) + count
+            for word, count in counts.iteritems():
+                if count > 0:
+                    mySum += count * math.log( float(count) / dPrefix2Count[ word[:-1] ] )
+        return - float( mySum ) / nbWords / math.log(4)
+
+
+    ## Return the relative entropy (base 4) of the counts compared to reference counts, with a pseudo-count of 1 for each word
+    #
+    # @param counts vector or dictionary
+    # @param nbWords integer number of words
+    # @param refCounts vector or dictionary
+    # @param refNbWords integer number of reference words
+    #
+    def getRelativeEntropy( self, counts, nbWords, refCounts, refNbWords ):
+        if self._isVector:
+            aFreqs = ( counts + 1 ) / float( nbWords )
+            aRefFreqs = ( refCounts + 1 ) / float( refNbWords )
+            mySum = ( aFreqs * numpy.log( aFreqs / aRefFreqs ) ).sum()
+        else:
+            mySum = 0.0
+            dWords = set( counts.keys() ).union( refCounts.keys() )
+            for word in dWords:
+                freq = ( counts.get( word, 0 ) + 1 ) / float( nbWords )
+                refFreq = ( refCounts.get( word, 0 ) + 1 ) / float( refNbWords )
+                mySum += freq * math.log( freq / refFreq )
+            # words absent from both counts
+            freq = 1 / float( nbWords )
+            refFreq = 1 / float( refNbWords )
+            mySum += ( 4 ** self._size - len(dWords) ) * freq * math.log( freq / refFreq )
+        return - float( mySum ) / math.log(4)
+
+
+    def _countWithVector( self, sequence ):
+        size = self._size
+        aCounts = self.getEmptyCounts()
+        nbWords = 0
+        for start in xrange( 0, max( 0, len(sequence) - size + 1 ), self._blockSize ):
+            block = sequence[ start : start + self._blockSize + size - 1 ]
+            nbWindows = len(block) - size + 1
+            aCodes = numpy.frombuffer( block.translate( self._codeTable ), dtype=numpy.uint8 )
+            # a window is valid if it doesn't overlap any code 4
+            aNbInvalid = numpy.concatenate( ( [ 0 ], numpy.cumsum( aCodes == 4 ) ) )
+            aIsValid = aNbInvalid[ size : ] == aNbInvalid[ : nbWindows ]
+            aWordCodes = numpy.zeros( nbWindows, dtype=numpy.int32 )
+            for i in xrange( 0, size ):
+                aWordCodes = ( aWordCodes << 2 ) | ( aCodes[ i : i + nbWindows ] & 3 )
+            aWordCodes = aWordCodes[ aIsValid ]
+            aCounts += numpy.bincount( aWordCodes, minlength=len(aCounts) )
+            nbWords += len(aWordCodes)
+        return aCounts, nbWords
+
+
+    def _countWithDictionary( self, sequence ):
+        size = self._size
+        dWord2Count = {}
+        nbWords = 0
+        for segment in self._nonATGCSymbols.split( sequence.upper() ):
+            for i in xrange( 0, len(segment) - size + 1 ):
+                word = segment[ i : i + size ]
+                dWord2Count[ word ] = dWord2Count.get( word, 0 ) + 1
+            nbWords += max( 0, len(segment) - size + 1 )
+        return dWord2Count, nbWords
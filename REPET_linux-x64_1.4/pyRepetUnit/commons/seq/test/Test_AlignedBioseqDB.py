@@ -0,0 +1,103 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import random
+from pyRepetUnit.commons.seq.Bioseq import Bioseq
+from pyRepetUnit.commons.seq.AlignedBioseqDB import AlignedBioseqDB
+from pyRepetUnit.commons.seq.AlignedBioseqDB import numpy
+
+
+# AlignedBioseqDB always computing the occurrences site by site, with dictionaries
+#
+class AlignedBioseqDBWithoutProfileMatrix( AlignedBioseqDB ):
+    
+    def isProfileMatrixAvailable( self ):
+        return False
+    
+    
+class Test_AlignedBioseqDB( unittest.TestCase ):
+    
+    # Random MSA with many ties, gaps, lower case letters, N, and ambiguous or unknown symbols
+    #
+    def _getRandomBioseqList( self ):
+        nbSites = random.randint( 1, 60 )
+        lBioseqs = []
+        for i in xrange( 0, random.randint( 2, 8 ) ):
+            lSymbols = []
+            for j in xrange( 0, nbSites ):
+                if random.random() < 0.1:
+                    lSymbols.append( random.choice( "RYMKWSBDHVUXn" ) )
+                else:
+                    lSymbols.append( random.choice( "AaCGTN--" ) )
+            lBioseqs.append( Bioseq( "seq%i" % ( i + 1 ), "".join( lSymbols ) ) )
+        return lBioseqs
+    
+    def _getAlignedBioseqDBs( self, lBioseqs ):
+        iAlignedBioseqDB = AlignedBioseqDB()
+        iAlignedBioseqDB.setData( lBioseqs )
+        iAlignedBioseqDBWithoutProfileMatrix = AlignedBioseqDBWithoutProfileMatrix()
+        iAlignedBioseqDBWithoutProfileMatrix.setData( lBioseqs )
+        return iAlignedBioseqDB, iAlignedBioseqDBWithoutProfileMatrix
+    
+    def test_getConsensus_tieOrder( self ):
+        iAlignedBioseqDB = AlignedBioseqDBWithoutProfileMatrix()
+        iAlignedBioseqDB.setData( [ Bioseq( "seq1", "TGNAA-" ), Bioseq( "seq2", "CTACN-" ), Bioseq( "seq3", "-----A" ) ] )
+        self.assertEquals( "CGAAAA", iAlignedBioseqDB.getConsensus( 1 ).sequence )
+        
+    @unittest.skipIf( numpy == None, "numpy not installed" )
+    def test_profileMatrixSameAsListOccPerSite( self ):
+        random.seed( 0 )
+        for i in xrange( 0, 300 ):
+            iAlignedBioseqDB, iAlignedBioseqDBWithoutProfileMatrix = self._getAlignedBioseqDBs( self._getRandomBioseqList() )
+            self.assertTrue( iAlignedBioseqDB.isProfileMatrixAvailable() )
+            self.assertEquals( iAlignedBioseqDBWithoutProfileMatrix.getListOccPerSite(), iAlignedBioseqDB.getListOccPerSite() )
+            for minNbNt, minPropNt in [ ( 1, 0.0 ), ( 2, 0.4 ), ( 3, 0.7 ) ]:
+                expConsensus = iAlignedBioseqDBWithoutProfileMatrix.getConsensus( minNbNt, minPropNt )
+                obsConsensus = iAlignedBioseqDB.getConsensus( minNbNt, minPropNt )
+                if expConsensus is None:
+                    self.assertTrue( obsConsensus is None )
+                else:
+                    self.assertEquals( expConsensus.sequence, obsConsensus.sequence )
+            seed = random.random()
+            random.seed( seed )
+            lExpEntropies = iAlignedBioseqDBWithoutProfileMatrix.getEntropy().values
+            random.seed( seed )
+            lObsEntropies = iAlignedBioseqDB.getEntropy().values
+            self.assertEquals( len(lExpEntropies), len(lObsEntropies) )
+            for j in xrange( 0, len(lExpEntropies) ):
+                self.assertAlmostEquals( lExpEntropies[j], lObsEntropies[j] )
+                
+                
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_AlignedBioseqDB ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
@@ -0,0 +1,164 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import os
+import shutil
+import random
+import tempfile
+from distutils.spawn import find_executable
+from pyRepetUnit.commons.seq.FastaUtils import FastaUtils
+
+
+class Test_FastaUtils( unittest.TestCase ):
+    
+    def setUp( self ):
+        self._dir = tempfile.mkdtemp()
+        self._inFileName = os.path.join( self._dir, "dummy.fa" )
+        self._prefix = os.path.join( self._dir, "dummyChunks" )
+        
+    def tearDown( self ):
+        shutil.rmtree( self._dir )
+        
+    def _writeFasta( self, lSequences, lineLength=60 ):
+        inFile = open( self._inFileName, "w" )
+        for i in xrange( 0, len(lSequences) ):
+            inFile.write( ">seq%i\n" % ( i + 1 ) )
+            for j in xrange( 0, len(lSequences[i]), lineLength ):
+                inFile.write( "%s\n" % ( lSequences[i][ j : j + lineLength ] ) )
+        inFile.close()
+        
+    def _getRandomSequence( self, length ):
+        return "".join( [ random.choice( "ACGT" ) for i in xrange( 0, length ) ] )
+    
+    def _getRandomNdenseSequence( self, length ):
+        lSeq = []
+        while len(lSeq) < length:
+            if random.random() < 0.3:
+                lSeq.extend( "N" * random.randint( 1, 25 ) )
+            else:
+                lSeq.extend( [ random.choice( "ACGTacgtn" ) for i in xrange( 0, random.randint( 1, 20 ) ) ] )
+        return "".join( lSeq )
+    
+    def _readFile( self, fileName ):
+        inFile = open( fileName, "r" )
+        content = inFile.read()
+        inFile.close()
+        return content
+    
+    def _dbChunks( self, chkLgth, chkOver, wordN, nbProcesses=1 ):
+        FastaUtils.dbChunks( self._inFileName, str(chkLgth), str(chkOver), str(wordN), self._prefix, nbProcesses=nbProcesses )
+        return self._readFile( self._prefix + ".fa" ), self._readFile( self._prefix + ".map" ), self._readFile( self._inFileName + ".Nstretch.map" )
+    
+    # Chunks, map and N stretches as written by the former dbChunks, from the output of cutterDB
+    #
+    def _cutterDBchunks( self, chkLgth, chkOver, wordN ):
+        cutFileName = self._inFileName + "_cut"
+        nStretchFileName = self._inFileName + ".Nstretch.map"
+        for fileName in [ cutFileName, nStretchFileName ]:
+            if os.path.exists( fileName ):
+                os.remove( fileName )
+        cmd = "cutterDB -l %i -o %i -w %i %s > /dev/null" % ( chkLgth, chkOver, wordN, self._inFileName )
+        self.assertEqual( 0, os.system( cmd ) )
+        lLines = self._readFile( cutFileName ).splitlines( True )
+        nbChunks = len( [ line for line in lLines if line[0] == ">" ] )
+        lFasta = []
+        lMap = []
+        for line in lLines:
+            if line[0] == ">":
+                data = line[:-1].split(" ")
+                newHeader = "chunk%s" % ( data[0][1:].zfill( len(str(nbChunks)) ) )
+                start, end = data[4].split("..")
+                lMap.append( "%s\t%s\t%s\t%s\n" % ( newHeader, data[2], start, end ) )
+                lFasta.append( ">%s\n" % ( newHeader ) )
+            else:
+                lFasta.append( line.upper() )
+        return "".join( lFasta ), "".join( lMap ), self._readFile( nStretchFileName )
+    
+    def test_dbChunks( self ):
+        seq = self._getRandomSequence( 250 )
+        self._writeFasta( [ seq ] )
+        expFasta = ">chunk1\n%s\n%s\n>chunk2\n%s\n%s\n>chunk3\n%s\n%s\n" % ( seq[0:60], seq[60:100], seq[80:140], seq[140:180], seq[160:220], seq[220:250] )
+        expMap = "chunk1\tseq1\t1\t100\nchunk2\tseq1\t81\t180\nchunk3\tseq1\t161\t250\n"
+        self.assertEqual( ( expFasta, expMap, "" ), self._dbChunks( 100, 20, 11 ) )
+        
+    def test_dbChunks_NstretchesSeparatedByWordNplusOneLetters( self ):
+        seq = self._getRandomSequence( 100 ) + "N" * 30 + self._getRandomSequence( 12 ) + "N" * 30 + self._getRandomSequence( 100 )
+        self._writeFasta( [ seq ] )
+        fasta, map, nStretches = self._dbChunks( 200, 10, 11 )
+        self.assertEqual( "chunk1\tseq1\t1\t100\nchunk2\tseq1\t173\t272\n", map )
+        self.assertEqual( "N_stretch\tseq1\t101\t172\n", nStretches )
+        
+    def test_dbChunks_NstretchesSeparatedByWordNplusTwoLetters( self ):
+        seq = self._getRandomSequence( 100 ) + "N" * 30 + self._getRandomSequence( 13 ) + "N" * 30 + self._getRandomSequence( 100 )
+        self._writeFasta( [ seq ] )
+        fasta, map, nStretches = self._dbChunks( 200, 10, 11 )
+        self.assertEqual( "chunk1\tseq1\t1\t100\nchunk2\tseq1\t174\t273\n", map )
+        self.assertEqual( "N_stretch\tseq1\t101\t130\nN_stretch\tseq1\t144\t173\n", nStretches )
+        
+    def test_dbChunks_NstretchFromShortNruns( self ):
+        seq = self._getRandomSequence( 100 ) + "NNNNNNANNNNNN" + self._getRandomSequence( 100 )
+        self._writeFasta( [ seq ] )
+        fasta, map, nStretches = self._dbChunks( 200, 10, 11 )
+        self.assertEqual( "N_stretch\tseq1\t101\t113\n", nStretches )
+        seq = self._getRandomSequence( 100 ) + "NNNNNANNNNNN" + self._getRandomSequence( 100 )
+        self._writeFasta( [ seq ] )
+        fasta, map, nStretches = self._dbChunks( 300, 10, 11 )
+        self.assertEqual( "chunk1\tseq1\t1\t212\n", map )
+        self.assertEqual( "", nStretches )
+        
+    def test_dbChunks_shortChunksAreNotWritten( self ):
+        seq = self._getRandomSequence( 13 ) + "N" * 20 + self._getRandomSequence( 43 )
+        self._writeFasta( [ seq, self._getRandomSequence( 13 ) ] )
+        fasta, map, nStretches = self._dbChunks( 40, 10, 11 )
+        self.assertEqual( "chunk1\tseq1\t34\t73\n", map )
+        self.assertEqual( "N_stretch\tseq1\t14\t33\n", nStretches )
+        
+    def test_dbChunks_sameAsCutterDB_NdenseSequences( self ):
+        if find_executable( "cutterDB" ) == None:
+            print "cutterDB not found, skip the comparison"
+            return
+        random.seed( 0 )
+        for i in xrange( 0, 50 ):
+            lSequences = [ self._getRandomNdenseSequence( random.randint( 1, 5000 ) ) for j in xrange( 0, random.randint( 1, 3 ) ) ]
+            self._writeFasta( lSequences, random.choice( [ 50, 60, 80 ] ) )
+            chkLgth = random.randint( 50, 600 )
+            chkOver = random.randint( 0, chkLgth - 1 )
+            wordN = random.choice( [ 0, 3, 11 ] )
+            exp = self._cutterDBchunks( chkLgth, chkOver, wordN )
+            self.assertEqual( exp, self._dbChunks( chkLgth, chkOver, wordN ) )
+            self.assertEqual( exp, self._dbChunks( chkLgth, chkOver, wordN, nbProcesses=2 ) )
+            
+            
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_FastaUtils ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
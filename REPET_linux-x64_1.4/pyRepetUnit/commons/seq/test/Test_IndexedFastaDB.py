@@ -0,0 +1,136 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import os
+import stat
+import shutil
+import random
+import tempfile
+from pyRepetUnit.commons.seq.IndexedFastaDB import IndexedFastaDB
+
+
+class Test_IndexedFastaDB( unittest.TestCase ):
+    
+    def setUp( self ):
+        self._dir = tempfile.mkdtemp()
+        self._inFileName = os.path.join( self._dir, "dummy.fa" )
+        self._faiFileName = self._inFileName + ".fai"
+        random.seed( 0 )
+        self._lSequences = [ self._getRandomSequence( length ) for length in [ 1000, 59, 60, 121 ] ]
+        
+    def tearDown( self ):
+        os.chmod( self._dir, stat.S_IRWXU )
+        shutil.rmtree( self._dir )
+        
+    def _getRandomSequence( self, length ):
+        return "".join( [ random.choice( "ACGT" ) for i in xrange( 0, length ) ] )
+    
+    # Write the sequences, all lines of 'lineLength' residues or, if 'lineLength' is 0, lines of random lengths
+    #
+    def _writeFasta( self, lineLength=60 ):
+        inFile = open( self._inFileName, "w" )
+        for i in xrange( 0, len(self._lSequences) ):
+            inFile.write( ">seq%i description %i\n" % ( i + 1, i ) )
+            j = 0
+            while j < len(self._lSequences[i]):
+                step = lineLength
+                if lineLength == 0:
+                    step = random.randint( 1, 80 )
+                inFile.write( "%s\n" % ( self._lSequences[i][ j : j + step ] ) )
+                j += step
+        inFile.close()
+        
+    def _getReverseComplement( self, seq ):
+        dComplements = { "A": "T", "C": "G", "G": "C", "T": "A" }
+        return "".join( [ dComplements[ c ] for c in reversed( seq ) ] )
+    
+    def _checkSequences( self, iDB ):
+        self.assertEquals( len(self._lSequences), iDB.getSize() )
+        self.assertEquals( [ "seq%i description %i" % ( i + 1, i ) for i in xrange( 0, len(self._lSequences) ) ], iDB.getHeaderList() )
+        for i in xrange( 0, len(self._lSequences) ):
+            seq = self._lSequences[i]
+            self.assertEquals( seq, iDB.fetch( "seq%i" % ( i + 1 ) ).sequence )
+            self.assertEquals( len(seq), iDB.getSeqLength( "seq%i description %i" % ( i + 1, i ) ) )
+            for j in xrange( 0, 50 ):
+                start = random.randint( 1, len(seq) )
+                end = random.randint( 1, len(seq) )
+                if start <= end:
+                    self.assertEquals( seq[ start - 1 : end ], iDB.subseq( "seq%i" % ( i + 1 ), start, end ) )
+                else:
+                    self.assertEquals( self._getReverseComplement( seq[ end - 1 : start ] ), iDB.subseq( "seq%i" % ( i + 1 ), start, end ) )
+                    
+    def test_regularLines_faiWritten( self ):
+        self._writeFasta( 60 )
+        iDB = IndexedFastaDB( self._inFileName )
+        self._checkSequences( iDB )
+        iDB.close()
+        faiFile = open( self._faiFileName, "r" )
+        lLines = faiFile.readlines()
+        faiFile.close()
+        self.assertEquals( "seq1\t1000\t20\t60\t61\n", lLines[0] )
+        self.assertEquals( "seq2\t59\t1057\t59\t60\n", lLines[1] )
+        self.assertEquals( len(self._lSequences), len(lLines) )
+        self.assertEquals( [ "dummy.fa", "dummy.fa.fai" ], sorted( os.listdir( self._dir ) ) )
+        
+    def test_staleFaiRebuilt( self ):
+        self._writeFasta( 60 )
+        faiFile = open( self._faiFileName, "w" )
+        faiFile.write( "seq1\t10\t22\t60\t61\n" )
+        faiFile.close()
+        os.utime( self._faiFileName, ( 0, 0 ) )
+        iDB = IndexedFastaDB( self._inFileName )
+        self._checkSequences( iDB )
+        iDB.close()
+        self.assertTrue( os.path.getmtime( self._faiFileName ) >= os.path.getmtime( self._inFileName ) )
+        
+    def test_irregularLines_indexInMemory( self ):
+        self._writeFasta( 0 )
+        iDB = IndexedFastaDB( self._inFileName )
+        self._checkSequences( iDB )
+        iDB.close()
+        self.assertFalse( os.path.exists( self._faiFileName ) )
+        
+    def test_readOnlyDirectory_indexInMemory( self ):
+        self._writeFasta( 60 )
+        os.chmod( self._dir, stat.S_IRUSR | stat.S_IXUSR )
+        if os.access( self._dir, os.W_OK ):
+            self.skipTest( "directory still writable (run as root)" )
+        iDB = IndexedFastaDB( self._inFileName )
+        self._checkSequences( iDB )
+        iDB.close()
+        self.assertFalse( os.path.exists( self._faiFileName ) )
+        
+        
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_IndexedFastaDB ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
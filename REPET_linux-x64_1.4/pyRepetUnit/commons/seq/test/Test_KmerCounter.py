@@ -0,0 +1,119 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import random
+from pyRepetUnit.commons.seq.KmerCounter import KmerCounter
+from pyRepetUnit.commons.seq.KmerCounter import numpy
+
+
+# KmerCounter always recording the counts in a dictionary
+#
+class KmerCounterWithDictionary( KmerCounter ):
+    
+    def __init__( self, size ):
+        KmerCounter.__init__( self, size )
+        self._isVector = False
+        
+        
+class Test_KmerCounter( unittest.TestCase ):
+    
+    def _getRandomSequence( self, length ):
+        lSymbols = []
+        for i in xrange( 0, length ):
+            if random.random() < 0.05:
+                lSymbols.append( random.choice( "NnRYMKWSBDHVX-" ) )
+            else:
+                lSymbols.append( random.choice( "ACGTacgt" ) )
+        return "".join( lSymbols )
+    
+    def _getExpCountPerWord( self, sequence, size ):
+        dWord2Count = {}
+        sequence = sequence.upper()
+        for i in xrange( 0, len(sequence) - size + 1 ):
+            word = sequence[ i : i + size ]
+            if word.strip( "ACGT" ) == "":
+                dWord2Count[ word ] = dWord2Count.get( word, 0 ) + 1
+        return dWord2Count
+    
+    def test_count_dictionary( self ):
+        iKmerCounter = KmerCounterWithDictionary( 3 )
+        counts, nbWords = iKmerCounter.count( "acgTNACGtacgRa" )
+        self.assertEqual( 7, nbWords )
+        self.assertEqual( { "ACG": 3, "CGT": 2, "GTA": 1, "TAC": 1 }, iKmerCounter.getCountPerWord( counts ) )
+        self.assertEqual( 64, len( iKmerCounter.getCountPerWord( counts, True ) ) )
+        
+    def test_count_dictionarySameAsBruteForce( self ):
+        random.seed( 0 )
+        for i in xrange( 0, 50 ):
+            sequence = self._getRandomSequence( random.randint( 0, 300 ) )
+            size = random.randint( 1, 5 )
+            iKmerCounter = KmerCounterWithDictionary( size )
+            counts, nbWords = iKmerCounter.count( sequence )
+            dExp = self._getExpCountPerWord( sequence, size )
+            self.assertEqual( dExp, iKmerCounter.getCountPerWord( counts ) )
+            self.assertEqual( sum( dExp.values() ), nbWords )
+            
+    @unittest.skipIf( numpy == None, "numpy not installed" )
+    def test_count_vectorSameAsDictionary( self ):
+        random.seed( 0 )
+        for i in xrange( 0, 100 ):
+            size = random.randint( 1, 6 )
+            iKmerCounter = KmerCounter( size )
+            self.assertTrue( iKmerCounter.isCountVector() )
+            iKmerCounter._blockSize = random.randint( 1, 50 )
+            iKmerCounterWithDictionary = KmerCounterWithDictionary( size )
+            lSequences = [ self._getRandomSequence( random.randint( 0, 500 ) ) for j in xrange( 0, 2 ) ]
+            refSequence = self._getRandomSequence( 2000 )
+            
+            counts, nbWords = iKmerCounter.count( lSequences[0] )
+            expCounts, expNbWords = iKmerCounterWithDictionary.count( lSequences[0] )
+            otherCounts, otherNbWords = iKmerCounter.count( lSequences[1] )
+            expOtherCounts, expOtherNbWords = iKmerCounterWithDictionary.count( lSequences[1] )
+            counts = iKmerCounter.addCounts( counts, otherCounts )
+            expCounts = iKmerCounterWithDictionary.addCounts( expCounts, expOtherCounts )
+            nbWords += otherNbWords
+            expNbWords += expOtherNbWords
+            self.assertEqual( expNbWords, nbWords )
+            self.assertEqual( iKmerCounterWithDictionary.getCountPerWord( expCounts, True ), iKmerCounter.getCountPerWord( counts, True ) )
+            self.assertAlmostEqual( iKmerCounterWithDictionary.getEntropy( expCounts, expNbWords ), iKmerCounter.getEntropy( counts, nbWords ) )
+            
+            refCounts, refNbWords = iKmerCounter.count( refSequence )
+            expRefCounts, expRefNbWords = iKmerCounterWithDictionary.count( refSequence )
+            if nbWords > 0 and refNbWords > 0:
+                self.assertAlmostEqual( iKmerCounterWithDictionary.getRelativeEntropy( expCounts, expNbWords, expRefCounts, expRefNbWords ),
+                                        iKmerCounter.getRelativeEntropy( counts, nbWords, refCounts, refNbWords ) )
+                
+                
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_KmerCounter ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
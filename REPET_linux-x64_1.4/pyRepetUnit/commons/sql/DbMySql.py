@@ -34,10 +34,27 @@ import sys
 import time
 import ConfigParser
 import MySQLdb
+import MySQLdb.cursors
 from pyRepetUnit.commons.seq.Bioseq import Bioseq
 from pyRepetUnit.commons.sql.RepetDB import RepetDB
 
 
+## Idle MySQL connections, per (pid, user, host, port, dbname)
+#
+# @note the pid is part of the key so that a forked child never reuses the connections of its parent
+#   (they are left untouched, closing them in the child would close the socket of the parent)
+#
+_dConnectionPool = {}
+
+## MySQL client errors meaning the connection was dropped (server gone away, lost connection)
+#
+_lConnectionLostErrors = [ 2006, 2013 ]
+
+## SQL statements which can be replayed safely after the connection was lost during the query
+#
+_lReadOnlyStatements = [ "SELECT", "SHOW", "DESCRIBE", "DESC", "EXPLAIN", "USE" ]
+
+
 ## Handle connections to MySQL tables formatted for REPET
 #
 class DbMySql( RepetDB ):
@@ -50,13 +67,16 @@ class DbMySql( RepetDB ):
     # @param dbname string database name
     # @param port integer database port
     # @param cfgFileName string configuration file name
+    # @param usePool boolean reuse an idle connection of the process and give it back on close (default = True)
     #
     # @note when a parameter is left blank, the constructor is able
     #   to set attribute values from environment variables: REPET_HOST,
     #   REPET_USER, REPET_PW, REPET_DB, REPET_PORT
+    # @note the pool can be disabled process-wide with REPET_DB_POOL=0
     #
-    def __init__(self, user = "", host = "", passwd = "", dbname = "", port = 3306, cfgFileName = ""):
+    def __init__(self, user = "", host = "", passwd = "", dbname = "", port = 3306, cfgFileName = "", usePool = True):
         self.port = int(port)
+        self._usePool = usePool and os.environ.get("REPET_DB_POOL") != "0"
 
         if cfgFileName != "":
             self.setAttributesFromConfigFile(cfgFileName)
@@ -80,6 +100,7 @@ class DbMySql( RepetDB ):
         if os.environ.get("REPET_PORT") != None:
             self.port = int( os.environ.get("REPET_PORT") )
             
+        self.db = None
         maxNbTry = 10
         for i in xrange(1,maxNbTry+1):
             if not self.open():
@@ -113,6 +134,8 @@ class DbMySql( RepetDB ):
     # @param verbose integer (default = 0)
     #
     def open( self, verbose = 0 ):
+        if self._usePool and self._getConnectionFromPool():
+            return True
         try:
             if int(MySQLdb.get_client_info().split(".")[0]) >= 5:
                 self.db = MySQLdb.connect( user = self.user, host = self.host,\
@@ -131,19 +154,79 @@ class DbMySql( RepetDB ):
         return True
     
     
+    ## Open a new connection, e.g. after the server closed the previous one (time out)
+    #
+    def reconnect( self ):
+        usePool = self._usePool
+        self._usePool = False
+        try:
+            if not self.open():
+                print "ERROR: failed to reconnect to the MySQL database"
+                sys.exit(1)
+        finally:
+            self._usePool = usePool
+        self.cursor = self.db.cursor()
+        RepetDB.execute(self, "use %s" % (self.dbname))
+        
+        
     ## Execute a SQL query
     #
     # @param qry string SQL query to execute
     # @param params parameters of SQL query 
     #
+    # @note the query is replayed once on a new connection if the server dropped the current one before the query
+    #   (error 2006), or during a read-only query (error 2013): a modification may have been applied already
+    #
     def execute( self, qry, params=None ):
-        RepetDB.execute(self, qry, params)
+        try:
+            RepetDB.execute(self, qry, params)
+        except MySQLdb.OperationalError, e:
+            if e.args[0] not in _lConnectionLostErrors:
+                raise
+            self.reconnect()
+            if e.args[0] != 2006 and not self._isReadOnly( qry ):
+                raise
+            RepetDB.execute(self, qry, params)
+            
+            
+    def _isReadOnly( self, qry ):
+        lWords = qry.split( None, 1 )
+        return lWords != [] and lWords[0].upper() in _lReadOnlyStatements
         
         
     ## Close the connection
     #
+    # @note with the pool, the connection is kept open for the next DbMySql instance of the process
+    # @note closing an instance twice has no effect
+    #
     def close( self ):
-        self.db.close()
+        if self.db == None:
+            return
+        if self._usePool:
+            self.cursor.close()
+            _dConnectionPool.setdefault( self._getPoolKey(), [] ).append( self.db )
+        else:
+            self.db.close()
+        self.db = None
+        self.cursor = None
+        
+        
+    def _getPoolKey( self ):
+        return ( os.getpid(), self.user, self.host, self.port, self.dbname )
+    
+    
+    def _getConnectionFromPool( self ):
+        key = self._getPoolKey()
+        lConnections = _dConnectionPool.get( key, [] )
+        while lConnections != []:
+            db = lConnections.pop()
+            try:
+                db.ping()
+            except MySQLdb.Error:
+                continue
+            self.db = db
+            return True
+        return False
         
         
     ## Retrieve the results of a SQL query
@@ -767,10 +850,11 @@ class DbMySql( RepetDB ):
     #
     # @param SQLCmd string is a SQL command
     # @param methodGetInstance2Adapt a getter method name. With this method you choose the type of intances contained in lObjs. See example in Test_DbMySql.py.
+    # @param params parameters of the SQL command (default = None)
     # @return lObjs list of instances
     #
-    def getObjectListWithSQLCmd( self, SQLCmd,  methodGetInstance2Adapt):
-        self.execute( SQLCmd )
+    def getObjectListWithSQLCmd( self, SQLCmd,  methodGetInstance2Adapt, params=None ):
+        self.execute( SQLCmd, params )
         res = self.fetchall()
         lObjs = []
         for t in res:
@@ -780,13 +864,40 @@ class DbMySql( RepetDB ):
         return lObjs
     
     
+    ## Give a generator of instances according to the SQL command, rows being streamed from the server
+    #
+    # @param SQLCmd string is a SQL command
+    # @param methodGetInstance2Adapt a getter method name, as in getObjectListWithSQLCmd()
+    # @param params parameters of the SQL command (default = None)
+    # @param batchSize integer number of rows fetched per round trip (default = 10000)
+    # @return generator of instances
+    #
+    # @warning the connection can't run other queries until the generator is exhausted or closed
+    #
+    def iterObjectsWithSQLCmd( self, SQLCmd, methodGetInstance2Adapt, params=None, batchSize=10000 ):
+        cursor = self.db.cursor( MySQLdb.cursors.SSCursor )
+        try:
+            cursor.execute( SQLCmd, params )
+            while True:
+                res = cursor.fetchmany( batchSize )
+                if len(res) == 0:
+                    break
+                for t in res:
+                    iObj = methodGetInstance2Adapt()
+                    iObj.setFromTuple( t )
+                    yield iObj
+        finally:
+            cursor.close()
+    
+    
     ## Give a list of integer according to the SQL command
     #
     # @param sqlCmd string is a SQL command
+    # @param params parameters of the SQL command (default = None)
     # @return lInteger integer list
     #
-    def getIntegerListWithSQLCmd( self, sqlCmd ):
-        self.execute(sqlCmd)
+    def getIntegerListWithSQLCmd( self, sqlCmd, params=None ):
+        self.execute(sqlCmd, params)
         res = self.fetchall()
         lInteger = []
         for t in res:
@@ -40,6 +40,14 @@ class ITablePathAdaptator (object):
     def getListOfAllPaths( self ):
         pass
     
+    ## Give the data contained in the table as a generator of Path instances, in constant memory
+    #
+    # @param batchSize integer number of rows fetched per round trip
+    # @return generator of path instances
+    #
+    def iterAllPaths( self, batchSize = 10000 ):
+        pass
+    
     ## Give a list of Path instances having the same identifier
     #
     # @param id integer identifier number
@@ -283,6 +291,14 @@ class ITablePathAdaptator (object):
     def getPathListSortedByQueryCoord( self ):
         pass
     
+    ## Give a generator of Path instances sorted by query coordinates, in constant memory
+    #
+    # @param batchSize integer number of rows fetched per round trip
+    # @return generator of Path instances
+    #
+    def iterPathsSortedByQueryCoord( self, batchSize = 10000 ):
+        pass
+    
     ## Give a a list of Path instances sorted by query coordinates for a given query
     #
     # @param queryName string query name
@@ -35,6 +35,8 @@ import datetime
 import sys
 from pyRepetUnit.commons.sql.Job import Job 
 from pyRepetUnit.commons.sql.DbMySql import DbMySql
+from pyRepetUnit.commons.launcher.LocalJobExecutor import getLocalJobExecutor
+from pyRepetUnit.commons.launcher.JobStatusDirectory import JobStatusDirectory
 
 ## Methods for Job persistence 
 #
@@ -165,6 +167,23 @@ class RepetJob( DbMySql ):
         return int( res[0][0] )
         
         
+    ## Get the number of jobs belonging to the desired groupid for each status, in one query.
+    #
+    # @param tablename string table name to record the jobs   
+    # @param groupid string a group identifier to record related job series 
+    # @return dict whose keys are status and values are nb of jobs
+    #
+    def getCountPerStatus( self, tablename, groupid ):
+        qry = "SELECT status,count(jobname) FROM %s" % ( tablename )
+        qry += " WHERE groupid='%s'" % ( groupid )
+        qry += " GROUP BY status;"
+        self.execute( qry )
+        dStatus2Count = {}
+        for status, count in self.fetchall():
+            dStatus2Count[ status ] = int( count )
+        return dStatus2Count
+    
+    
     ## Clean all job from a job group
     #
     # @param tablename table name to record the jobs
@@ -220,39 +239,91 @@ class RepetJob( DbMySql ):
         return isJobInQstat
     
     
+    ## Check if a job is still handled by the queue (SGE or local executor)
+    #
+    # @param jobid string job identifier
+    # @param jobname string job name
+    #
+    def isJobStillHandled( self, jobid, jobname ):
+        if os.environ.get( "REPET_QUEUE" ) == "local":
+            return getLocalJobExecutor().isJobHandled( jobid, jobname )
+        return self.isJobStillHandledBySge( jobid, jobname )
+    
+    
+    ## Set in error the jobs of a group which are not finished but not handled by the local executor anymore
+    #  (job killed before updating its status, or submitted by another process)
+    #
+    # @param tableName string table name to record the jobs
+    # @param groupid string a group identifier to record related job series
+    #
+    def setErrorStatusOfLostLocalJobs( self, tableName, groupid ):
+        qry = "SELECT jobid,jobname,queue FROM %s" % ( tableName )
+        qry += " WHERE groupid='%s'" % ( groupid )
+        qry += " AND status IN ('waiting','running');"
+        self.execute( qry )
+        for jobid, jobname, queue in getLocalJobExecutor().getUnhandledJobList( self.fetchall() ):
+            lostJob = Job( tablename=tableName, jobname=jobname, groupid=groupid, queue=queue, node=os.uname()[1] )
+            self.changeJobStatus( lostJob, "error", "db" )
+                
+                
     ## Wait job finished status from a job group.
     #  Job are re-launched if error (max. 3 times)
+    #  The table is checked more and more rarely while nothing changes (from 1 second to checkInterval).
+    #  The wait is interrupted as soon as a job ends with the local executor, or as soon as a job notifies
+    #  a status change in statusDir, in which case the table is checked at least every minute.
     #
     # @param tableName string table name to record the jobs
     # @param groupid string a group identifier to record related job series
-    # @param checkInterval integer time laps in seconds between two checks (default = 5)
+    # @param checkInterval integer max time laps in seconds between two checks (default = 5)
     # @param maxRelaunch integer max nb of times a job in error is relaunch before exiting (default = 3)
     # @param exitIfTooManyErrors boolean exit if a job is still in error above maxRelaunch (default = True)
     # @param timeOutPerJob integer max nb of seconds after which one tests if a job is still in SGE or not (default = 60*60=1h)
+    # @param statusDir string directory in which the jobs notify their status changes (see JobStatusDirectory, default = none)
     #
-    def waitJobGroup( self, tableName, groupid, checkInterval=5, maxRelaunch=3, exitIfTooManyErrors=True, timeOutPerJob=60*60 ):
+    def waitJobGroup( self, tableName, groupid, checkInterval=5, maxRelaunch=3, exitIfTooManyErrors=True, timeOutPerJob=60*60, statusDir="" ):
         dJob2Err = {}
         
         # retrieve the total number of jobs belonging to the desired groupid
-        qry = "SELECT count(jobname) FROM %s WHERE groupid='%s';" % ( tableName, groupid )
-        self.execute( qry )
-        totalNbJobs = int( self.fetchall()[0][0] )
+        dStatus2Count = self.getCountPerStatus( tableName, groupid )
+        totalNbJobs = sum( dStatus2Count.values() )
+        
+        iStatusDir = None
+        if statusDir != "" and os.path.isdir( statusDir ):
+            iStatusDir = JobStatusDirectory( statusDir )
+            iStatusDir.hasChanged()
+        minCheckInterval = min( 1, checkInterval )
+        currentCheckInterval = minCheckInterval
         
         nbTimeOuts = 0
         
         while True:
-            time.sleep( checkInterval )
-            # retrieve the finished jobs and stop if all jobs are finished
-            nbFinishedJobs = self.getCountStatus( tableName, groupid, "finished" )
-            if nbFinishedJobs == totalNbJobs:
+            if os.environ.get( "REPET_QUEUE" ) == "local":
+                getLocalJobExecutor().waitForCompletion( currentCheckInterval )
+                self.setErrorStatusOfLostLocalJobs( tableName, groupid )
+            elif iStatusDir != None:
+                iStatusDir.waitForChange( max( currentCheckInterval, 60 ) )
+            else:
+                time.sleep( currentCheckInterval )
+                
+            # retrieve the nb of jobs per status and stop if all jobs are finished
+            dPreviousStatus2Count = dStatus2Count
+            dStatus2Count = self.getCountPerStatus( tableName, groupid )
+            if dStatus2Count.get( "finished", 0 ) == totalNbJobs:
                 break
-
+            if dStatus2Count == dPreviousStatus2Count:
+                currentCheckInterval = min( 2 * currentCheckInterval, checkInterval )
+            else:
+                currentCheckInterval = minCheckInterval
+                
             # retrieve the jobs in error and relaunch them if they are in error (max. 3 times)
-            qry = "SELECT * FROM %s" % ( tableName )
-            qry += " WHERE groupid='%s'" % ( groupid )
-            qry += " AND status ='error';"
-            self.execute( qry )
-            lJobsInError = self.fetchall()
+            if dStatus2Count.get( "error", 0 ) == 0:
+                lJobsInError = []
+            else:
+                qry = "SELECT * FROM %s" % ( tableName )
+                qry += " WHERE groupid='%s'" % ( groupid )
+                qry += " AND status ='error';"
+                self.execute( qry )
+                lJobsInError = self.fetchall()
 #            if lJobsInError != "":   # 0:jobid, 1:groupid, 2:cmd, 3:launcher, 4:queue, 5:status, 6:time, 7:node      
 #                raise Exception
             for job in lJobsInError:
@@ -275,10 +346,10 @@ class RepetJob( DbMySql ):
                     cmd = "job '%s' in permanent error (>%i)" % ( job[1], maxRelaunch )
                     cmd += "\ngroupid = %s" % ( groupid )
                     cmd += "\nnb of jobs = %i" % ( totalNbJobs )
-                    cmd += "\nnb of finished jobs = %i" % ( self.getCountStatus( tableName, groupid, "finished" ) )
-                    cmd += "\nnb of waiting jobs = %i" % ( self.getCountStatus( tableName, groupid, "waiting" ) )
-                    cmd += "\nnb of running jobs = %i" % ( self.getCountStatus( tableName, groupid, "running" ) )
-                    cmd += "\nnb of jobs in error = %i" % ( self.getCountStatus( tableName, groupid, "error" ) )
+                    cmd += "\nnb of finished jobs = %i" % ( dStatus2Count.get( "finished", 0 ) )
+                    cmd += "\nnb of waiting jobs = %i" % ( dStatus2Count.get( "waiting", 0 ) )
+                    cmd += "\nnb of running jobs = %i" % ( dStatus2Count.get( "running", 0 ) )
+                    cmd += "\nnb of jobs in error = %i" % ( dStatus2Count.get( "error", 0 ) )
                     print cmd; sys.stdout.flush()
                     if exitIfTooManyErrors:
                         self.cleanJobGroup( tableName, groupid )
@@ -287,6 +358,8 @@ class RepetJob( DbMySql ):
                         checkInterval = 60
                         
             # retrieve the date and time at which the oldest, still-running job was submitted
+            if dStatus2Count.get( "running", 0 ) == 0:
+                continue
             sql = "SELECT jobid,jobname,time FROM %s WHERE groupid='%s' AND status='running' ORDER BY time DESC LIMIT 1" % ( tableName, groupid )
             self.execute( sql )
             res = self.fetchall()
@@ -304,13 +377,13 @@ class RepetJob( DbMySql ):
                 if delta.seconds >= (nbTimeOuts+1) * timeOutPerJob:
                     nbTimeOuts += 1
                     # Job with 'running' status should be in qstat. Because status in DB is set at 'running' by the job launched.
-                    if not self.isJobStillHandledBySge( jobid, jobname ):
+                    if not self.isJobStillHandled( jobid, jobname ):
                         # But if not, let time for the status update (in DB), if the job finished between the query execution and now.
                         time.sleep( 5 )
                     # If no update at 'finished', exit
                     #TODO: check status in DB
-                    if not self.isJobStillHandledBySge( jobid, jobname ):
-                        msg = "ERROR: job '%s', supposedly still running, is not handled by SGE anymore" % ( jobid )
+                    if not self.isJobStillHandled( jobid, jobname ):
+                        msg = "ERROR: job '%s', supposedly still running, is not handled by %s anymore" % ( jobid, os.environ.get( "REPET_QUEUE" ) )
                         msg += "\nit was launched the %s (> %.2f hours ago)" % ( dateTimeOldestJob, timeOutPerJob/3600.0 )
                         msg += "\nthis problem can be due to:"
                         msg += "\n* memory shortage, in that case, decrease the size of your jobs;"
@@ -330,8 +403,9 @@ class RepetJob( DbMySql ):
     # @param verbose integer (default = 0)
     #               
     def submitJob( self, job, verbose=0, maxNbWaitingJobs=10000, checkInterval=30 ):
-        if os.environ.get( "REPET_QUEUE" ) not in "SGE":
-            print "ERROR: environment variable REPET_QUEUE should be 'SGE'"
+        isLocal = os.environ.get( "REPET_QUEUE" ) == "local"
+        if not isLocal and os.environ.get( "REPET_QUEUE" ) not in "SGE":
+            print "ERROR: environment variable REPET_QUEUE should be 'SGE' or 'local'"
             return 1
         
         if not self.doesTableExist( job.tablename ):
@@ -350,10 +424,22 @@ class RepetJob( DbMySql ):
             sys.exit(1)
             
         while self.getCountStatus( job.tablename, job.groupid, "waiting" ) > maxNbWaitingJobs:
-            time.sleep( checkInterval )
+            if isLocal:
+                getLocalJobExecutor().waitForCompletion( checkInterval )
+            else:
+                time.sleep( checkInterval )
             
         self.recordJob( job )
         
+        if isLocal:
+            jobid = getLocalJobExecutor().submit( job.jobname, job.launcher )
+            if verbose > 0:
+                print "job '%i %s' submitted" % ( jobid, job.jobname )
+                sys.stdout.flush()
+            job.jobid = jobid
+            self.setJobIdFromSge( job, jobid )
+            return 0
+        
         cmd = "echo '%s' | " % ( job.launcher )
         prg = "qsub"
         cmd += prg
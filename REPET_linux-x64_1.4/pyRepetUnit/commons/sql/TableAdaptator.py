@@ -87,10 +87,24 @@ class TableAdaptator( object ):
     #
     # @param l a list of object instances
     # @param delayed boolean
+    # @param batchSize integer number of instances sent per multi-row INSERT (default = 1, one INSERT per instance)
     #
-    def insertList(self, l, delayed = False):
-        for i in l:
-            self.insert(i, delayed)
+    def insertList(self, l, delayed = False, batchSize = 1):
+        if batchSize <= 1:
+            for i in l:
+                self.insert(i, delayed)
+            return
+        lValues = []
+        for obj in l:
+            if obj.isEmpty():
+                continue
+            self._escapeAntislash(obj)
+            lValues.append(self._genSqlValuesForInsert(obj))
+            if len(lValues) == batchSize:
+                self._iDb.execute(self._genSqlCmdForMultipleInsert(self._table, lValues, delayed))
+                lValues = []
+        if lValues != []:
+            self._iDb.execute(self._genSqlCmdForMultipleInsert(self._table, lValues, delayed))
             
     ## Give the data contained in the table as a list of coord object instances
     #
@@ -118,6 +132,30 @@ class TableAdaptator( object ):
         sqlCmd = sqlCmd % attr2Insert
         return sqlCmd
    
+    ## Generate the parenthesized values of an instance, for a multi-row insert
+    #
+    # @param obj Map, Set, Match or Path instance
+    # @return string values as '(...)'
+    #
+    def _genSqlValuesForInsert(self, obj):
+        type2Insert, attr2Insert = self._getTypeAndAttr2Insert(obj)
+        values = "(%s)" % (",".join(type2Insert))
+        return values % attr2Insert
+    
+    ## Generate sql command inserting several rows at once
+    #
+    # @param table string table name
+    # @param lValues list of parenthesized values
+    # @param delayed boolean
+    # @return sqlCmd string generated sql command
+    #
+    def _genSqlCmdForMultipleInsert(self, table, lValues, delayed):
+        sqlCmd = 'INSERT '
+        if delayed :
+            sqlCmd += ' DELAYED '
+        sqlCmd += 'INTO %s VALUES %s' % (table, ",".join(lValues))
+        return sqlCmd
+    
     def _getTypeAndAttr2Insert(self, obj):
         pass
     
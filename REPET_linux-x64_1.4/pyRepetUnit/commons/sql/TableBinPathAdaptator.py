@@ -29,7 +29,11 @@
 # knowledge of the CeCILL license and that you accept its terms.
 
 import os
+import time
+import math
 from pyRepetUnit.commons.coord.Range import getIdx
+from pyRepetUnit.commons.coord.Path import Path
+from pyRepetUnit.commons.coord.NCList import NCList
 from pyRepetUnit.commons.sql.TablePathAdaptator import TablePathAdaptator
 from pyRepetUnit.commons.coord.PathUtils import PathUtils
 
@@ -42,15 +46,23 @@ class TableBinPathAdaptator(TablePathAdaptator):
     #
     # @param db db instance
     # @param tableName string table name (default = "")
+    # @param useBinTable boolean maintain and query the bin table (default = True), if False the coordinate queries use the in-memory index
     #
-    def __init__(self, db, tableName = ""):
+    def __init__(self, db, tableName = "", useBinTable = True):
         TablePathAdaptator.__init__(self, db, tableName)
         self._table_idx = "%s_idx" % (self._table)
+        self._useBinTable = useBinTable
+        self._dId2Rows = None
+        self._dContig2Ids = {}
+        self._dContig2Index = {}
+        self._dContig2Pending = {}
+        self._dContig2Stale = {}
     
     #TODO: move into DbMySql ? path2path_range() migration ? range table is empty, is it normal ?
     ## Create a bin table for fast access
     #
     # @param verbose integer verbosity (default = 0)
+    # @note bin indexes are computed by MySQL in a single INSERT ... SELECT, secondary indexes are created after the load
     #    
     def createBinPathTable(self, verbose = 0):
         if not self._iDb.doesTableExist(self._table):
@@ -63,6 +75,20 @@ class TableBinPathAdaptator(TablePathAdaptator):
         sql_cmd = "CREATE TABLE %s ( path int unsigned, idx int unsigned, contig varchar(255), min int, max int, strand int unsigned)"% (self._table_idx)
         self._iDb.execute(sql_cmd)
 
+        rangeTable = "%s_range" % (self._table)
+        self._iDb.dropTable(rangeTable)
+        self._iDb.path2path_range(self._table)
+        table = TablePathAdaptator(self._iDb, rangeTable)
+        if not table.isEmpty():
+            startTime = time.time()
+            sql_cmd = self._genSqlCmdForBinPathTable(rangeTable)
+            self._iDb.execute(sql_cmd)
+            self._iDb.updateInfoTable(self._table_idx, self._table + " bin indexes")
+            if verbose > 0:
+                nbRows = self._iDb.getSize(self._table_idx)
+                elapsed = max(time.time() - startTime, 1e-6)
+                print "%i rows loaded in %s (%.0f rows/s)" % (nbRows, self._table_idx, nbRows / elapsed)
+
         sql_cmd = "CREATE INDEX id ON %s ( path );"% (self._table_idx)
         self._iDb.execute(sql_cmd)
         sql_cmd = "CREATE INDEX ibin ON %s ( idx );"% (self._table_idx)
@@ -75,29 +101,6 @@ class TableBinPathAdaptator(TablePathAdaptator):
         self._iDb.execute(sql_cmd)
         sql_cmd = "CREATE INDEX istrand ON %s ( strand );"% (self._table_idx)
         self._iDb.execute(sql_cmd)
-
-        rangeTable = "%s_range" % (self._table)
-        self._iDb.dropTable(rangeTable)
-        self._iDb.path2path_range(self._table)
-        table = TablePathAdaptator(self._iDb, rangeTable)
-        if not table.isEmpty():
-            tmp_file = "%s.tmp%s" % (self._table, str(os.getpid()))
-            out = open(tmp_file, "w")
-            contigs = table.getQueryList()
-            for c in contigs:
-                lpath = table.getPathListFromQuery(c)
-                for i in lpath:
-                    idx = i.range_query.findIdx()
-                    max = i.range_query.getMax()
-                    min = i.range_query.getMin()
-                    strand = i.range_query.isOnDirectStrand()
-                    out.write("%d\t%d\t%s\t%d\t%d\t%d\n"%(i.id, idx, i.range_query.seqname, min, max, strand))
-            out.close()
-            sql_cmd="LOAD DATA LOCAL INFILE '%s' INTO TABLE %s FIELDS ESCAPED BY '' "%\
-                     (tmp_file, self._table_idx)
-            self._iDb.execute(sql_cmd)
-            self._iDb.updateInfoTable(self._table_idx, self._table + " bin indexes")
-            os.remove(tmp_file)
             
     ## Insert a path instance
     #
@@ -105,7 +108,12 @@ class TableBinPathAdaptator(TablePathAdaptator):
     # @param delayed boolean indicating if the insert must be delayed (default = false) 
     #        
     def insert( self, path, delayed = False ):
+        row = self._getTypeAndAttr2Insert(path)[1]
         TablePathAdaptator.insert(self, path, delayed)
+        if self.isIndexInMemory():
+            self._addRowInMemory(row)
+        if not self._useBinTable:
+            return
         self._escapeAntislash(path)
         idx = path.range_query.findIdx()
         max = path.range_query.getMax()
@@ -132,6 +140,35 @@ class TableBinPathAdaptator(TablePathAdaptator):
             
         self._iDb.execute(sql_cmd)
     
+    ## Insert a list of path instances, in the path table and in the bin table
+    #
+    # @param lPaths list of path instances
+    # @param delayed boolean indicating if the insert must be delayed (default = false)
+    # @param batchSize integer number of paths sent per multi-row INSERT (default = 1, one INSERT per path)
+    #
+    def insertList( self, lPaths, delayed = False, batchSize = 1 ):
+        if batchSize <= 1:
+            for iPath in lPaths:
+                self.insert(iPath, delayed)
+            return
+        lValues = []
+        lIdxValues = []
+        for iPath in lPaths:
+            if iPath.isEmpty():
+                continue
+            if self.isIndexInMemory():
+                self._addRowInMemory(self._getTypeAndAttr2Insert(iPath)[1])
+            self._escapeAntislash(iPath)
+            lValues.append(self._genSqlValuesForInsert(iPath))
+            if self._useBinTable:
+                lIdxValues.append(self._genSqlValuesForIdxInsert(iPath))
+            if len(lValues) == batchSize:
+                self._insertValuesInPathAndIdxTables(lValues, lIdxValues, delayed)
+                lValues = []
+                lIdxValues = []
+        if lValues != []:
+            self._insertValuesInPathAndIdxTables(lValues, lIdxValues, delayed)
+    
     ## Return a path instances list included in a given region using the bin scheme
     #
     # @param contig string contig name
@@ -181,10 +218,14 @@ class TableBinPathAdaptator(TablePathAdaptator):
     # @return lpath a path instances list
     #    
     def getChainListOverlappingQueryCoord(self, contig, start, end):
+        if not self._useBinTable and not self.isIndexInMemory():
+            self.loadIndexInMemory()
+        if self.isIndexInMemory():
+            return self._getChainListOverlappingQueryCoordFromMemory(contig, start, end)
         min_coord = min(start, end)
         max_coord = max(start, end)
-        sql_cmd = 'select distinct path from %s where contig="%s" and ('\
-                 % (self._table + "_idx", contig)
+        sql_cmd = 'select p.* from %s as p join ( select distinct path from %s where contig=%%s and ('\
+                 % (self._table, self._table_idx)
                  
         for bin_lvl in xrange(6, 2, -1):
             if getIdx(start,bin_lvl) == getIdx(end, bin_lvl):
@@ -197,15 +238,9 @@ class TableBinPathAdaptator(TablePathAdaptator):
             if bin_lvl > 3:
                 sql_cmd += " or "
                 
-        sql_cmd += ") and min<=%d and max>=%d;" % (max_coord, min_coord)
+        sql_cmd += ") and min<=%d and max>=%d ) as c on p.path=c.path;" % (max_coord, min_coord)
 
-        
-        self._iDb.execute(sql_cmd)
-        res = self._iDb.fetchall()
-        lnum = []
-        for i in res:
-            lnum.append( int(i[0]) )
-        lpath = self.getPathListFromIdList(lnum)
+        lpath = self._iDb.getObjectListWithSQLCmd(sql_cmd, self._getInstanceToAdapt, (contig,))
         return lpath
 
     ## Delete path corresponding to a given identifier number
@@ -214,8 +249,11 @@ class TableBinPathAdaptator(TablePathAdaptator):
     #
     def deleteFromId(self, num):
         TablePathAdaptator.deleteFromId(self, num)
-        sqlCmd='delete from %s where path=%d;' % (self._table_idx, num)
-        self._iDb.execute(sqlCmd)
+        if self._useBinTable:
+            sqlCmd='delete from %s where path=%d;' % (self._table_idx, num)
+            self._iDb.execute(sqlCmd)
+        if self.isIndexInMemory():
+            self._removeIdInMemory(num)
     
     ## Delete path corresponding to a given list of identifier number
     #
@@ -225,11 +263,15 @@ class TableBinPathAdaptator(TablePathAdaptator):
         if lNum == []:
             return
         TablePathAdaptator.deleteFromIdList(self, lNum)
-        sqlCmd = 'delete from %s where path=%d' % (self._table_idx, lNum[0])
-        for i in lNum[1:]:
-            sqlCmd += " or path=%d" % (i)
-        sqlCmd += ";"
-        self._iDb.execute(sqlCmd)
+        if self._useBinTable:
+            sqlCmd = 'delete from %s where path=%d' % (self._table_idx, lNum[0])
+            for i in lNum[1:]:
+                sqlCmd += " or path=%d" % (i)
+            sqlCmd += ";"
+            self._iDb.execute(sqlCmd)
+        if self.isIndexInMemory():
+            for num in lNum:
+                self._removeIdInMemory(num)
              
     ##  Join two path by changing id number of id1 and id2 path to the least of id1 and id2
     #
@@ -246,8 +288,12 @@ class TableBinPathAdaptator(TablePathAdaptator):
         else:
             newId = id2
             oldId = id1
-        sqlCmd = 'UPDATE %s SET path=%d WHERE path=%d' % (self._table_idx, newId, oldId)
-        self._iDb.execute(sqlCmd)
+        if self._useBinTable:
+            sqlCmd = 'UPDATE %s SET path=%d WHERE path=%d' % (self._table_idx, newId, oldId)
+            self._iDb.execute(sqlCmd)
+        if self.isIndexInMemory():
+            for row in self._removeIdInMemory(oldId):
+                self._addRowInMemory((newId,) + tuple(row[1:]))
         return newId
     
     ## Get a new id number
@@ -255,6 +301,8 @@ class TableBinPathAdaptator(TablePathAdaptator):
     # @return newId integer max Id in path table + 1
     #
     def getNewId(self):
+        if not self._useBinTable:
+            return TablePathAdaptator.getNewId(self)
         sqlCmd = 'select max(path) from %s;' % (self._table_idx)
         self._iDb.execute(sqlCmd)
         maxId = self._iDb.fetchall()[0][0]
@@ -292,6 +340,8 @@ class TableBinPathAdaptator(TablePathAdaptator):
     # @return lId integer list
     #
     def getIdList(self):
+        if not self._useBinTable:
+            return TablePathAdaptator.getIdList(self)
         sqlCmd = "SELECT DISTINCT path from %s;" % (self._table_idx)
         lId = self._iDb.getIntegerListWithSQLCmd( sqlCmd )
         return lId
@@ -305,6 +355,137 @@ class TableBinPathAdaptator(TablePathAdaptator):
         return lDistinctQueryNames
     
     def _getDistinctTypeNamesList( self, type ):
+        if not self._useBinTable:
+            return TablePathAdaptator._getDistinctTypeNamesList(self, type)
         sqlCmd = "SELECT DISTINCT contig FROM %s" % ( self._table_idx )
         lDistinctTypeNames = self._iDb.getStringListWithSQLCmd(sqlCmd)
-        return lDistinctTypeNames
\ No newline at end of file
+        return lDistinctTypeNames
+    
+    ## Load the path table in memory and answer coordinate queries with one interval index per contig instead of the bin table
+    #
+    # @param verbose integer verbosity (default = 0)
+    # @note the indexes are built lazily; insert, delete and join don't rebuild them but record the changed intervals
+    # in a pending list scanned by the queries, merged into the index when it exceeds 8 times the square root of the index size
+    #
+    def loadIndexInMemory(self, verbose = 0):
+        self._dId2Rows = {}
+        self._dContig2Ids = {}
+        self._dContig2Index = {}
+        self._dContig2Pending = {}
+        self._dContig2Stale = {}
+        sqlCmd = "SELECT * FROM %s" % (self._table)
+        self._iDb.execute(sqlCmd)
+        for row in self._iDb.fetchall():
+            self._addRowInMemory(row)
+        if verbose > 0:
+            print "%i path identifiers of %s loaded in memory (%i contigs)" % (len(self._dId2Rows), self._table, len(self._dContig2Ids))
+    
+    ## Free the in-memory index, coordinate queries go back to the bin table
+    #
+    def unloadIndexFromMemory(self):
+        self._dId2Rows = None
+        self._dContig2Ids = {}
+        self._dContig2Index = {}
+        self._dContig2Pending = {}
+        self._dContig2Stale = {}
+    
+    ## Return True if coordinate queries are answered from memory, False otherwise
+    #
+    def isIndexInMemory(self):
+        return self._dId2Rows != None
+    
+    def _addRowInMemory(self, row):
+        id = int(row[0])
+        contig = row[1]
+        self._dId2Rows.setdefault(id, []).append(row)
+        self._dContig2Ids.setdefault(contig, {})[id] = True
+        if self._dContig2Index.has_key(contig):
+            self._dContig2Stale[contig][id] = True
+            self._dContig2Pending[contig][id] = self._getIntervalInMemory(contig, id)
+        
+    def _removeIdInMemory(self, id):
+        lRows = self._dId2Rows.pop(id, [])
+        for row in lRows:
+            contig = row[1]
+            if self._dContig2Ids.has_key(contig) and self._dContig2Ids[contig].has_key(id):
+                del self._dContig2Ids[contig][id]
+            if self._dContig2Index.has_key(contig):
+                self._dContig2Stale[contig][id] = True
+                self._dContig2Pending[contig].pop(id, None)
+        return lRows
+    
+    def _getIntervalInMemory(self, contig, id):
+        lCoords = []
+        for row in self._dId2Rows[id]:
+            if row[1] == contig:
+                lCoords.append(int(row[2]))
+                lCoords.append(int(row[3]))
+        return min(lCoords), max(lCoords)
+    
+    def _getIndexInMemory(self, contig):
+        if self._dContig2Index.has_key(contig) \
+        and len(self._dContig2Stale[contig]) > max(100, 8 * int(math.sqrt(self._dContig2Index[contig].getSize()))):
+            del self._dContig2Index[contig]
+        if not self._dContig2Index.has_key(contig):
+            lIntervals = []
+            for id in self._dContig2Ids.get(contig, {}).keys():
+                minCoord, maxCoord = self._getIntervalInMemory(contig, id)
+                lIntervals.append((minCoord, maxCoord, id))
+            self._dContig2Index[contig] = NCList(lIntervals)
+            self._dContig2Pending[contig] = {}
+            self._dContig2Stale[contig] = {}
+        return self._dContig2Index[contig]
+    
+    def _getIdListOverlappingInMemory(self, contig, start, end):
+        minCoord = min(start, end)
+        maxCoord = max(start, end)
+        iIndex = self._getIndexInMemory(contig)
+        dStale = self._dContig2Stale[contig]
+        lId = [id for id in iIndex.getIdListOverlapping(minCoord, maxCoord) if not dStale.has_key(id)]
+        for id, (idMin, idMax) in self._dContig2Pending[contig].iteritems():
+            if idMin <= maxCoord and idMax >= minCoord:
+                lId.append(id)
+        return lId
+    
+    def _getChainListOverlappingQueryCoordFromMemory(self, contig, start, end):
+        lId = self._getIdListOverlappingInMemory(contig, start, end)
+        lId.sort()
+        lpath = []
+        for id in lId:
+            for row in self._dId2Rows[id]:
+                iPath = Path()
+                iPath.setFromTuple(row)
+                lpath.append(iPath)
+        return lpath
+    
+    ## Generate the sql command filling the bin table from a 'path_range' table
+    #
+    # @param rangeTable string name of the 'path_range' table
+    # @return sqlCmd string generated sql command
+    # @note same bins as Range.findIdx(), the query being read on the direct strand like in Path.setFromTuple()
+    #
+    def _genSqlCmdForBinPathTable(self, rangeTable):
+        minCoord = "LEAST(query_start,query_end)"
+        maxCoord = "GREATEST(query_start,query_end)"
+        sqlIdx = "CASE"
+        for bin_lvl in xrange(3, 6):
+            binSize = pow(10, bin_lvl)
+            sqlIdx += " WHEN FLOOR(%s/%d)=FLOOR(%s/%d) THEN %d+FLOOR(%s/%d)"\
+                 % (minCoord, binSize, maxCoord, binSize, getIdx(0, bin_lvl), minCoord, binSize)
+        sqlIdx += " ELSE %d END" % (getIdx(0, 6))
+        sqlCmd = "INSERT INTO %s SELECT path, %s, query_name, %s, %s, 1 FROM %s"\
+                 % (self._table_idx, sqlIdx, minCoord, maxCoord, rangeTable)
+        return sqlCmd
+    
+    def _genSqlValuesForIdxInsert(self, path):
+        return '(%d,%d,"%s",%d,%d,%d)' % (path.id,\
+                                          path.range_query.findIdx(),\
+                                          path.range_query.seqname,\
+                                          path.range_query.getMin(),\
+                                          path.range_query.getMax(),\
+                                          path.range_query.isOnDirectStrand())
+    
+    def _insertValuesInPathAndIdxTables(self, lValues, lIdxValues, delayed):
+        self._iDb.execute(self._genSqlCmdForMultipleInsert(self._table, lValues, delayed))
+        if self._useBinTable:
+            self._iDb.execute(self._genSqlCmdForMultipleInsert(self._table_idx, lIdxValues, delayed))
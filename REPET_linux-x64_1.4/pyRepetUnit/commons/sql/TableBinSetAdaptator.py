@@ -7,6 +7,9 @@ from pyRepetUnit.commons.coord.SetUtils import SetUtils
 ## Adaptator for Set tables with bin indexes
 #
 class TableBinSetAdaptator(TableSetAdaptator):
+    
+    ## number of sets sent per multi-row INSERT when merging lists of sets
+    _insertBatchSize = 1000
    
     ## constructor
     #
@@ -296,13 +299,37 @@ class TableBinSetAdaptator(TableSetAdaptator):
     
     ## Insert a Set list with the same new identifier in the table bin and set
     #
+    # @param lSets list of set instances
+    # @param delayed boolean an insert delayed or not
+    # @param batchSize integer number of sets sent per multi-row INSERT (default = 1, one INSERT per set)
     # @note old name was insAddSetList
+    # @note as with insASetInSetAndBinTable, an empty set is only inserted in the bin table
     #
-    def insertListInSetAndBinTable(self, lSets, delayed = False):
+    def insertListInSetAndBinTable(self, lSets, delayed = False, batchSize = 1):
         id = self.getNewId()
         SetUtils.changeIdInList( lSets, id )
+        if batchSize <= 1:
+            for iSet in lSets:
+                self.insASetInSetAndBinTable(iSet, delayed)
+            return
+        lValues = []
+        lBinValues = []
         for iSet in lSets:
-            self.insASetInSetAndBinTable(iSet, delayed)
+            self._escapeAntislash(iSet)
+            if not iSet.isEmpty():
+                lValues.append(self._genSqlValuesForInsert(iSet))
+            lBinValues.append('(%d,%f,"%s",%d,%d,%d)' % (iSet.id, iSet.getBin(), iSet.seqname, iSet.getMin(), iSet.getMax(), iSet.isOnDirectStrand()))
+            if len(lBinValues) == batchSize:
+                self._insertValuesInSetAndBinTables(lValues, lBinValues, delayed)
+                lValues = []
+                lBinValues = []
+        if lBinValues != []:
+            self._insertValuesInSetAndBinTables(lValues, lBinValues, delayed)
+    
+    def _insertValuesInSetAndBinTables(self, lValues, lBinValues, delayed):
+        if lValues != []:
+            self._iDb.execute(self._genSqlCmdForMultipleInsert(self._table, lValues, delayed))
+        self._iDb.execute(self._genSqlCmdForMultipleInsert(self.tableName_bin, lBinValues, delayed))
     
     ## Insert a set list instances In table Bin and Set and merge all overlapping sets
     #
@@ -323,11 +350,11 @@ class TableBinSetAdaptator(TableSetAdaptator):
                     self.deleteFromIdFromSetAndBinTable(currentId)
                     found = True
             if not found:
-                self.insertListInSetAndBinTable(lNewSetById)
+                self.insertListInSetAndBinTable(lNewSetById, batchSize = self._insertBatchSize)
             else:
                 id = self.getNewId()
                 SetUtils.changeIdInList(oldLsetById, id)
-                self.insertListInSetAndBinTable(oldLsetById)
+                self.insertListInSetAndBinTable(oldLsetById, batchSize = self._insertBatchSize)
                 
     ## Insert a set list instances In table Bin and Set after removing all overlaps between database and lSets
     #
@@ -343,4 +370,4 @@ class TableBinSetAdaptator(TableSetAdaptator):
             for lOldSetById in oldQueryHash.values():
                 if SetUtils.areSetsOverlappingBetweenLists(lNewSetById, lOldSetById):
                     lNewSetById = SetUtils.getListOfSetWithoutOverlappingBetweenTwoListOfSet(lOldSetById, lNewSetById)
-            self.insertListInSetAndBinTable(lNewSetById)
+            self.insertListInSetAndBinTable(lNewSetById, batchSize = self._insertBatchSize)
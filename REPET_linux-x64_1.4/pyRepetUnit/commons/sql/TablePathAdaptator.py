@@ -45,8 +45,8 @@ class TablePathAdaptator( TableAdaptator, ITablePathAdaptator ):
     # @return lPath a list of Path instances
     #
     def getPathListFromId( self, id ):
-        sqlCmd = "SELECT * FROM %s WHERE path='%d';" % ( self._table, id )
-        lPath = self._iDb.getObjectListWithSQLCmd( sqlCmd, self._getInstanceToAdapt )
+        sqlCmd = "SELECT * FROM %s WHERE path=%%s;" % ( self._table )
+        lPath = self._iDb.getObjectListWithSQLCmd( sqlCmd, self._getInstanceToAdapt, ( id, ) )
         return lPath
     
     ## Give a list of Path instances according to the given list of identifier numbers
@@ -58,10 +58,7 @@ class TablePathAdaptator( TableAdaptator, ITablePathAdaptator ):
         lPath=[]
         if lId == []:
             return lPath
-        sqlCmd = "select * from %s where path=%d" % (self._table, lId[0])
-        for i in lId[1:]:
-            sqlCmd += " or path=%d" % (i)
-        sqlCmd += ";"
+        sqlCmd = "SELECT * FROM %s WHERE path IN (%s);" % ( self._table, ",".join( [ "%d" % i for i in lId ] ) )
         lPath = self._iDb.getObjectListWithSQLCmd( sqlCmd, self._getInstanceToAdapt )
         return lPath
     
@@ -143,6 +140,15 @@ class TablePathAdaptator( TableAdaptator, ITablePathAdaptator ):
     def getListOfAllPaths( self ):
         return self.getListOfAllCoordObject()
     
+    ## Give the data contained in the table as a generator of Paths instances, in constant memory
+    #
+    # @param batchSize integer number of rows fetched per round trip (default = 10000)
+    # @return generator of path instances
+    #
+    def iterAllPaths( self, batchSize = 10000 ):
+        sqlCmd = "SELECT * FROM %s" % ( self._table )
+        return self._iDb.iterObjectsWithSQLCmd( sqlCmd, self._getInstanceToAdapt, batchSize=batchSize )
+    
     ## Give a list of Path instances with the given query and subject, both on direct strand
     #
     # @param query string query name
@@ -259,13 +265,12 @@ class TablePathAdaptator( TableAdaptator, ITablePathAdaptator ):
             tmp = start
             start = end
             end = tmp
-        sqlCmd = "SELECT DISTINCT path FROM %s WHERE query_name='%s'" % ( self._table, query )
+        sqlCmd = "SELECT p.* FROM %s AS p JOIN ( SELECT DISTINCT path FROM %s WHERE query_name=%%s" % ( self._table, self._table )
         sqlCmd += " AND ( ( query_start < %i AND query_end >= %i AND query_end <= %i )" % ( start, start, end )
         sqlCmd += " OR ( query_start >= %i AND query_end <= %i )" % ( start, end )
         sqlCmd += " OR ( query_start >= %i AND query_start <= %i AND query_end > %i )" % ( start, end, end )
-        sqlCmd += " OR ( query_start < %i AND query_end > %i ) )" % ( start, end )
-        lIdentifiers = self._iDb.getIntegerListWithSQLCmd( sqlCmd )
-        lPaths = self.getPathListFromIdList( lIdentifiers )
+        sqlCmd += " OR ( query_start < %i AND query_end > %i ) ) ) AS c ON p.path=c.path" % ( start, end )
+        lPaths = self._iDb.getObjectListWithSQLCmd( sqlCmd, self._getInstanceToAdapt, ( query, ) )
         return lPaths
     
     ## Give a list of Set instances overlapping a given region
@@ -301,6 +306,15 @@ class TablePathAdaptator( TableAdaptator, ITablePathAdaptator ):
         lPaths = self._iDb.getObjectListWithSQLCmd( sqlCmd, self._getInstanceToAdapt )
         return lPaths
     
+    ## Give a generator of Path instances sorted by query coordinates, in constant memory
+    #
+    # @param batchSize integer number of rows fetched per round trip (default = 10000)
+    # @return generator of Path instances
+    #
+    def iterPathsSortedByQueryCoord( self, batchSize = 10000 ):
+        sqlCmd = "SELECT * FROM %s ORDER BY query_name, LEAST(query_start,query_end)" % ( self._table )
+        return self._iDb.iterObjectsWithSQLCmd( sqlCmd, self._getInstanceToAdapt, batchSize=batchSize )
+    
     ## Give a a list of Path instances sorted by query coordinates for a given query
     #
     # @return lPaths list of Path instances
@@ -551,8 +565,8 @@ class TablePathAdaptator( TableAdaptator, ITablePathAdaptator ):
     
     
     def _getPathListFromTypeName( self, type, typeName ):
-        sqlCmd = "SELECT * FROM %s WHERE %s_name='%s';" % ( self._table, type, typeName )
-        lPath = self._iDb.getObjectListWithSQLCmd( sqlCmd, self._getInstanceToAdapt )
+        sqlCmd = "SELECT * FROM %s WHERE %s_name=%%s;" % ( self._table, type )
+        lPath = self._iDb.getObjectListWithSQLCmd( sqlCmd, self._getInstanceToAdapt, ( typeName, ) )
         return lPath
     
     def _getDistinctTypeNamesList( self, type ):
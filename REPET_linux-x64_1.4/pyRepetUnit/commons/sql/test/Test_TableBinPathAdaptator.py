@@ -0,0 +1,128 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import random
+from pyRepetUnit.commons.coord.Path import Path
+from pyRepetUnit.commons.sql.TableBinPathAdaptator import TableBinPathAdaptator
+
+
+# Database connector recording the SQL commands, 'SELECT' returning the rows of the path table
+#
+class DummyDb( object ):
+    
+    def __init__( self, lRows ):
+        self._lRows = lRows
+        self.lSqlCmds = []
+        
+    def execute( self, sqlCmd, params = None ):
+        self.lSqlCmds.append( sqlCmd )
+        
+    def fetchall( self ):
+        return self._lRows
+    
+    
+class Test_TableBinPathAdaptator( unittest.TestCase ):
+    
+    def _getRandomRow( self, id ):
+        start = random.randint( 1, 200000 )
+        return ( id, "chr%i" % ( random.randint( 1, 3 ) ), start, start + random.randint( 10, 2000 ), "TE%i" % ( random.randint( 1, 5 ) ), 1, 100, 1e-20, 80, 90.0 )
+    
+    def _getTuple( self, iPath ):
+        return ( iPath.id, iPath.range_query.seqname, iPath.range_query.start, iPath.range_query.end, iPath.range_subject.seqname )
+    
+    # Chains overlapping a region, computed from all the rows
+    #
+    def _getExpChainList( self, dId2Rows, contig, start, end ):
+        lExp = []
+        for id in sorted( dId2Rows.keys() ):
+            lCoords = []
+            for row in dId2Rows[ id ]:
+                if row[1] == contig:
+                    lCoords += [ row[2], row[3] ]
+            if lCoords != [] and min( lCoords ) <= max( start, end ) and max( lCoords ) >= min( start, end ):
+                lExp += [ ( row[0], row[1], row[2], row[3], row[4] ) for row in dId2Rows[ id ] ]
+        return sorted( lExp )
+    
+    def test_getChainListOverlappingQueryCoord_inMemoryWithUpdates( self ):
+        random.seed( 0 )
+        lRows = [ self._getRandomRow( random.randint( 1, 1500 ) ) for i in xrange( 0, 3000 ) ]
+        dId2Rows = {}
+        for row in lRows:
+            dId2Rows.setdefault( row[0], [] ).append( row )
+        iDb = DummyDb( lRows )
+        tpA = TableBinPathAdaptator( iDb, "dummyPath", useBinTable=False )
+        tpA.loadIndexInMemory()
+        nextId = 1501
+        for i in xrange( 0, 1000 ):
+            action = random.random()
+            if action < 0.3 and len(dId2Rows) > 1:
+                id1, id2 = random.sample( dId2Rows.keys(), 2 )
+                newId = tpA.joinTwoPaths( id1, id2 )
+                oldId = max( id1, id2 )
+                self.assertEqual( min( id1, id2 ), newId )
+                dId2Rows[ newId ] += [ ( newId, ) + row[1:] for row in dId2Rows.pop( oldId ) ]
+            elif action < 0.4 and len(dId2Rows) > 1:
+                id = random.choice( dId2Rows.keys() )
+                tpA.deleteFromId( id )
+                del dId2Rows[ id ]
+            elif action < 0.6:
+                row = self._getRandomRow( random.choice( [ nextId, random.choice( dId2Rows.keys() ) ] ) )
+                nextId += 1
+                iPath = Path()
+                iPath.setFromTuple( row )
+                tpA.insert( iPath )
+                dId2Rows.setdefault( row[0], [] ).append( row )
+            contig = "chr%i" % ( random.randint( 1, 3 ) )
+            start = random.randint( 1, 200000 )
+            end = start + random.randint( 0, 5000 )
+            lObs = sorted( [ self._getTuple( iPath ) for iPath in tpA.getChainListOverlappingQueryCoord( contig, end, start ) ] )
+            self.assertEqual( self._getExpChainList( dId2Rows, contig, start, end ), lObs )
+        for sqlCmd in iDb.lSqlCmds:
+            self.assertFalse( "dummyPath_idx" in sqlCmd )
+            
+    def test_getChainListOverlappingQueryCoord_indexNotRebuiltAtEachUpdate( self ):
+        lRows = [ ( i, "chr1", 100 * i, 100 * i + 50, "TE", 1, 50, 0.0, 50, 90.0 ) for i in xrange( 1, 1001 ) ]
+        tpA = TableBinPathAdaptator( DummyDb( lRows ), "dummyPath", useBinTable=False )
+        tpA.loadIndexInMemory()
+        tpA.getChainListOverlappingQueryCoord( "chr1", 1, 10 )
+        iIndex = tpA._dContig2Index[ "chr1" ]
+        for i in xrange( 1, 50 ):
+            tpA.joinTwoPaths( 2 * i, 2 * i + 1 )
+            lIds = [ iPath.id for iPath in tpA.getChainListOverlappingQueryCoord( "chr1", 200 * i, 200 * i + 100 ) ]
+            self.assertEqual( [ 2 * i, 2 * i ], lIds )
+        self.assertTrue( iIndex is tpA._dContig2Index[ "chr1" ] )
+        
+        
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_TableBinPathAdaptator ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
@@ -0,0 +1,100 @@
+# Copyright INRA (Institut National de la Recherche Agronomique)
+# http://www.inra.fr
+# http://urgi.versailles.inra.fr
+#
+# This software is governed by the CeCILL license under French law and
+# abiding by the rules of distribution of free software.  You can  use, 
+# modify and/ or redistribute the software under the terms of the CeCILL
+# license as circulated by CEA, CNRS and INRIA at the following URL
+# "http://www.cecill.info". 
+#
+# As a counterpart to the access to the source code and  rights to copy,
+# modify and redistribute granted by the license, users are provided only
+# with a limited warranty  and the software's author,  the holder of the
+# economic rights,  and the successive licensors  have only  limited
+# liability. 
+#
+# In this respect, the user's attention is drawn to the risks associated
+# with loading,  using,  modifying and/or developing or reproducing the
+# software by the user in light of its specific status of free software,
+# that may mean  that it is complicated to manipulate,  and  that  also
+# therefore means  that it is reserved for developers  and  experienced
+# professionals having in-depth computer knowledge. Users are therefore
+# encouraged to load and test the software's suitability as regards their
+# requirements in conditions enabling the security of their systems and/or 
+# data to be ensured and,  more generally, to use and operate it in the 
+# same conditions as regards security. 
+#
+# The fact that you are presently reading this means that you have had
+# knowledge of the CeCILL license and that you accept its terms.
+
+
+import unittest
+import re
+import copy
+import random
+from pyRepetUnit.commons.coord.Set import Set
+from pyRepetUnit.commons.sql.TableBinSetAdaptator import TableBinSetAdaptator
+
+
+# Database connector recording the SQL commands, without any table
+#
+class DummyDb( object ):
+    
+    def __init__( self ):
+        self.lSqlCmds = []
+        
+    def doesTableExist( self, table ):
+        return False
+    
+    def execute( self, sqlCmd, params = None ):
+        self.lSqlCmds.append( sqlCmd )
+        
+    def fetchall( self ):
+        return [ ( None, ) ]
+    
+    
+class Test_TableBinSetAdaptator( unittest.TestCase ):
+    
+    def _getSetList( self ):
+        lSets = []
+        for i in xrange( 0, 25 ):
+            start = random.randint( 1, 10000 )
+            lSets.append( Set( i, "TE%i" % ( random.randint( 1, 5 ) ), "chr%i" % ( random.randint( 1, 3 ) ), start, start + random.randint( -500, 500 ) ) )
+        lSets.insert( 7, Set( 3, "TE1", "chr1", 0, 0 ) )
+        lSets.append( Set( 4, "TE2", "chr2", -1, -1 ) )
+        return lSets
+    
+    # Rows inserted in each table, whatever the number of rows per INSERT
+    #
+    def _getInsertedRows( self, lSqlCmds ):
+        dTable2Rows = {}
+        for sqlCmd in lSqlCmds:
+            if not sqlCmd.startswith( "INSERT" ):
+                continue
+            prefix, values = sqlCmd.split( " VALUES " )
+            dTable2Rows.setdefault( prefix.split()[-1], [] ).extend( re.findall( "\([^()]*\)", values ) )
+        return dTable2Rows
+    
+    def test_insertListInSetAndBinTable_batchedSameAsOneInsertPerSet( self ):
+        random.seed( 0 )
+        lSets = self._getSetList()
+        iDbOnePerSet = DummyDb()
+        TableBinSetAdaptator( iDbOnePerSet, "dummySet" ).insertListInSetAndBinTable( copy.deepcopy( lSets ) )
+        for batchSize in [ 2, 5, 1000 ]:
+            iDbBatched = DummyDb()
+            TableBinSetAdaptator( iDbBatched, "dummySet" ).insertListInSetAndBinTable( copy.deepcopy( lSets ), batchSize = batchSize )
+            self.assertEquals( self._getInsertedRows( iDbOnePerSet.lSqlCmds ), self._getInsertedRows( iDbBatched.lSqlCmds ) )
+            
+    def test_insertListInSetAndBinTable_emptySetOnlyInBinTable( self ):
+        iDb = DummyDb()
+        TableBinSetAdaptator( iDb, "dummySet" ).insertListInSetAndBinTable( [ Set( 1, "TE1", "chr1", 0, 0 ) ], batchSize = 10 )
+        dTable2Rows = self._getInsertedRows( iDb.lSqlCmds )
+        self.assertEquals( [ "dummySet_bin" ], dTable2Rows.keys() )
+        self.assertEquals( 1, len( dTable2Rows[ "dummySet_bin" ] ) )
+        
+        
+test_suite = unittest.TestSuite()
+test_suite.addTest( unittest.makeSuite( Test_TableBinSetAdaptator ) )
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run( test_suite )
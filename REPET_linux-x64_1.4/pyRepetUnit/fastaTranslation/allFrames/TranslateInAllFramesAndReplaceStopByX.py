@@ -1,6 +1,6 @@
 import os
 import pyRepet.seq.Bioseq
-import pyRepet.seq.BioseqUtils 
+from pyRepetUnit.commons.seq.BioseqUtils import BioseqUtils
 from pyRepet.util.file.FileUtils import FileUtils
 
 
@@ -11,7 +11,8 @@ class TranslateInAllFramesAndReplaceStopByX( object ):
         self.bioseq = pyRepet.seq.Bioseq.Bioseq()
         self._inputFile = "" 
         self._outputFile =  ""
-        self._bioseqUtils =  pyRepet.seq.BioseqUtils.BioseqUtils
+        self._bioseqUtils =  BioseqUtils
+        self._nbProcesses = 1
     
     def setInputFile(self, input):
         self._inputFile = input
@@ -19,6 +20,9 @@ class TranslateInAllFramesAndReplaceStopByX( object ):
     def setOutputFile(self, output):
         self._outputFile = output    
         
+    def setNbProcesses(self, nbProcesses):
+        self._nbProcesses = nbProcesses
+        
     def run(self):
         """
         read a fasta file with nucleotide sequences and translate all sequences in all frames, write the result in a file
@@ -26,11 +30,6 @@ class TranslateInAllFramesAndReplaceStopByX( object ):
         if not self.fileUtils.isRessourceExists(self._inputFile):
             print "Warning your input file " + self._inputFile + " does not exist!\n"
             return
-        bioseqList = self._bioseqUtils.extractBioseqListFromFastaFile(self._inputFile)
-        # translate in All frames
-        bioseqListInAllFrames = self._bioseqUtils.translateBioseqListInAllFrames(bioseqList)
-        #replace Stops by X
-        bioseqListTranslatedAndStopsReplace = self._bioseqUtils.replaceStopCodonsByXInBioseqList( bioseqListInAllFrames )
-        # write in a file
-        self._bioseqUtils.writeBioseqListIntoFastaFile(bioseqListTranslatedAndStopsReplace, self._outputFile)   
+        # translate in All frames, replace Stops by X and write in a file, one sequence at a time
+        self._bioseqUtils.translateFastaFileInAllFrames(self._inputFile, self._outputFile, True, self._nbProcesses)   
                 
\ No newline at end of file
@@ -1,4 +1,4 @@
-import re
+import os
 from pyRepetUnit.hmmer.hmmOutput.HmmOutput import HmmOutput
 from pyRepetUnit.hmmer.hmmOutput.HmmOutputProcessing import HmmOutputProcessing
     
@@ -18,19 +18,41 @@ class HmmscanOutputProcessing (HmmOutputProcessing):
             tabResult = None
             return tabResult
         tabResult = HmmOutput()
-        
-        while line != "":
-            line = hmmerOutputFile.readline()
-            if not(re.match("^#.*$", line)) and line != "":            
-                lLines = re.split("\s+", line)
-                seqName = lLines[3]
-                profilName = lLines[0]
-                iValue = lLines[12]
-                score =  lLines[13]
-                queryCoordStart =lLines[17]
-                queryCoordEnd = lLines[18]
-                subjectCoordStart = lLines[15]
-                subjectCoordEnd = lLines[16]
-                tabResult.append([seqName, queryCoordStart, queryCoordEnd, profilName, subjectCoordStart, subjectCoordEnd, iValue, score]) 
+        for item in self._iterHits( hmmerOutputFile ):
+            tabResult.append( item )
         return tabResult
-
+    
+    ## give the results of an hmmscan output one at a time, in one pass and without keeping them in memory
+    #
+    # @param hmmerOutputFile handle of file generated by hmmscan (domtblout format)
+    # @return generator of lists [ seqName, queryCoordStart, queryCoordEnd, profilName, subjectCoordStart, subjectCoordEnd, iValue, score ]
+    #
+    def iterHmmOutput( self, hmmerOutputFile ):
+        hmmerOutputFile.readline()
+        return self._iterHits( hmmerOutputFile )
+    
+    ## read an hmmscan output file and write the corresponding .align file, hit by hit
+    #
+    # @param inputFile file
+    # @param outputFile file
+    #
+    def readHmmOutputsAndWriteAlignFile( self, inputFile, outputFile ):
+        if not os.path.exists(inputFile):
+            print "Warning your input file " + inputFile + " does not exist!\n"
+            return
+        if outputFile == "":
+            print "Warning have to specify an output name file!\n"
+            return
+        file2parse = open( inputFile )
+        fout = open( outputFile, "w" )
+        for item in self.iterHmmOutput( file2parse ):
+            fout.write( "\t".join( item ) + "\t0\n" )
+        fout.close()
+        file2parse.close()
+    
+    def _iterHits( self, hmmerOutputFile ):
+        for line in hmmerOutputFile:
+            if line[0] == "#":
+                continue
+            lLines = line.split()
+            yield [ lLines[3], lLines[17], lLines[18], lLines[0], lLines[15], lLines[16], lLines[12], lLines[13] ]
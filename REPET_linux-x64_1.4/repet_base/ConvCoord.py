@@ -10,8 +10,10 @@
 #      -f: input data format (default='align'/'path')
 #      -c: coordinates to convert (query, subject or both; default='q'/'s'/'qs')
 #      -m: mapping of chunks on chromosomes (format='map')
+#      -M: merge chunk overlaps (default=yes/no)
 #      -x: convert from chromosomes to chunks (opposite by default)
 #      -o: output data (file or table, same as input)
+#      -p: number of processes merging the chunk overlaps, one chromosome at a time (default=1)
 #      -C: configuration file (for database connection)
 #      -v: verbosity level (default=0/1/2)
 
@@ -20,11 +22,15 @@ import os
 import sys
 import getopt
 import time
+import itertools
+import collections
+import multiprocessing
 from pyRepetUnit.commons.sql.DbMySql import DbMySql
 from pyRepetUnit.commons.coord.MapUtils import MapUtils
 from pyRepetUnit.commons.sql.TableMapAdaptator import TableMapAdaptator
 from pyRepetUnit.commons.sql.TablePathAdaptator import TablePathAdaptator
 from pyRepetUnit.commons.coord.PathUtils import PathUtils
+from pyRepetUnit.commons.coord.DoublonUtils import DoublonUtils
 from pyRepetUnit.commons.coord.Align import Align
 from pyRepetUnit.commons.coord.Path import Path
 from pyRepetUnit.commons.coord.Range import Range
@@ -45,6 +51,7 @@ class ConvCoord( object ):
         self._convertChunks = True
         self._outData = ""
         self._configFile = ""
+        self._nbProcesses = 1
         self._verbose = 0
         self._typeInData = "file"
         self._typeMapData = "file"
@@ -66,6 +73,7 @@ class ConvCoord( object ):
         print "     -M: merge chunk overlaps (default=yes/no)"
         print "     -x: convert from chromosomes to chunks (opposite by default)"
         print "     -o: output data (file or table, same as input)"
+        print "     -p: number of processes merging the chunk overlaps, one chromosome at a time (default=1)"
         print "     -C: configuration file (for database connection)"
         print "     -v: verbosity level (default=0/1/2)"
         print
@@ -75,7 +83,7 @@ class ConvCoord( object ):
     #
     def setAttributesFromCmdLine( self ):
         try:
-            opts, args = getopt.getopt(sys.argv[1:],"hi:f:c:m:M:xo:C:v:")
+            opts, args = getopt.getopt(sys.argv[1:],"hi:f:c:m:M:xo:p:C:v:")
         except getopt.GetoptError, err:
             sys.stderr.write( "%s\n" % ( str(err) ) )
             self.help(); sys.exit(1)
@@ -94,6 +102,8 @@ class ConvCoord( object ):
                 self.setMergeChunkOverlaps( a )
             elif o == "-o":
                 self.setOutputData( a )
+            elif o == "-p":
+                self.setNbProcesses( a )
             elif o == "-C":
                 self.setConfigFile( a )
             elif o == "-v":
@@ -121,6 +131,9 @@ class ConvCoord( object ):
     def setOutputData( self, outData ):
         self._outData = outData
         
+    def setNbProcesses( self, nbProcesses ):
+        self._nbProcesses = int(nbProcesses)
+        
     def setConfigFile( self, configFile ):
         self._configFile = configFile
         
@@ -307,50 +320,39 @@ class ConvCoord( object ):
         return lDirectPaths, lReversePaths
     
     
-    def mergePaths( self, lPaths, lIdsToInsert, lIdsToDelete, dOldIdToNewId ):
+    def mergePaths( self, lPaths, dIdsToInsert, dIdsToDelete, dOldIdToNewId ):
         if len(lPaths) < 2:
-            lIdsToInsert.append( lPaths[0].id )
+            dIdsToInsert[ lPaths[0].id ] = True
             return
-        i = 0
-        while i < len(lPaths) - 1:
-            i += 1
+        lMergedPaths = [ lPaths[0] ]
+        for iPath in lPaths[1:]:
+            iPrevPath = lMergedPaths[-1]
             if self._verbose > 1:
-                print lPaths[i-1]
-                print lPaths[i]
+                print iPrevPath
+                print iPath
                 sys.stdout.flush()
-            idPrev = lPaths[i-1].id
-            idNext = lPaths[i].id
-            if lPaths[i-1].canMerge( lPaths[i] ):
-                dOldIdToNewId[ idNext ] = idPrev
-                if idPrev not in lIdsToInsert:
-                    lIdsToInsert.append( idPrev )
-                if idNext not in lIdsToDelete:
-                    lIdsToDelete.append( idNext )
-                lPaths[i-1].merge( lPaths[i] )
-                del lPaths[i]
-                i -= 1
-#            else:
-#                if idPrev not in lIdsToInsert:
-#                    lIdsToInsert.append( idPrev )
-#                if idNext not in lIdsToInsert:
-#                    lIdsToInsert.append( idNext )
-                    
-                    
-    def insertPaths( self, lPaths, lIdsToInsert, dOldIdToNewId ):
+            if iPrevPath.canMerge( iPath ):
+                dOldIdToNewId[ iPath.id ] = iPrevPath.id
+                dIdsToInsert[ iPrevPath.id ] = True
+                dIdsToDelete[ iPath.id ] = True
+                iPrevPath.merge( iPath )
+            else:
+                lMergedPaths.append( iPath )
+        lPaths[:] = lMergedPaths
+        
+        
+    def insertPaths( self, lPaths, dIdsToInsert, dOldIdToNewId ):
         for iPath in lPaths:
             if dOldIdToNewId.has_key( iPath.id ):
                 iPath.id = dOldIdToNewId[ iPath.id ]
-            if iPath.id in lIdsToInsert:
+            if dIdsToInsert.has_key( iPath.id ):
                 self._tpa.insert( iPath )
                 
                 
-    ## Merge Path instances in a Path table when they correspond to chunk overlaps
+    ## Return a dictionary whose keys are the chromosome names and values the list of the chunk overlaps (min,max) on them, in the order of the chunks
     #
-    def mergeCoordsOnChunkOverlaps( self, dChunks2CoordMaps, tmpPathTable ):
-        if self._verbose > 0:
-            msg = "start method 'mergeCoordsOnChunkOverlaps'"
-            sys.stdout.write( "%s\n" % ( msg ) )
-        self._tpa = TablePathAdaptator( self._iDb, tmpPathTable )
+    def getChunkOverlapsPerChromosome( self, dChunks2CoordMaps ):
+        dChr2Overlaps = {}
         nbChunks = len(dChunks2CoordMaps.keys())
         for numChunk in range(1,nbChunks):
             chunkName1 = "chunk%s" % ( str(numChunk).zfill( len(str(nbChunks)) ) )
@@ -370,36 +372,104 @@ class ConvCoord( object ):
                 continue
             minCoord = min( dChunks2CoordMaps[ chunkName1 ].end, dChunks2CoordMaps[ chunkName2 ].start )
             maxCoord = max( dChunks2CoordMaps[ chunkName1 ].end, dChunks2CoordMaps[ chunkName2 ].start )
-            lPaths = self._tpa.getChainListOverlappingQueryCoord( chrName, minCoord, maxCoord )
-            if len(lPaths) == 0:
-                if self._verbose > 1:
-                    msg = "no overlapping matches on %s (%i->%i)" % ( chrName, minCoord, maxCoord )
-                    sys.stdout.write( "%s\n" % ( msg ) )
-                    sys.stdout.flush()
-                continue
+            if not dChr2Overlaps.has_key( chrName ):
+                dChr2Overlaps[ chrName ] = []
+            dChr2Overlaps[ chrName ].append( ( minCoord, maxCoord ) )
+        return dChr2Overlaps
+    
+    
+    ## Merge the Path instances of self._tpa overlapping a chunk overlap
+    #
+    def mergePathsOnChunkOverlap( self, chrName, minCoord, maxCoord ):
+        lPaths = self._tpa.getChainListOverlappingQueryCoord( chrName, minCoord, maxCoord )
+        if len(lPaths) == 0:
             if self._verbose > 1:
-                msg = "%i overlapping matche(s) on %s (%i->%i)" % ( len(lPaths), chrName, minCoord, maxCoord )
+                msg = "no overlapping matches on %s (%i->%i)" % ( chrName, minCoord, maxCoord )
                 sys.stdout.write( "%s\n" % ( msg ) )
                 sys.stdout.flush()
-            lSortedPaths = PathUtils.getPathListSortedByIncreasingMinQueryThenMaxQueryThenIdentifier( lPaths )
-            lDirectPaths, lReversePaths = self.getListsDirectAndReversePaths( lSortedPaths )
-            lIdsToInsert = []
-            lIdsToDelete = []
-            dOldIdToNewId = {}
-            if len(lDirectPaths) > 0:
-                self.mergePaths( lDirectPaths, lIdsToInsert, lIdsToDelete, dOldIdToNewId )
-            if len(lReversePaths) > 0:
-                self.mergePaths( lReversePaths, lIdsToInsert, lIdsToDelete, dOldIdToNewId )
-            self._tpa.deleteFromIdList( lIdsToDelete )
-            self._tpa.deleteFromIdList( lIdsToInsert )
-            self.insertPaths( lDirectPaths, lIdsToInsert, dOldIdToNewId )
-            self.insertPaths( lReversePaths, lIdsToInsert, dOldIdToNewId )
+            return
+        if self._verbose > 1:
+            msg = "%i overlapping matche(s) on %s (%i->%i)" % ( len(lPaths), chrName, minCoord, maxCoord )
+            sys.stdout.write( "%s\n" % ( msg ) )
+            sys.stdout.flush()
+        lSortedPaths = PathUtils.getPathListSortedByIncreasingMinQueryThenMaxQueryThenIdentifier( lPaths )
+        lDirectPaths, lReversePaths = self.getListsDirectAndReversePaths( lSortedPaths )
+        dIdsToInsert = {}
+        dIdsToDelete = {}
+        dOldIdToNewId = {}
+        if len(lDirectPaths) > 0:
+            self.mergePaths( lDirectPaths, dIdsToInsert, dIdsToDelete, dOldIdToNewId )
+        if len(lReversePaths) > 0:
+            self.mergePaths( lReversePaths, dIdsToInsert, dIdsToDelete, dOldIdToNewId )
+        self._tpa.deleteFromIdList( dIdsToDelete.keys() )
+        self._tpa.deleteFromIdList( dIdsToInsert.keys() )
+        self.insertPaths( lDirectPaths, dIdsToInsert, dOldIdToNewId )
+        self.insertPaths( lReversePaths, dIdsToInsert, dOldIdToNewId )
+        
+        
+    ## Merge Path instances in a Path table when they correspond to chunk overlaps
+    #
+    def mergeCoordsOnChunkOverlaps( self, dChunks2CoordMaps, tmpPathTable ):
+        if self._verbose > 0:
+            msg = "start method 'mergeCoordsOnChunkOverlaps'"
+            sys.stdout.write( "%s\n" % ( msg ) )
+        self._tpa = TablePathAdaptator( self._iDb, tmpPathTable )
+        dChr2Overlaps = self.getChunkOverlapsPerChromosome( dChunks2CoordMaps )
+        for chrName, lOverlaps in dChr2Overlaps.items():
+            for minCoord, maxCoord in lOverlaps:
+                self.mergePathsOnChunkOverlap( chrName, minCoord, maxCoord )
         if self._verbose > 0:
             msg = "end method 'mergeCoordsOnChunkOverlaps'"
             sys.stdout.write( "%s\n" % ( msg ) )
             sys.stdout.flush()
             
             
+    ## Merge Path instances in a Path file when they correspond to chunk overlaps
+    #
+    # @param dChunks2CoordMaps dictionary with the mapping of the chunks on the chromosomes
+    # @param inPathFile string name of the Path file with coordinates on chromosomes
+    # @param outPathFile string name of the output Path file
+    # @note the merges are done in memory, one chromosome at a time, with several processes if self._nbProcesses > 1
+    # @note the file is streamed: only the chromosomes being merged (at most twice the number of processes) are held in memory
+    #
+    def mergeCoordsOnChunkOverlapsInFile( self, dChunks2CoordMaps, inPathFile, outPathFile ):
+        if self._verbose > 0:
+            msg = "start method 'mergeCoordsOnChunkOverlapsInFile'"
+            sys.stdout.write( "%s\n" % ( msg ) )
+            sys.stdout.flush()
+        dChr2Overlaps = self.getChunkOverlapsPerChromosome( dChunks2CoordMaps )
+        sortedPathFile = inPathFile
+        if not _areQueriesContiguous( inPathFile ):
+            sortedPathFile = "%s.sorted" % ( outPathFile )
+            returnStatus = os.system( "sort -s -t '\t' -k 2,2 %s > %s" % ( inPathFile, sortedPathFile ) )
+            if returnStatus != 0:
+                msg = "ERROR: 'sort' returned '%i' on '%s'" % ( returnStatus, inPathFile )
+                sys.stderr.write( "%s\n" % ( msg ) )
+                if os.path.exists( sortedPathFile ):
+                    os.remove( sortedPathFile )
+                sys.exit(1)
+        iterArgs = _iterMergeArgsPerQuery( sortedPathFile, dChr2Overlaps, self._verbose )
+        if self._nbProcesses > 1:
+            pool = multiprocessing.Pool( self._nbProcesses )
+            iterResults = _imapWithBoundedQueue( pool, _mergePathsOnChunkOverlapsOfQuery, iterArgs, 2 * self._nbProcesses )
+        else:
+            pool = None
+            iterResults = itertools.imap( _mergePathsOnChunkOverlapsOfQuery, iterArgs )
+        outFile = open( outPathFile, "w" )
+        for lLines in iterResults:
+            outFile.writelines( lLines )
+        outFile.close()
+        if pool != None:
+            pool.close()
+            pool.join()
+        if sortedPathFile != inPathFile:
+            os.remove( sortedPathFile )
+        if self._verbose > 0:
+            msg = "end method 'mergeCoordsOnChunkOverlapsInFile'"
+            sys.stdout.write( "%s\n" % ( msg ) )
+            sys.stdout.flush()
+            
+            
     def saveChrCoordsAsFile( self, tmpPathTable, outFile ):
         self._iDb.exportDataToFile( tmpPathTable, tmpPathTable, False )
         self._iDb.dropTable( tmpPathTable )
@@ -418,25 +488,70 @@ class ConvCoord( object ):
             self._iDb.renameTable( tmpPathTable, outTable )
             
             
+    ## Convert coordinates of a Path or Align file from chunks to chromosomes and return the name of the resulting Path file
+    #
+    # @note doublons of Align instances are removed and the identifiers of the resulting Path instances are their ranks
+    #
+    def convCoordsChkToChrFromFileIntoPathFile( self, inFile, format, dChunks2CoordMaps ):
+        if format == "path":
+            return self.convCoordsChkToChrFromPathFile( inFile, dChunks2CoordMaps )
+        tmpAlignFile = self.convCoordsChkToChrFromAlignFile( inFile, dChunks2CoordMaps )
+        uniqAlignFile = "%s.uniq" % ( tmpAlignFile )
+        DoublonUtils.writeFileWithoutDoublons( tmpAlignFile, uniqAlignFile, Align, DoublonUtils.getAlignKey )
+        os.remove( tmpAlignFile )
+        tmpPathFile = "%s.path" % ( tmpAlignFile )
+        inFileHandler = open( uniqAlignFile, "r" )
+        outFileHandler = open( tmpPathFile, "w" )
+        rowIndex = 0
+        for line in inFileHandler:
+            rowIndex += 1
+            outFileHandler.write( "%i\t%s" % ( rowIndex, line ) )
+        inFileHandler.close()
+        outFileHandler.close()
+        os.remove( uniqAlignFile )
+        return tmpPathFile
+    
+    
+    ## Save a Path file with coordinates on chromosomes in the output data, converting it into the input format
+    #
+    def saveChrCoordsFromPathFile( self, tmpPathFile ):
+        if self._formatInData == "align":
+            tmpFile = "%s.align" % ( tmpPathFile )
+            PathUtils.convertPathFileIntoAlignFile( tmpPathFile, tmpFile )
+            os.remove( tmpPathFile )
+        elif self._formatInData == "path":
+            tmpFile = tmpPathFile
+        if self._typeInData == "file":
+            os.rename( tmpFile, self._outData )
+        elif self._typeInData == "table":
+            self._iDb.createTable( self._outData, self._formatInData, tmpFile, True, self._verbose-1 )
+            os.remove( tmpFile )
+            
+            
     ## Convert coordinates from chunks to chromosomes
     #
+    # @note the data is processed as files, the chunk overlaps are merged in memory and a table is written only once at the end
+    #
     def convertCoordinatesFromChunksToChromosomes( self ):
         dChunks2CoordMaps = self.getChunkCoordsOnChromosomes()
         
         if self._typeInData == "file":
-            tmpPathTable = self.convCoordsChkToChrFromFile( self._inData, self._formatInData, dChunks2CoordMaps )
+            tmpPathFile = self.convCoordsChkToChrFromFileIntoPathFile( self._inData, self._formatInData, dChunks2CoordMaps )
         elif self._typeInData == "table":
-            tmpPathTable = self.convCoordsChkToChrFromTable( self._inData, self._formatInData, dChunks2CoordMaps )
+            tmpFile = self._inData
+            self._iDb.exportDataToFile( self._inData, tmpFile, False )
+            tmpPathFile = self.convCoordsChkToChrFromFileIntoPathFile( tmpFile, self._formatInData, dChunks2CoordMaps )
+            os.remove( tmpFile )
             
         if self._mergeChunkOverlaps:
-            self.mergeCoordsOnChunkOverlaps( dChunks2CoordMaps, tmpPathTable );
-            
-        if self._typeInData == "file":
-            self.saveChrCoordsAsFile( tmpPathTable, self._outData )
-        elif self._typeInData == "table":
-            self.saveChrCoordsAsTable( tmpPathTable, self._outData )
-            
+            mergedPathFile = "%s.merged" % ( tmpPathFile )
+            self.mergeCoordsOnChunkOverlapsInFile( dChunks2CoordMaps, tmpPathFile, mergedPathFile )
+            os.remove( tmpPathFile )
+            tmpPathFile = mergedPathFile
             
+        self.saveChrCoordsFromPathFile( tmpPathFile )
+        
+        
     ## Convert coordinates from chromosomes to chunks
     #
     def convertCoordinatesFromChromosomesToChunks( self ):
@@ -501,6 +616,149 @@ class ConvCoord( object ):
         self.end()
         
         
+# Functions (module level, to be usable by a multiprocessing pool)
+
+# Return True if the lines with the same query name (second field) are contiguous in a Path file
+#
+def _areQueriesContiguous( pathFile ):
+    dSeenQueries = {}
+    previousQuery = None
+    pathFileHandler = open( pathFile, "r" )
+    for line in pathFileHandler:
+        query = line.split("\t")[1]
+        if query != previousQuery:
+            if dSeenQueries.has_key( query ):
+                pathFileHandler.close()
+                return False
+            dSeenQueries[ query ] = True
+            previousQuery = query
+    pathFileHandler.close()
+    return True
+
+
+# Yield the query name and the list of lines of each group of contiguous lines with the same query name in a Path file
+#
+def _iterLinesPerQuery( pathFile ):
+    lLines = []
+    previousQuery = None
+    pathFileHandler = open( pathFile, "r" )
+    for line in pathFileHandler:
+        if line.strip() == "":
+            continue
+        query = line.split("\t")[1]
+        if query != previousQuery and lLines != []:
+            yield previousQuery, lLines
+            lLines = []
+        previousQuery = query
+        lLines.append( line )
+    pathFileHandler.close()
+    if lLines != []:
+        yield previousQuery, lLines
+
+
+# Yield the arguments of _mergePathsOnChunkOverlapsOfQuery for each query of a Path file with contiguous queries
+#
+def _iterMergeArgsPerQuery( pathFile, dQuery2Overlaps, verbose ):
+    for query, lLines in _iterLinesPerQuery( pathFile ):
+        yield query, lLines, dQuery2Overlaps.get( query, [] ), verbose
+
+
+# Yield the results of a function applied by a pool to each item of an iterator, in order,
+# reading the iterator only as the results are consumed (pool.imap reads it all at once)
+#
+def _imapWithBoundedQueue( pool, function, iterArgs, maxPending ):
+    dqPending = collections.deque()
+    for args in iterArgs:
+        dqPending.append( pool.apply_async( function, ( args, ) ) )
+        if len(dqPending) >= maxPending:
+            yield dqPending.popleft().get()
+    while len(dqPending) > 0:
+        yield dqPending.popleft().get()
+
+
+# Merge the Path instances overlapping the chunk overlaps of one query (chromosome)
+#
+# @param args tuple (query name, list of Path lines of this query, list of chunk overlaps (min,max) on this query, verbosity level)
+# @return list of Path lines after the merges
+#
+def _mergePathsOnChunkOverlapsOfQuery( args ):
+    query, lLines, lOverlaps, verbose = args
+    if lOverlaps == []:
+        return lLines
+    iConvCoord = ConvCoord()
+    iConvCoord.setVerbosityLevel( verbose )
+    iConvCoord._tpa = _QueryPathTable( lLines )
+    for minCoord, maxCoord in lOverlaps:
+        iConvCoord.mergePathsOnChunkOverlap( query, minCoord, maxCoord )
+    return iConvCoord._tpa.getLines()
+
+
+# In-memory Path table of one query, with the methods of TablePathAdaptator used to merge the chunk overlaps
+#
+# The rows are indexed by bins of query coordinates and by identifiers.
+# The rows never modified keep their original line.
+#
+class _QueryPathTable( object ):
+    
+    _binSize = 10000
+    
+    def __init__( self, lLines ):
+        self._dKey2Row = {}
+        self._dId2Keys = {}
+        self._dBin2Keys = {}
+        self._nextKey = 0
+        for line in lLines:
+            iPath = Path()
+            iPath.setFromString( line )
+            self._add( iPath, line )
+            
+    def _add( self, iPath, line ):
+        key = self._nextKey
+        self._nextKey += 1
+        minCoord = iPath.getQueryMin()
+        maxCoord = iPath.getQueryMax()
+        self._dKey2Row[ key ] = ( iPath.id, minCoord, maxCoord, line )
+        self._dId2Keys.setdefault( iPath.id, [] ).append( key )
+        for bin in xrange( minCoord / self._binSize, maxCoord / self._binSize + 1 ):
+            self._dBin2Keys.setdefault( bin, [] ).append( key )
+            
+    def getChainListOverlappingQueryCoord( self, query, start, end ):
+        if start > end:
+            start, end = end, start
+        dIds = {}
+        for bin in xrange( start / self._binSize, end / self._binSize + 1 ):
+            for key in self._dBin2Keys.get( bin, [] ):
+                if self._dKey2Row.has_key( key ):
+                    id, minCoord, maxCoord, line = self._dKey2Row[ key ]
+                    if minCoord <= end and maxCoord >= start:
+                        dIds[ id ] = True
+        lKeys = []
+        for id in dIds.keys():
+            lKeys.extend( self._dId2Keys[ id ] )
+        lKeys.sort()
+        lPaths = []
+        for key in lKeys:
+            iPath = Path()
+            iPath.setFromString( self._dKey2Row[ key ][3] )
+            lPaths.append( iPath )
+        return lPaths
+    
+    def deleteFromIdList( self, lIds ):
+        for id in lIds:
+            if self._dId2Keys.has_key( id ):
+                for key in self._dId2Keys[ id ]:
+                    del self._dKey2Row[ key ]
+                del self._dId2Keys[ id ]
+                
+    def insert( self, iPath ):
+        self._add( iPath, "%s\n" % ( iPath.toString() ) )
+        
+    def getLines( self ):
+        lKeys = self._dKey2Row.keys()
+        lKeys.sort()
+        return [ self._dKey2Row[ key ][3] for key in lKeys ]
+    
+    
 if __name__ == "__main__":
     i = ConvCoord()
     i.setAttributesFromCmdLine()
@@ -3,13 +3,15 @@
 """
 Interface to orient sequences before making a multiple alignment.
 Use hashing or suffix tree to get an idea of the appropriate strand.
-Use 'orienter' by default, otherwise use 'mummer'.
+Use 'orienter' by default, otherwise use shared k-mers or 'mummer'.
 """
 
 import sys
 import os
+import re
 import glob
 import getopt
+import string
 
 from pyRepetUnit.commons.seq.BioseqDB import BioseqDB
 import pyRepet.seq.fastaDB
@@ -20,9 +22,13 @@ class OrientSequences( object ):
     """
     Interface to orient sequences before making a multiple alignment.
     Use hashing or suffix tree to get an idea of the appropriate strand.
-    Use 'orienter' by default, otherwise use 'mummer'.
+    Use 'orienter' by default, otherwise use shared k-mers or 'mummer'.
     """
     
+    _complementTable = string.maketrans( "ACGT", "TGCA" )
+    
+    _nonATGCSymbols = re.compile( "[^ACGT]+" )
+    
     
     def __init__( self ):
         """
@@ -31,6 +37,7 @@ class OrientSequences( object ):
         self._inFileName = ""
         self._minMatchLength = 10
         self._prgToOrient = "orienter"
+        self._sketchSize = 1000
         self._outFileName = ""
         self._clean = False
         self._verbose = 1
@@ -46,7 +53,7 @@ class OrientSequences( object ):
         print "     -h: this help"
         print "     -i: name of the input file (format='fasta')"
         print "     -m: minimum match length (default=10)"
-        print "     -p: program to use first (default=orienter/mummer)"
+        print "     -p: program to use first (default=orienter/kmers/mummer)"
         print "     -o: name of the output file (default=inFileName+'.oriented')"
         print "     -c: clean"
         print "     -v: verbosity level (0/default=1/2)"
@@ -86,6 +93,9 @@ class OrientSequences( object ):
     def setPrgToOrient( self, prgToOrient ):
         self._prgToOrient = prgToOrient
         
+    def setSketchSize( self, sketchSize ):
+        self._sketchSize = int(sketchSize)
+        
     def setOutputFileName( self, outFileName ):
         self._outFileName = outFileName
         
@@ -106,7 +116,7 @@ class OrientSequences( object ):
         if not os.path.exists( self._inFileName ):
             print "ERROR: input file '%s' doesn't exist" % ( self._inFileName )
             self.help(); sys.exit(1)
-        if self._prgToOrient not in [ "orienter", "mummer" ]:
+        if self._prgToOrient not in [ "orienter", "kmers", "mummer" ]:
             print "ERROR: unknown program '%s'" % ( self._prgToOrient )
             self.help(); sys.exit(1)
         if self._outFileName == "":
@@ -129,6 +139,72 @@ class OrientSequences( object ):
         return log
     
     
+    def getKmerSample( self, sequence, modulo ):
+        """
+        Return the set of words of length minMatchLength in a sequence, made only of A, T, G or C, and whose hash is a multiple of 'modulo'.
+        As the sampling only depends on the word, the same words are sampled in all the sequences and on both strands.
+        @param sequence: sequence (upper case)
+        @type sequence: string
+        @param modulo: 1 to keep all the words
+        @type modulo: integer
+        """
+        size = self._minMatchLength
+        dWords = set()
+        for segment in self._nonATGCSymbols.split( sequence ):
+            if modulo == 1:
+                dWords.update( [ segment[ i : i + size ] for i in xrange( 0, len(segment) - size + 1 ) ] )
+            else:
+                for i in xrange( 0, len(segment) - size + 1 ):
+                    word = segment[ i : i + size ]
+                    if hash( word ) % modulo == 0:
+                        dWords.add( word )
+        return dWords
+    
+    
+    def compareInputSequencesWithKmers( self, inFileName ):
+        """
+        Count the words shared by each pair of sequences, on the direct and on the reverse strand, without calling an external program.
+        The words of all the sequences are indexed once, and sampled when the sequences are long to keep about 'sketchSize' words per sequence.
+        @param inFileName: name of the fasta file
+        @type inFileName: string
+        @return: dictionary whose keys are pairwise comparisons ('i_vs_j' with i < j) and values are number of shared words on both strands (same as with 'getCumulativeMatchLengthsOnBothStrandForEachPairwiseComparison()')
+        """
+        if self._verbose > 0:
+            print "comparing the words of the input sequences..."
+            sys.stdout.flush()
+        lSequences = [ bs.sequence.upper() for bs in BioseqDB( inFileName ).db ]
+        nbInSeq = len(lSequences)
+        maxLength = max( [ 0 ] + [ len(sequence) for sequence in lSequences ] )
+        modulo = max( 1, maxLength / self._sketchSize )
+        if self._verbose > 1:
+            print "sample 1 word out of %i" % ( modulo )
+            sys.stdout.flush()
+            
+        dMatrix = {}
+        dWord2SeqIndices = {}
+        for i in xrange( nbInSeq, 0, -1 ):
+            # the index only records the sequences after the i-th one
+            dDirectWords = self.getKmerSample( lSequences[i-1], modulo )
+            dReverseWords = self.getKmerSample( lSequences[i-1][::-1].translate( self._complementTable ), modulo )
+            for strand, dWords in [ ( "direct", dDirectWords ), ( "reverse", dReverseWords ) ]:
+                dSeqIndex2NbWords = {}
+                for word in dWords:
+                    for j in dWord2SeqIndices.get( word, () ):
+                        dSeqIndex2NbWords[ j ] = dSeqIndex2NbWords.get( j, 0 ) + 1
+                for j in xrange( i+1, nbInSeq+1 ):
+                    pairComp = "%i_vs_%i" % ( i, j )
+                    if not dMatrix.has_key( pairComp ):
+                        dMatrix[ pairComp ] = {}
+                    dMatrix[ pairComp ][ strand ] = dSeqIndex2NbWords.get( j, 0 )
+            for word in dDirectWords:
+                if dWord2SeqIndices.has_key( word ):
+                    dWord2SeqIndices[ word ].append( i )
+                else:
+                    dWord2SeqIndices[ word ] = [ i ]
+                    
+        return dMatrix
+    
+    
     def compareInputSequencesWithMummer( self, nbInSeq ):
         """
         Launch MUmmer on two single-sequence fasta files to find all maximal matches regardless of their uniqueness and record stdout.
@@ -287,7 +363,7 @@ class OrientSequences( object ):
                 self.end()
                 #TODO: add sys.exit(0) ?
             if exitStatus != 0:
-                print "\nWARNING: 'orienter' had a problem, switch to 'mummer'"
+                print "\nWARNING: 'orienter' had a problem, switch to shared k-mers"
                 sys.stdout.flush()
                 
         lInHeaders = pyRepet.seq.fastaDB.dbHeaders( self._inFileName )
@@ -301,11 +377,14 @@ class OrientSequences( object ):
         lNewHeaders = pyRepet.seq.fastaDB.dbHeaders( tmpFileName )
         dNew2Init = pyRepet.seq.fastaDB.retrieveLinksNewInitialHeaders( "%slink" % ( tmpFileName ) )
         
-        pyRepet.seq.fastaDB.dbSplit( tmpFileName, nbSeqPerBatch=1, newDir=True )
-        os.chdir( "batches" )
-        self.compareInputSequencesWithMummer( nbInSeq )
-        dMatrix = self.getCumulativeMatchLengthsOnBothStrandForEachPairwiseComparison( lNewHeaders, nbInSeq )
-        os.chdir( ".." )
+        if self._prgToOrient == "mummer":
+            pyRepet.seq.fastaDB.dbSplit( tmpFileName, nbSeqPerBatch=1, newDir=True )
+            os.chdir( "batches" )
+            self.compareInputSequencesWithMummer( nbInSeq )
+            dMatrix = self.getCumulativeMatchLengthsOnBothStrandForEachPairwiseComparison( lNewHeaders, nbInSeq )
+            os.chdir( ".." )
+        else:
+            dMatrix = self.compareInputSequencesWithKmers( tmpFileName )
         
         lNewHeadersToReverse = self.getSequencesToReverseFromMatrix( dMatrix, lNewHeaders )
         for newH in lNewHeadersToReverse: